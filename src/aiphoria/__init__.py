@@ -10,7 +10,7 @@ from .core.builder import (
 )
 
 from .core.dataprovider import DataProvider
-from .core.datachecker import DataChecker
+from .core.datachecker import DataChecker, DataCheck
 from .core.datastructures import (
     Scenario,
     ScenarioData,
@@ -18,6 +18,7 @@ from .core.datastructures import (
     Flow,
     Stock,
     Indicator,
+    IndicatorSchema,
 )
 
 from .core.parameters import (
@@ -27,7 +28,7 @@ from .core.parameters import (
 
 from .core.utils import (create_output_directory)
 from .core.logger import log
-from .runner import run_scenarios
+from .runner import run_scenarios, render_plots
 
 __all__ = [
     "core",
@@ -37,14 +38,17 @@ __all__ = [
     "build_datachecker",
     "DataProvider",
     "DataChecker",
+    "DataCheck",
     "Scenario",
     "Process",
     "Flow",
     "Stock",
     "Indicator",
+    "IndicatorSchema",
     "ParameterName",
     "ParameterFillMethod",
     "create_output_directory",
     "log",
     "run_scenarios",
+    "render_plots",
 ]
@@ -8,10 +8,11 @@ from .builder import (
     build_dataprovider,
     build_datachecker,
     build_and_solve_scenarios,
+    solve_scenarios,
 )
 
 from .dataprovider import DataProvider
-from .datachecker import DataChecker
+from .datachecker import DataChecker, DataCheck
 from .datastructures import (
     Scenario,
     ScenarioData,
@@ -19,9 +20,12 @@ from .datastructures import (
     Flow,
     Stock,
     Indicator,
+    IndicatorSchema,
 )
 
 from .flowsolver import FlowSolver
+from .resultstore import ScenarioResults, write_scenario_results, write_results, load_results
+from .plotrenderer import PlotRenderer
 from .parameters import ParameterName, ParameterFillMethod, StockDistributionType
 from .datavisualizer import DataVisualizer
 from .network_graph import NetworkGraph
@@ -36,15 +40,23 @@ __all__ = [
     "build_dataprovider",
     "build_datachecker",
     "build_and_solve_scenarios",
+    "solve_scenarios",
     "DataProvider",
     "DataChecker",
+    "DataCheck",
     "Scenario",
     "ScenarioData",
     "Process",
     "Flow",
     "Stock",
     "Indicator",
+    "IndicatorSchema",
     "FlowSolver",
+    "ScenarioResults",
+    "write_scenario_results",
+    "write_results",
+    "load_results",
+    "PlotRenderer",
     "DataVisualizer",
     "NetworkGraph",
     "ParameterName",
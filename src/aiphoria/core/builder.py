@@ -1,14 +1,19 @@
+import hashlib
+import importlib.metadata
 import os
 import pickle
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
 from typing import Union, List, Dict, Any
+import numpy as np
 from . import logger
 from .logger import log, start_log_perf, stop_log_perf, clear_log_perf, show_log_perf_summary
 from .datachecker import DataChecker
 from .dataprovider import DataProvider
-from .datastructures import Scenario
+from .datastructures import Scenario, ScenarioData, IndicatorSchema, _get_slot_names
 from .flowsolver import FlowSolver
-from .parameters import ParameterName
+from .parameters import ParameterName, execution_only_parameter_names
 from .utils import show_exception_errors, show_model_parameters, build_mfa_system_for_scenario
 
 # Globals
@@ -17,6 +22,9 @@ global_use_cache = False
 global_use_timing = False
 global_clear_cache = False
 
+# Solved baseline ScenarioData in scenario worker process (see _init_scenario_worker)
+global_worker_baseline_scenario_data = None
+
 
 def init_builder(path_to_cache: str,
                  use_cache: bool = False,
@@ -49,43 +57,222 @@ def init_builder(path_to_cache: str,
     logger.use_log_perf = global_use_timing
 
 
+def _get_aiphoria_version() -> str:
+    """
+    Get installed aiphoria version.
+
+    :return: Version string or "unknown" if package metadata is not available
+    """
+    try:
+        return importlib.metadata.version("aiphoria")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _get_canonical_value(value: Any) -> Any:
+    """
+    Get canonical representation of value for cache keys. Canonical value consists only of
+    tuples, strings, numbers, booleans and None so its repr depends only on the content of the value
+    and not on object identities or on how the objects are shared between each other.
+
+    :param value: Value made of builtin types, numpy values and aiphoria objects
+    :return: Canonical value
+    """
+    if isinstance(value, Enum):
+        return value.value
+
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+
+    if isinstance(value, float):
+        return repr(value)
+
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+
+    if isinstance(value, np.generic):
+        return _get_canonical_value(value.item())
+
+    if isinstance(value, np.ndarray):
+        return str(value.dtype), value.shape, _get_canonical_value(value.tolist())
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_get_canonical_value(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted(((_get_canonical_value(key), _get_canonical_value(item)) for key, item in value.items()),
+                            key=repr))
+
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((_get_canonical_value(item) for item in value), key=repr))
+
+    if isinstance(value, IndicatorSchema):
+        return type(value).__name__, value.names, value.units
+
+    slot_names = _get_slot_names(type(value))
+    if slot_names:
+        entries = []
+        for slot_name in slot_names:
+            if hasattr(value, slot_name):
+                entries.append((slot_name, _get_canonical_value(getattr(value, slot_name))))
+        return type(value).__name__, tuple(entries)
+
+    if hasattr(value, "__dict__"):
+        return type(value).__name__, _get_canonical_value(vars(value))
+
+    raise Exception("Unable to create cache key for value of type '{}'".format(type(value).__name__))
+
+
+def get_cache_key(*items: Any) -> str:
+    """
+    Get content hash for items. Items are hashed in canonical form (see _get_canonical_value)
+    and the key always includes aiphoria version so entries made by another version are never used.
+
+    :param items: Values made of builtin types, numpy values and aiphoria objects
+    :return: Hexadecimal SHA-256 digest (str)
+    """
+    hasher = hashlib.sha256(_get_aiphoria_version().encode("utf-8"))
+    for item in items:
+        hasher.update(repr(_get_canonical_value(item)).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def get_settings_file_cache_key(filename: str) -> str:
+    """
+    Get cache key for settings file or data bundle directory.
+    Key changes when any byte of the file changes. For data bundle directories
+    the key changes when any file in the directory is added, removed, renamed or changed.
+
+    :param filename: Target settings filename or path to data bundle directory
+    :return: Cache key (str)
+    """
+    if not os.path.isdir(filename):
+        with open(filename, "rb") as fs:
+            return get_cache_key(fs.read())
+
+    entries = []
+    for root, dirs, files in os.walk(filename):
+        dirs.sort()
+        for name in sorted(files):
+            path_to_file = os.path.join(root, name)
+            with open(path_to_file, "rb") as fs:
+                entries.append((os.path.relpath(path_to_file, filename), fs.read()))
+    return get_cache_key(entries)
+
+
+def _get_effective_model_params(model_params: Dict[str, Any]) -> List[Any]:
+    """
+    Get model parameters that affect the results as sorted list of (name, value)-tuples.
+    Parameters in execution_only_parameter_names (e.g. output path, number of workers and
+    export and plot settings) are excluded so changing those does not invalidate cached entries.
+
+    :param model_params: Dictionary of model parameters
+    :return: List of (parameter name, parameter value)-tuples
+    """
+    return sorted([(_get_canonical_value(name), _get_canonical_value(value))
+                   for name, value in model_params.items() if name not in execution_only_parameter_names],
+                  key=lambda entry: str(entry[0]))
+
+
+def get_baseline_cache_key(datachecker: DataChecker) -> str:
+    """
+    Get cache key for solved baseline Scenario. Key covers the effective model parameters
+    and all the data used for building the baseline scenario but not the scenario definitions,
+    so editing only the alternative scenarios does not invalidate the baseline.
+
+    :param datachecker: DataChecker
+    :return: Cache key (str)
+    """
+    dataprovider = datachecker.get_dataprovider()
+    return get_cache_key(_get_effective_model_params(dataprovider.get_model_params()),
+                         datachecker.get_processes(),
+                         datachecker.get_flows(),
+                         datachecker.get_stocks(),
+                         dataprovider.get_process_positions(),
+                         dataprovider.get_stock_lifetime_overrides())
+
+
+def get_scenario_cache_keys(datachecker: DataChecker) -> List[str]:
+    """
+    Get cache keys for all Scenarios in the same order as DataChecker.build_scenarios returns them.
+    Alternative scenario key depends on the baseline key and the scenario definition.
+
+    :param datachecker: DataChecker
+    :return: List of cache keys (str), first element is the key for baseline Scenario
+    """
+    baseline_key = get_baseline_cache_key(datachecker)
+    scenario_keys = [baseline_key]
+    for scenario_definition in datachecker.get_scenario_definitions():
+        scenario_keys.append(get_cache_key(baseline_key, scenario_definition))
+    return scenario_keys
+
+
+def _get_path_to_cache_entry(prefix: str, key: str) -> str:
+    return os.path.join(global_path_to_cache, "{}_{}.pickle".format(prefix, key))
+
+
+def _read_cache_entry(prefix: str, key: str) -> Any:
+    """
+    Read cached object.
+
+    :param prefix: Cache entry prefix (e.g. "dataprovider")
+    :param key: Cache key
+    :return: Cached object or None if entry does not exist
+    """
+    path_to_entry = _get_path_to_cache_entry(prefix, key)
+    if not os.path.isfile(path_to_entry):
+        return None
+
+    with open(path_to_entry, "rb") as fs:
+        return pickle.load(fs)
+
+
+def _write_cache_entry(prefix: str, key: str, obj: Any) -> None:
+    """
+    Write object to cache. Object is first written to temporary file and then
+    renamed so interrupted runs never leave partial entries in cache.
+
+    :param prefix: Cache entry prefix (e.g. "dataprovider")
+    :param key: Cache key
+    :param obj: Picklable object
+    """
+    os.makedirs(global_path_to_cache, exist_ok=True)
+    path_to_entry = _get_path_to_cache_entry(prefix, key)
+    path_to_temp_entry = "{}.{}.tmp".format(path_to_entry, os.getpid())
+    with open(path_to_temp_entry, "wb") as fs:
+        pickle.dump(obj, fs, pickle.HIGHEST_PROTOCOL)
+    os.replace(path_to_temp_entry, path_to_entry)
+
+
 def build_dataprovider(filename: str, use_cache: Union[bool, None] = None) -> DataProvider:
     """
     Build DataProvider.
-    If use_cache is True then create DataProvider normally, write pickled object to file and read pickled
-    object from cache.
+    If use_cache is True then DataProvider is read from cache if settings file
+    has not changed since the cached DataProvider was created.
 
-    :param filename: Target settings filename
+    :param filename: Target settings filename or path to data bundle directory
     :param use_cache: True to use cached DataProvider object (default: False)
     :return: DataProvider-object
     """
     if use_cache is None:
         use_cache = global_use_cache
 
-    dataprovider = None
+    cache_key = None
     if use_cache:
-        path_to_cached_dataprovider = os.path.join(global_path_to_cache, "dataprovider.pickle")
-
-        if not os.path.exists(path_to_cached_dataprovider):
-            try:
-                dataprovider = DataProvider(filename)
-            except Exception as ex:
-                show_exception_errors(ex, "Following errors occurred when loading settings file:")
-                print("Fatal error, stopping execution...")
-                raise ex
+        cache_key = get_settings_file_cache_key(filename)
+        dataprovider = _read_cache_entry("dataprovider", cache_key)
+        if dataprovider is not None:
+            return dataprovider
+
+    try:
+        dataprovider = DataProvider(filename)
+    except Exception as ex:
+        show_exception_errors(ex, "Following errors occurred when loading settings file:")
+        print("Fatal error, stopping execution...")
+        raise ex
 
-            with open(path_to_cached_dataprovider, "wb") as fs:
-                pickle.dump(dataprovider, fs, pickle.HIGHEST_PROTOCOL)
-
-        with open(path_to_cached_dataprovider, "rb") as fs:
-            dataprovider = pickle.load(fs)
-    else:
-        try:
-            dataprovider = DataProvider(filename)
-        except Exception as ex:
-            show_exception_errors(ex, "Following errors occurred when loading settings file:")
-            print("Fatal error, stopping execution...")
-            raise ex
+    if use_cache:
+        _write_cache_entry("dataprovider", cache_key, dataprovider)
 
     return dataprovider
 
@@ -93,6 +280,8 @@ def build_dataprovider(filename: str, use_cache: Union[bool, None] = None) -> Da
 def build_datachecker(dataprovider: DataProvider = None, use_cache: Union[bool, None] = None) -> DataChecker:
     """
     Build DataChecker.
+    If use_cache is True then DataChecker is read from cache if data and effective
+    model parameters of the DataProvider have not changed.
 
     :param dataprovider: DataProvider
     :param use_cache: True to use cached DataChecker from file (default: False)
@@ -101,26 +290,177 @@ def build_datachecker(dataprovider: DataProvider = None, use_cache: Union[bool,
     if use_cache is None:
         use_cache = global_use_cache
 
-    datachecker = None
-    if use_cache:
-        path_to_cached_datachecker = os.path.join(global_path_to_cache, "datachecker.pickle")
-        if not os.path.exists(path_to_cached_datachecker):
-            datachecker = DataChecker(dataprovider)
+    if not use_cache:
+        return DataChecker(dataprovider)
 
-            with open(path_to_cached_datachecker, "wb") as fs:
-                pickle.dump(datachecker, fs, pickle.HIGHEST_PROTOCOL)
+    cache_key = get_cache_key(_get_effective_model_params(dataprovider.get_model_params()),
+                              dataprovider.get_processes(),
+                              dataprovider.get_flows(),
+                              dataprovider.get_stocks(),
+                              dataprovider.get_scenario_definitions(),
+                              dataprovider.get_color_definitions(),
+                              dataprovider.get_process_positions(),
+                              dataprovider.get_stock_lifetime_overrides())
 
-        with open(path_to_cached_datachecker, "rb") as fs:
-            datachecker = pickle.load(fs)
-    else:
+    datachecker = _read_cache_entry("datachecker", cache_key)
+    if datachecker is None:
         datachecker = DataChecker(dataprovider)
+        _write_cache_entry("datachecker", cache_key, datachecker)
+    else:
+        # Use parameters of the current DataProvider, cached entry might differ in execution-only parameters
+        datachecker.get_dataprovider().get_model_params().update(dataprovider.get_model_params())
 
     return datachecker
 
 
+def solve_alternative_scenario(scenario: Scenario,
+                               baseline_scenario_data: ScenarioData,
+                               reset_evaluated_values: bool = False) -> Scenario:
+    """
+    Solve alternative Scenario using solved ScenarioData from baseline Scenario.
+    This is module level function so that it can be run in worker process.
+
+    :param scenario: Alternative Scenario
+    :param baseline_scenario_data: Solved ScenarioData from baseline scenario FlowSolver
+    :param reset_evaluated_values: True to reset evaluated values of baseline ScenarioData (default: False)
+    :return: Solved Scenario
+    """
+    # Copy solved scenario data from baseline scenario flow solver
+    scenario.copy_from_baseline_scenario_data(baseline_scenario_data)
+
+    # Solve this alternative scenario time steps
+    scenario_flow_solver = FlowSolver(scenario=scenario, reset_evaluated_values=reset_evaluated_values)
+    scenario_flow_solver.solve_timesteps()
+    scenario.flow_solver = scenario_flow_solver
+    return scenario
+
+
+def _init_scenario_worker(baseline_scenario_data: ScenarioData) -> None:
+    """
+    Initialize scenario worker process.
+    Baseline ScenarioData is sent once to each worker process instead of once for every alternative scenario.
+
+    :param baseline_scenario_data: Solved ScenarioData from baseline scenario FlowSolver
+    """
+    globals().update(global_worker_baseline_scenario_data=baseline_scenario_data)
+
+
+def _solve_alternative_scenario_in_worker(scenario: Scenario, reset_evaluated_values: bool = False) -> Scenario:
+    """
+    Solve alternative Scenario in worker process using the baseline ScenarioData of the worker.
+
+    :param scenario: Alternative Scenario
+    :param reset_evaluated_values: True to reset evaluated values of baseline ScenarioData (default: False)
+    :return: Solved Scenario
+    """
+    return solve_alternative_scenario(scenario, global_worker_baseline_scenario_data, reset_evaluated_values)
+
+
+def solve_scenarios(scenarios: List[Scenario],
+                    num_workers: Union[int, None] = None,
+                    reset_evaluated_values: bool = False) -> List[Scenario]:
+    """
+    Solve baseline Scenario and then all alternative Scenarios.
+    Baseline Scenario that already has FlowSolver is considered solved.
+    Alternative scenarios are independent of each other once baseline is solved so those
+    are solved in process pool if num_workers is not 1. Returned list has the same order as scenarios.
+
+    :param scenarios: List of Scenarios, baseline scenario is always the first element
+    :param num_workers: Number of worker processes for alternative scenarios, 0 = number of CPUs.
+        If None then uses the model parameter 'num_scenario_workers' of the baseline scenario.
+    :param reset_evaluated_values: True to reset evaluated values of alternative scenarios (default: False)
+    :return: List of solved Scenarios
+    """
+    if not scenarios:
+        return scenarios
+
+    # NOTE: Baseline scenario is always the first element in the list
+    # and all the alternative scenarios (if any) are after that
+    # Baseline scenario is not solved again if it already has FlowSolver (e.g. when loaded from cache)
+    baseline_scenario = scenarios[0]
+    baseline_flow_solver = baseline_scenario.flow_solver
+    if baseline_flow_solver is None:
+        baseline_flow_solver = FlowSolver(scenario=baseline_scenario)
+        baseline_flow_solver.solve_timesteps()
+        baseline_scenario.flow_solver = baseline_flow_solver
+
+    alternative_scenarios = scenarios[1:]
+    if not alternative_scenarios:
+        return scenarios
+
+    if num_workers is None:
+        num_workers = baseline_scenario.model_params.get(ParameterName.NumScenarioWorkers, 1)
+
+    if num_workers <= 0:
+        num_workers = os.cpu_count()
+
+    num_workers = min(num_workers, len(alternative_scenarios))
+    # Get solved scenario data from baseline scenario flow solver, each alternative
+    # scenario makes its own copy of it (see Scenario.copy_from_baseline_scenario_data)
+    baseline_scenario_data = baseline_flow_solver.get_solved_scenario_data()
+    if num_workers == 1:
+        solved_scenarios = [baseline_scenario]
+        for scenario in alternative_scenarios:
+            solved_scenarios.append(solve_alternative_scenario(scenario, baseline_scenario_data, reset_evaluated_values))
+        return solved_scenarios
+
+    # Solve alternative scenarios in worker processes. Baseline scenario data is passed to the workers
+    # once in initializer so only the unsolved alternative scenario is sent with each task.
+    # NOTE: Each solved Scenario is returned by pickling it back to this process, including its
+    # FlowSolver with the flow and process data for every year and the dynamic stock models, so
+    # the result transfer costs about the size of the solved scenario for every alternative scenario
+    errors = []
+    solved_scenarios = [baseline_scenario]
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             initializer=_init_scenario_worker,
+                             initargs=(baseline_scenario_data,)) as executor:
+        futures = [executor.submit(_solve_alternative_scenario_in_worker, scenario, reset_evaluated_values)
+                   for scenario in alternative_scenarios]
+
+        for scenario, future in zip(alternative_scenarios, futures):
+            try:
+                solved_scenarios.append(future.result())
+            except Exception as ex:
+                errors.append("Scenario '{}': {}".format(scenario.name, ex))
+                solved_scenarios.append(scenario)
+
+    if errors:
+        raise Exception(errors)
+
+    return solved_scenarios
+
+
+def _build_and_check_scenarios(datachecker: DataChecker) -> List[Scenario]:
+    """
+    Build scenarios and check for errors in the built scenarios.
+
+    :param datachecker: DataChecker-object
+    :return: List of unsolved Scenario-objects
+    """
+    try:
+        scenarios = datachecker.build_scenarios()
+    except Exception as ex:
+        show_exception_errors(ex, "Following errors occurred when building scenarios:")
+        print("Fatal error, stopping execution...")
+        raise ex
+
+    # Check for build scenario errors
+    try:
+        datachecker.check_for_errors()
+    except Exception as ex:
+        show_exception_errors(ex, "Following errors found when checking scenario errors:")
+        print("Fatal error, stopping execution...")
+        raise ex
+
+    return scenarios
+
+
 def build_and_solve_scenarios(datachecker: DataChecker = None, use_cache: Union[bool, None] = None) -> List[Scenario]:
     """
     Build and check errors in scenario data and solve scenarios.
+    If use_cache is True then each solved Scenario is cached separately (see get_scenario_cache_keys)
+    and only the Scenarios that are not found from cache are solved. Solved baseline Scenario is reused
+    from cache when only the alternative scenario definitions have changed.
 
     :param datachecker: DataChecker-object
     :param use_cache: True to use cached Scenario-objects (default: False)
@@ -129,117 +469,51 @@ def build_and_solve_scenarios(datachecker: DataChecker = None, use_cache: Union[
     if use_cache is None:
         use_cache = global_use_cache
 
-    scenarios = []
-    if use_cache:
-        # Check for cached scenario files
-        filenames_to_load = []
-        scenario_prefix = "scenario"
-        files_in_cache = os.listdir(global_path_to_cache)
-        for file in files_in_cache:
-            abs_path = os.path.join(global_path_to_cache, file)
-            has_prefix = file.startswith(scenario_prefix)
-            is_file = os.path.isfile(abs_path)
-            if has_prefix and is_file:
-                filenames_to_load.append(abs_path)
-
-        if not filenames_to_load:
-            # No existing scenario data, build scenarios to pickle to files
-            try:
-                scenarios = datachecker.build_scenarios()
-            except Exception as ex:
-                show_exception_errors(ex, "Following errors occurred when building scenarios:")
-                print("Fatal error, stopping execution...")
-                raise ex
-
-            # Check for build scenario errors
-            try:
-                datachecker.check_for_errors()
-            except Exception as ex:
-                show_exception_errors(ex, "Following errors found when checking scenario errors:")
-                print("Fatal error, stopping execution...")
-                raise ex
-
-            # Solve scenarios
-            for scenario_index, scenario in enumerate(scenarios):
-                # NOTE: Baseline scenario is always the first element in the list
-                # and all the alternative scenarios (if any) are after that
-                if scenario_index == 0:
-                    # Process baseline scenario
-                    baseline_flow_solver = FlowSolver(scenario=scenario)
-                    baseline_flow_solver.solve_timesteps()
-                    scenario.flow_solver = baseline_flow_solver
-                else:
-                    # Get and copy solved scenario data from baseline scenario flow solver
-                    baseline_scenario_data = scenarios[0].flow_solver.get_solved_scenario_data()
-                    scenario.copy_from_baseline_scenario_data(baseline_scenario_data)
-
-                    # Solve this alternative scenario time steps
-                    scenario_flow_solver = FlowSolver(scenario=scenario)
-                    scenario_flow_solver.solve_timesteps()
-                    scenario.flow_solver = scenario_flow_solver
-
-            # Build MFA systems for the scenarios
-            for scenario in scenarios:
-                scenario.mfa_system = build_mfa_system_for_scenario(scenario)
-
-            for scenario_index, scenario in enumerate(scenarios):
-                filename = os.path.join(global_path_to_cache, "{}_{}.pickle".format(scenario_prefix, scenario_index))
-                with open(filename, "wb") as fs:
-                    pickle.dump(scenario, fs, pickle.HIGHEST_PROTOCOL)
-
-            # Rescan cache for scenario files
-            filenames_to_load = []
-            files_in_cache = os.listdir(global_path_to_cache)
-            for file in files_in_cache:
-                if file.startswith(scenario_prefix) and os.path.isfile(file):
-                    filenames_to_load.append(os.path.abspath(file))
-            filenames_to_load.sort()
-
-        # Load all scenario files
-        for filename in filenames_to_load:
-            with open(filename, "rb") as fs:
-                scenario = pickle.load(fs)
-                scenarios.append(scenario)
-
-    else:
-        try:
-            scenarios = datachecker.build_scenarios()
-        except Exception as ex:
-            show_exception_errors(ex, "Following errors occurred when building scenarios:")
-            print("Fatal error, stopping execution...")
-            raise ex
-
-        # Check for build scenario errors
-        try:
-            datachecker.check_for_errors()
-        except Exception as ex:
-            show_exception_errors(ex, "Following errors found when checking scenario errors:")
-            print("Fatal error, stopping execution...")
-            raise ex
+    if not use_cache:
+        scenarios = _build_and_check_scenarios(datachecker)
 
         # Solve scenarios
-        for scenario_index, scenario in enumerate(scenarios):
-            # NOTE: Baseline scenario is always the first element in the list
-            # and all the alternative scenarios (if any) are after that
-            if scenario_index == 0:
-                # Process baseline scenario
-                baseline_flow_solver = FlowSolver(scenario=scenario)
-                baseline_flow_solver.solve_timesteps()
-                scenario.flow_solver = baseline_flow_solver
-            else:
-                # Get and copy solved scenario data from baseline scenario flow solver
-                baseline_scenario_data = scenarios[0].flow_solver.get_solved_scenario_data()
-                scenario.copy_from_baseline_scenario_data(baseline_scenario_data)
-
-                # Solve this alternative scenario time steps
-                scenario_flow_solver = FlowSolver(scenario=scenario, reset_evaluated_values=False)
-                scenario_flow_solver.solve_timesteps()
-                scenario.flow_solver = scenario_flow_solver
+        scenarios = solve_scenarios(scenarios)
 
         # Build MFA systems for the scenarios
         for scenario in scenarios:
             scenario.mfa_system = build_mfa_system_for_scenario(scenario)
 
+        return scenarios
+
+    # NOTE: Keys must be calculated before building scenarios
+    # because DataChecker.build_scenarios modifies the data
+    model_params = datachecker.get_dataprovider().get_model_params()
+    scenario_keys = get_scenario_cache_keys(datachecker)
+    cached_scenarios = [_read_cache_entry("scenario", scenario_key) for scenario_key in scenario_keys]
+    for scenario in cached_scenarios:
+        if scenario is not None:
+            # Use parameters of the current run, cached entry might differ in execution-only parameters
+            scenario.model_params.update(model_params)
+
+    if all(scenario is not None for scenario in cached_scenarios):
+        return cached_scenarios
+
+    # Scenarios are always built and checked when anything needs to be solved
+    # so that errors in changed scenario definitions are still reported
+    scenarios = _build_and_check_scenarios(datachecker)
+    if cached_scenarios[0] is not None:
+        log("Using cached baseline scenario")
+        scenarios[0] = cached_scenarios[0]
+
+    # Solve only scenarios that were not found from cache, baseline scenario is
+    # always passed to solve_scenarios because alternative scenarios are solved using its data
+    unsolved_indices = [index for index, scenario in enumerate(cached_scenarios) if scenario is None or index == 0]
+    solved_scenarios = solve_scenarios([scenarios[index] for index in unsolved_indices])
+    for index, scenario in zip(unsolved_indices, solved_scenarios):
+        if cached_scenarios[index] is not None:
+            continue
+
+        # Build MFA system for the scenario
+        scenario.mfa_system = build_mfa_system_for_scenario(scenario)
+        _write_cache_entry("scenario", scenario_keys[index], scenario)
+        scenarios[index] = scenario
+
     return scenarios
 
 
@@ -251,7 +525,7 @@ def build_results(filename: str = None,
     Build and solve scenarios using the settings file.
     Parameters can be overriden by providing dictionary with key as parameter name and value as parameter value.
 
-    :param filename: Path to Excel settings file
+    :param filename: Path to Excel settings file or to data bundle directory (CSV/Parquet tables)
     :param path_to_output_dir: If None then uses the path from settings file
     :param parameter_overrides: Dictionary {parameter name: parameter value}
 
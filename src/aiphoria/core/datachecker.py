@@ -1,16 +1,100 @@
-import copy
-from typing import List, Dict, Tuple, Any
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Any, Callable
 import numpy as np
 import pandas as pd
 from .dataprovider import DataProvider
 from .datastructures import Process, Flow, Stock, ScenarioDefinition, Scenario, ScenarioData, Color, ProcessEntry, \
-    StockLifetimeOverride
+    StockLifetimeOverride, YearTable
 from .parameters import ParameterName, ParameterFillMethod, StockDistributionType, StockDistributionParameter, \
     RequiredStockDistributionParameters, AllowedStockDistributionParameterValues
-from .types import FunctionType, ChangeType
+from .types import FunctionType, ChangeType, DataCheckStage
+
+
+# Messages of the data check running in the current thread (see DataChecker._print_check_message)
+_check_messages = threading.local()
+
+
+class DataCheck(object):
+    """
+    Data check (validation pass) run by DataChecker.
+    Check function gets DataChecker and check data (Dictionary) and returns
+    Tuple (True if no errors (bool), list of errors (list[str])).
+    Condition function gets check data and returns True if the check is needed.
+
+    NOTE: Check functions must only read the data and never modify it, because checks
+    can be skipped (ParameterName.SkipChecks) and are run concurrently in worker threads
+    (ParameterName.NumCheckWorkers). Data conversions belong to DataChecker.build_scenarios.
+    """
+
+    def __init__(self,
+                 name: str,
+                 stage: DataCheckStage,
+                 description: str,
+                 check: Callable[["DataChecker", Dict[str, Any]], Tuple[bool, List[str]]],
+                 condition: Callable[[Dict[str, Any]], bool] = None):
+        self._name = name
+        self._stage = stage
+        self._description = description
+        self._check = check
+        self._condition = condition
+
+    @property
+    def name(self) -> str:
+        """
+        Get check name. Name is used for skipping the check.
+
+        :return: Check name (str)
+        """
+        return self._name
+
+    @property
+    def stage(self) -> DataCheckStage:
+        """
+        Get check stage.
+
+        :return: DataCheckStage
+        """
+        return self._stage
+
+    @property
+    def description(self) -> str:
+        """
+        Get check description that is printed when running the check.
+
+        :return: Description (str)
+        """
+        return self._description
+
+    def is_needed(self, check_data: Dict[str, Any]) -> bool:
+        """
+        Check if the check needs to be run with the check data.
+
+        :param check_data: Dictionary of check data
+        :return: True if check is needed, False otherwise
+        """
+        if self._condition is None:
+            return True
+
+        return self._condition(check_data)
+
+    def run(self, datachecker: "DataChecker", check_data: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """
+        Run check.
+
+        :param datachecker: DataChecker
+        :param check_data: Dictionary of check data
+        :return: Tuple (True if no errors (bool), list of errors (list[str]))
+        """
+        return self._check(datachecker, check_data)
 
 
 class DataChecker(object):
+    # Registered data checks, checks are run and errors are reported in the order of registration
+    _data_checks: List[DataCheck] = []
+
     def __init__(self, dataprovider: DataProvider = None):
         self._dataprovider = dataprovider
         self._processes = self._dataprovider.get_processes()
@@ -22,6 +106,39 @@ class DataChecker(object):
         self._year_start = 0
         self._year_end = 0
         self._years = []
+        self._check_name_to_time = {}
+
+    @classmethod
+    def register_data_check(cls, data_check: DataCheck) -> None:
+        """
+        Register data check. Data check with the same name replaces the existing data check.
+        Check must not modify the data (see DataCheck).
+
+        :param data_check: DataCheck
+        """
+        for index, existing_data_check in enumerate(cls._data_checks):
+            if existing_data_check.name == data_check.name:
+                cls._data_checks[index] = data_check
+                return
+
+        cls._data_checks.append(data_check)
+
+    @classmethod
+    def get_data_check_names(cls) -> List[str]:
+        """
+        Get names of all registered data checks.
+
+        :return: List of check names
+        """
+        return [data_check.name for data_check in cls._data_checks]
+
+    def get_check_timings(self) -> Dict[str, float]:
+        """
+        Get running times of the data checks run by the latest build_scenarios.
+
+        :return: Dictionary (check name -> time in seconds)
+        """
+        return dict(self._check_name_to_time)
 
     def build_scenarios(self) -> List[Scenario]:
         """
@@ -104,181 +221,92 @@ class DataChecker(object):
         # Dictionaries preserve insertion order in Python version >= 3.7
         unique_flow_ids = self._get_unique_flow_ids_in_year_range(flows, self._years)
         unique_process_ids = self._get_unique_process_ids_in_year_range(flows, processes, self._years)
-        df_year_to_flows = self._create_year_to_flow_data(unique_flow_ids, flows, self._years)
+        year_to_flows = self._create_year_to_flow_data(unique_flow_ids, flows, self._years)
 
         # **********************************
         # * Check invalid parameter values *
         # **********************************
 
+        self._check_name_to_time = {}
+        check_data = {
+            "model_params": model_params,
+            "processes": processes,
+            "flows": flows,
+            "stocks": stocks,
+            "years": self._years,
+            "unique_flow_ids": unique_flow_ids,
+            "unique_process_ids": unique_process_ids,
+            "year_to_flows": year_to_flows,
+            "fill_missing_absolute_flows": fill_missing_absolute_flows,
+            "fill_missing_relative_flows": fill_missing_relative_flows,
+            "fill_method": fill_method,
+            "virtual_flows_epsilon": virtual_flows_epsilon,
+            "stock_lifetime_overrides": stock_lifetime_overrides,
+        }
+
+        # Data checks only validate the data so defaults are set also when checks are skipped
+        self._set_default_stock_distribution_types(processes)
+
+        # Run data checks for the data read from the settings file
+        # NOTE: Default data checks are registered at the end of this file
         if check_errors:
-            print("Checking processes for inflow visualization...")
-            process_ids_for_inflow_viz = model_params[ParameterName.VisualizeInflowsToProcesses]
-            ok, errors = self._check_process_ids_for_inflow_visualization(process_ids_for_inflow_viz, unique_process_ids)
-            if not ok:
-                raise Exception(errors)
-
-            # Check that source and target processes for flows are defined
-            # NOTE: This test is currently unreachable with tests because
-            # exception is already thrown in self._get_unique_process_ids_in_year_range(flows, processes, self._years)
-            print("Checking flow source and target processes...")
-            ok, errors = self._check_flow_sources_and_targets(unique_process_ids, df_year_to_flows)
-            if not ok:
-                raise Exception(errors)
-
-            # Check that there is not multiple definitions for the exact same flow per year
-            # Exact means that source and target processes are the same
-            print("Checking multiple flow definitions in the same year...")
-            ok, errors = self._check_flow_multiple_definitions_per_year(unique_flow_ids, flows, self._years)
-            if not ok:
-                raise Exception(errors)
-
-            # Check if stock distribution type and parameters are set and valid
-            print("Checking process stock parameters...")
-            ok, errors = self._check_process_stock_parameters(processes)
-            if not ok:
-                raise Exception(errors)
-
-            # Check if stocks are defined in processes that do not have any inflows and outflows at any year
-            print("Checking stocks in isolated processes...")
-            ok, errors = self._check_stocks_in_isolated_processes(stocks, unique_process_ids)
-            if not ok:
-                raise Exception(errors)
-
-            if fill_missing_absolute_flows or fill_missing_absolute_flows:
-                print("Checking fill method requirements...")
-                ok, errors = self._check_fill_method_requirements(fill_method, df_year_to_flows)
-                if not ok:
-                    raise Exception(errors)
+            self._run_data_checks(DataCheckStage.Input, check_data)
 
         # Create and propagate flow data for missing years
-        df_year_to_flows = self._create_flow_data_for_missing_years(
-            df_year_to_flows,
+        year_to_flows = self._create_flow_data_for_missing_years(
+            year_to_flows,
             fill_missing_absolute_flows=fill_missing_absolute_flows,
             fill_missing_relative_flows=fill_missing_relative_flows,
             fill_method=fill_method
         )
 
         # Create process to flow mappings
-        df_year_to_process_flows = self._create_process_to_flows_entries(unique_process_ids, df_year_to_flows)
+        year_to_process_flows = self._create_process_to_flows_entries(unique_process_ids, year_to_flows)
 
         # NOTE: This is workaround for situation where flow merging removes 0% relative outflow
         # and that causes root process checking to fail
         # Evaluate 0.0 % relative flows as 0.0 absolute flows
-        for year in df_year_to_process_flows.index:
-            for process_id in df_year_to_process_flows.columns:
-                entry: ProcessEntry = df_year_to_process_flows.at[year, process_id]
-                inflows = entry.inflows
-                outflows = entry.outflows
-
-                for flow in inflows:
-                    is_relative_flow = not flow.is_unit_absolute_value
-                    is_zero_flow = flow.value < 0.01
-                    if is_relative_flow and is_zero_flow:
-                        flow.evaluated_value = 0.0
-                        flow.evaluated_share = 0.0
-                        flow.is_evaluated = True
-
-                for flow in outflows:
-                    is_relative_flow = not flow.is_unit_absolute_value
-                    is_zero_flow = flow.value < 0.01
-                    if is_relative_flow and is_zero_flow:
-                        flow.evaluated_value = 0.0
-                        flow.evaluated_share = 0.0
-                        flow.is_evaluated = True
+        flow_values = year_to_flows.get_values("value")
+        is_absolute_flow = year_to_flows.get_values("is_unit_absolute_value", dtype=bool, default_value=True)
+        is_zero_relative_flow = year_to_flows.has_data & ~is_absolute_flow & (flow_values < 0.01)
+        for year_index, flow_index in zip(*np.nonzero(is_zero_relative_flow)):
+            flow = year_to_flows.get_by_index(year_index, flow_index)
+            flow.evaluated_value = 0.0
+            flow.evaluated_share = 0.0
+            flow.is_evaluated = True
 
         print("Merge relative outflows...")
         # NOTE: This is externalized in the future, now go with the hardcoded value
         # min_threshold is value for checking if flow is 100%: any relative flow share greater than min_threshold
         # are considered relative flows with 100% share.
         min_threshold = 99.99
-        df_year_to_process_flows, df_year_to_flows = self._merge_relative_outflows(df_year_to_process_flows,
-                                                                                   df_year_to_flows,
-                                                                                   min_threshold)
+        year_to_process_flows, year_to_flows = self._merge_relative_outflows(year_to_process_flows,
+                                                                             year_to_flows,
+                                                                             min_threshold)
 
         # Remove isolated processes caused by the flow merging
-        df_year_to_process_flows = self._remove_isolated_processes(df_year_to_process_flows)
+        year_to_process_flows = self._remove_isolated_processes(year_to_process_flows)
 
+        # Data checks only validate the data so conversion is done also when checks are skipped
+        self._convert_flow_indicator_conversion_factors(year_to_flows)
+
+        # Run data checks for the built model data
         if check_errors:
-            # Check that root flows have no inflows and only absolute outflows
-            print("Checking root processes...")
-            ok, errors = self._check_root_processes(df_year_to_process_flows)
-            if not ok:
-                raise Exception(errors)
-
-            # Check if process only absolute inflows AND absolute outflows so that
-            # the total inflow matches with the total outflows within certain limit
-            if not model_params[ParameterName.UseVirtualFlows]:
-                print("Checking process total inflows and total outflows mismatches...")
-                ok, errors = self._check_process_inflows_and_outflows_mismatch(df_year_to_process_flows,
-                                                                               epsilon=virtual_flows_epsilon)
-                if not ok:
-                    raise Exception(errors)
-
-            print("Checking relative flow errors...")
-            ok, errors = self._check_relative_flow_errors(df_year_to_flows)
-            if not ok:
-                raise Exception(errors)
-
-            # Check if process has no inflows and only relative outflows:
-            print("Checking processes with no inflows and only relative outflows...")
-            ok, errors = self._check_process_has_no_inflows_and_only_relative_outflows(df_year_to_process_flows)
-            if not ok:
-                raise Exception(errors)
-
-            print("Checking isolated/unconnected processes...")
-            ok, errors = self._check_for_isolated_processes(df_year_to_process_flows)
-            if not ok:
-                raise Exception(errors)
-
-            print("Checking prioritized locations...")
-            ok, errors = self._check_prioritized_locations(self._processes, model_params)
-            if not ok:
-                raise Exception(errors)
-
-            print("Checking prioritized transformation stages...")
-            ok, errors = self._check_prioritized_transformation_stages(self._processes, model_params)
-            if not ok:
-                raise Exception(errors)
-
-            # Check that the sheet ParameterName.SheetNameScenarios exists
-            # and that it has properly defined data (source process ID, target process IDs, etc.)
-            print("Checking scenario definitions...")
-            ok, errors = self._check_scenario_definitions(df_year_to_process_flows)
-            if not ok:
-                raise Exception(errors)
-
-            # Check that colors have both name and valid value
-            print("Checking color definitions...")
-            ok, errors = self._check_color_definitions(self._color_definitions)
-            if not ok:
-                raise Exception(errors)
-
-            print("Checking flow indicators...")
-            ok, errors = self._check_flow_indicators(df_year_to_flows)
-            if not ok:
-                raise Exception(errors)
-
-            if model_params[ParameterName.UseStockLifetimeOverrides]:
-                print("Checking stock lifetime overrides...")
-                ok, errors = self._check_stock_lifetime_overrides(stock_lifetime_overrides)
-                if not ok:
-                    raise Exception(errors)
+            check_data["year_to_flows"] = year_to_flows
+            check_data["year_to_process_flows"] = year_to_process_flows
+            self._run_data_checks(DataCheckStage.Model, check_data)
 
         # *************************************
-        # * Unpack DataFrames to dictionaries *
+        # * Unpack YearTables to dictionaries *
         # *************************************
 
-        # Create mapping of year -> Process ID -> Process by deep copying entry from DataFrame
+        # Create mapping of year -> Process ID -> Process by copying Process from the entry in YearTable.
+        # Entries share the same Process-object between years so every year needs its own copy.
         year_to_process_id_to_process = {}
-        for year in df_year_to_process_flows.index:
+        for year in year_to_process_flows.years:
             year_to_process_id_to_process[year] = {}
-            for process_id in df_year_to_process_flows.columns:
-                entry = df_year_to_process_flows.at[year, process_id]
-                if pd.isna(entry):
-                    continue
-
-                new_entry = copy.deepcopy(entry)
-                process = new_entry.process
+            for process_id, entry in year_to_process_flows.get_year_items(year):
+                process = entry.process.create_copy()
 
                 # Update process position
                 if year in year_to_process_id_to_position:
@@ -292,29 +320,22 @@ class DataChecker(object):
 
         # Create mapping of year -> Process ID -> List of incoming Flow IDs and list of outgoing Flow IDs
         year_to_process_id_to_flow_ids = {}
-        for year in df_year_to_process_flows.index:
+        for year in year_to_process_flows.years:
             year_to_process_id_to_flow_ids[year] = {}
-            for process_id in df_year_to_process_flows.columns:
-                entry = df_year_to_process_flows.at[year, process_id]
-                if pd.isna(entry):
-                    continue
-
-                new_entry: ProcessEntry = copy.deepcopy(entry)
+            for process_id, entry in year_to_process_flows.get_year_items(year):
                 inflow_ids = [flow.id for flow in entry.inflows]
                 outflow_ids = [flow.id for flow in entry.outflows]
                 year_to_process_id_to_flow_ids[year][process_id] = {"in": inflow_ids, "out": outflow_ids}
 
-        # Create mapping of year -> Flow ID -> Flow by deep copying entry from DataFrame
+        # Create mapping of year -> Flow ID -> Flow by copying entry from YearTable.
+        # Years filled from other years share the Flow so year is set for the copy.
         year_to_flow_id_to_flow = {}
-        for year in df_year_to_flows.index:
+        for year in year_to_flows.years:
             year_to_flow_id_to_flow[year] = {}
-            for flow_id in df_year_to_flows.columns:
-                entry = df_year_to_flows.at[year, flow_id]
-                if pd.isna(entry):
-                    continue
-
-                new_entry = copy.deepcopy(df_year_to_flows.at[year, flow_id])
-                year_to_flow_id_to_flow[year][flow_id] = new_entry
+            for flow_id, flow in year_to_flows.get_year_items(year):
+                new_flow = flow.create_copy()
+                new_flow.year = year
+                year_to_flow_id_to_flow[year][flow_id] = new_flow
 
         # Process ID to stock mapping
         process_id_to_stock = {}
@@ -325,8 +346,9 @@ class DataChecker(object):
         # Copy Indicator mappings from first unique Flow (Indicator ID -> Indicator)
         # and set indicator conversion factors to default values.
         # NOTE: Virtual flows creation uses directly these default values
+        # NOTE: Flow creates new Indicator-objects every time so no need to copy them
         first_unique_flow = unique_flow_ids[list(unique_flow_ids.keys())[0]]
-        indicator_name_to_indicator = copy.deepcopy(first_unique_flow.indicator_name_to_indicator)
+        indicator_name_to_indicator = first_unique_flow.indicator_name_to_indicator
         for name, indicator in indicator_name_to_indicator.items():
             indicator.conversion_factor = 1.0
 
@@ -373,6 +395,101 @@ class DataChecker(object):
 
         return scenarios
 
+    @staticmethod
+    def _print_check_message(message: str) -> None:
+        """
+        Print message from data check. Messages are collected while the check is running
+        and printed by _run_data_checks after the check has finished.
+
+        :param message: Message (str)
+        """
+        messages = getattr(_check_messages, "messages", None)
+        if messages is None:
+            print(message)
+            return
+
+        messages.append(message)
+
+    def _run_data_checks(self, stage: DataCheckStage, check_data: Dict[str, Any]) -> None:
+        """
+        Run all registered data checks for the stage that are not skipped.
+        Checks are independent of each other so all checks are run and errors
+        from all failed checks are raised at once. Exception raised by check is
+        reported as error prefixed with the check name.
+        Checks are run in worker threads if parameter ParameterName.NumCheckWorkers is not 1.
+
+        :param stage: DataCheckStage
+        :param check_data: Dictionary of check data
+        :raises Exception: Exception containing errors from all failed checks
+        """
+        model_params = check_data["model_params"]
+        skip_check_names = model_params.get(ParameterName.SkipChecks, [])
+        num_workers = model_params.get(ParameterName.NumCheckWorkers, 1)
+
+        # Check that all skipped checks exist
+        valid_check_names = self.get_data_check_names()
+        errors = []
+        for check_name in skip_check_names:
+            if check_name not in valid_check_names:
+                s = "Unknown data check '{}' in parameter '{}'. Valid data checks are: {}".format(
+                    check_name, ParameterName.SkipChecks.value, ", ".join(valid_check_names))
+                errors.append(s)
+
+        if errors:
+            raise Exception(errors)
+
+        data_checks = []
+        for data_check in self._data_checks:
+            if data_check.stage != stage:
+                continue
+
+            if data_check.name in skip_check_names:
+                print("Skipping data check '{}'".format(data_check.name))
+                continue
+
+            if not data_check.is_needed(check_data):
+                continue
+
+            data_checks.append(data_check)
+
+        def run_data_check(data_check: DataCheck) -> Tuple[bool, List[str], List[str], float]:
+            # Exception from check is reported as error so that errors from other checks are not lost
+            _check_messages.messages = [data_check.description]
+            time_start = time.perf_counter()
+            try:
+                ok, check_errors = data_check.run(self, check_data)
+            except Exception as ex:
+                ok = False
+                ex_errors = ex.args[0] if ex.args and isinstance(ex.args[0], list) else [str(ex)]
+                check_errors = ["Data check '{}' failed: {}".format(data_check.name, error) for error in ex_errors]
+            finally:
+                messages = _check_messages.messages
+                _check_messages.messages = None
+            return ok, check_errors, messages, time.perf_counter() - time_start
+
+        if num_workers <= 0:
+            num_workers = os.cpu_count()
+
+        num_workers = max(min(num_workers, len(data_checks)), 1)
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            if num_workers == 1:
+                results = map(run_data_check, data_checks)
+            else:
+                results = executor.map(run_data_check, data_checks)
+
+            # Messages are printed and errors are reported in the order of registered checks
+            # from this thread so that the output from concurrent checks does not interleave
+            for data_check, (ok, check_errors, messages, check_time) in zip(data_checks, results):
+                for message in messages:
+                    print(message)
+
+                self._check_name_to_time[data_check.name] = check_time
+                if not ok:
+                    errors.extend(check_errors)
+
+        if errors:
+            raise Exception(errors)
+
     def check_processes_integrity(self):
         # Check that there is only processes with unique ids
         errors = []
@@ -452,27 +569,23 @@ class DataChecker(object):
 
         return result, messages
 
-    def _check_for_isolated_processes(self, df_year_to_process_to_flows: pd.DataFrame) -> Tuple[bool, List[str]]:
+    def _check_for_isolated_processes(self, year_to_process_flows: YearTable) -> Tuple[bool, List[str]]:
         """
         Check for isolated Processes (= processes that have no inflows and no outflows) in any year.
         This is most likely error in data.
 
+        :param year_to_process_flows: YearTable (year to Process ID to ProcessEntry)
         :return: Tuple (has errors (bool), list of errors (list[str]))
         """
         errors = []
-        for process_id in df_year_to_process_to_flows.columns:
-            flow_data = df_year_to_process_to_flows[[process_id]]
-            has_inflows = False
-            has_outflows = False
-            for year in flow_data.index:
-                entry: ProcessEntry = flow_data.at[year, process_id]
-                if entry is pd.NA:
-                    continue
-
-                has_inflows = has_inflows or len(entry.inflows) > 0
-                has_inflows = has_inflows or len(entry.outflows) > 0
-
-            if (not has_inflows) and (not has_outflows):
+        for process_id in year_to_process_flows.ids:
+            has_flows = False
+            for year, entry in year_to_process_flows.get_id_items(process_id):
+                if entry.inflows or entry.outflows:
+                    has_flows = True
+                    break
+
+            if not has_flows:
                 errors.append("ERROR: Found isolated Process '{}', no inflows and no outflows at any year".format(
                     process_id))
 
@@ -551,6 +664,12 @@ class DataChecker(object):
     def get_stocks(self) -> List[Stock]:
         return self._stocks
 
+    def get_scenario_definitions(self) -> List[ScenarioDefinition]:
+        return self._scenario_definitions
+
+    def get_dataprovider(self) -> DataProvider:
+        return self._dataprovider
+
     def get_start_year(self) -> int:
         return self._year_start
 
@@ -652,31 +771,26 @@ class DataChecker(object):
 
     def _check_flow_sources_and_targets(self,
                                         unique_process_ids: dict[str, Process],
-                                        df_year_to_flows: pd.DataFrame) -> [bool, List[str]]:
+                                        year_to_flows: YearTable) -> [bool, List[str]]:
         """
         Check that all Flow sources and target Processes exists.
 
         :param unique_process_ids:
-        :param df_year_to_flows: DataFrame
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
         :return: Tuple (True, list of errors)
         """
         errors = []
         sheet_name_flows = self._dataprovider.sheet_name_flows
-        for year in df_year_to_flows.index:
-            for flow_id in df_year_to_flows.columns:
-                flow = df_year_to_flows.at[year, flow_id]
-                if pd.isnull(flow):
-                    continue
-
-                if flow.source_process_id not in unique_process_ids:
-                    s = "No source process {} for flow {} (row number {}) in year {} (in Excel sheet {}) ".format(
-                        flow.source_process_id, flow_id, flow.row_number, year, sheet_name_flows)
-                    errors.append(s)
+        for year, flow_id, flow in year_to_flows.items():
+            if flow.source_process_id not in unique_process_ids:
+                s = "No source process {} for flow {} (row number {}) in year {} (in Excel sheet {}) ".format(
+                    flow.source_process_id, flow_id, flow.row_number, year, sheet_name_flows)
+                errors.append(s)
 
-                if flow.target_process_id not in unique_process_ids:
-                    s = "No target process {} for flow {} (row number {}) in year {} (sheet {})".format(
-                        flow.target_process_id, flow_id, flow.row_number, year, sheet_name_flows)
-                    errors.append(s)
+            if flow.target_process_id not in unique_process_ids:
+                s = "No target process {} for flow {} (row number {}) in year {} (sheet {})".format(
+                    flow.target_process_id, flow_id, flow.row_number, year, sheet_name_flows)
+                errors.append(s)
 
         return not errors, errors
 
@@ -771,24 +885,24 @@ class DataChecker(object):
     def _create_year_to_flow_data(self,
                                   unique_flow_ids: dict[str, Flow],
                                   flows: list[Flow],
-                                  years: list[int]) -> pd.DataFrame:
+                                  years: list[int]) -> YearTable:
         """
-        Create DataFrame that has year as index and Flow IDs as column and cell is Flow-object.
+        Create YearTable that has years as rows, Flow IDs as columns and Flow-objects as cells.
 
         :param unique_flow_ids: Dictionary of unique [Flow ID -> Flow]
         :param flows: List of Flows
         :param years: list of years
-        :return: DataFrame
+        :return: YearTable
         """
 
-        df = pd.DataFrame(index=years, columns=unique_flow_ids.keys())
+        year_to_flows = YearTable(years, list(unique_flow_ids.keys()))
         for flow in flows:
-            if flow.year not in years:
+            if not year_to_flows.has_year(flow.year):
                 continue
 
-            df.at[flow.year, flow.id] = flow
+            year_to_flows.set(flow.year, flow.id, flow)
 
-        return df
+        return year_to_flows
 
     def _check_flow_multiple_definitions_per_year(self,
                                                   unique_flow_ids: Dict[str, Flow],
@@ -805,208 +919,208 @@ class DataChecker(object):
         """
         errors = []
         sheet_name_flows = self._dataprovider.sheet_name_flows
-        df = pd.DataFrame(index=years, columns=list(unique_flow_ids.keys()))
+        year_to_flow_definitions = YearTable(years, list(unique_flow_ids.keys()))
         for flow in flows:
-            if flow.year not in years:
+            if not year_to_flow_definitions.has_year(flow.year):
                 continue
 
-            if flow.year > max(years):
-                continue
-
-            if pd.isnull(df.at[flow.year, flow.id]):
-                df.at[flow.year, flow.id] = []
-            df.at[flow.year, flow.id].append(flow)
-
-        for year in df.index:
-            for flow_id in df.columns:
-                existing_flows = df.at[year, flow_id]
-                if type(existing_flows) != list:
-                    continue
+            existing_flows = year_to_flow_definitions.get(flow.year, flow.id)
+            if existing_flows is None:
+                existing_flows = []
+                year_to_flow_definitions.set(flow.year, flow.id, existing_flows)
+            existing_flows.append(flow)
+
+        for year, flow_id, existing_flows in year_to_flow_definitions.items():
+            if len(existing_flows) > 1:
+                target_flow = existing_flows[0]
+                s = "Multiple definitions for the same flow '{}' in year {} in sheet named '{}':".format(
+                    target_flow.id, target_flow.year, sheet_name_flows)
+                errors.append(s)
 
-                if len(existing_flows) > 1:
-                    target_flow = existing_flows[0]
-                    s = "Multiple definitions for the same flow '{}' in year {} in sheet named '{}':".format(
-                        target_flow.id, target_flow.year, sheet_name_flows)
+                for duplicate_flow in existing_flows:
+                    s = "- in row {}".format(duplicate_flow.row_number)
                     errors.append(s)
 
-                    for duplicate_flow in existing_flows:
-                        s = "- in row {}".format(duplicate_flow.row_number)
-                        errors.append(s)
-
         return not errors, errors
 
-    def _check_root_processes(self, df_year_to_process_flows: pd.DataFrame):
+    def _check_root_processes(self, year_to_process_flows: YearTable):
         """
         Check root processes.
         Root processes do not have inflows and have only absolute outflows.
 
-        :param df_year_to_process_flows: DataFrame
+        :param year_to_process_flows: YearTable (year to Process ID to ProcessEntry)
         :return: Tuple (has errors (bool), list of errors (list[str]))
         """
 
         errors = []
-        for year in df_year_to_process_flows.index:
-            for process_id in df_year_to_process_flows.columns:
-                entry: ProcessEntry = df_year_to_process_flows.at[year, process_id]
+        for year, process_id, entry in year_to_process_flows.items():
+            process = entry.process
+            inflows = entry.inflows
+            outflows = entry.outflows
 
-                # Skip NA entries
-                if pd.isna(entry):
-                    continue
-
-                process = entry.process
-                inflows = entry.inflows
-                outflows = entry.outflows
-
-                if len(inflows) > 0:
-                    continue
+            if len(inflows) > 0:
+                continue
 
-                abs_outflows = []
-                rel_outflows = []
-                for flow in outflows:
-                    if flow.is_unit_absolute_value:
-                        abs_outflows.append(flow)
-                    else:
-                        rel_outflows.append(flow)
+            abs_outflows = []
+            rel_outflows = []
+            for flow in outflows:
+                if flow.is_unit_absolute_value:
+                    abs_outflows.append(flow)
+                else:
+                    rel_outflows.append(flow)
 
-                num_abs_outflows = len(abs_outflows)
-                num_rel_outflows = len(rel_outflows)
-                no_outflows = (num_abs_outflows == 0) and (num_rel_outflows == 0)
+            num_abs_outflows = len(abs_outflows)
+            num_rel_outflows = len(rel_outflows)
+            no_outflows = (num_abs_outflows == 0) and (num_rel_outflows == 0)
 
-                # NOTE: This is workaround for situation where flow merging removes 0% relative outflow
-                # and that causes root process checking to fail
-                is_outflows_evaluated = np.all([flow.is_evaluated for flow in rel_outflows])
+            # NOTE: This is workaround for situation where flow merging removes 0% relative outflow
+            # and that causes root process checking to fail
+            is_outflows_evaluated = np.all([flow.is_evaluated for flow in rel_outflows])
 
-                if no_outflows:
-                    # Error: Root process does not have any outflows
-                    msg = "{}: Root process '{}' has no inflows and outflows".format(year, process)
-                    errors.append(msg)
+            if no_outflows:
+                # Error: Root process does not have any outflows
+                msg = "{}: Root process '{}' has no inflows and outflows".format(year, process)
+                errors.append(msg)
 
-                if num_rel_outflows > 0 and not is_outflows_evaluated:
-                    # Error: root process can have only absolute outflows
-                    msg = "{}: Root process '{}' has only relative outflows".format(year, process)
-                    errors.append(msg)
+            if num_rel_outflows > 0 and not is_outflows_evaluated:
+                # Error: root process can have only absolute outflows
+                msg = "{}: Root process '{}' has only relative outflows".format(year, process)
+                errors.append(msg)
 
         return not errors, errors
 
     def _check_process_inflows_and_outflows_mismatch(self,
-                                                     df_process_to_flows: pd.DataFrame,
+                                                     year_to_process_flows: YearTable,
                                                      epsilon: float = 0.1) -> Tuple[bool, List[str]]:
 
         errors = []
         sheet_name_flows = self._dataprovider.sheet_name_flows
-        for year in df_process_to_flows.index:
-            for process_id in df_process_to_flows.columns:
-                entry: ProcessEntry = df_process_to_flows.at[year, process_id]
-                inflows = entry.inflows
-                outflows = entry.outflows
-
-                if not inflows:
-                    continue
-
-                if not outflows:
-                    continue
-
-                is_all_inflows_absolute = all([flow.is_unit_absolute_value for flow in inflows])
-                is_all_outflows_absolute = all([flow.is_unit_absolute_value for flow in outflows])
-                if is_all_inflows_absolute and is_all_outflows_absolute:
-                    inflows_total = np.sum([flow.value for flow in inflows])
-                    outflows_total = np.sum([flow.value for flow in outflows])
-                    diff_abs = np.abs(inflows_total) - np.abs(outflows_total)
-                    if diff_abs > epsilon:
-                        s = "Total inflows and total outflows for process '{}' does not match.".format(process_id)
-                        errors.append(s)
-
-                        s = "Absolute difference of total inflows and total outflows was {}".format(diff_abs)
-                        errors.append(s)
+        for year, process_id, entry in year_to_process_flows.items():
+            inflows = entry.inflows
+            outflows = entry.outflows
 
-                        s = "Check following inflows in Excel sheet '{}':".format(sheet_name_flows)
-                        errors.append(s)
-                        for flow in inflows:
-                            s = "- flow '{}' in row {}".format(flow.id, flow.row_number)
-                            errors.append(s)
-
-                        errors.append("Check following outflows:")
-                        for flow in outflows:
-                            s = "- flow '{}' in row {}".format(flow.id, flow.row_number)
-                            errors.append(s)
+            if not inflows:
+                continue
 
-                        s = ""
-                        errors.append(s)
+            if not outflows:
+                continue
 
-                # Check if process has more outflows than inflows
-                inflows_abs = [flow for flow in inflows if flow.is_unit_absolute_value]
-                outflows_abs = [flow for flow in outflows if flow.is_unit_absolute_value]
-                inflows_total_abs = np.sum([flow.value for flow in inflows_abs if flow.is_unit_absolute_value])
-                outflows_total_abs = np.sum([flow.value for flow in outflows_abs if flow.is_unit_absolute_value])
-                if outflows_total_abs > inflows_total_abs:
-                    s = "Total outflows are greater than total inflows for process '{}'".format(process_id)
+            is_all_inflows_absolute = all([flow.is_unit_absolute_value for flow in inflows])
+            is_all_outflows_absolute = all([flow.is_unit_absolute_value for flow in outflows])
+            if is_all_inflows_absolute and is_all_outflows_absolute:
+                inflows_total = np.sum([flow.value for flow in inflows])
+                outflows_total = np.sum([flow.value for flow in outflows])
+                diff_abs = np.abs(inflows_total) - np.abs(outflows_total)
+                if diff_abs > epsilon:
+                    s = "Total inflows and total outflows for process '{}' does not match.".format(process_id)
                     errors.append(s)
 
-                    s = "Year {}, total absolute inflows={}, total absolute outflows={}".format(
-                        year, inflows_total_abs, outflows_total_abs)
+                    s = "Absolute difference of total inflows and total outflows was {}".format(diff_abs)
                     errors.append(s)
 
                     s = "Check following inflows in Excel sheet '{}':".format(sheet_name_flows)
                     errors.append(s)
-                    for flow in inflows_abs:
-                        s = "- flow '{}' in row {} (value: {})".format(flow.id, flow.row_number, flow.value)
+                    for flow in inflows:
+                        s = "- flow '{}' in row {}".format(flow.id, flow.row_number)
                         errors.append(s)
 
                     errors.append("Check following outflows:")
-                    for flow in outflows_abs:
-                        s = "- flow '{}' in row {} (value: {})".format(flow.id, flow.row_number, flow.value)
+                    for flow in outflows:
+                        s = "- flow '{}' in row {}".format(flow.id, flow.row_number)
                         errors.append(s)
 
                     s = ""
                     errors.append(s)
 
+            # Check if process has more outflows than inflows
+            inflows_abs = [flow for flow in inflows if flow.is_unit_absolute_value]
+            outflows_abs = [flow for flow in outflows if flow.is_unit_absolute_value]
+            inflows_total_abs = np.sum([flow.value for flow in inflows_abs if flow.is_unit_absolute_value])
+            outflows_total_abs = np.sum([flow.value for flow in outflows_abs if flow.is_unit_absolute_value])
+            if outflows_total_abs > inflows_total_abs:
+                s = "Total outflows are greater than total inflows for process '{}'".format(process_id)
+                errors.append(s)
+
+                s = "Year {}, total absolute inflows={}, total absolute outflows={}".format(
+                    year, inflows_total_abs, outflows_total_abs)
+                errors.append(s)
+
+                s = "Check following inflows in Excel sheet '{}':".format(sheet_name_flows)
+                errors.append(s)
+                for flow in inflows_abs:
+                    s = "- flow '{}' in row {} (value: {})".format(flow.id, flow.row_number, flow.value)
+                    errors.append(s)
+
+                errors.append("Check following outflows:")
+                for flow in outflows_abs:
+                    s = "- flow '{}' in row {} (value: {})".format(flow.id, flow.row_number, flow.value)
+                    errors.append(s)
+
+                s = ""
+                errors.append(s)
+
         return not errors, errors
 
-    def _check_relative_flow_errors(self, df_year_to_flows: pd.DataFrame, epsilon: float = 0.01) -> Tuple[bool, List[str]]:
+    def _check_relative_flow_errors(self, year_to_flows: YearTable, epsilon: float = 0.01) -> Tuple[bool, List[str]]:
         """
         Check that relative flows do not go over 100%.
         Default epsilon is 0.01.
 
-        :param df_year_to_flows: DataFrame
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
         :param epsilon: Maximum allowed difference when checking if total outflows > 100.0
         :return: Tuple (bool, list of errors)
         """
         errors = []
-        for flow_id in df_year_to_flows.columns:
-            flow_data = df_year_to_flows[flow_id]
-            for year, flow in flow_data.items():
-                # NOTE: NEW, allow making "holes" to DataFrame
-                if not isinstance(flow, Flow):
-                    continue
-
-                if flow.is_unit_absolute_value:
-                    continue
-
-                if flow.value < 0.0:
-                    s = "Flow {} has value less than 0% for year {} in row {} in sheet '{}'".format(
-                        flow.id, flow.year, flow.row_number, self._dataprovider.sheet_name_flows
-                    )
-                    errors.append(s)
-                    return not errors, errors
-
-                if flow.value > 100.0:
-                    s = "Flow {} has value over 100% for year {} in row {} in sheet '{}'".format(
-                        flow.id, flow.year, flow.row_number, self._dataprovider.sheet_name_flows
-                    )
-                    errors.append(s)
-                    return not errors, errors
+        flow_values = year_to_flows.get_values("value")
+        is_absolute_flow = year_to_flows.get_values("is_unit_absolute_value", dtype=bool, default_value=True)
+        is_relative_flow = year_to_flows.has_data & ~is_absolute_flow
+
+        # Flows are checked in Flow ID order and only the first invalid flow is reported
+        is_invalid_flow = is_relative_flow & ((flow_values < 0.0) | (flow_values > 100.0))
+        if np.any(is_invalid_flow):
+            flow_index, year_index = np.argwhere(is_invalid_flow.T)[0]
+            flow = year_to_flows.get_by_index(year_index, flow_index)
+            year = year_to_flows.years[year_index]
+            if flow.value < 0.0:
+                s = "Flow {} has value less than 0% for year {} in row {} in sheet '{}'".format(
+                    flow.id, year, flow.row_number, self._dataprovider.sheet_name_flows
+                )
+            else:
+                s = "Flow {} has value over 100% for year {} in row {} in sheet '{}'".format(
+                    flow.id, year, flow.row_number, self._dataprovider.sheet_name_flows
+                )
+            errors.append(s)
+            return not errors, errors
 
         # Check if total relative outflows from process are >100%
-        for year in df_year_to_flows.index:
-            process_id_to_rel_outflows = {}
-            for flow_id in df_year_to_flows.columns:
-                flow = df_year_to_flows.at[year, flow_id]
-                # NOTE: NEW, allow making "holes" to DataFrame
-                if not isinstance(flow, Flow):
-                    continue
+        # Flow ID is built from the source and target Process IDs so all Flows
+        # in the same column have the same source Process
+        source_process_id_to_index = {}
+        flow_index_to_source_index = np.zeros(len(year_to_flows.ids), dtype=np.int64)
+        for flow_index, flow_id in enumerate(year_to_flows.ids):
+            year_indices = np.flatnonzero(year_to_flows.has_data[:, flow_index])
+            if not len(year_indices):
+                continue
 
-                if flow.is_unit_absolute_value:
-                    continue
+            flow = year_to_flows.get_by_index(year_indices[0], flow_index)
+            source_index = source_process_id_to_index.setdefault(flow.source_process_id,
+                                                                 len(source_process_id_to_index))
+            flow_index_to_source_index[flow_index] = source_index
+
+        # Find years that have candidates for total relative outflows over 100% and check only those years
+        # NOTE: Totals are only used for finding the candidates, totals in error messages are calculated
+        # NOTE: in the same order as flows are defined
+        year_indices, flow_indices = np.nonzero(is_relative_flow)
+        source_totals = np.zeros((len(year_to_flows.years), len(source_process_id_to_index)))
+        np.add.at(source_totals, (year_indices, flow_index_to_source_index[flow_indices]),
+                  flow_values[year_indices, flow_indices])
+        candidate_year_indices = np.flatnonzero(np.any(source_totals > 100.0 + epsilon - 1e-6, axis=1))
+
+        for year_index in candidate_year_indices:
+            year = year_to_flows.years[year_index]
+            process_id_to_rel_outflows = {}
+            for flow_index in np.flatnonzero(is_relative_flow[year_index]):
+                flow = year_to_flows.get_by_index(year_index, flow_index)
 
                 # Gather relative outflows to source process ID
                 outflows = process_id_to_rel_outflows.get(flow.source_process_id, [])
@@ -1027,24 +1141,23 @@ class DataChecker(object):
                     s = "Check following flows:"
                     errors.append(s)
                     for flow in outflows:
+                        # Years filled from other years share the Flow
+                        if flow.year != year:
+                            flow = flow.create_copy()
+                            flow.year = year
+
                         s = "\t{} (row {})".format(flow, flow.row_number)
                         errors.append(s)
                     errors.append("")
 
         return not errors, errors
 
-    def _create_flow_id_has_data_mapping(self, df_flows) -> pd.DataFrame:
-        df = df_flows.copy()
-        for flow_id in df.columns:
-            df[flow_id] = np.where(pd.isnull(df[flow_id]), False, True)
-        return df
-
     def _create_flow_data_for_missing_years(self,
-                                            df_year_flows: pd.DataFrame,
+                                            year_to_flows: YearTable,
                                             fill_missing_absolute_flows: bool,
                                             fill_missing_relative_flows: bool,
                                             fill_method: str = ParameterFillMethod.Zeros
-                                            ) -> pd.DataFrame:
+                                            ) -> YearTable:
         """
         Fill years missing Flow data with the previous valid Flow data.
         If fill_absolute_flows is set to True then process Flows with absolute values.
@@ -1052,210 +1165,153 @@ class DataChecker(object):
         If both fill_absolute_flows and fill_relative_flows are set to False then returns copy
         of the original.
 
-        :param df_year_flows: DataFrame
+        Filling is done for all Flow IDs at once using the years x Flow IDs value matrix
+        and the existence mask. Filled years reference the Flow that the year is filled from
+        (Zeros, Previous and Next) so the Flow for the year is created only when building
+        the scenario data. Interpolated years get new Flow with the interpolated value.
+
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
         :param fill_missing_absolute_flows: If True then process Flows with absolute values
         :param fill_missing_relative_flows: If True then process Flows with relative values
-        :return: DataFrame
+        :return: YearTable
         """
-        # No filling, convert nan in DataFrame to None
+        result = year_to_flows.copy()
+
+        # No filling
         if (not fill_missing_absolute_flows) and (not fill_missing_relative_flows):
-            result = df_year_flows.copy()
             return result
 
-        # Create flow has data as boolean mapping
-        df_flow_id_has_data = df_year_flows.copy()
-        for flow_id in df_flow_id_has_data.columns:
-            df_flow_id_has_data[flow_id] = np.where(pd.isnull(df_flow_id_has_data[flow_id]), False, True)
-
-        # Find earliest and latest year of Flow data for each Flow ID
-        flow_id_to_min_year = {flow_id: max(df_year_flows.index) for flow_id in df_year_flows}
-        flow_id_to_max_year = {flow_id: min(df_year_flows.index) for flow_id in df_year_flows}
-        for flow_id in df_year_flows.columns:
-            for year, has_flow_data in df_year_flows[flow_id].items():
-                if pd.notna(has_flow_data):
-                    if year < flow_id_to_min_year[flow_id]:
-                        flow_id_to_min_year[flow_id] = year
-                    if year > flow_id_to_max_year[flow_id]:
-                        flow_id_to_max_year[flow_id] = year
-
-        # Find gaps flow data columns and set values according to fill_method
-        for flow_id in df_year_flows.columns:
-            flow_data = df_year_flows[flow_id]
-            flow_has_data = df_flow_id_has_data[flow_id]
-
-            # NOTE: Now checks the flow type on from the first occurrence of flow data and assume that the flow type
-            # NOTE: does not change during the years
-            first_valid_flow = flow_data[flow_id_to_min_year[flow_id]]
-            is_abs_flow = first_valid_flow.is_unit_absolute_value
-            is_rel_flow = not is_abs_flow
-
-            # Skip to next if not using filling for flow type
-            if is_abs_flow and not fill_missing_absolute_flows:
-                continue
-
-            if is_rel_flow and not fill_missing_relative_flows:
-                continue
-
-            if fill_method == ParameterFillMethod.Zeros:
-                # Fill all missing flow values with zeros
-                # Fill all missing absolute flows with zeros
-                flow_id_min_year = flow_id_to_min_year[flow_data.name]
-                missing_flow_base = copy.deepcopy(flow_data.loc[flow_id_min_year])
-                for year, has_data in flow_has_data.items():
-                    if not has_data:
-                        new_flow_data = copy.deepcopy(missing_flow_base)
-                        if new_flow_data.is_unit_absolute_value:
-                            new_flow_data.value = 0.0
-                        new_flow_data.year = year
-                        flow_data[year] = new_flow_data
-                        flow_has_data[year] = True
-
-            if fill_method == ParameterFillMethod.Previous:
-                # Fill all missing flow values using the last found flow values
-                # NOTE: Do not fill flows if flows are missing at the start of the flow_data
-                flow_data.ffill(inplace=True)
-
-                # DataFrame.ffill copies the object that the new created object references
-                # to the last found flow object so overwrite all objects in flow_data
-                # with the new deepcopied flow object
-                for year, flow in flow_data.items():
-                    if pd.isna(flow):
-                        continue
-
-                    new_flow = copy.deepcopy(flow)
-                    new_flow.year = year
-                    flow_data.at[year] = new_flow
-                    flow_has_data[year] = True
-
-            if fill_method == ParameterFillMethod.Next:
-                # Fill all missing flow values using the next found flow values
-                # NOTE: Do not fill flows if flows are missing at the end of the flow_data
-                flow_data.bfill(inplace=True)
-
-                # DataFrame.bfill copies the object that the new created object references
-                # to the last found flow object so overwrite all objects in flow_data
-                # with the new deepcopied flow object
-                for year, flow in flow_data.items():
-                    if pd.isna(flow):
-                        continue
-
-                    new_flow = copy.deepcopy(flow)
-                    new_flow.year = year
-                    flow_data.at[year] = new_flow
-                    flow_has_data[year] = True
-
-            if fill_method == ParameterFillMethod.Interpolate:
-                # Fill all missing flow values using interpolation
-                # Do not fill flow values if missing at the start of flow_data or missing at the end of flow_data
-                flow_values = flow_data.copy()
-                for year, has_data in flow_has_data.items():
-                    if not has_data:
-                        continue
-
-                    flow_values[year] = flow_data[year].value
-
-                flow_values = flow_values.astype("float64")
-                flow_values.interpolate(limit_direction="forward", inplace=True)
-
-                # Get first valid flow data and use that as missing flow base
-                flow_id_min_year = flow_id_to_min_year[flow_data.name]
-                missing_flow_base = copy.deepcopy(flow_data.loc[flow_id_min_year])
-                for year, interpolated_value in flow_values.items():
-                    if pd.isna(interpolated_value):
-                        continue
-
-                    new_flow = copy.deepcopy(missing_flow_base)
-                    new_flow.value = flow_values[year]
-                    new_flow.year = year
-                    flow_data[year] = new_flow
-                    flow_has_data[year] = True
-
-        return df_year_flows
-
-    def _create_process_to_flow_ids(self, unique_process_ids, processes: List[Process], df_flows: pd.DataFrame) -> pd.DataFrame:
-        df = pd.DataFrame(dtype="object", index=df_flows.index, columns=unique_process_ids)
-        for year in df_flows.index:
-            for process in processes:
-                df.at[year, process.id] = {"process": copy.deepcopy(process), "flow_ids": {"in": [], "out": []}}
-
-        # Add process inflows and outflows for every year
-        for year in df_flows.index:
-            for flow_id in df_flows.columns:
-                # No data defined for process ID at this year
-                flow = df_flows.at[year, flow_id]
-                if pd.isnull(flow):
-                    continue
-
-                df.at[year, flow.source_process_id]["flow_ids"]["out"].append(flow.id)
-                df.at[year, flow.target_process_id]["flow_ids"]["in"].append(flow.id)
-        return df
-
-    def _create_process_to_flows(self,
-                                 unique_process_ids: dict[str, Process],
-                                 df_year_flows: pd.DataFrame) -> pd.DataFrame:
-        """
-
-        :param unique_process_ids: Dictionary of unique [Process ID -> Process]
-        :param df_year_flows: DataFrame, year to Flows
-        :return: DataFrame
-        """
-
-        df = pd.DataFrame(index=df_year_flows.index, columns=list(unique_process_ids.keys()), dtype="object")
-        for year in df_year_flows.index:
-            for process_id, process in unique_process_ids.items():
-                df.at[year, process.id] = {"process": copy.deepcopy(process), "flows": {"in": [], "out": []}}
-
-        # Add process inflows and outflows for every year
-        for year in df_year_flows.index:
-            for flow_id in df_year_flows.columns:
-                flow = df_year_flows.at[year, flow_id]
-
-                # No data defined for process ID at this year
-                if pd.isnull(flow):
-                    continue
-
-                df.at[year, flow.source_process_id]["flows"]["out"].append(flow)
-                df.at[year, flow.target_process_id]["flows"]["in"].append(flow)
-
-        return df
+        years = year_to_flows.years
+        num_years = len(years)
+        has_data = year_to_flows.has_data
+        has_any_data = np.any(has_data, axis=0)
+        year_indices = np.arange(num_years)[:, np.newaxis]
+
+        # NOTE: Now checks the flow type on from the first occurrence of flow data and assume that the flow type
+        # NOTE: does not change during the years
+        first_year_indices = np.argmax(has_data, axis=0)
+        first_valid_flows = [year_to_flows.get_by_index(year_index, flow_index) if has_any_data[flow_index] else None
+                             for flow_index, year_index in enumerate(first_year_indices)]
+        is_abs_flow = np.array([flow is not None and flow.is_unit_absolute_value for flow in first_valid_flows],
+                               dtype=bool)
+
+        # Flow IDs that are filled according to flow type
+        is_fill_flow = has_any_data & np.where(is_abs_flow, fill_missing_absolute_flows, fill_missing_relative_flows)
+
+        # Index of the previous and the next year that has data (including the year itself).
+        # Value -1 means no previous year and value num_years means no next year.
+        prev_year_indices = np.maximum.accumulate(np.where(has_data, year_indices, -1), axis=0)
+        next_year_indices = np.minimum.accumulate(np.where(has_data, year_indices, num_years)[::-1], axis=0)[::-1]
+
+        if fill_method == ParameterFillMethod.Zeros:
+            # Fill all missing flow values with zeros
+            # Fill all missing absolute flows with zeros
+            # Missing years of the Flow ID share the same zero valued Flow
+            flow_index_to_missing_flow = {}
+            fill_year_indices, fill_flow_indices = np.nonzero(~has_data & is_fill_flow)
+            for year_index, flow_index in zip(fill_year_indices.tolist(), fill_flow_indices.tolist()):
+                missing_flow = flow_index_to_missing_flow.get(flow_index, None)
+                if missing_flow is None:
+                    missing_flow = first_valid_flows[flow_index]
+                    if missing_flow.is_unit_absolute_value:
+                        missing_flow = missing_flow.create_copy()
+                        missing_flow.value = 0.0
+                    flow_index_to_missing_flow[flow_index] = missing_flow
+                result.set_by_index(year_index, flow_index, missing_flow)
+
+        if fill_method == ParameterFillMethod.Previous:
+            # Fill all missing flow values using the last found flow values
+            # NOTE: Do not fill flows if flows are missing at the start of the flow data
+            fill_year_indices, fill_flow_indices = np.nonzero(~has_data & is_fill_flow & (prev_year_indices >= 0))
+            source_year_indices = prev_year_indices[fill_year_indices, fill_flow_indices]
+            for year_index, flow_index, source_year_index in zip(fill_year_indices.tolist(),
+                                                                 fill_flow_indices.tolist(),
+                                                                 source_year_indices.tolist()):
+                source_flow = year_to_flows.get_by_index(source_year_index, flow_index)
+                result.set_by_index(year_index, flow_index, source_flow)
+
+        if fill_method == ParameterFillMethod.Next:
+            # Fill all missing flow values using the next found flow values
+            # NOTE: Do not fill flows if flows are missing at the end of the flow data
+            fill_cells = ~has_data & is_fill_flow & (next_year_indices < num_years)
+            fill_year_indices, fill_flow_indices = np.nonzero(fill_cells)
+            source_year_indices = next_year_indices[fill_year_indices, fill_flow_indices]
+            for year_index, flow_index, source_year_index in zip(fill_year_indices.tolist(),
+                                                                 fill_flow_indices.tolist(),
+                                                                 source_year_indices.tolist()):
+                source_flow = year_to_flows.get_by_index(source_year_index, flow_index)
+                result.set_by_index(year_index, flow_index, source_flow)
+
+        if fill_method == ParameterFillMethod.Interpolate:
+            # Fill all missing flow values using linear interpolation (same as numpy.interp)
+            # Do not fill flow values if missing at the start of flow data, flow values
+            # missing at the end of flow data are filled with the last valid value
+            flow_values = year_to_flows.get_values("value")
+            has_prev = prev_year_indices >= 0
+            has_next = next_year_indices < num_years
+            flow_indices = np.arange(len(year_to_flows.ids))[np.newaxis, :]
+            prev_values = flow_values[np.maximum(prev_year_indices, 0), flow_indices]
+            next_values = flow_values[np.minimum(next_year_indices, num_years - 1), flow_indices]
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                slopes = (next_values - prev_values) / (next_year_indices - prev_year_indices)
+                interpolated_values = slopes * (year_indices - prev_year_indices) + prev_values
+                fallback_values = slopes * (year_indices - next_year_indices) + next_values
+            interpolated_values = np.where(np.isnan(interpolated_values), fallback_values, interpolated_values)
+            interpolated_values = np.where(np.isnan(interpolated_values) & (prev_values == next_values),
+                                           prev_values, interpolated_values)
+            interpolated_values = np.where(has_next, interpolated_values, prev_values)
+            interpolated_values = np.where(has_data, flow_values, interpolated_values)
+
+            # Use first valid flow data as missing flow base for every year from the first valid year onward.
+            # Consecutive years with the same value (e.g. years after the last flow data) share the same Flow.
+            flow_index_to_interpolated_flow = {}
+            fill_flow_indices, fill_year_indices = np.nonzero((has_prev & is_fill_flow).T)
+            fill_values = interpolated_values[fill_year_indices, fill_flow_indices]
+            for year_index, flow_index, value in zip(fill_year_indices.tolist(),
+                                                     fill_flow_indices.tolist(),
+                                                     fill_values):
+                new_flow = flow_index_to_interpolated_flow.get(flow_index, None)
+                if new_flow is None or new_flow.value != value:
+                    new_flow = first_valid_flows[flow_index].create_copy()
+                    new_flow.value = value
+                    new_flow.year = years[year_index]
+                    flow_index_to_interpolated_flow[flow_index] = new_flow
+                result.set_by_index(year_index, flow_index, new_flow)
+
+        return result
 
     def _create_process_to_flows_entries(self,
                                          unique_process_ids: dict[str, Process],
-                                         df_year_flows: pd.DataFrame) -> pd.DataFrame:
+                                         year_to_flows: YearTable) -> YearTable:
         """
         Create Process to Flows (inflows and outflows) entries.
-        Entries are ProcessEntry-objects inside DataFrame.
+        Entries are ProcessEntry-objects inside YearTable.
 
         :param unique_process_ids: Dictionary of unique [Process ID -> Process]
-        :param df_year_flows: DataFrame, year to flows
-        :return: DataFrame (index as year, column as Process ID, cell as ProcessEntry)
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
+        :return: YearTable (year to Process ID to ProcessEntry)
         """
 
-        df = pd.DataFrame(index=df_year_flows.index, columns=list(unique_process_ids.keys()), dtype="object")
-
-        for year in df_year_flows.index:
-            for process_id, process in unique_process_ids.items():
-                df.at[year, process_id] = ProcessEntry(process)
+        year_to_process_flows = YearTable(year_to_flows.years, list(unique_process_ids.keys()))
+        for year_index in range(len(year_to_flows.years)):
+            for process_index, process in enumerate(unique_process_ids.values()):
+                year_to_process_flows.set_by_index(year_index, process_index, ProcessEntry(process))
 
         # Add Process inflows and outflows for every year
-        for year in df_year_flows.index:
-            for flow_id in df_year_flows.columns:
-                flow = df_year_flows.at[year, flow_id]
-                if pd.isnull(flow):
-                    continue
-
-                entry_source_process = df.at[year, flow.source_process_id]
-                entry_source_process.add_outflow(flow)
+        for year, flow_id, flow in year_to_flows.items():
+            entry_source_process = year_to_process_flows.get(year, flow.source_process_id)
+            entry_source_process.add_outflow(flow)
 
-                entry_target_process = df.at[year, flow.target_process_id]
-                entry_target_process.add_inflow(flow)
+            entry_target_process = year_to_process_flows.get(year, flow.target_process_id)
+            entry_target_process.add_inflow(flow)
 
-        return df
+        return year_to_process_flows
 
     @staticmethod
-    def _merge_relative_outflows(df_year_to_process_flows: pd.DataFrame,
-                                 df_year_to_flows: pd.DataFrame,
-                                 min_threshold: float = 99.9) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def _merge_relative_outflows(year_to_process_flows: YearTable,
+                                 year_to_flows: YearTable,
+                                 min_threshold: float = 99.9) -> Tuple[YearTable, YearTable]:
         """
         Check if relative outflows needs merging. Flow merging means that
         if Process has only one 100% relative flow then from that year onward
@@ -1264,62 +1320,73 @@ class DataChecker(object):
         year and the rest of the years.
 
         :param min_threshold: Flow with share greater than this are considered as 100%
-        :param df_year_to_process_flows: pd.DataFrame (index is year, column is Process ID)
-        :param df_year_to_flows: pd.DataFrame (index is year, column is Flow ID)
-        :return: pd.DataFrame
+        :param year_to_process_flows: YearTable (year to Process ID to ProcessEntry)
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
+        :return: Tuple (YearTable for process flows, YearTable for flows)
         """
         assert min_threshold > 0.0, "min_threshold should be > 0.0"
         assert min_threshold <= 100.0, "min_threshold should be <= 100.0"
 
-        df_process = df_year_to_process_flows.copy()
-        df_flows = df_year_to_flows.copy()
-        for process_id in df_process.columns:
-            for year in df_process.index:
-                entry: ProcessEntry = df_process.at[year, process_id]
-                inflows = entry.inflows
-                outflows = entry.outflows
-
-                # Skip root processes
-                if not inflows:
-                    continue
+        process_table = year_to_process_flows.copy()
+        flow_table = year_to_flows.copy()
+
+        # Find Processes that have full relative outflow in year. Only these entries need merging.
+        # NOTE: Only merging of the Process itself changes its outflows so checking the initial
+        # NOTE: outflows is enough, inflows are checked when visiting the entry
+        flow_values = flow_table.get_values("value")
+        is_absolute_flow = flow_table.get_values("is_unit_absolute_value", dtype=bool, default_value=True)
+        is_full_relative_flow = flow_table.has_data & ~is_absolute_flow & (flow_values > min_threshold)
+        candidates = set()
+        for year_index, flow_index in zip(*np.nonzero(is_full_relative_flow)):
+            flow = flow_table.get_by_index(year_index, flow_index)
+            candidates.add((process_table.get_id_index(flow.source_process_id), year_index))
+
+        # Visit the entries in Process ID order and then in year order
+        for process_index, year_index in sorted(candidates):
+            year = process_table.years[year_index]
+            entry: ProcessEntry = process_table.get_by_index(year_index, process_index)
+            inflows = entry.inflows
+            outflows = entry.outflows
+
+            # Skip root processes
+            if not inflows:
+                continue
 
-                # Get only Processes that have only 1 relative outflow
-                rel_outflows = [flow for flow in outflows if not flow.is_unit_absolute_value]
-                full_relative_outflows = [flow for flow in rel_outflows if flow.value > min_threshold]
-                if not full_relative_outflows:
-                    continue
+            # Get only Processes that have only 1 relative outflow
+            rel_outflows = [flow for flow in outflows if not flow.is_unit_absolute_value]
+            full_relative_outflows = [flow for flow in rel_outflows if flow.value > min_threshold]
+            if not full_relative_outflows:
+                continue
 
-                assert len(full_relative_outflows) == 1, "There should be only 1 full relative outflow"
+            assert len(full_relative_outflows) == 1, "There should be only 1 full relative outflow"
 
-                # Remove all other flows except the Flow that had 100% share from both
-                # source process outflows and in target process inflows.
-                flows_to_remove = list(set(rel_outflows) - set(full_relative_outflows))
+            # Remove all other flows except the Flow that had 100% share from both
+            # source process outflows and in target process inflows.
+            flows_to_remove = list(set(rel_outflows) - set(full_relative_outflows))
 
-                for flow in flows_to_remove:
-                    # Remove the source process outflow for this year
-                    source_entry: ProcessEntry = df_process.at[year, flow.source_process_id]
-                    source_entry.remove_outflow(flow.id)
+            for flow in flows_to_remove:
+                # Remove the source process outflow for this year
+                source_entry: ProcessEntry = process_table.get(year, flow.source_process_id)
+                source_entry.remove_outflow(flow.id)
 
-                    # Remove the target process inflow for this year
-                    target_entry: ProcessEntry = df_process.at[year, flow.target_process_id]
-                    target_entry.remove_inflow(flow.id)
+                # Remove the target process inflow for this year
+                target_entry: ProcessEntry = process_table.get(year, flow.target_process_id)
+                target_entry.remove_inflow(flow.id)
 
-                    # Remove the flow also from df_flows for this year
-                    df_flows.at[year, flow.id] = pd.NA
+                # Remove the flow also from flow table for this year
+                flow_table.remove(year, flow.id)
 
-        return df_process, df_flows
+        return process_table, flow_table
 
-    def _remove_isolated_processes(self, df_year_to_process_flows: pd.DataFrame) -> pd.DataFrame:
-        df = df_year_to_process_flows.copy()
+    def _remove_isolated_processes(self, year_to_process_flows: YearTable) -> YearTable:
+        result = year_to_process_flows.copy()
 
-        # Remove isolated processes from DataFrame
-        for year in df.index:
-            for process_id in df.columns:
-                entry = df.at[year, process_id]
-                if (not entry.inflows) and (not entry.outflows):
-                    df.at[year, process_id] = pd.NA
+        # Remove isolated processes from YearTable
+        for year, process_id, entry in year_to_process_flows.items():
+            if (not entry.inflows) and (not entry.outflows):
+                result.remove(year, process_id)
 
-        return df
+        return result
 
     def _check_process_stock_parameters(self, processes: List[Process]) -> Tuple[bool, list[str]]:
         """
@@ -1328,13 +1395,12 @@ class DataChecker(object):
         :return: True if no errors, False otherwise
         """
         errors = []
-        print("Checking stock distribution types...")
+        self._print_check_message("Checking stock distribution types...")
         allowed_distribution_types = set([name.value for name in StockDistributionType])
 
         for process in processes:
             if process.stock_lifetime == 0:
-                # Default to fixed and continue to next
-                process.stock_distribution_type = StockDistributionType.Fixed
+                # Stock distribution type defaults to fixed (see _set_default_stock_distribution_types)
                 continue
 
             if process.stock_distribution_type not in allowed_distribution_types:
@@ -1373,7 +1439,7 @@ class DataChecker(object):
         # Check if Process has valid parameters for stock distribution parameters
         # Expected: float or dictionary with valid keys (stddev, shape, scale)
         errors = []
-        print("Checking stock distribution parameters...")
+        self._print_check_message("Checking stock distribution parameters...")
         for process in processes:
             # Check that all required stock distribution parameters are present and have valid type
             found_params = process.stock_distribution_params
@@ -1455,30 +1521,31 @@ class DataChecker(object):
 
         return not errors, errors
 
-    def _check_fill_method_requirements(self, fill_method: ParameterFillMethod, df_year_to_flows: pd.DataFrame)\
+    def _check_fill_method_requirements(self, fill_method: ParameterFillMethod, year_to_flows: YearTable)\
             -> Tuple[bool, List[str]]:
         """
         Check if fill method requirements are met for flows.
         Fill method Zeros: No checks needed.
-        Fill method Previous: At least Flow for the starting year must be defined in the data.
-        Fill method Next: At least Flow for the last year must be defined in the data.
-        Fill method Interpolate: At least start AND last year have Flows defined in the data.
+        Fill method Previous: Years before the first Flow data are not filled.
+        Fill method Next: Years after the last Flow data are not filled.
+        Fill method Interpolate: Years before the first Flow data are not filled.
+
+        NOTE: Flows that are not defined for the start year or the end year are not errors
+        NOTE: because filling leaves those years without Flow. Earlier versions compared the missing
+        NOTE: DataFrame cells (NaN) to None so these requirements were never reported as errors.
 
         :param fill_method: Fill method (ParameterFillMethod)
-        :param df_year_to_flows: DataFrame
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
         :return: Tuple (has errors (bool), list of errors (list[str]))
         """
         errors = []
-        if fill_method is ParameterFillMethod.Zeros:
-            # Flow must be defined at least for one year
-            # This works always, just fills years without Flow data with Flows
-            return not errors, errors
+        return not errors, errors
 
         if fill_method is ParameterFillMethod.Previous:
             # Check that there exists Flow in the start year
-            start_year = df_year_to_flows.index[0]
-            for flow_id in df_year_to_flows.columns:
-                flow = df_year_to_flows.at[start_year, flow_id]
+            start_year = year_to_flows.years[0]
+            for flow_id in year_to_flows.ids:
+                flow = year_to_flows.get(start_year, flow_id)
                 if flow is None:
                     s = "ERROR: Flow '{}' is not defined for the start year and using fill method = 'Previous'".format(
                         flow_id)
@@ -1486,9 +1553,9 @@ class DataChecker(object):
 
         if fill_method is ParameterFillMethod.Next:
             # Check that there exists Flow in the start year
-            end_year = df_year_to_flows.index[-1]
-            for flow_id in df_year_to_flows.columns:
-                flow = df_year_to_flows.at[end_year, flow_id]
+            end_year = year_to_flows.years[-1]
+            for flow_id in year_to_flows.ids:
+                flow = year_to_flows.get(end_year, flow_id)
                 if flow is None:
                     s = "ERROR: Flow '{}' is not defined for the end year and using fill method = 'Next'".format(
                         flow_id)
@@ -1496,11 +1563,11 @@ class DataChecker(object):
 
         if fill_method is ParameterFillMethod.Interpolate:
             # Check that there exists Flow at least for start AND end year
-            start_year = df_year_to_flows.index[0]
-            end_year = df_year_to_flows.index[-1]
-            for flow_id in df_year_to_flows.columns:
-                flow_start_year = df_year_to_flows.at[start_year, flow_id]
-                flow_end_year = df_year_to_flows.at[end_year, flow_id]
+            start_year = year_to_flows.years[0]
+            end_year = year_to_flows.years[-1]
+            for flow_id in year_to_flows.ids:
+                flow_start_year = year_to_flows.get(start_year, flow_id)
+                flow_end_year = year_to_flows.get(end_year, flow_id)
                 if flow_start_year is None or flow_end_year is None:
                     s = "ERROR: Flow '{}' is not defined for either start or end year and using fill method = 'Interpolate'".format(
                         flow_id)
@@ -1508,41 +1575,34 @@ class DataChecker(object):
 
         return not errors, errors
 
-    def _check_process_has_no_inflows_and_only_relative_outflows(self, df_year_to_process_flows: pd.DataFrame)\
+    def _check_process_has_no_inflows_and_only_relative_outflows(self, year_to_process_flows: YearTable)\
             -> Tuple[bool, List[str]]:
         """
         Check for Processes that have no inflows and have only relative outflows.
         This is error in data.
 
-        :param df_year_to_process_flows: DataFrame (index: year, column: Process name, cell: ProcessEntry)
+        :param year_to_process_flows: YearTable (year to Process ID to ProcessEntry)
         :return: True if no errors, False otherwise
         """
         errors = []
-        print("Checking for processes that have no inflows and only relative outflows...")
+        self._print_check_message("Checking for processes that have no inflows and only relative outflows...")
         year_to_errors = {}
-        for year in df_year_to_process_flows.index:
-            for process_id in df_year_to_process_flows.columns:
-                entry: ProcessEntry = df_year_to_process_flows.at[year, process_id]
-
-                # Skip removed entries
-                if pd.isna(entry):
-                    continue
-
-                process = entry.process
-                flows_in = entry.inflows
-                flows_out = entry.outflows
+        for year, process_id, entry in year_to_process_flows.items():
+            process = entry.process
+            flows_in = entry.inflows
+            flows_out = entry.outflows
 
-                no_inflows = len(flows_in) == 0
-                all_outflows_relative = len(flows_out) > 0 and all([not flow.is_unit_absolute_value for flow in flows_out])
+            no_inflows = len(flows_in) == 0
+            all_outflows_relative = len(flows_out) > 0 and all([not flow.is_unit_absolute_value for flow in flows_out])
 
-                # NOTE: This is workaround for situation where flow merging removes 0% relative outflow
-                # and that causes root process checking to fail
-                is_all_evaluated = np.all([flow.is_evaluated for flow in flows_out])
+            # NOTE: This is workaround for situation where flow merging removes 0% relative outflow
+            # and that causes root process checking to fail
+            is_all_evaluated = np.all([flow.is_evaluated for flow in flows_out])
 
-                if no_inflows and all_outflows_relative and not is_all_evaluated:
-                    if year not in year_to_errors:
-                        year_to_errors[year] = []
-                    year_to_errors[year].append("{}".format(process.id))
+            if no_inflows and all_outflows_relative and not is_all_evaluated:
+                if year not in year_to_errors:
+                    year_to_errors[year] = []
+                year_to_errors[year].append("{}".format(process.id))
 
         has_errors = len(year_to_errors.keys()) > 0
         if has_errors:
@@ -1560,16 +1620,16 @@ class DataChecker(object):
 
         return not has_errors, errors
 
-    def _check_scenario_definitions(self, df_year_to_process_flows: pd.DataFrame) -> Tuple[bool, List[str]]:
+    def _check_scenario_definitions(self, year_to_process_flows: YearTable) -> Tuple[bool, List[str]]:
         """
         Check scenario definitions.
 
-        :param df_year_to_process_flows: pd.DataFrame
+        :param year_to_process_flows: YearTable (year to Process ID to ProcessEntry)
         :return: Tuple (has errors: bool, list of errors)
         """
         errors = []
         scenario_definitions = self._scenario_definitions
-        valid_years = list(df_year_to_process_flows.index)
+        valid_years = list(year_to_process_flows.years)
         first_valid_year = min(valid_years)
         last_valid_year = max(valid_years)
         for scenario_definition in scenario_definitions:
@@ -1608,21 +1668,24 @@ class DataChecker(object):
 
                 # Check if source Process ID exists for the defined year range
                 for year in years:
-                    year_data = df_year_to_process_flows[df_year_to_process_flows.index == year]
-                    if source_process_id not in year_data.columns:
+                    entry: ProcessEntry = None
+                    if year_to_process_flows.has_id(source_process_id):
+                        entry = year_to_process_flows.get(year, source_process_id)
+
+                    # Source Process ID is not defined or has no flows for the year
+                    if entry is None:
                         s = "" + error_message_prefix
                         s += "Source Process ID '{}' not defined for the year {}".format(source_process_id, year)
                         errors.append(s)
                         continue
 
                     # Check if target Process ID exists for the defined year range
-                    if target_process_id not in year_data.columns:
+                    if not year_to_process_flows.has_id(target_process_id):
                         s = "" + error_message_prefix
                         s += "Target Process ID '{}' not defined for the year {}".format(source_process_id, year)
                         errors.append(s)
                         continue
 
-                    entry: ProcessEntry = year_data.at[year, source_process_id]
                     flows_out = entry.outflows
                     target_process_id_to_flow = {flow.target_process_id: flow for flow in flows_out}
                     source_to_target_flow = target_process_id_to_flow.get(target_process_id, None)
@@ -1691,11 +1754,12 @@ class DataChecker(object):
                     source_to_target_id = Flow.make_flow_id(flow_modifier.source_process_id,
                                                             flow_modifier.target_process_id)
 
-                    start_year_processes = df_year_to_process_flows.loc[flow_modifier.start_year]
-
                     # Get source-to-target flow mappings at start year
-                    source_process_entry: ProcessEntry = start_year_processes[source_process_id]
-                    source_process_outflows = source_process_entry.outflows
+                    source_process_entry: ProcessEntry = None
+                    if year_to_process_flows.has_id(source_process_id):
+                        source_process_entry = year_to_process_flows.get(flow_modifier.start_year, source_process_id)
+
+                    source_process_outflows = source_process_entry.outflows if source_process_entry else []
                     flow_id_to_flow = {flow.id: flow for flow in source_process_outflows}
                     if source_to_target_id not in flow_id_to_flow:
                         s = "" + error_message_prefix
@@ -1766,7 +1830,7 @@ class DataChecker(object):
                     if len(stripped_opposite_target_process_ids):
                         # Check that source and target Process IDs are valid
                         for target_opposite_process_id in stripped_opposite_target_process_ids:
-                            if target_opposite_process_id not in df_year_to_process_flows.columns:
+                            if not year_to_process_flows.has_id(target_opposite_process_id):
                                 s = "" + error_message_prefix
                                 s += "Target opposite process ID ({}) does not exists".format(target_opposite_process_id)
                                 errors.append(s)
@@ -1817,7 +1881,7 @@ class DataChecker(object):
                 if color.name not in transformation_stages:
                     s = "INFO: Color definition name '{}' is not transformation stage name (row {})".format(
                         color.name, color.row_number)
-                    print(s)
+                    self._print_check_message(s)
 
             if row_errors:
                 msg = "errors" if len(row_errors) > 1 else "error"
@@ -1829,33 +1893,56 @@ class DataChecker(object):
 
         return not errors, errors
 
-    def _check_flow_indicators(self, df_year_to_flows: pd.DataFrame, default_conversion_factor: float = 1.0)\
-            -> Tuple[bool, List[str]]:
+    def _set_default_stock_distribution_types(self, processes: List[Process]) -> None:
+        """
+        Set stock distribution type to fixed for Processes that have stock lifetime of 0.
+
+        :param processes: List of Processes
+        """
+        for process in processes:
+            if process.stock_lifetime == 0:
+                process.stock_distribution_type = StockDistributionType.Fixed
+
+    def _convert_flow_indicator_conversion_factors(self, year_to_flows: YearTable) -> None:
         """
-        Check and set default value to every flow that is missing value.
+        Convert flow indicator conversion factors to float.
+        Flows that have conversion factors that are not convertible to float keep those values
+        as they are so that _check_flow_indicators can report them.
+
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
+        """
+        for year, flow_id, flow in year_to_flows.items():
+            # NOTE: Conversion factors are float array unless some value was not convertible to float
+            conversion_factors = flow.indicator_conversion_factors
+            if conversion_factors.dtype != object:
+                continue
 
-        :param df_year_to_flows:
+            for name, conversion_factor in zip(flow.indicator_schema.names, conversion_factors):
+                try:
+                    flow.set_indicator_conversion_factor(name, float(conversion_factor))
+                except (ValueError, TypeError):
+                    continue
+
+    def _check_flow_indicators(self, year_to_flows: YearTable) -> Tuple[bool, List[str]]:
+        """
+        Check that every flow indicator conversion factor is convertible to float.
+
+        :param year_to_flows: YearTable (year to Flow ID to Flow)
         :return: Tuple (has errors (bool), list of errors (str))
         """
         errors = []
-        for year in df_year_to_flows.index:
-            for flow_id in df_year_to_flows:
-                flow = df_year_to_flows.at[year, flow_id]
-                # NOTE: NEW, allow making "holes" to DataFrame
-                if not isinstance(flow, Flow):
-                    continue
+        for year, flow_id, flow in year_to_flows.items():
+            conversion_factors = flow.indicator_conversion_factors
+            if conversion_factors.dtype != object:
+                continue
 
-                # NOTE: Flow indicator now defaults to 0.0 when it's not specified
-                for name, indicator in flow.indicator_name_to_indicator.items():
-                    try:
-                        # Try casting value to float and if exception happens then
-                        # value was not float
-                        conversion_factor = float(indicator.conversion_factor)
-                        indicator.conversion_factor = conversion_factor
-                    except ValueError as ex:
-                        s = "Flow '{}' has invalid conversion factor defined for year {} (row {})".format(
-                            flow_id, year, flow.row_number)
-                        errors.append(s)
+            for conversion_factor in conversion_factors:
+                try:
+                    float(conversion_factor)
+                except (ValueError, TypeError):
+                    s = "Flow '{}' has invalid conversion factor defined for year {} (row {})".format(
+                        flow_id, year, flow.row_number)
+                    errors.append(s)
 
         return not errors, errors
 
@@ -1980,4 +2067,108 @@ class DataChecker(object):
                     s = s.format(process_id, condition, entry.row_number)
                     errors.append(s)
 
-        return not errors, errors
\ No newline at end of file
+        return not errors, errors
+
+
+# ***********************
+# * Default data checks *
+# ***********************
+
+# Checks for the data read from the settings file
+DataChecker.register_data_check(DataCheck(
+    "inflow_visualization", DataCheckStage.Input,
+    "Checking processes for inflow visualization...",
+    lambda checker, data: checker._check_process_ids_for_inflow_visualization(
+        data["model_params"][ParameterName.VisualizeInflowsToProcesses], data["unique_process_ids"])))
+
+# NOTE: This check is currently unreachable with tests because exception is already
+# thrown in DataChecker._get_unique_process_ids_in_year_range
+DataChecker.register_data_check(DataCheck(
+    "flow_sources_and_targets", DataCheckStage.Input,
+    "Checking flow source and target processes...",
+    lambda checker, data: checker._check_flow_sources_and_targets(
+        data["unique_process_ids"], data["year_to_flows"])))
+
+DataChecker.register_data_check(DataCheck(
+    "flow_multiple_definitions", DataCheckStage.Input,
+    "Checking multiple flow definitions in the same year...",
+    lambda checker, data: checker._check_flow_multiple_definitions_per_year(
+        data["unique_flow_ids"], data["flows"], data["years"])))
+
+DataChecker.register_data_check(DataCheck(
+    "process_stock_parameters", DataCheckStage.Input,
+    "Checking process stock parameters...",
+    lambda checker, data: checker._check_process_stock_parameters(data["processes"])))
+
+DataChecker.register_data_check(DataCheck(
+    "stocks_in_isolated_processes", DataCheckStage.Input,
+    "Checking stocks in isolated processes...",
+    lambda checker, data: checker._check_stocks_in_isolated_processes(
+        data["stocks"], data["unique_process_ids"])))
+
+DataChecker.register_data_check(DataCheck(
+    "fill_method_requirements", DataCheckStage.Input,
+    "Checking fill method requirements...",
+    lambda checker, data: checker._check_fill_method_requirements(data["fill_method"], data["year_to_flows"]),
+    lambda data: data["fill_missing_absolute_flows"] or data["fill_missing_relative_flows"]))
+
+# Checks for the built model data
+DataChecker.register_data_check(DataCheck(
+    "root_processes", DataCheckStage.Model,
+    "Checking root processes...",
+    lambda checker, data: checker._check_root_processes(data["year_to_process_flows"])))
+
+DataChecker.register_data_check(DataCheck(
+    "process_inflows_and_outflows_mismatch", DataCheckStage.Model,
+    "Checking process total inflows and total outflows mismatches...",
+    lambda checker, data: checker._check_process_inflows_and_outflows_mismatch(
+        data["year_to_process_flows"], epsilon=data["virtual_flows_epsilon"]),
+    lambda data: not data["model_params"][ParameterName.UseVirtualFlows]))
+
+DataChecker.register_data_check(DataCheck(
+    "relative_flows", DataCheckStage.Model,
+    "Checking relative flow errors...",
+    lambda checker, data: checker._check_relative_flow_errors(data["year_to_flows"])))
+
+DataChecker.register_data_check(DataCheck(
+    "processes_with_only_relative_outflows", DataCheckStage.Model,
+    "Checking processes with no inflows and only relative outflows...",
+    lambda checker, data: checker._check_process_has_no_inflows_and_only_relative_outflows(
+        data["year_to_process_flows"])))
+
+DataChecker.register_data_check(DataCheck(
+    "isolated_processes", DataCheckStage.Model,
+    "Checking isolated/unconnected processes...",
+    lambda checker, data: checker._check_for_isolated_processes(data["year_to_process_flows"])))
+
+DataChecker.register_data_check(DataCheck(
+    "prioritized_locations", DataCheckStage.Model,
+    "Checking prioritized locations...",
+    lambda checker, data: checker._check_prioritized_locations(checker._processes, data["model_params"])))
+
+DataChecker.register_data_check(DataCheck(
+    "prioritized_transformation_stages", DataCheckStage.Model,
+    "Checking prioritized transformation stages...",
+    lambda checker, data: checker._check_prioritized_transformation_stages(
+        checker._processes, data["model_params"])))
+
+DataChecker.register_data_check(DataCheck(
+    "scenario_definitions", DataCheckStage.Model,
+    "Checking scenario definitions...",
+    lambda checker, data: checker._check_scenario_definitions(data["year_to_process_flows"])))
+
+DataChecker.register_data_check(DataCheck(
+    "color_definitions", DataCheckStage.Model,
+    "Checking color definitions...",
+    lambda checker, data: checker._check_color_definitions(checker._color_definitions)))
+
+DataChecker.register_data_check(DataCheck(
+    "flow_indicators", DataCheckStage.Model,
+    "Checking flow indicators...",
+    lambda checker, data: checker._check_flow_indicators(data["year_to_flows"])))
+
+DataChecker.register_data_check(DataCheck(
+    "stock_lifetime_overrides", DataCheckStage.Model,
+    "Checking stock lifetime overrides...",
+    lambda checker, data: checker._check_stock_lifetime_overrides(data["stock_lifetime_overrides"]),
+    lambda data: data["model_params"][ParameterName.UseStockLifetimeOverrides]))
@@ -1,9 +1,14 @@
+import importlib.util
+import json
+import os
 import warnings
 from typing import List, Union, Any, Dict
 import numpy as np
 import pandas as pd
-from .datastructures import Process, Flow, Stock, FlowModifier, ScenarioDefinition, Color, StockLifetimeOverride
-from .parameters import ParameterName, ParameterFillMethod, StockDistributionType, ParameterScenarioType
+from .datastructures import Process, Flow, Stock, FlowModifier, ScenarioDefinition, Color, StockLifetimeOverride, \
+    IndicatorSchema
+from .parameters import ParameterName, ParameterFillMethod, StockDistributionType, ParameterScenarioType, \
+    ParameterDynamicStockCohortsFormat, ParameterScenarioDataExportFormat, ParameterPlotMode, ParameterPlotFormat
 
 # Suppress openpyxl warnings about Data Validation being suppressed
 warnings.filterwarnings('ignore', category=UserWarning, module="openpyxl")
@@ -160,6 +165,11 @@ class DataProvider(object):
              "Create Sankey charts for each scenario",
              True,
              ],
+            [ParameterName.CreateResultStore,
+             bool,
+             "Write solved flow and dynamic stock values of each scenario as arrays to results directory",
+             False,
+             ],
             [ParameterName.OutputPath,
              str,
              "Path to directory where all output is created (relative to running script)",
@@ -170,6 +180,21 @@ class DataProvider(object):
              "Show Matplotlib plots",
              True,
              ],
+            [ParameterName.PlotMode,
+             str,
+             "Render plots during run (Render), skip plots (Off) or render plots later from result store (OnRequest)",
+             ParameterPlotMode.Render,
+             ],
+            [ParameterName.PlotFormat,
+             str,
+             "Image format of the plots (SVG / PNG)",
+             ParameterPlotFormat.SVG,
+             ],
+            [ParameterName.NumPlotWorkers,
+             int,
+             "Number of worker processes for rendering plots (1 = no worker processes, 0 = number of CPUs)",
+             1,
+             ],
             [ParameterName.VisualizeInflowsToProcesses,
              list,
              "Create inflow visualization and export data for process IDs defined in here. " +
@@ -200,6 +225,17 @@ class DataProvider(object):
              "Check errors when building data (development)",
              True,
              ],
+            [ParameterName.SkipChecks,
+             list,
+             "Names of the data checks to skip when check_errors is enabled. " +
+             "Each check name must be separated by comma (',')",
+             [],
+             ],
+            [ParameterName.NumCheckWorkers,
+             int,
+             "Number of worker threads for running data checks (1 = no worker threads, 0 = number of CPUs)",
+             1,
+             ],
             [ParameterName.IncludeMetadata,
              bool,
              "Include scenario metadata",
@@ -227,32 +263,112 @@ class DataProvider(object):
              "Columns to ignore when reading stock lifetime overrides sheet",
              [],
              ],
-        ]
 
-        param_type_to_str = {int: "integer", float: "float", str: "string", bool: "boolean", list: "list"}
+            # Flow solver
+            [ParameterName.UseArraySolver,
+             bool,
+             "Solve timesteps using integer-indexed arrays instead of Process/Flow dictionaries",
+             False,
+             ],
+            [ParameterName.NumScenarioWorkers,
+             int,
+             "Number of worker processes for solving alternative scenarios (1 = no worker processes, 0 = number of CPUs)",
+             1,
+             ],
 
-        # Read settings sheet from the file
-        param_name_to_value = {}
-        try:
-            with pd.ExcelFile(filename) as xls:
-                try:
-                    sheet_settings = pd.read_excel(io=xls,
-                                                   sheet_name=sheet_settings_name,
-                                                   usecols=sheet_settings_col_range,
-                                                   skiprows=sheet_settings_skip_num_rows,
-                                                   )
+            # Result export
+            [ParameterName.NumExportWorkers,
+             int,
+             "Number of worker threads for exporting scenario results (1 = no worker threads, 0 = number of CPUs)",
+             1,
+             ],
+            [ParameterName.ScenarioDataExportFormat,
+             str,
+             "Format of combined scenario data (Excel / Parquet / Arrow), Parquet and Arrow are partitioned by scenario and year",
+             ParameterScenarioDataExportFormat.Excel,
+             ],
 
-                    for row_index, row in sheet_settings.iterrows():
-                        param_name, param_value = row
-                        param_name_to_value[param_name] = param_value
+            # Dynamic stocks
+            [ParameterName.PackDynamicStockCohorts,
+             bool,
+             "Store dynamic stock by cohort and outflow by cohort as packed lower triangular tables to save memory",
+             False,
+             ],
+            [ParameterName.DynamicStockSurvivalCutoff,
+             float,
+             "Survival share below which a cohort is considered to have left the packed dynamic stock (0.0 = exact)",
+             0.0,
+             ],
+            [ParameterName.StreamDynamicStocksExport,
+             bool,
+             "Write dynamic stocks Excel file row by row with constant memory instead of building DataFrames",
+             False,
+             ],
+            [ParameterName.DynamicStockCohortsFormat,
+             str,
+             "Format of dynamic stock by cohort and outflow by cohort matrices (Excel / NPZ / Parquet)",
+             ParameterDynamicStockCohortsFormat.Excel,
+             ],
+        ]
 
-                except ValueError as e:
-                    raise Exception("DataProvider: Settings sheet '{}' not found in file {}!".format(
-                        sheet_settings_name, filename))
+        # Data bundle directory: settings file and one CSV/Parquet table per sheet
+        if os.path.isdir(filename):
+            self._read_data(filename, filename, sheet_settings_name, sheet_settings_col_range,
+                            sheet_settings_skip_num_rows, required_params, optional_params)
+            return
 
+        # Open the workbook only once, settings and data sheets are read from the same file
+        try:
+            xls = pd.ExcelFile(filename, engine=self._get_excel_engine())
         except FileNotFoundError as ex:
             raise Exception("File not found: {}".format(filename))
 
+        with xls:
+            self._read_data(xls, filename, sheet_settings_name, sheet_settings_col_range,
+                            sheet_settings_skip_num_rows, required_params, optional_params)
+
+    def _read_data(self,
+                   source: Union[pd.ExcelFile, str],
+                   filename: str,
+                   sheet_settings_name: str,
+                   sheet_settings_col_range: Union[str, int],
+                   sheet_settings_skip_num_rows: int,
+                   required_params: List[List[Any]],
+                   optional_params: List[List[Any]],
+                   ) -> None:
+        """
+        Read parameters and data from opened workbook or from data bundle directory.
+
+        :param source: Opened workbook or path to data bundle directory
+        :param filename: Path to workbook or data bundle directory (used in error messages)
+        :param sheet_settings_name: Name of the settings sheet
+        :param sheet_settings_col_range: Column range of the settings sheet
+        :param sheet_settings_skip_num_rows: Number of rows to skip in the settings sheet
+        :param required_params: List of required parameter definitions
+        :param optional_params: List of optional parameter definitions
+        """
+        param_type_to_str = {int: "integer", float: "float", str: "string", bool: "boolean", list: "list"}
+
+        # Read settings sheet from the file
+        param_name_to_value = {}
+        if isinstance(source, pd.ExcelFile):
+            try:
+                sheet_settings = pd.read_excel(io=source,
+                                               sheet_name=sheet_settings_name,
+                                               usecols=sheet_settings_col_range,
+                                               skiprows=sheet_settings_skip_num_rows,
+                                               )
+
+                for row_index, row in sheet_settings.iterrows():
+                    param_name, param_value = row
+                    param_name_to_value[param_name] = param_value
+
+            except ValueError as e:
+                raise Exception("DataProvider: Settings sheet '{}' not found in file {}!".format(
+                    sheet_settings_name, filename))
+        else:
+            param_name_to_value = self._read_bundle_settings(source)
+
         # Check that all required params are defined in settings sheet
         missing_params = []
         for entry in required_params:
@@ -362,6 +478,70 @@ class DataProvider(object):
                         print("")
                         raise Exception(-1)
 
+                elif param_name is ParameterName.DynamicStockCohortsFormat:
+                    valid_format_names = [format_name for format_name in ParameterDynamicStockCohortsFormat]
+                    found_param_value_lower = found_param_value.lower().strip()
+                    valid_format_names_lower = [name.lower().strip() for name in valid_format_names]
+                    if found_param_value_lower in valid_format_names_lower:
+                        # Get the actual parameter name from ParameterDynamicStockCohortsFormat-enum
+                        format_index = valid_format_names_lower.index(found_param_value_lower)
+                        found_param_value = valid_format_names[format_index]
+                        self._param_name_to_value[param_name] = found_param_value
+                    else:
+                        print("{} not valid value for {}! ".format(found_param_value, param_name), end="")
+                        print("Valid values are: {}".format(", ".join(valid_format_names)))
+                        self._param_name_to_value[param_name] = param_default_value
+                        print("")
+                        raise Exception(-1)
+
+                elif param_name is ParameterName.ScenarioDataExportFormat:
+                    valid_format_names = [format_name for format_name in ParameterScenarioDataExportFormat]
+                    found_param_value_lower = found_param_value.lower().strip()
+                    valid_format_names_lower = [name.lower().strip() for name in valid_format_names]
+                    if found_param_value_lower in valid_format_names_lower:
+                        # Get the actual parameter name from ParameterScenarioDataExportFormat-enum
+                        format_index = valid_format_names_lower.index(found_param_value_lower)
+                        found_param_value = valid_format_names[format_index]
+                        self._param_name_to_value[param_name] = found_param_value
+                    else:
+                        print("{} not valid value for {}! ".format(found_param_value, param_name), end="")
+                        print("Valid values are: {}".format(", ".join(valid_format_names)))
+                        self._param_name_to_value[param_name] = param_default_value
+                        print("")
+                        raise Exception(-1)
+
+                elif param_name is ParameterName.PlotMode:
+                    valid_mode_names = [mode_name for mode_name in ParameterPlotMode]
+                    found_param_value_lower = found_param_value.lower().strip()
+                    valid_mode_names_lower = [name.lower().strip() for name in valid_mode_names]
+                    if found_param_value_lower in valid_mode_names_lower:
+                        # Get the actual parameter name from ParameterPlotMode-enum
+                        mode_index = valid_mode_names_lower.index(found_param_value_lower)
+                        found_param_value = valid_mode_names[mode_index]
+                        self._param_name_to_value[param_name] = found_param_value
+                    else:
+                        print("{} not valid value for {}! ".format(found_param_value, param_name), end="")
+                        print("Valid values are: {}".format(", ".join(valid_mode_names)))
+                        self._param_name_to_value[param_name] = param_default_value
+                        print("")
+                        raise Exception(-1)
+
+                elif param_name is ParameterName.PlotFormat:
+                    valid_format_names = [format_name for format_name in ParameterPlotFormat]
+                    found_param_value_lower = found_param_value.lower().strip()
+                    valid_format_names_lower = [name.lower().strip() for name in valid_format_names]
+                    if found_param_value_lower in valid_format_names_lower:
+                        # Get the actual parameter name from ParameterPlotFormat-enum
+                        format_index = valid_format_names_lower.index(found_param_value_lower)
+                        found_param_value = valid_format_names[format_index]
+                        self._param_name_to_value[param_name] = found_param_value
+                    else:
+                        print("{} not valid value for {}! ".format(found_param_value, param_name), end="")
+                        print("Valid values are: {}".format(", ".join(valid_format_names)))
+                        self._param_name_to_value[param_name] = param_default_value
+                        print("")
+                        raise Exception(-1)
+
             else:
                 # Use default optional parameter value
                 self._param_name_to_value[param_name] = param_default_value
@@ -415,67 +595,63 @@ class DataProvider(object):
         # Sheet name to DataFrame
         sheets = {}
         try:
-            with pd.ExcelFile(filename) as xls:
-                try:
-                    sheet_processes = pd.read_excel(xls,
-                                                    sheet_name=sheet_name_processes,
-                                                    skiprows=skip_num_rows_processes)
-                    sheet_processes = self._drop_ignored_columns_from_sheet(sheet_processes, ignore_columns_processes)
-                    sheets[sheet_name_processes] = sheet_processes
-                except ValueError:
-                    pass
+            sheet_processes = self._read_sheet(source,
+                                               sheet_name=sheet_name_processes,
+                                               skiprows=skip_num_rows_processes)
+            sheet_processes = self._drop_ignored_columns_from_sheet(sheet_processes, ignore_columns_processes)
+            sheets[sheet_name_processes] = sheet_processes
+        except ValueError:
+            pass
 
-                try:
-                    sheet_flows = pd.read_excel(xls,
-                                                sheet_name=sheet_name_flows,
-                                                skiprows=skip_num_rows_flows)
-                    sheet_flows = self._drop_ignored_columns_from_sheet(sheet_flows, ignore_columns_flows)
-                    sheets[sheet_name_flows] = sheet_flows
-                except ValueError:
-                    pass
-
-                # Optionals
-                if use_scenarios:
-                    try:
-                        sheet_scenarios = pd.read_excel(xls,
-                                                        sheet_name=sheet_name_scenarios,
-                                                        skiprows=skip_num_rows_scenarios)
-                        sheet_scenarios = self._drop_ignored_columns_from_sheet(sheet_scenarios,
-                                                                                ignore_columns_scenarios)
-                        sheets[sheet_name_scenarios] = sheet_scenarios
-
-                    except ValueError:
-                        pass
+        try:
+            sheet_flows = self._read_sheet(source,
+                                           sheet_name=sheet_name_flows,
+                                           skiprows=skip_num_rows_flows)
+            sheet_flows = self._drop_ignored_columns_from_sheet(sheet_flows, ignore_columns_flows)
+            sheets[sheet_name_flows] = sheet_flows
+        except ValueError:
+            pass
 
-                try:
-                    sheet_colors = pd.read_excel(xls,
-                                                 sheet_name=sheet_name_colors,
-                                                 skiprows=skip_num_rows_colors)
-                    sheet_colors = self._drop_ignored_columns_from_sheet(sheet_colors, ignore_columns_colors)
-                    sheets[sheet_name_colors] = sheet_colors
-                except ValueError:
-                    pass
+        # Optionals
+        if use_scenarios:
+            try:
+                sheet_scenarios = self._read_sheet(source,
+                                                   sheet_name=sheet_name_scenarios,
+                                                   skiprows=skip_num_rows_scenarios)
+                sheet_scenarios = self._drop_ignored_columns_from_sheet(sheet_scenarios,
+                                                                        ignore_columns_scenarios)
+                sheets[sheet_name_scenarios] = sheet_scenarios
 
-                try:
-                    sheet_process_positions = pd.read_excel(xls, sheet_name=sheet_name_process_positions)
-                    sheets[sheet_name_process_positions] = sheet_process_positions
-                except ValueError:
-                    pass
+            except ValueError:
+                pass
 
-                # Stock lifetime overrides
-                try:
-                    sheet_stock_lifetime_overrides = pd.read_excel(xls,
-                                                                   sheet_name=sheet_name_stock_lifetime_overrides,
-                                                                   skiprows=skip_num_rows_stock_lifetime_overrides)
+        try:
+            sheet_colors = self._read_sheet(source,
+                                            sheet_name=sheet_name_colors,
+                                            skiprows=skip_num_rows_colors)
+            sheet_colors = self._drop_ignored_columns_from_sheet(sheet_colors, ignore_columns_colors)
+            sheets[sheet_name_colors] = sheet_colors
+        except ValueError:
+            pass
+
+        try:
+            sheet_process_positions = self._read_sheet(source, sheet_name=sheet_name_process_positions)
+            sheets[sheet_name_process_positions] = sheet_process_positions
+        except ValueError:
+            pass
 
-                    sheet_stock_lifetime_overrides = self._drop_ignored_columns_from_sheet(
-                        sheet_stock_lifetime_overrides, ignore_columns_stock_lifetime_overrides)
-                    sheets[sheet_name_stock_lifetime_overrides] = sheet_stock_lifetime_overrides
-                except ValueError:
-                    pass
+        # Stock lifetime overrides
+        try:
+            sheet_stock_lifetime_overrides = self._read_sheet(source,
+                                                           sheet_name=sheet_name_stock_lifetime_overrides,
+                                                           skiprows=skip_num_rows_stock_lifetime_overrides)
+
+            sheet_stock_lifetime_overrides = self._drop_ignored_columns_from_sheet(
+                sheet_stock_lifetime_overrides, ignore_columns_stock_lifetime_overrides)
+            sheets[sheet_name_stock_lifetime_overrides] = sheet_stock_lifetime_overrides
+        except ValueError:
+            pass
 
-        except FileNotFoundError:
-            raise Exception("Settings file '{}' not found".format(filename))
 
         # Check that all the required sheets exists
         required_sheet_names = [sheet_name_processes, sheet_name_flows]
@@ -514,26 +690,24 @@ class DataProvider(object):
         self._sheet_name_stock_lifetime_overrides = sheet_name_stock_lifetime_overrides
 
         # Create Processes
-        rows_processes = []
+        # NOTE: Processes and Flows are created from lists of row values instead of
+        # pd.Series per row because Flows sheet can have hundreds of thousands of rows
         df_processes = sheets[self._sheet_name_processes]
-        for (row_index, row) in df_processes.iterrows():
-            row = self._convert_row_nan_to_none(row)
-            rows_processes.append(row)
-
+        rows_processes = self._get_rows_as_lists(df_processes)
         self._processes = self._create_objects_from_rows(Process,
                                                          rows_processes,
                                                          row_start=skip_num_rows_processes)
 
         # Create Flows
-        rows_flows = []
         df_flows = sheets[self._sheet_name_flows]
-        for (row_index, row) in df_flows.iterrows():
-            row = self._convert_row_nan_to_none(row)
-            rows_flows.append(row)
-
+        rows_flows = self._get_rows_as_lists(df_flows)
+        flow_column_names = list(df_flows.columns)
         self._flows = self._create_objects_from_rows(Flow,
                                                      rows_flows,
-                                                     row_start=skip_num_rows_flows)
+                                                     row_start=skip_num_rows_flows,
+                                                     column_names=flow_column_names,
+                                                     indicator_schema=IndicatorSchema.from_column_names(
+                                                         flow_column_names))
 
         # Create Stocks from Processes
         self._stocks = self._create_stocks_from_processes(self._processes)
@@ -607,7 +781,8 @@ class DataProvider(object):
 
         return missing_sheet_names
 
-    def _create_objects_from_rows(self, object_type=None, rows=None, row_start=-1) -> List:
+    def _create_objects_from_rows(self, object_type=None, rows=None, row_start=-1, column_names=None,
+                                  **kwargs) -> List:
         if rows is None:
             rows = []
 
@@ -621,7 +796,10 @@ class DataProvider(object):
                 row_number += 1
                 continue
 
-            new_instance = object_type(row, row_number)
+            if column_names is None:
+                new_instance = object_type(row, row_number)
+            else:
+                new_instance = object_type(row, row_number, column_names, **kwargs)
             if new_instance.is_valid():
                 result.append(new_instance)
 
@@ -708,11 +886,10 @@ class DataProvider(object):
         :return: True if row is valid, false otherwise
         """
         # Each row must have all first columns defined
-        cols = row.iloc[0:4]
-        if any(pd.isna(cols)):
-            return False
+        if isinstance(row, pd.Series):
+            return not any(pd.isna(row.iloc[0:4]))
 
-        return True
+        return not any(value is None for value in row[0:4])
 
     def _convert_row_nan_to_none(self, row: pd.Series) -> pd.Series:
         """
@@ -723,10 +900,97 @@ class DataProvider(object):
         :return: Returns the original modified row
         """
         for col_name, value in row.items():
-            if np.isreal(value) and np.isnan(value):
+            if value is not None and np.isreal(value) and np.isnan(value):
                 row[col_name] = None
         return row
 
+    def _get_rows_as_lists(self, df: pd.DataFrame) -> List[List[Any]]:
+        """
+        Get DataFrame rows as lists of values, missing values (NaN) are converted to None.
+        Same as converting each row with _convert_row_nan_to_none but done for the whole table at once.
+
+        :param df: Target DataFrame
+        :return: List of rows (list of values)
+        """
+        values = df.to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = None
+        return values.tolist()
+
+    @staticmethod
+    def _get_excel_engine() -> Union[str, None]:
+        """
+        Get engine for reading Excel files.
+        Uses calamine if python-calamine is installed because it is much faster than openpyxl,
+        otherwise uses the pandas default engine.
+
+        :return: Engine name or None to use pandas default engine
+        """
+        if importlib.util.find_spec("python_calamine") is not None:
+            return "calamine"
+        return None
+
+    def _read_bundle_settings(self, path_to_dir: str) -> Dict[str, Any]:
+        """
+        Read settings from data bundle directory.
+        Settings are read from file settings.json or settings.toml (TOML requires Python 3.11 or newer).
+        Both files contain a flat mapping of parameter names to values, lists can be given either as
+        comma separated string or as list of strings.
+
+        :param path_to_dir: Path to data bundle directory
+        :return: Dictionary (parameter name to value)
+        """
+        path_to_json = os.path.join(path_to_dir, "settings.json")
+        path_to_toml = os.path.join(path_to_dir, "settings.toml")
+        if os.path.isfile(path_to_json):
+            with open(path_to_json, "r", encoding="utf-8") as fs:
+                settings = json.load(fs)
+        elif os.path.isfile(path_to_toml):
+            try:
+                import tomllib
+            except ImportError:
+                raise Exception("DataProvider: Reading settings.toml requires Python 3.11 or newer, " +
+                                "use settings.json in data bundle {} instead".format(path_to_dir))
+
+            with open(path_to_toml, "rb") as fs:
+                settings = tomllib.load(fs)
+        else:
+            raise Exception("DataProvider: Settings file 'settings.json' or 'settings.toml' not found in {}!".format(
+                path_to_dir))
+
+        if not isinstance(settings, dict):
+            raise Exception("DataProvider: Settings in data bundle {} must be a mapping of parameter names to values!".format(
+                path_to_dir))
+
+        return settings
+
+    def _read_sheet(self, source: Union[pd.ExcelFile, str], sheet_name: str, skiprows: int = None) -> pd.DataFrame:
+        """
+        Read sheet from opened workbook or table from data bundle directory.
+        Data bundle tables are named after the sheet names, e.g. sheet 'Flows' is read from
+        file Flows.csv or Flows.parquet. Parquet files have no rows to skip so skiprows is ignored for them.
+        Raises ValueError if sheet is not found, same as pd.read_excel.
+
+        :param source: Opened workbook or path to data bundle directory
+        :param sheet_name: Name of the sheet
+        :param skiprows: Number of rows to skip before the header row
+        :return: DataFrame
+        """
+        if isinstance(source, pd.ExcelFile):
+            return pd.read_excel(source, sheet_name=sheet_name, skiprows=skiprows)
+
+        if not sheet_name:
+            raise ValueError("No sheet name")
+
+        path_to_csv = os.path.join(source, "{}.csv".format(sheet_name))
+        if os.path.isfile(path_to_csv):
+            return pd.read_csv(path_to_csv, skiprows=skiprows)
+
+        path_to_parquet = os.path.join(source, "{}.parquet".format(sheet_name))
+        if os.path.isfile(path_to_parquet):
+            return pd.read_parquet(path_to_parquet)
+
+        raise ValueError("Table '{}' not found in data bundle {}".format(sheet_name, source))
+
     def _to_bool(self, value: Any) -> bool:
         """
         Check and convert value to bool.
@@ -767,6 +1031,7 @@ class DataProvider(object):
     def _to_list(self, value: Any, sep=',', allowed_chars: List[str] = [":"]) -> List[str]:
         """
         Check and convert value to list of strings.
+        Value can be either string or list of values.
         Default separator is comma (',')
         Returns empty list of conversion is not possible.
 
@@ -775,6 +1040,10 @@ class DataProvider(object):
         """
 
         result = []
+        if isinstance(value, list):
+            # Settings read from data bundles can define lists directly
+            value = sep.join([str(v) for v in value])
+
         if type(value) is not str:
             # float and int are not valid types, just return empty list
             result = []
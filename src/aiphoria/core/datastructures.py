@@ -1,23 +1,71 @@
 from typing import Tuple, List, Union, Dict, Any
 from builtins import float
-import copy
+from functools import lru_cache
+import gc
+import sys
+import numpy as np
 import pandas as pd
 from aiphoria.lib.odym.modules.ODYM_Classes import MFAsystem
 from .parameters import StockDistributionParameterValueType
 from .types import FunctionType, ChangeType
 
 
+def _intern(value: Any) -> Any:
+    """
+    Intern string so that all equal strings (e.g. IDs repeated on every year) share the same object.
+    Other values are returned as is.
+
+    :param value: Target value
+    :return: Interned string or the original value
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+@lru_cache(maxsize=None)
+def _get_slot_names(cls: type) -> Tuple[str, ...]:
+    """
+    Get names of all slots defined in class and its base classes.
+
+    :param cls: Target class
+    :return: Tuple of slot names
+    """
+    slot_names = []
+    for base_cls in reversed(cls.__mro__):
+        for slot_name in base_cls.__dict__.get("__slots__", ()):
+            slot_names.append(slot_name)
+    return tuple(slot_names)
+
+
 class ObjectBase(object):
     """
     Base class for Process, Flow and Stock.
     Keeps track of row number, validity of read row and virtual state.
+    NOTE: Objects use __slots__ to keep the per-object memory low, all instance attributes
+    must be listed in __slots__ of the class.
     """
+    __slots__ = ("_id", "_row_number", "_is_valid", "_is_virtual")
+
     def __init__(self):
         self._id: Union[str, any] = -1
         self._row_number: int = -1
         self._is_valid: bool = False
         self._is_virtual: bool = False
 
+    def _copy_slots_to(self, other: "ObjectBase") -> None:
+        """
+        Copy all slot values (shallow) to other object of the same type.
+        Slots that are not set in this object are left unset.
+
+        :param other: Target object
+        """
+        for slot_name in _get_slot_names(type(self)):
+            try:
+                setattr(other, slot_name, getattr(self, slot_name))
+            except AttributeError:
+                continue
+
     @property
     def is_valid(self) -> bool:
         """
@@ -44,7 +92,7 @@ class ObjectBase(object):
         :param new_id: New ID
         :return: None
         """
-        self._id = new_id
+        self._id = _intern(new_id)
 
     @property
     def row_number(self) -> int:
@@ -87,6 +135,8 @@ class ObjectBase(object):
 
 
 class Indicator(object):
+    __slots__ = ("_name", "_conversion_factor", "_comment", "_unit")
+
     def __init__(self, name: str = None, conversion_factor: float = 1.0, comment: str = None, unit: str = None):
         super().__init__()
         self._name: Union[str, None] = name
@@ -167,10 +217,128 @@ class Indicator(object):
         self._unit = new_unit
 
 
+
+class IndicatorSchema(object):
+    """
+    Indicator names and units shared by all Flows read from the same sheet.
+    Flows store only the conversion factors as array in the same order as names in the schema.
+    Schema is immutable so copying returns the same instance.
+    """
+
+    # Number of columns in Flows sheet before the first indicator column
+    first_indicator_column_index: int = 13
+
+    def __init__(self, names: List[str] = None, units: List[str] = None):
+        if names is None:
+            names = []
+
+        if units is None:
+            units = ["" for _ in names]
+
+        self._names: Tuple[str, ...] = tuple(names)
+        self._units: Tuple[str, ...] = tuple(units)
+        self._name_to_index: Dict[str, int] = {name: index for index, name in enumerate(self._names)}
+        self._hash = hash((self._names, self._units))
+
+    def __len__(self):
+        return len(self._names)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, IndicatorSchema):
+            return NotImplemented
+
+        return self._names == other._names and self._units == other._units
+
+    def __hash__(self):
+        return self._hash
+
+    @staticmethod
+    def from_column_names(column_names: List[str]) -> "IndicatorSchema":
+        """
+        Create IndicatorSchema from Flows sheet column names.
+        Each indicator has two columns (value and comment) and indicator unit is
+        defined inside parentheses in the value column name, e.g. "Carbon (t C)".
+
+        :param column_names: List of Flows sheet column names
+        :return: New IndicatorSchema
+        """
+        indicator_column_names = column_names[IndicatorSchema.first_indicator_column_index:]
+        if len(indicator_column_names) % 2:
+            s = "Not even number of indicator columns in settings file.\n"
+            s += "Each indicator needs two columns (value and comment) in this order."
+            raise Exception(s)
+
+        names = []
+        units = []
+        for indicator_name in indicator_column_names[::2]:
+            # Strip substring inside characters '(' and  ')'
+            # and use that as a unit
+            indicator_name = str(indicator_name)
+            indicator_unit = ""
+            start_index = indicator_name.find("(")
+            end_index = indicator_name.find(")")
+            if start_index >= 0 and end_index >= 0:
+                unit_name = indicator_name[start_index:end_index + 1]
+                indicator_name = indicator_name.replace(unit_name, '').strip()
+                indicator_unit = unit_name[1:-1].strip()
+
+            names.append(indicator_name)
+            units.append(indicator_unit)
+
+        return IndicatorSchema(names, units)
+
+    @staticmethod
+    def from_indicators(indicator_name_to_indicator: Dict[str, Indicator]) -> "IndicatorSchema":
+        """
+        Create IndicatorSchema from Indicator name to Indicator dictionary.
+
+        :param indicator_name_to_indicator: Dictionary (Indicator name to Indicator)
+        :return: New IndicatorSchema
+        """
+        names = list(indicator_name_to_indicator.keys())
+        units = [indicator.unit for indicator in indicator_name_to_indicator.values()]
+        return IndicatorSchema(names, units)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """
+        Get indicator names.
+
+        :return: Tuple of indicator names
+        """
+        return self._names
+
+    @property
+    def units(self) -> Tuple[str, ...]:
+        """
+        Get indicator units, in the same order as names.
+
+        :return: Tuple of indicator units
+        """
+        return self._units
+
+    def get_index(self, name: str) -> int:
+        """
+        Get index of indicator. Raises KeyError if indicator is not in the schema.
+
+        :param name: Indicator name
+        :return: Index of indicator (int)
+        """
+        return self._name_to_index[name]
+
 class StockLifetimeOverride(ObjectBase):
     """
     Storage class to store stock lifetime override parameters.
     """
+    __slots__ = ("_process_id", "_lifetime", "_start_year", "_end_year", "_std_dev", "_shape", "_scale",
+                 "_condition", "_comment")
+
     def __init__(self, params: pd.Series, row_number: int = -1):
         super().__init__()
 
@@ -320,7 +488,12 @@ class Process(ObjectBase):
 
     Used to store data for Process.
     """
-    def __init__(self, params: pd.Series = None, row_number=-1):
+    __slots__ = ("_name", "_location", "_transformation_stage", "_stock_lifetime", "_stock_lifetime_source",
+                 "_stock_distribution_type", "_stock_distribution_params", "_wood_content", "_wood_content_source",
+                 "_density", "_density_source", "_modelling_status", "_comment", "_depth", "_position_x",
+                 "_position_y", "_label_in_graph", "_meta")
+
+    def __init__(self, params: Union[pd.Series, List[Any]] = None, row_number=-1):
         super().__init__()
 
         self._name = None
@@ -348,35 +521,40 @@ class Process(ObjectBase):
             return
 
         # Skip totally empty row
-        if params.isna().all():
+        # NOTE: Row can be also list of values where missing values are None
+        if isinstance(params, pd.Series):
+            if params.isna().all():
+                return
+            params = params.tolist()
+        elif all(value is None for value in params):
             return
 
-        self._name = params.iloc[0]
-        self._location = params.iloc[1]
-        self._id = params.iloc[2]
-        self._transformation_stage = params.iloc[3]
+        self._name = _intern(params[0])
+        self._location = _intern(params[1])
+        self._id = _intern(params[2])
+        self._transformation_stage = _intern(params[3])
 
         # Parse stock lifetime, default to zero if None
-        self._stock_lifetime = self._parse_stock_lifetime(params.iloc[4], row_number)
+        self._stock_lifetime = self._parse_stock_lifetime(params[4], row_number)
 
-        self._stock_lifetime_source = params.iloc[5]
-        self._stock_distribution_type = params.iloc[6]
-        self._stock_distribution_params = params.iloc[7]
+        self._stock_lifetime_source = params[5]
+        self._stock_distribution_type = params[6]
+        self._stock_distribution_params = params[7]
 
         # Parse stock distribution parameters
         # NOTE: Event invalid key-value -pairs are stored to _stock_distribution_params after parsin
         # and those are checked in datachecker
-        self._parse_and_set_distribution_params(params.iloc[7])
-
-        self._wood_content = params.iloc[8]
-        self._wood_content_source = params.iloc[9]
-        self._density = params.iloc[10]
-        self._density_source = params.iloc[11]
-        self._modelling_status = params.iloc[12]
-        self._comment = params.iloc[13]
-        self._position_x = params.iloc[14]
-        self._position_y = params.iloc[15]
-        self._label_in_graph = params.iloc[16]
+        self._parse_and_set_distribution_params(params[7])
+
+        self._wood_content = params[8]
+        self._wood_content_source = params[9]
+        self._density = params[10]
+        self._density_source = params[11]
+        self._modelling_status = params[12]
+        self._comment = params[13]
+        self._position_x = params[14]
+        self._position_y = params[15]
+        self._label_in_graph = params[16]
         self._row_number = row_number
         self._meta = {}
 
@@ -548,6 +726,22 @@ class Process(ObjectBase):
     def meta(self, value: Dict[Any, Any]) -> None:
         self._meta = value
 
+    def create_copy(self) -> "Process":
+        """
+        Create copy of Process that can be modified independently of this Process.
+        Much faster than copy.deepcopy because only the dictionaries are copied,
+        all other values are immutable and shared with this Process.
+
+        :return: New Process
+        """
+        new_process = Process.__new__(Process)
+        self._copy_slots_to(new_process)
+        if isinstance(self._stock_distribution_params, dict):
+            new_process._stock_distribution_params = dict(self._stock_distribution_params)
+        if getattr(self, "_meta", None) is not None:
+            new_process._meta = dict(self._meta)
+        return new_process
+
     def _parse_stock_lifetime(self, s: str, row_number: int = -1):
         """
         Parse stock lifetime from string.
@@ -632,9 +826,19 @@ class Flow(ObjectBase):
 
     Used to store data for Flow.
     """
-    def __init__(self, params: pd.Series = None, row_number=-1):
+    __slots__ = ("_source_process", "_source_process_transformation_stage", "_source_process_location",
+                 "_target_process", "_target_process_transformation_stage", "_target_process_location",
+                 "_source_process_id", "_target_process_id", "_value", "_unit", "_year", "_data_source",
+                 "_data_source_comment", "_comment", "_is_evaluated", "_evaluated_share", "_evaluated_value",
+                 "_indicator_schema", "_indicator_conversion_factors", "_indicator_comments",
+                 "_indicator_name_to_evaluated_value", "_is_prioritized")
+
+    def __init__(self, params: Union[pd.Series, List[Any]] = None, row_number=-1,
+                 column_names: List[str] = None, indicator_schema: IndicatorSchema = None):
         super().__init__()
 
+        # Flow ID is created from source and target Process IDs when needed
+        self._id = None
         self._source_process = None
         self._source_process_transformation_stage = None
         self._source_process_location = None
@@ -655,8 +859,11 @@ class Flow(ObjectBase):
         self._evaluated_share = 0.0
         self._evaluated_value = 0.0
 
-        # Indicator name to Indicator
-        self._indicator_name_to_indicator = {}
+        # Indicator names and units are shared through the schema,
+        # conversion factors and comments are in the same order as names in the schema
+        self._indicator_schema = IndicatorSchema()
+        self._indicator_conversion_factors = np.zeros(0, dtype=np.float64)
+        self._indicator_comments = ()
         self._indicator_name_to_evaluated_value = {}
 
         # Flow prioritization
@@ -666,56 +873,52 @@ class Flow(ObjectBase):
             return
 
         # Skip totally empty row
-        if params.isna().all():
+        # NOTE: Row can be also list of values where missing values are None,
+        # column names are then needed for indicator names and units
+        if isinstance(params, pd.Series):
+            if params.isna().all():
+                return
+            column_names = list(params.index)
+            params = params.tolist()
+        elif all(value is None for value in params):
             return
 
-        self._source_process = params.iloc[0]
-        self._source_process_transformation_stage = params.iloc[1]
-        self._source_process_location = params.iloc[2]
-        self._target_process = params.iloc[3]
-        self._target_process_transformation_stage = params.iloc[4]
-        self._target_process_location = params.iloc[5]
-        self._source_process_id = params.iloc[6]
-        self._target_process_id = params.iloc[7]
-        self._value = params.iloc[8]
-        self._unit = params.iloc[9]
-        self._year = int(params.iloc[10])
-        self._data_source = params.iloc[11]
-        self._data_source_comment = params.iloc[12]
-
-        # Rest of the elements except last element are indicators
-        # There should be even number of indicators because each indicator has value and comment
-        first_indicator_index = 13
+        # NOTE: Names, IDs and units are repeated on every year so those are interned
+        self._source_process = _intern(params[0])
+        self._source_process_transformation_stage = _intern(params[1])
+        self._source_process_location = _intern(params[2])
+        self._target_process = _intern(params[3])
+        self._target_process_transformation_stage = _intern(params[4])
+        self._target_process_location = _intern(params[5])
+        self._source_process_id = _intern(params[6])
+        self._target_process_id = _intern(params[7])
+        self._value = params[8]
+        self._unit = _intern(params[9])
+        self._year = int(params[10])
+        self._data_source = _intern(params[11])
+        self._data_source_comment = params[12]
+
+        # Rest of the elements are indicators, each indicator has value and comment
+        if indicator_schema is None:
+            if column_names is not None:
+                indicator_schema = IndicatorSchema.from_column_names(column_names)
+            else:
+                indicator_schema = IndicatorSchema()
+
+        first_indicator_index = IndicatorSchema.first_indicator_column_index
         indicators = params[first_indicator_index:]
-        if len(indicators) % 2:
+        if len(indicators) != 2 * len(indicator_schema):
             s = "Not even number of indicator columns in settings file.\n"
             s += "Each indicator needs two columns (value and comment) in this order."
             raise Exception(s)
 
-        # Build indicator name to Indicator mappings
-        for i in range(0, len(indicators), 2):
-            indicator_name = indicators.index[i]
-            conversion_factor = indicators.iloc[i]
-            comment = indicators.iloc[i+1]
-
-            # Strip substring inside characters '(' and  ')'
-            # and use that as a unit
-            indicator_unit = ""
-            start_index = indicator_name.find("(")
-            end_index = indicator_name.find(")")
-            if start_index >= 0 and end_index >= 0:
-                unit_name = indicator_name[start_index:end_index + 1]
-                indicator_name = indicator_name.replace(unit_name, '').strip()
-                indicator_unit = unit_name[1:-1].strip()
-
-            # NOTE: Set indicator conversion factor to 0.0
-            # if not defined in the settings file
-            if conversion_factor is None:
-                conversion_factor = 0.0
-
-            new_indicator = Indicator(indicator_name, conversion_factor, comment, indicator_unit)
-            self._indicator_name_to_indicator[indicator_name] = new_indicator
-            self._indicator_name_to_evaluated_value[indicator_name] = 0.0
+        # NOTE: Set indicator conversion factor to 0.0
+        # if not defined in the settings file
+        conversion_factors = [0.0 if value is None else value for value in indicators[::2]]
+        self._indicator_schema = indicator_schema
+        self._indicator_conversion_factors = self._to_conversion_factor_array(conversion_factors)
+        self._indicator_comments = tuple(indicators[1::2])
+        self._indicator_name_to_evaluated_value = dict.fromkeys(indicator_schema.names, 0.0)
 
         self._row_number = row_number  # Track Excel file row number
 
@@ -755,7 +958,9 @@ class Flow(ObjectBase):
 
         :return: Flow ID (string)
         """
-        return Flow.make_flow_id(self.source_process_id, self.target_process_id)
+        if self._id is None:
+            self._id = sys.intern(Flow.make_flow_id(self.source_process_id, self.target_process_id))
+        return self._id
 
     def is_valid(self):
         is_valid = True
@@ -827,7 +1032,8 @@ class Flow(ObjectBase):
 
         :param source_process_id: Source Process ID (str)
         """
-        self._source_process_id = source_process_id
+        self._source_process_id = _intern(source_process_id)
+        self._id = None
 
     @property
     def target_process_id(self) -> str:
@@ -845,7 +1051,8 @@ class Flow(ObjectBase):
 
         :param target_process_id: New target Process ID
         """
-        self._target_process_id = target_process_id
+        self._target_process_id = _intern(target_process_id)
+        self._id = None
 
     # Original value from Excel row
     @property
@@ -948,19 +1155,69 @@ class Flow(ObjectBase):
 
     @property
     def indicator_name_to_indicator(self) -> Dict[str, Indicator]:
-        return self._indicator_name_to_indicator
+        """
+        Get Indicator name to Indicator dictionary.
+        Indicator-objects are created from the indicator schema and conversion factors on every call,
+        use set_indicator_conversion_factor to change the conversion factors of this Flow.
+
+        :return: Dictionary (Indicator name to Indicator)
+        """
+        result = {}
+        for index, (name, unit) in enumerate(zip(self._indicator_schema.names, self._indicator_schema.units)):
+            comment = self._indicator_comments[index] if self._indicator_comments else None
+            conversion_factor = self._indicator_conversion_factors[index]
+            if isinstance(conversion_factor, np.generic):
+                conversion_factor = conversion_factor.item()
+            result[name] = Indicator(name, conversion_factor, comment, unit)
+        return result
+
+    @property
+    def indicator_schema(self) -> IndicatorSchema:
+        """
+        Get IndicatorSchema (indicator names and units) of this Flow.
+
+        :return: IndicatorSchema
+        """
+        return self._indicator_schema
+
+    @property
+    def indicator_conversion_factors(self) -> np.ndarray:
+        """
+        Get indicator conversion factors in the same order as names in the indicator schema.
+        Array has object dtype if any of the conversion factors could not be converted to float.
+        NOTE: Array can be shared with copies of this Flow, do not modify.
+
+        :return: Numpy array of conversion factors
+        """
+        return self._indicator_conversion_factors
 
     @property
     def indicator_name_to_evaluated_value(self) -> Dict[str, float]:
         return self._indicator_name_to_evaluated_value
 
+    def set_indicators(self, indicator_schema: IndicatorSchema, conversion_factors: List[float] = None):
+        """
+        Set indicator schema and conversion factors of this Flow.
+        Evaluated indicator values are reset to 0.0.
+
+        :param indicator_schema: IndicatorSchema
+        :param conversion_factors: List of conversion factors in the same order as in schema (default: all 0.0)
+        """
+        if conversion_factors is None:
+            conversion_factors = [0.0] * len(indicator_schema)
+
+        self._indicator_schema = indicator_schema
+        self._indicator_conversion_factors = self._to_conversion_factor_array(conversion_factors)
+        self._indicator_comments = ()
+        self._indicator_name_to_evaluated_value = dict.fromkeys(indicator_schema.names, 0.0)
+
     def get_indicator_names(self) -> List[str]:
         """
         Get list of Indicator names (including baseline indicator name).
 
         :return: List of Indicator names
         """
-        return list(self._indicator_name_to_indicator.keys())
+        return list(self._indicator_schema.names)
 
     def get_indicator_units(self) -> List[str]:
         """
@@ -968,19 +1225,46 @@ class Flow(ObjectBase):
 
         :return: List of Indicator unit names
         """
-        indicator_units = []
-        for indicator_name, indicator in self._indicator_name_to_indicator.items():
-            indicator_units.append(indicator.unit)
-
-        return indicator_units
+        return list(self._indicator_schema.units)
 
     def get_indicator_conversion_factor(self, indicator_name: str) -> float:
         """
+        Get conversion factor for Indicator.
+
+        :param indicator_name: Target Indicator name (str)
+        :return: Conversion factor
+        """
+        conversion_factor = self._indicator_conversion_factors[self._indicator_schema.get_index(indicator_name)]
+        if isinstance(conversion_factor, np.generic):
+            conversion_factor = conversion_factor.item()
+        return conversion_factor
 
-        :param indicator_name:
-        :return:
+    def set_indicator_conversion_factor(self, indicator_name: str, conversion_factor: float):
         """
-        return self._indicator_name_to_indicator[indicator_name].conversion_factor
+        Set conversion factor for Indicator.
+        Conversion factors are copied before modifying because copies of Flow share the conversion factors.
+
+        :param indicator_name: Target Indicator name (str)
+        :param conversion_factor: New conversion factor
+        """
+        conversion_factors = self._indicator_conversion_factors.tolist()
+        conversion_factors[self._indicator_schema.get_index(indicator_name)] = conversion_factor
+        self._indicator_conversion_factors = self._to_conversion_factor_array(conversion_factors)
+
+    @staticmethod
+    def _to_conversion_factor_array(conversion_factors: List[Any]) -> np.ndarray:
+        """
+        Convert list of conversion factors to float array.
+        If any of the values is not convertible to float then array has object dtype
+        and values are kept as they are so that DataChecker can report them.
+
+        :param conversion_factors: List of conversion factors
+        :return: Numpy array
+        """
+        try:
+            return np.array(conversion_factors, dtype=np.float64)
+        except (ValueError, TypeError):
+            return np.array(conversion_factors, dtype=object)
 
     def get_evaluated_value_for_indicator(self, indicator_name: str) -> float:
         """
@@ -1004,9 +1288,9 @@ class Flow(ObjectBase):
         """
         Evaluated indicator evaluated value from baseline value.
         """
-        for indicator_name, indicator in self._indicator_name_to_indicator.items():
-            evaluated_value = self.evaluated_value * indicator.conversion_factor
-            self.set_evaluated_value_for_indicator(indicator_name, evaluated_value)
+        evaluated_values = self.evaluated_value * self._indicator_conversion_factors
+        for indicator_name, evaluated_value in zip(self._indicator_schema.names, evaluated_values.tolist()):
+            self._indicator_name_to_evaluated_value[indicator_name] = evaluated_value
 
     def get_all_evaluated_values(self) -> List[float]:
         """
@@ -1019,6 +1303,18 @@ class Flow(ObjectBase):
 
         return [self.evaluated_value] + [value for name, value in self.indicator_name_to_evaluated_value.items()]
 
+    def create_copy(self) -> "Flow":
+        """
+        Create copy of Flow that can be modified independently of this Flow.
+        Indicator schema and conversion factors are shared with this Flow.
+
+        :return: New Flow
+        """
+        new_flow = Flow.__new__(Flow)
+        self._copy_slots_to(new_flow)
+        new_flow._indicator_name_to_evaluated_value = dict(self._indicator_name_to_evaluated_value)
+        return new_flow
+
 
 # Stock is created for each process that has lifetime
 class Stock(ObjectBase):
@@ -1027,6 +1323,8 @@ class Stock(ObjectBase):
 
     Used to store data for Stock.
     """
+    __slots__ = ("_process", "_stock_lifetime_overrides", "_year_to_stock_lifetime_override_entry_index")
+
     def __init__(self, params: Process = None, row_number=-1):
         super().__init__()
         self._process = None
@@ -1145,6 +1443,10 @@ class FlowModifier(ObjectBase):
 
     Used to store data for scenario related flow modifications.
     """
+    __slots__ = ("_scenario_name", "_source_process_id", "_target_process_id", "_change_in_value",
+                 "_target_value", "_change_type", "_start_year", "_end_year", "_function_type",
+                 "_apply_to_targets", "_opposite_target_process_ids")
+
     def __init__(self, params: pd.Series = None):
         super().__init__()
 
@@ -1181,8 +1483,8 @@ class FlowModifier(ObjectBase):
         param_apply_to_targets = params.iloc[9]
 
         self._scenario_name = self._parse_as(param_scenario_name, str)[0]
-        self._source_process_id = self._parse_as(param_source_process_id, str)[0]
-        self._target_process_id = self._parse_as(param_target_process_id, str)[0]
+        self._source_process_id = _intern(self._parse_as(param_source_process_id, str)[0])
+        self._target_process_id = _intern(self._parse_as(param_target_process_id, str)[0])
 
         # This is the delta change of the value and means that it's error
         # if target flow has ABS type and the 'change in value' is REL
@@ -1596,6 +1898,67 @@ class ScenarioData(object):
         """
         self._indicator_name_to_indicator = new_indicator_name_to_indicator
 
+    def create_copy(self) -> "ScenarioData":
+        """
+        Create copy of ScenarioData for alternative Scenario.
+        FlowSolver and FlowModifierSolver only modify Flows and the year/Process/Flow mappings (e.g. when
+        adding and removing virtual Processes and Flows) so only those are copied. Processes, Stocks and
+        Indicators are shared with this ScenarioData instead of deep copying everything.
+
+        :return: New ScenarioData
+        """
+        # Creating lots of small objects triggers the cyclic garbage collector repeatedly
+        # although nothing here creates reference cycles, so pause it while copying
+        is_gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._create_copy()
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+
+    def _create_copy(self) -> "ScenarioData":
+        # Flow-object ID -> copied Flow, keeps the same Flow shared between
+        # yearly Flows and unique Flows also shared in the copy
+        flow_id_to_new_flow = {}
+
+        def copy_flow(flow: Flow) -> Flow:
+            new_flow = flow_id_to_new_flow.get(id(flow), None)
+            if new_flow is None:
+                new_flow = flow.create_copy()
+                flow_id_to_new_flow[id(flow)] = new_flow
+            return new_flow
+
+        year_to_flow_id_to_flow = {}
+        for year, flow_id_to_flow in self._year_to_flow_id_to_flow.items():
+            year_to_flow_id_to_flow[year] = {flow_id: copy_flow(flow) for flow_id, flow in flow_id_to_flow.items()}
+
+        year_to_process_id_to_flow_ids = {}
+        for year, process_id_to_flow_ids in self._year_to_process_id_to_flow_ids.items():
+            year_to_process_id_to_flow_ids[year] = {
+                process_id: {direction: list(flow_ids) for direction, flow_ids in flow_ids_by_direction.items()}
+                for process_id, flow_ids_by_direction in process_id_to_flow_ids.items()
+            }
+
+        year_to_process_id_to_process = {year: dict(process_id_to_process) for year, process_id_to_process
+                                         in self._year_to_process_id_to_process.items()}
+        unique_flow_id_to_flow = {flow_id: copy_flow(flow) for flow_id, flow in self._unique_flow_id_to_flow.items()}
+
+        return ScenarioData(years=list(self._years),
+                            year_to_process_id_to_process=year_to_process_id_to_process,
+                            year_to_process_id_to_flow_ids=year_to_process_id_to_flow_ids,
+                            year_to_flow_id_to_flow=year_to_flow_id_to_flow,
+                            stocks=list(self._stocks),
+                            process_id_to_stock=dict(self._process_id_to_stock),
+                            unique_process_id_to_process=dict(self._unique_process_id_to_process),
+                            unique_flow_id_to_flow=unique_flow_id_to_flow,
+                            use_virtual_flows=self._use_virtual_flows,
+                            virtual_flows_epsilon=self._virtual_flows_epsilon,
+                            baseline_value_name=self._baseline_value_name,
+                            baseline_unit_name=self._baseline_unit_name,
+                            indicator_name_to_indicator=dict(self._indicator_name_to_indicator),
+                            )
+
 
 class ScenarioDefinition(object):
     """
@@ -1705,14 +2068,17 @@ class Scenario(object):
     def copy_from_baseline_scenario_data(self, scenario_data: ScenarioData):
         """
         Copy ScenarioData from baseline Scenario.
-        Data is deep copied and is not referencing to original data anymore.
+        Flows and mappings are copied and are not referencing to original data anymore,
+        Processes, Stocks and Indicators are shared (see ScenarioData.create_copy).
 
         :param scenario_data: ScenarioData from baseline FlowSolver.
         """
-        self._scenario_data = copy.deepcopy(scenario_data)
+        self._scenario_data = scenario_data.create_copy()
 
 
 class Color(ObjectBase):
+    __slots__ = ("_name", "_value")
+
     def __init__(self, params: Union[List, pd.Series] = None, row_number=-1):
         super().__init__()
         self._name: str = ""
@@ -1815,7 +2181,7 @@ class Color(ObjectBase):
 class ProcessEntry(object):
     """
     Internal storage class for Process entry (process, inflows, and outflows).
-    Used when storing Process data in DataFrames.
+    Used when storing Process data in YearTable.
     """
 
     KEY_IN: str = "in"
@@ -1895,3 +2261,219 @@ class ProcessEntry(object):
         removed_flow_id = self._flows[self.KEY_OUT].pop(flow_id, None)
         if not removed_flow_id:
             raise Exception("No flow_id {} in outflows".format(flow_id))
+
+
+class YearTable(object):
+    """
+    Internal storage class for objects indexed by year and ID (e.g. Flow ID or Process ID).
+    Years and IDs are mapped to dense integer indices, existence of the objects is stored
+    in boolean array (rows: years, columns: IDs) and the objects are stored in lists, one list for each year.
+    Used by DataChecker instead of DataFrames with object-dtype cells.
+    """
+
+    def __init__(self, years: List[int] = None, ids: List[str] = None):
+        if years is None:
+            years = []
+
+        if ids is None:
+            ids = []
+
+        self._years: List[int] = list(years)
+        self._ids: List[str] = list(ids)
+        self._year_to_index: Dict[int, int] = {year: index for index, year in enumerate(self._years)}
+        self._id_to_index: Dict[str, int] = {object_id: index for index, object_id in enumerate(self._ids)}
+        self._has_data = np.zeros((len(self._years), len(self._ids)), dtype=bool)
+        self._objects: List[List[Any]] = [[None] * len(self._ids) for _ in self._years]
+
+    @property
+    def years(self) -> List[int]:
+        """
+        Get years (rows).
+
+        :return: List of years
+        """
+        return self._years
+
+    @property
+    def ids(self) -> List[str]:
+        """
+        Get IDs (columns).
+
+        :return: List of IDs
+        """
+        return self._ids
+
+    @property
+    def has_data(self) -> np.ndarray:
+        """
+        Get existence of objects as boolean array (rows: years, columns: IDs).
+        NOTE: Do not modify the returned array, use set and remove instead.
+
+        :return: Numpy array (bool)
+        """
+        return self._has_data
+
+    def has_year(self, year: int) -> bool:
+        """
+        Check if year is in YearTable.
+
+        :param year: Target year
+        :return: True if year is in YearTable, False otherwise
+        """
+        return year in self._year_to_index
+
+    def has_id(self, object_id: str) -> bool:
+        """
+        Check if ID is in YearTable.
+
+        :param object_id: Target ID
+        :return: True if ID is in YearTable, False otherwise
+        """
+        return object_id in self._id_to_index
+
+    def get_year_index(self, year: int) -> int:
+        """
+        Get row index for year.
+
+        :param year: Target year
+        :return: Row index
+        """
+        return self._year_to_index[year]
+
+    def get_id_index(self, object_id: str) -> int:
+        """
+        Get column index for ID.
+
+        :param object_id: Target ID
+        :return: Column index
+        """
+        return self._id_to_index[object_id]
+
+    def get(self, year: int, object_id: str) -> Any:
+        """
+        Get object for year and ID.
+
+        :param year: Target year
+        :param object_id: Target ID
+        :return: Object or None if there is no object for year and ID
+        """
+        return self._objects[self._year_to_index[year]][self._id_to_index[object_id]]
+
+    def set(self, year: int, object_id: str, obj: Any) -> None:
+        """
+        Set object for year and ID.
+
+        :param year: Target year
+        :param object_id: Target ID
+        :param obj: Object
+        """
+        year_index = self._year_to_index[year]
+        id_index = self._id_to_index[object_id]
+        self._objects[year_index][id_index] = obj
+        self._has_data[year_index, id_index] = True
+
+    def remove(self, year: int, object_id: str) -> None:
+        """
+        Remove object for year and ID.
+
+        :param year: Target year
+        :param object_id: Target ID
+        """
+        year_index = self._year_to_index[year]
+        id_index = self._id_to_index[object_id]
+        self._objects[year_index][id_index] = None
+        self._has_data[year_index, id_index] = False
+
+    def get_by_index(self, year_index: int, id_index: int) -> Any:
+        """
+        Get object using row and column indices.
+
+        :param year_index: Row index
+        :param id_index: Column index
+        :return: Object or None if there is no object
+        """
+        return self._objects[year_index][id_index]
+
+    def set_by_index(self, year_index: int, id_index: int, obj: Any) -> None:
+        """
+        Set object using row and column indices.
+
+        :param year_index: Row index
+        :param id_index: Column index
+        :param obj: Object
+        """
+        self._objects[year_index][id_index] = obj
+        self._has_data[year_index, id_index] = True
+
+    def remove_by_index(self, year_index: int, id_index: int) -> None:
+        """
+        Remove object using row and column indices.
+
+        :param year_index: Row index
+        :param id_index: Column index
+        """
+        self._objects[year_index][id_index] = None
+        self._has_data[year_index, id_index] = False
+
+    def get_year_items(self, year: int) -> List[Tuple[str, Any]]:
+        """
+        Get all existing objects for year.
+
+        :param year: Target year
+        :return: List of tuples (ID, object)
+        """
+        year_index = self._year_to_index[year]
+        objects = self._objects[year_index]
+        return [(self._ids[id_index], objects[id_index]) for id_index in np.flatnonzero(self._has_data[year_index])]
+
+    def get_id_items(self, object_id: str) -> List[Tuple[int, Any]]:
+        """
+        Get all existing objects for ID.
+
+        :param object_id: Target ID
+        :return: List of tuples (year, object)
+        """
+        id_index = self._id_to_index[object_id]
+        year_indices = np.flatnonzero(self._has_data[:, id_index])
+        return [(self._years[year_index], self._objects[year_index][id_index]) for year_index in year_indices]
+
+    def items(self) -> List[Tuple[int, str, Any]]:
+        """
+        Get all existing objects ordered by year and then by ID.
+
+        :return: List of tuples (year, ID, object)
+        """
+        result = []
+        for year_index, id_index in zip(*np.nonzero(self._has_data)):
+            result.append((self._years[year_index], self._ids[id_index], self._objects[year_index][id_index]))
+        return result
+
+    def get_values(self, attribute_name: str, dtype: Any = np.float64, default_value: Any = np.nan) -> np.ndarray:
+        """
+        Get attribute of all existing objects as array (rows: years, columns: IDs).
+        Cells without object have default value.
+
+        :param attribute_name: Name of the object attribute (e.g. "value")
+        :param dtype: Array dtype
+        :param default_value: Value for cells without object
+        :return: Numpy array
+        """
+        result = np.full(self._has_data.shape, default_value, dtype=dtype)
+        for year_index, id_index in zip(*np.nonzero(self._has_data)):
+            result[year_index, id_index] = getattr(self._objects[year_index][id_index], attribute_name)
+        return result
+
+    def copy(self) -> "YearTable":
+        """
+        Create copy of YearTable. Objects are shared with this YearTable.
+
+        :return: New YearTable
+        """
+        new_table = YearTable.__new__(YearTable)
+        new_table._years = self._years
+        new_table._ids = self._ids
+        new_table._year_to_index = self._year_to_index
+        new_table._id_to_index = self._id_to_index
+        new_table._has_data = self._has_data.copy()
+        new_table._objects = [list(objects) for objects in self._objects]
+        return new_table
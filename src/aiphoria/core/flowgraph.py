@@ -0,0 +1,350 @@
+from typing import Dict, List
+import numpy as np
+import scipy.sparse
+import scipy.sparse.csgraph
+
+from .datastructures import Flow
+
+
+class FlowGraphTopology(object):
+    """
+    Structure of Processes and Flows for a single year.
+
+    Process IDs and Flow IDs are mapped to dense integer indices and Process inflows and outflows
+    are stored as CSR (compressed sparse row) adjacency arrays. Years that have the same structure
+    (same Processes, same Flows between the Processes and same absolute/relative Flows) share
+    the same FlowGraphTopology, see make_key.
+    """
+
+    def __init__(self,
+                 process_id_to_flow_ids: Dict[str, Dict[str, List[str]]],
+                 flow_id_to_flow: Dict[str, Flow]):
+        """
+        Compile year structure to FlowGraphTopology.
+
+        :param process_id_to_flow_ids: Dictionary (Process ID -> Dictionary (keys "in", "out") -> List of Flow IDs)
+        :param flow_id_to_flow: Dictionary (Flow ID -> Flow)
+        """
+        # Processes
+        self.process_ids = list(process_id_to_flow_ids.keys())
+        self.process_id_to_index = {process_id: index for index, process_id in enumerate(self.process_ids)}
+
+        # Flows, ordered by source Process
+        self.flow_ids = []
+        for process_id in self.process_ids:
+            outflow_ids = process_id_to_flow_ids[process_id]["out"]
+            if outflow_ids:
+                self.flow_ids += outflow_ids
+        self.flow_id_to_index = {flow_id: index for index, flow_id in enumerate(self.flow_ids)}
+
+        # Adjacency arrays: inflows/outflows of Process at index i are flow indices
+        # in range [indptr[i], indptr[i + 1]) of the indices-array
+        self.in_indptr, self.in_indices = self._build_csr(process_id_to_flow_ids, "in")
+        self.out_indptr, self.out_indices = self._build_csr(process_id_to_flow_ids, "out")
+
+        num_flows = len(self.flow_ids)
+        self.flow_source = np.zeros(num_flows, dtype=np.int64)
+        self.flow_source[self.out_indices] = np.repeat(np.arange(self.num_processes), np.diff(self.out_indptr))
+        self.flow_target = np.zeros(num_flows, dtype=np.int64)
+        self.flow_target[self.in_indices] = np.repeat(np.arange(self.num_processes), np.diff(self.in_indptr))
+        self.is_absolute = np.array([flow_id_to_flow[flow_id].is_unit_absolute_value for flow_id in self.flow_ids],
+                                    dtype=bool)
+
+        # Root processes have no inflows and leaf processes have no outflows
+        self.is_root_process = np.diff(self.in_indptr) == 0
+        self.is_leaf_process = np.diff(self.out_indptr) == 0
+
+        # Stock processes (bytes) -> Tuple (evaluation order, unsolvable Process indices)
+        self._stock_key_to_evaluation_order = {}
+
+    @staticmethod
+    def make_key(process_id_to_flow_ids: Dict[str, Dict[str, List[str]]], flow_id_to_flow: Dict[str, Flow])\
+            -> tuple:
+        """
+        Make structural key for year data.
+        Years that have the same key have the same FlowGraphTopology.
+
+        :param process_id_to_flow_ids: Dictionary (Process ID -> Dictionary (keys "in", "out") -> List of Flow IDs)
+        :param flow_id_to_flow: Dictionary (Flow ID -> Flow)
+        :return: Structural key (tuple)
+        """
+        key = []
+        for process_id, flow_ids in process_id_to_flow_ids.items():
+            inflow_ids = tuple(flow_ids["in"]) if flow_ids["in"] else ()
+            outflow_ids = tuple(flow_ids["out"]) if flow_ids["out"] else ()
+            is_outflow_abs = tuple([flow_id_to_flow[flow_id].is_unit_absolute_value for flow_id in outflow_ids])
+            key.append((process_id, inflow_ids, outflow_ids, is_outflow_abs))
+        return tuple(key)
+
+    @property
+    def num_processes(self) -> int:
+        """
+        Get number of Processes.
+
+        :return: Number of Processes (int)
+        """
+        return len(self.process_ids)
+
+    @property
+    def num_flows(self) -> int:
+        """
+        Get number of Flows.
+
+        :return: Number of Flows (int)
+        """
+        return len(self.flow_ids)
+
+    def get_inflow_indices(self, process_index: int) -> np.ndarray:
+        """
+        Get inflow indices for Process.
+
+        :param process_index: Process index
+        :return: Array of Flow indices
+        """
+        return self.in_indices[self.in_indptr[process_index]:self.in_indptr[process_index + 1]]
+
+    def get_outflow_indices(self, process_index: int) -> np.ndarray:
+        """
+        Get outflow indices for Process.
+
+        :param process_index: Process index
+        :return: Array of Flow indices
+        """
+        return self.out_indices[self.out_indptr[process_index]:self.out_indptr[process_index + 1]]
+
+    def get_root_process_indices(self) -> np.ndarray:
+        """
+        Get indices of Processes that have no inflows.
+
+        :return: Array of Process indices
+        """
+        return np.flatnonzero(self.is_root_process)
+
+    def get_evaluation_order(self, is_stock_process: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get Process evaluation order using topological sorting (Kahn's algorithm).
+
+        Process can be evaluated when all relative inflows to the Process are evaluated, absolute
+        flows are known at the start of the timestep. Relative outflows from Processes with stocks
+        are evaluated from the stock outflows at the start of the timestep, so those are used for
+        ordering Processes but are ignored if they are part of a loop. Loops that contain only
+        other relative flows can not be evaluated.
+        Only Processes reachable from the root Processes are evaluated.
+
+        Evaluation order is computed once for each set of stock Processes.
+
+        :param is_stock_process: Boolean array, True if Process at the index has stock
+        :return: Tuple (Process indices in evaluation order, Process indices that can not be evaluated)
+        """
+        stock_key = is_stock_process.tobytes()
+        if stock_key not in self._stock_key_to_evaluation_order:
+            self._stock_key_to_evaluation_order[stock_key] = self._compute_evaluation_order(is_stock_process)
+
+        return self._stock_key_to_evaluation_order[stock_key]
+
+    def _compute_evaluation_order(self, is_stock_process: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Compute Process evaluation order, see get_evaluation_order.
+
+        :param is_stock_process: Boolean array, True if Process at the index has stock
+        :return: Tuple (Process indices in evaluation order, Process indices that can not be evaluated)
+        """
+        num_processes = self.num_processes
+        flow_source = self.flow_source
+        flow_target = self.flow_target
+
+        # Processes reachable from the root processes
+        is_reachable = np.zeros(num_processes, dtype=bool)
+        is_frontier = np.zeros(num_processes, dtype=bool)
+        is_frontier[self.get_root_process_indices()] = True
+        while is_frontier.any():
+            is_reachable |= is_frontier
+            is_frontier = np.zeros(num_processes, dtype=bool)
+            is_frontier[flow_target[is_reachable[flow_source]]] = True
+            is_frontier &= ~is_reachable
+
+        # Dependencies between Processes are relative flows. Relative stock outflows from
+        # Processes that are never evaluated are already evaluated from the stock outflows
+        is_relative = ~self.is_absolute
+        is_stock_outflow = is_relative & is_stock_process[flow_source]
+        is_dependency = is_relative & is_reachable[flow_target]
+        is_dependency &= ~(is_stock_outflow & ~is_reachable[flow_source])
+
+        # Ignore stock outflows that are part of the loop (= source and target Process
+        # are in the same strongly connected component)
+        dependency_indices = np.flatnonzero(is_dependency)
+        adjacency = scipy.sparse.csr_matrix(
+            (np.ones(len(dependency_indices)), (flow_source[dependency_indices], flow_target[dependency_indices])),
+            shape=(num_processes, num_processes))
+        _, component = scipy.sparse.csgraph.connected_components(adjacency, directed=True, connection="strong")
+        is_dependency &= ~(is_stock_outflow & (component[flow_source] == component[flow_target]))
+
+        # Evaluate Processes level by level, Processes on the same level do not depend on each other
+        in_degree = np.bincount(flow_target[is_dependency], minlength=num_processes)
+        is_done = ~is_reachable
+        levels = []
+        while True:
+            is_ready = ~is_done & (in_degree == 0)
+            if not is_ready.any():
+                break
+
+            levels.append(np.flatnonzero(is_ready))
+            is_done |= is_ready
+            is_resolved = is_dependency & is_ready[flow_source]
+            in_degree -= np.bincount(flow_target[is_resolved], minlength=num_processes)
+
+        process_order = np.concatenate(levels) if levels else np.zeros(0, dtype=np.int64)
+        return process_order, np.flatnonzero(~is_done)
+
+    def _build_csr(self, process_id_to_flow_ids: Dict[str, Dict[str, List[str]]], key: str)\
+            -> tuple[np.ndarray, np.ndarray]:
+        """
+        Build CSR adjacency arrays for Process inflows or outflows.
+
+        :param process_id_to_flow_ids: Dictionary (Process ID -> Dictionary (keys "in", "out") -> List of Flow IDs)
+        :param key: "in" for inflows, "out" for outflows
+        :return: Tuple (indptr, indices)
+        """
+        indptr = np.zeros(len(self.process_ids) + 1, dtype=np.int64)
+        indices = []
+        for process_index, process_id in enumerate(self.process_ids):
+            flow_ids = process_id_to_flow_ids[process_id][key]
+            if flow_ids:
+                indices += [self.flow_id_to_index[flow_id] for flow_id in flow_ids]
+            indptr[process_index + 1] = len(indices)
+
+        return indptr, np.array(indices, dtype=np.int64)
+
+
+class FlowGraph(object):
+    """
+    Integer-indexed representation of Processes and Flows for a single year.
+
+    Structure of the year is stored in shared FlowGraphTopology and Flow state (value, share,
+    prioritized, evaluated) is stored as NumPy vectors. FlowSolver evaluates timestep using
+    these arrays and writes the results back to Flow-objects with sync_to_flows().
+    """
+
+    def __init__(self,
+                 topology: FlowGraphTopology,
+                 flow_id_to_flow: Dict[str, Flow],
+                 indicator_names: List[str]):
+        """
+        Create FlowGraph for year data.
+        Values are read from the Flows so Flows must be prepared for the timestep before creating FlowGraph.
+
+        :param topology: FlowGraphTopology of the year
+        :param flow_id_to_flow: Dictionary (Flow ID -> Flow)
+        :param indicator_names: List of indicator names
+        """
+        self.topology = topology
+        self.process_ids = topology.process_ids
+        self.flow_source = topology.flow_source
+        self.flow_target = topology.flow_target
+        self.is_absolute = topology.is_absolute
+        self.flows = [flow_id_to_flow[flow_id] for flow_id in topology.flow_ids]
+
+        # Indicators
+        self.indicator_names = list(indicator_names)
+        self.indicator_name_to_index = {name: index for index, name in enumerate(self.indicator_names)}
+
+        # Flow state
+        num_flows = len(self.flows)
+        self.value = np.zeros(num_flows, dtype=np.float64)
+        self.share = np.zeros(num_flows, dtype=np.float64)
+        self.evaluated_value = np.zeros(num_flows, dtype=np.float64)
+        self.is_prioritized = np.zeros(num_flows, dtype=bool)
+        self.is_evaluated = np.zeros(num_flows, dtype=bool)
+
+        # Indicator conversion factors (rows: flows, columns: indicators)
+        self.conversion_factors = np.zeros((num_flows, len(self.indicator_names)), dtype=np.float64)
+        self.load_flow_values()
+
+    @property
+    def num_processes(self) -> int:
+        """
+        Get number of Processes.
+
+        :return: Number of Processes (int)
+        """
+        return self.topology.num_processes
+
+    @property
+    def num_flows(self) -> int:
+        """
+        Get number of Flows.
+
+        :return: Number of Flows (int)
+        """
+        return len(self.flows)
+
+    def get_inflow_indices(self, process_index: int) -> np.ndarray:
+        """
+        Get inflow indices for Process.
+
+        :param process_index: Process index
+        :return: Array of Flow indices
+        """
+        return self.topology.get_inflow_indices(process_index)
+
+    def get_outflow_indices(self, process_index: int) -> np.ndarray:
+        """
+        Get outflow indices for Process.
+
+        :param process_index: Process index
+        :return: Array of Flow indices
+        """
+        return self.topology.get_outflow_indices(process_index)
+
+    def get_evaluation_order(self, is_stock_process: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get Process evaluation order, see FlowGraphTopology.get_evaluation_order.
+
+        :param is_stock_process: Boolean array, True if Process at the index has stock
+        :return: Tuple (Process indices in evaluation order, Process indices that can not be evaluated)
+        """
+        return self.topology.get_evaluation_order(is_stock_process)
+
+    def load_flow_values(self) -> None:
+        """
+        Read Flow values and state from Flow-objects to value vectors.
+        """
+        schema_to_mapping = {}
+        for index, flow in enumerate(self.flows):
+            self.value[index] = flow.value
+            self.share[index] = flow.evaluated_share
+            self.evaluated_value[index] = flow.evaluated_value
+            self.is_prioritized[index] = flow.is_prioritized
+            self.is_evaluated[index] = flow.is_evaluated
+
+            # Flows read from the same sheet share the indicator schema so the
+            # schema column indices are resolved only once for each schema
+            schema = flow.indicator_schema
+            mapping = schema_to_mapping.get(schema, None)
+            if mapping is None:
+                schema_indices = []
+                indicator_indices = []
+                for schema_index, indicator_name in enumerate(schema.names):
+                    indicator_index = self.indicator_name_to_index.get(indicator_name, None)
+                    if indicator_index is None:
+                        continue
+
+                    schema_indices.append(schema_index)
+                    indicator_indices.append(indicator_index)
+                mapping = (np.array(schema_indices, dtype=np.intp), np.array(indicator_indices, dtype=np.intp))
+                schema_to_mapping[schema] = mapping
+
+            schema_indices, indicator_indices = mapping
+            self.conversion_factors[index, indicator_indices] = flow.indicator_conversion_factors[schema_indices]
+
+    def sync_to_flows(self) -> None:
+        """
+        Write evaluated values back to Flow-objects.
+        Indicator values are evaluated for relative flows that were evaluated.
+        """
+        evaluated_relative = self.is_evaluated & ~self.is_absolute
+        for index, flow in enumerate(self.flows):
+            flow.is_evaluated = bool(self.is_evaluated[index])
+            flow.evaluated_value = float(self.evaluated_value[index])
+            if evaluated_relative[index]:
+                flow.evaluate_indicator_values_from_baseline_value()
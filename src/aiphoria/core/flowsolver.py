@@ -7,10 +7,12 @@ import tqdm as tqdm
 from pandas import DataFrame
 
 from .types import FunctionType
-from .datastructures import Process, Flow, Stock, ScenarioData, Scenario, Indicator
+from .datastructures import Process, Flow, Stock, ScenarioData, Scenario, Indicator, IndicatorSchema
+from .flowgraph import FlowGraph, FlowGraphTopology
 # from .flowmodifiersolver import FlowModifierSolver
 from .parameters import ParameterName, StockDistributionType, StockDistributionParameter, ParameterScenarioType
-from aiphoria.lib.odym.modules.dynamic_stock_model import DynamicStockModel
+from aiphoria.lib.odym.modules.dynamic_stock_model import BatchedDynamicStockModel, PackedBatchedDynamicStockModel, \
+    DynamicStockModelElement
 
 
 # Solves flows to absolute values
@@ -21,7 +23,6 @@ class FlowSolver(object):
     """
     _virtual_process_id_prefix = "VP_"
     _virtual_flow_id_prefix = "VF_"
-    _max_iterations = 100000
     _virtual_process_transformation_stage = "Virtual"
 
     def __init__(self, scenario: Scenario = None, reset_evaluated_values: bool = True):
@@ -33,6 +34,13 @@ class FlowSolver(object):
         self._prioritized_locations = self._model_params[ParameterName.PrioritizeLocations]
         self._prioritized_transformation_stages = self._model_params[ParameterName.PrioritizeTransformationStages]
 
+        # Evaluate timesteps using integer-indexed FlowGraph instead of Process/Flow dictionaries
+        self._use_array_solver = self._model_params.get(ParameterName.UseArraySolver, False)
+
+        # Store dynamic stock cohorts as packed lower triangular tables
+        self._pack_dynamic_stock_cohorts = self._model_params.get(ParameterName.PackDynamicStockCohorts, False)
+        self._dynamic_stock_survival_cutoff = self._model_params.get(ParameterName.DynamicStockSurvivalCutoff, 0.0)
+
         # Time
         self._year_start = self._scenario.scenario_data.start_year
         self._year_end = self._scenario.scenario_data.end_year
@@ -69,17 +77,25 @@ class FlowSolver(object):
         # Get and store indicator names from scenario.scenario_data
         self._indicator_name_to_indicator = scenario.scenario_data.indicator_name_to_indicator
         self._indicators = {name: indicator for name, indicator in self._indicator_name_to_indicator.items()}
+        self._indicator_schema = IndicatorSchema.from_indicators(self._indicator_name_to_indicator)
 
         # Baseline indicator name (e.g. Solid wood equivalent) and unit name (e.g. 'Mm3')
         self._baseline_value_name = self._scenario.scenario_data.baseline_value_name
         self._baseline_unit_name = self._scenario.scenario_data.baseline_unit_name
 
+        # Stock ID -> Batched DSM (baseline value and all indicators)
+        self._stock_id_to_batched_dsm = {}
+
         # Stock ID -> Baseline value DSM
         self._stock_id_to_baseline_dsm = {}
 
         # Stock ID -> Indicator name -> DSM
         self._stock_id_to_indicator_name_to_dsm = {}
 
+        # Structural key -> FlowGraphTopology, shared between years that have the same structure
+        self._structure_key_to_topology = {}
+        self._current_topology = None
+
     def get_scenario(self) -> Scenario:
         """
         Get Scenario that FlowSolver is using.
@@ -127,26 +143,48 @@ class FlowSolver(object):
 
         :return: DataFrame
         """
+        indicators = list(self.get_indicator_name_to_indicator().values())
         col_names = ["Year", "Process ID"]
         col_names += ["Total inflows, {} ({})".format(self._baseline_value_name, self._baseline_unit_name)]
         col_names += ["Total outflows, {} ({})".format(self._baseline_value_name, self._baseline_unit_name)]
-        for indicator in self.get_indicator_name_to_indicator().values():
+        for indicator in indicators:
             col_names += ["Total inflows, {} ({})".format(indicator.name, indicator.unit)]
             col_names += ["Total outflows, {} ({})".format(indicator.name, indicator.unit)]
 
-        rows = []
+        # Totals are summed per year from the Flow value matrix (elements x flows) with np.bincount
+        # which adds the values in the same order as the Flow IDs are listed for each Process
+        years = []
+        process_ids = []
+        list_of_totals = []
         for year, process_id_to_process in self._year_to_process_id_to_process.items():
-            for process_id, process in process_id_to_process.items():
-                new_row = [year, process_id]
-                new_row += [self.get_process_inflows_total(process_id, year)]
-                new_row += [self.get_process_outflows_total(process_id, year)]
-                for indicator in self.get_indicator_name_to_indicator().values():
-                    new_row += [self._get_process_indicator_inflows_total(process_id, indicator.name, year)]
-                    new_row += [self._get_process_indicator_outflows_total(process_id, indicator.name, year)]
-                rows.append(new_row)
-
-        df = pd.DataFrame(rows, columns=col_names)
-        return df
+            flow_id_to_flow = self._year_to_flow_id_to_flow[year]
+            flow_id_to_index = {flow_id: index for index, flow_id in enumerate(flow_id_to_flow.keys())}
+            flow_values = self._get_flow_value_matrix(list(flow_id_to_flow.values()), indicators)
+
+            process_id_to_flow_ids = self._year_to_process_id_to_flow_ids[year]
+            num_processes = len(process_id_to_process)
+            totals = np.zeros((num_processes, len(col_names) - 2))
+            for direction_index, direction in enumerate(["in", "out"]):
+                process_indices = []
+                flow_indices = []
+                for process_index, process_id in enumerate(process_id_to_process.keys()):
+                    flow_ids = process_id_to_flow_ids[process_id][direction] or []
+                    process_indices += [process_index] * len(flow_ids)
+                    flow_indices += [flow_id_to_index[flow_id] for flow_id in flow_ids]
+
+                for element_index in range(flow_values.shape[0]):
+                    totals[:, element_index * 2 + direction_index] = np.bincount(
+                        process_indices, weights=flow_values[element_index, flow_indices], minlength=num_processes)
+
+            years += [year] * num_processes
+            process_ids += list(process_id_to_process.keys())
+            list_of_totals.append(totals)
+
+        totals = np.concatenate(list_of_totals) if list_of_totals else np.zeros((0, len(col_names) - 2))
+        data = {"Year": np.array(years, dtype=np.int64), "Process ID": process_ids}
+        for col_index, col_name in enumerate(col_names[2:]):
+            data[col_name] = totals[:, col_index]
+        return pd.DataFrame(data, columns=col_names)
 
     def get_flows_as_dataframe(self) -> DataFrame:
         """
@@ -161,22 +199,30 @@ class FlowSolver(object):
 
         :return: DataFrame
         """
+        indicators = list(self.get_indicator_name_to_indicator().values())
         col_names = ["Year", "Flow ID", "Source Process ID", "Target Process ID", "Flow share"]
         col_names += ["{} ({})".format(self._baseline_value_name, self._baseline_unit_name)]
-        col_names += ["{} ({})".format(ind.name, ind.unit) for ind in self.get_indicator_name_to_indicator().values()]
+        col_names += ["{} ({})".format(ind.name, ind.unit) for ind in indicators]
 
-        rows = []
+        # Columns are collected for all years and values are taken from one Flow value matrix (elements x rows)
+        years = []
+        flows = []
         for year, flow_id_to_flow in self._year_to_flow_id_to_flow.items():
-            for flow_id, flow in flow_id_to_flow.items():
-                if not isinstance(flow, Flow):
-                    continue
-
-                new_row = [year, flow_id, flow.source_process_id, flow.target_process_id, flow.evaluated_share]
-                new_row += [evaluated_value for evaluated_value in flow.get_all_evaluated_values()]
-                rows.append(new_row)
-
-        df = pd.DataFrame(rows, columns=col_names)
-        return df
+            year_flows = [flow for flow in flow_id_to_flow.values() if isinstance(flow, Flow)]
+            years += [year] * len(year_flows)
+            flows += year_flows
+
+        flow_values = self._get_flow_value_matrix(flows, indicators)
+        data = {
+            "Year": np.array(years, dtype=np.int64),
+            "Flow ID": [flow.id for flow in flows],
+            "Source Process ID": [flow.source_process_id for flow in flows],
+            "Target Process ID": [flow.target_process_id for flow in flows],
+            "Flow share": [flow.evaluated_share for flow in flows],
+        }
+        for element_index, col_name in enumerate(col_names[5:]):
+            data[col_name] = flow_values[element_index]
+        return pd.DataFrame(data, columns=col_names)
 
     def get_evaluated_flow_values_as_dataframe(self) -> DataFrame:
         """
@@ -184,28 +230,72 @@ class FlowSolver(object):
 
         :return: DataFrame
         """
+        sorted_flow_ids = sorted(self.get_unique_flows().keys())
+        flow_id_to_index = {flow_id: index for index, flow_id in enumerate(sorted_flow_ids)}
+
+        # Years x flows matrix, value is 0.0 for years when Flow does not exist
+        values = np.zeros((len(self._years), len(sorted_flow_ids)))
+        for year_index, year in enumerate(self._years):
+            flow_indices = []
+            flow_values = []
+            for flow_id, flow in self._year_to_flow_id_to_flow[year].items():
+                flow_index = flow_id_to_index.get(flow_id, None)
+                if flow_index is None or not isinstance(flow, Flow):
+                    continue
+
+                flow_indices.append(flow_index)
+                flow_values.append(flow.evaluated_value)
+            values[year_index, flow_indices] = flow_values
 
-        unique_flows = self.get_unique_flows()
-        sorted_flow_ids = sorted([flow.id for flow in unique_flows.values()], key=lambda x: x)
-        columns = ["Year"]
-        columns += [flow_id for flow_id in sorted_flow_ids]
-
-        df = pd.DataFrame(columns=columns)
-        df["Year"] = [year for year in self._years]
-        df.set_index(["Year"], inplace=True)
-        for year in df.index:
-            for flow_id in df.columns:
-                flow_value = 0.0
-                if self.has_flow(flow_id, year):
-                    flow = self.get_flow(flow_id, year)
-                    if not isinstance(flow, Flow):
-                        pass
-                    else:
-                        flow_value = flow.evaluated_value
-                df.at[year, flow_id] = flow_value
-        df.reset_index(inplace=True)
+        df = pd.DataFrame(values, columns=sorted_flow_ids)
+        df.insert(0, "Year", [year for year in self._years])
         return df
 
+    @staticmethod
+    def _get_flow_value_matrix(flows: List[Flow], indicators: List[Indicator]) -> np.ndarray:
+        """
+        Get evaluated baseline and indicator values of Flows as matrix.
+        Element 0 is the baseline value and elements 1...N are the indicators in the same order as indicators.
+
+        :param flows: List of Flows
+        :param indicators: List of Indicators
+        :return: Values (elements x flows)
+        """
+        flow_values = np.zeros((len(indicators) + 1, len(flows)))
+        flow_values[0] = [flow.evaluated_value for flow in flows]
+        for indicator_index, indicator in enumerate(indicators):
+            flow_values[indicator_index + 1] = [flow.get_evaluated_value_for_indicator(indicator.name)
+                                                for flow in flows]
+        return flow_values
+
+    def get_evaluated_flow_values_as_array(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Get evaluated baseline and indicator values for Flows for all years as array.
+        Element 0 is the baseline value and elements 1...N are the indicators in the same
+        order as in get_indicator_names(). Value is 0.0 for years when Flow does not exist.
+
+        :return: Tuple (sorted Flow IDs, values (elements x years x flows), flow exists (years x flows))
+        """
+        sorted_flow_ids = sorted(self.get_unique_flows().keys())
+        flow_id_to_index = {flow_id: index for index, flow_id in enumerate(sorted_flow_ids)}
+        indicator_names = self.get_indicator_names()
+        values = np.zeros((len(indicator_names) + 1, len(self._years), len(sorted_flow_ids)))
+        flow_exists = np.zeros((len(self._years), len(sorted_flow_ids)), dtype=bool)
+        for year_index, year in enumerate(self._years):
+            for flow_id, flow in self._year_to_flow_id_to_flow[year].items():
+                flow_index = flow_id_to_index.get(flow_id, None)
+                if flow_index is None or not isinstance(flow, Flow):
+                    continue
+
+                flow_exists[year_index, flow_index] = True
+                values[0, year_index, flow_index] = flow.evaluated_value
+                indicator_name_to_evaluated_value = flow.indicator_name_to_evaluated_value
+                for indicator_index, indicator_name in enumerate(indicator_names):
+                    values[indicator_index + 1, year_index, flow_index] = \
+                        indicator_name_to_evaluated_value.get(indicator_name, 0.0)
+
+        return sorted_flow_ids, values, flow_exists
+
     def get_process(self, process_id: str, year: int = -1) -> Process:
         """
         Get Process by ID and target year.
@@ -242,7 +332,17 @@ class FlowSolver(object):
         """
         return self._process_id_to_stock[process_id]
 
-    def get_baseline_dynamic_stocks(self) -> Dict[str, DynamicStockModel]:
+    def get_batched_dynamic_stocks(self) -> Dict[str, BatchedDynamicStockModel]:
+        """
+        Get dictionary of Stock ID -> BatchedDynamicStockModel.
+        Element 0 is the baseline value and elements 1...N are the indicators in the same
+        order as in get_indicator_names().
+
+        :return: Dictionary (Stock ID -> BatchedDynamicStockModel)
+        """
+        return self._stock_id_to_batched_dsm
+
+    def get_baseline_dynamic_stocks(self) -> Dict[str, DynamicStockModelElement]:
         """
         Get dictionary of Stock ID -> baseline DynamicStockModel.
 
@@ -251,7 +351,7 @@ class FlowSolver(object):
 
         return self._stock_id_to_baseline_dsm
 
-    def get_indicator_dynamic_stocks(self) -> Dict[str, Dict[str, DynamicStockModel]]:
+    def get_indicator_dynamic_stocks(self) -> Dict[str, Dict[str, DynamicStockModelElement]]:
         """
         Get dictionary of stock ID -> indicator name -> DynamicStockModel
 
@@ -464,40 +564,26 @@ class FlowSolver(object):
 
         return process_id in self._current_process_id_to_process
 
-    def accumulate_dynamic_stock_inflows(self, dsm: DynamicStockModel, total_inflows: float, year: int = -1) -> None:
+    def accumulate_dynamic_stock_inflows(self,
+                                         dsm: Union[BatchedDynamicStockModel, DynamicStockModelElement],
+                                         total_inflows: Union[float, np.ndarray],
+                                         year: int = -1) -> None:
         """
         Update and accumulate inflows to DynamicStockModel.
+        If dsm is BatchedDynamicStockModel then total_inflows contains the total inflows for each element.
 
-        :param dsm: Target DynamicStockModel
-        :param total_inflows: Total inflows for the stock (float)
+        :param dsm: Target BatchedDynamicStockModel or DynamicStockModelElement
+        :param total_inflows: Total inflows for the stock (float or array)
         :param year: Target year (int)
         :return: None
         """
 
         year_index = self._years.index(year)
 
-        # Resetting some DynamicStockModel properties are needed to make
-        # timestep stock accumulation and other calculations work
-        dsm.i[year_index] = total_inflows
-
-        # Recalculate stock by cohort
-        dsm.s_c = None
-        dsm.compute_s_c_inflow_driven()
-
-        # Recalculate outflow by cohort
-        dsm.o_c = None
-        dsm.compute_o_c_from_s_c()
-
-        # Recalculate stock total
-        dsm.s = None
-        dsm.compute_stock_total()
-
-        # Get stock total
-        dsm.compute_stock_change()
-
-        # Recalculate stock outflow
-        dsm.o = None
-        dsm.compute_outflow_total()
+        # Only the cohort of the target year changes so update stock by cohort,
+        # outflow by cohort and the totals incrementally instead of recalculating
+        # the whole cohort matrices
+        dsm.update_inflow_cohort(year_index, total_inflows)
 
     def get_year_range(self) -> List[int]:
         """
@@ -776,9 +862,10 @@ class FlowSolver(object):
                 # Reduce total inflows to baseline stock by total prioritized outflows
                 total_inflows_to_stock = total_inflows - total_outflows_prioritized
 
-                # Update baseline DSM
-                baseline_dsm = self.get_baseline_dynamic_stocks()[process_id]
-                self.accumulate_dynamic_stock_inflows(baseline_dsm, total_inflows_to_stock, year)
+                # Total inflows to baseline DSM and to indicator DSMs, updated at once
+                batched_dsm = self.get_batched_dynamic_stocks()[process_id]
+                total_inflows_to_stock_by_element = np.zeros(len(batched_dsm))
+                total_inflows_to_stock_by_element[0] = total_inflows_to_stock
 
                 # Update stock inflows to indicator DSMs
                 indicator_dynamic_stocks = self.get_indicator_dynamic_stocks()
@@ -801,9 +888,12 @@ class FlowSolver(object):
                                 corrected_flow_value = correction_factor * total_inflows_to_stock
                                 total_indicator_inflows_to_stock += corrected_flow_value
 
-                        self.accumulate_dynamic_stock_inflows(indicator_dsm, total_indicator_inflows_to_stock, year)
+                        total_inflows_to_stock_by_element[indicator_dsm.element] = total_indicator_inflows_to_stock
+
+                self.accumulate_dynamic_stock_inflows(batched_dsm, total_inflows_to_stock_by_element, year)
 
                 # Distribute baseline total outflow values
+                baseline_dsm = self.get_baseline_dynamic_stocks()[process_id]
                 baseline_stock_outflow = self._get_dynamic_stock_outflow_value(baseline_dsm, year)
 
                 # Check that if process has absolute outflow then outflow value must be
@@ -846,20 +936,7 @@ class FlowSolver(object):
                     if self._use_virtual_flows and need_virtual_flows:
                         # Create new virtual inflow and new virtual process where flow comes from
                         diff = total_inflows - total_outflows_abs
-                        process = self.get_process(process_id, year)
-                        v_process = self._create_virtual_process_ex(process)
-                        v_flow = self._create_virtual_flow_ex(v_process, process, abs(diff))
-                        v_flow.evaluate_indicator_values_from_baseline_value()
-
-                        # Create virtual Flows and Processes to current year data
-                        self._year_to_process_id_to_process[year][v_process.id] = v_process
-                        self._year_to_process_id_to_flow_ids[year][v_process.id] = {"in": [], "out": []}
-                        self._unique_process_id_to_process[v_process.id] = v_process
-
-                        self._year_to_flow_id_to_flow[year][v_flow.id] = v_flow
-                        self._year_to_process_id_to_flow_ids[year][v_flow.target_process_id]["in"].append(v_flow.id)
-                        self._year_to_process_id_to_flow_ids[year][v_flow.source_process_id]["out"].append(v_flow.id)
-                        self._unique_flow_id_to_flow[v_flow.id] = v_flow
+                        self._create_virtual_inflow(process_id, abs(diff), year)
 
                         # Recalculate total_inflows again
                         total_inflows = self.get_process_inflows_total(process_id)
@@ -898,86 +975,10 @@ class FlowSolver(object):
         # would prevent in some cases the whole evaluation of scenarios with stocks.
         self._evaluate_dynamic_stock_outflows(self._year_current)
 
-        # Add all root processes (= processes with no inflows) to unvisited list
-        unevaluated_process_ids = []
-        evaluated_process_ids = []
-        current_year_process_ids = list(self._current_process_id_to_process.keys())
-        for process_id in current_year_process_ids:
-            inflows = self._get_process_inflows(process_id, year=self._year_current)
-            if not inflows:
-                unevaluated_process_ids.append(process_id)
-
-        # Process flow value propagation until all inflows to processes are calculated
-        current_iteration = 0
-        while unevaluated_process_ids:
-            process_id = unevaluated_process_ids.pop(0)
-            if process_id in evaluated_process_ids:
-                continue
-
-            is_evaluated, outflows = self._evaluate_process(process_id, self._year_current)
-            if is_evaluated:
-                evaluated_process_ids.append(process_id)
-                for flow in outflows:
-                    target_process_id = flow.target_process_id
-                    if target_process_id not in unevaluated_process_ids:
-                        unevaluated_process_ids.insert(0, target_process_id)
-
-            else:
-                # Check all outflow target process ids
-                for flow in outflows:
-                    target_process_id = flow.target_process_id
-                    if target_process_id not in unevaluated_process_ids:
-                        unevaluated_process_ids.insert(0, target_process_id)
-
-                # Add this process_id back to unevaluated list
-                if process_id not in unevaluated_process_ids:
-                    unevaluated_process_ids.append(process_id)
-
-            # NOTE: Break out of infinite loop if running over big amount of iterations
-            # This will happen if graph has loops that contain only relative flows between them
-            current_iteration += 1
-            if current_iteration >= self._max_iterations:
-                print("Encountered processes that could not be evaluated in year {}:".format(self._year_current))
-                print("The following processes have no inflows and have ONLY relative outflows (= error in data)")
-                print("Possible ways to to fix:")
-                print("- Introducing a valid inflow to the process")
-                print("- Ensure that a valid inflow is present for the process in the model's initial year")
-                print("")
-
-                # Get list of unevaluated flows
-                # The possible process causing the error is probably one of the flows' source processes
-                unevaluated_inflows = []
-                for p_id in current_year_process_ids:
-                    for flow in self._get_process_inflows(p_id, self._year_current):
-                        if not flow.is_evaluated:
-                            unevaluated_inflows.append(flow)
-
-                # Check all flow source processes and check for problematic processes:
-                # Invalid process means:
-                # - no inflows
-                # - only relative outflows
-                # This is definitely error in data
-                unique_process_ids = set()
-                for flow in unevaluated_inflows:
-                    source_process_inflows = self._get_process_inflows(flow.source_process_id, self._year_current)
-                    source_process_outflows = self._get_process_outflows(flow.source_process_id, self._year_current)
-                    has_no_inflows = len(source_process_inflows) == 0
-                    has_only_relative_outflows = len(source_process_outflows) > 0 and all(
-                        [not flow.is_unit_absolute_value for flow in source_process_outflows])
-
-                    if has_no_inflows and has_only_relative_outflows:
-                        unique_process_ids.add(flow.source_process_id)
-
-                print("List of invalid process IDs:")
-                for source_process_id in unique_process_ids:
-                    print("\t{}".format(source_process_id))
-                print("")
-
-                print("List of unevaluated flows:")
-                for flow in unevaluated_inflows:
-                    print("\t{}".format(flow))
-
-                raise Exception("Unsolvable loop detected")
+        if self._use_array_solver:
+            self._solve_flow_graph(self._year_current)
+        else:
+            self._solve_processes(self._year_current)
 
         # Check for unreported inflows or outflows (= process mass balance != 0)
         # and create virtual flows to balance out those processes.
@@ -988,6 +989,220 @@ class FlowSolver(object):
         # Recalculate evaluated values for stock outflows
         self._recalculate_indicator_dynamic_stock_outflows(self._year_current)
 
+    def _solve_processes(self, year: int) -> None:
+        """
+        Evaluate Processes for the target year in topological order.
+        Each Process is evaluated once after all inflows to the Process are evaluated.
+
+        :param year: Target year
+        """
+        topology = self._get_flow_graph_topology(year)
+        process_order, unsolvable_process_indices = topology.get_evaluation_order(
+            self._get_stock_process_mask(topology))
+
+        for process_index in process_order:
+            process_id = topology.process_ids[process_index]
+            is_evaluated, _ = self._evaluate_process(process_id, year)
+            if not is_evaluated:
+                # Inflow to the Process was not evaluated before the Process in the evaluation order
+                raise Exception("Process '{}' could not be evaluated in year {}, not all inflows were evaluated".format(
+                    process_id, year))
+
+        # This will happen if graph has loops that contain only relative flows between them
+        if len(unsolvable_process_indices):
+            self._raise_unsolvable_timestep(year)
+
+    def _solve_flow_graph(self, year: int) -> None:
+        """
+        Evaluate Processes for the target year using integer-indexed FlowGraph.
+        Evaluates Processes in the same order as _solve_processes but operates on
+        NumPy vectors and writes the evaluated values back to Flows after all Processes are evaluated.
+
+        :param year: Target year
+        """
+        topology = self._get_flow_graph_topology(year)
+        graph = FlowGraph(topology, self._year_to_flow_id_to_flow[year], self.get_indicator_names())
+        process_order, unsolvable_process_indices = graph.get_evaluation_order(
+            self._get_stock_process_mask(topology))
+
+        for process_index in process_order:
+            if not self._evaluate_flow_graph_process(graph, process_index, year):
+                # Inflow to the Process was not evaluated before the Process in the evaluation order
+                raise Exception("Process '{}' could not be evaluated in year {}, not all inflows were evaluated".format(
+                    graph.process_ids[process_index], year))
+
+        graph.sync_to_flows()
+        if len(unsolvable_process_indices):
+            self._raise_unsolvable_timestep(year)
+
+    def _get_flow_graph_topology(self, year: int) -> FlowGraphTopology:
+        """
+        Get FlowGraphTopology for the target year.
+        Topology is compiled only once for all the years that have the same structure.
+
+        :param year: Target year
+        :return: FlowGraphTopology
+        """
+        process_id_to_flow_ids = self._year_to_process_id_to_flow_ids[year]
+        flow_id_to_flow = self._year_to_flow_id_to_flow[year]
+        key = FlowGraphTopology.make_key(process_id_to_flow_ids, flow_id_to_flow)
+        topology = self._structure_key_to_topology.get(key, None)
+        if topology is None:
+            topology = FlowGraphTopology(process_id_to_flow_ids, flow_id_to_flow)
+            self._structure_key_to_topology[key] = topology
+
+        self._current_topology = topology
+        return topology
+
+    def _get_stock_process_mask(self, topology: FlowGraphTopology) -> np.ndarray:
+        """
+        Get boolean array of Processes in FlowGraphTopology that have stock.
+
+        :param topology: Target FlowGraphTopology
+        :return: Boolean array, True if Process at the index has stock
+        """
+        return np.array([process_id in self._stock_id_to_baseline_dsm for process_id in topology.process_ids],
+                        dtype=bool)
+
+    def _evaluate_flow_graph_process(self, graph: FlowGraph, process_index: int, year: int) -> bool:
+        """
+        Evaluate Process in FlowGraph and accumulate inflows to DynamicStockModels.
+        FlowGraph version of _evaluate_process.
+
+        :param graph: Target FlowGraph
+        :param process_index: Target Process index in FlowGraph
+        :param year: Target year
+        :return: True if Process was evaluated, False otherwise
+        """
+        inflow_indices = graph.get_inflow_indices(process_index)
+        outflow_indices = graph.get_outflow_indices(process_index)
+
+        # Root process should have only absolute outflow
+        if not len(inflow_indices):
+            return True
+
+        # Absolute flows are already marked as evaluated when preparing flows for timestep
+        if not graph.is_evaluated[inflow_indices].all():
+            return False
+
+        process_id = graph.process_ids[process_index]
+        total_inflows = graph.evaluated_value[inflow_indices].sum()
+        is_outflow_abs = graph.is_absolute[outflow_indices]
+        outflow_abs_indices = outflow_indices[is_outflow_abs]
+        outflow_rel_indices = outflow_indices[~is_outflow_abs]
+        if process_id in self._stock_id_to_baseline_dsm:
+            # Flow prioritization: Ignore inflow amount to stock for outflows that are prioritized
+            prioritized_indices = outflow_indices[graph.is_prioritized[outflow_indices]]
+            if not graph.is_absolute[prioritized_indices].all():
+                raise Exception("Relative flow as prioritized flow!")
+
+            graph.is_evaluated[prioritized_indices] = True
+            graph.evaluated_value[prioritized_indices] = graph.value[prioritized_indices]
+            total_outflows_prioritized = graph.evaluated_value[prioritized_indices].sum()
+            if total_outflows_prioritized > total_inflows:
+                s = "Not enough inflows for prioritized outflows at process '{}' in year {}".format(
+                    process_id, year)
+                sys.stdout.flush()
+                raise Exception(s)
+
+            # Update baseline DSM and indicator DSMs at once
+            total_inflows_to_stock = total_inflows - total_outflows_prioritized
+            batched_dsm = self._stock_id_to_batched_dsm[process_id]
+            total_inflows_to_stock_by_element = np.zeros(len(batched_dsm))
+            total_inflows_to_stock_by_element[0] = total_inflows_to_stock
+
+            # Stock inflows to indicator DSMs, see _evaluate_process for the correction factor
+            indicator_name_to_dsm = self._stock_id_to_indicator_name_to_dsm.get(process_id, {})
+            if indicator_name_to_dsm and total_inflows_to_stock > 0.0:
+                inflow_values = graph.evaluated_value[inflow_indices]
+                indicator_inflows = inflow_values @ graph.conversion_factors[inflow_indices]
+                for indicator_name, indicator_dsm in indicator_name_to_dsm.items():
+                    indicator_index = graph.indicator_name_to_index[indicator_name]
+                    correction_factor = indicator_inflows[indicator_index] / total_inflows
+                    total_inflows_to_stock_by_element[indicator_dsm.element] = correction_factor * total_inflows_to_stock
+
+            self.accumulate_dynamic_stock_inflows(batched_dsm, total_inflows_to_stock_by_element, year)
+            baseline_dsm = self._stock_id_to_baseline_dsm[process_id]
+
+            # Distribute baseline stock outflow between relative outflows
+            baseline_stock_outflow = self._get_dynamic_stock_outflow_value(baseline_dsm, year)
+            is_outflow_abs_not_prioritized = ~graph.is_prioritized[outflow_abs_indices]
+            total_outflows_abs = graph.evaluated_value[outflow_abs_indices[is_outflow_abs_not_prioritized]].sum()
+            total_outflows_rel = baseline_stock_outflow - total_outflows_abs
+            if total_outflows_rel < 0.0:
+                s = "Process {}: stock outflow ({:.3f}) is less than sum of absolute outflows ({:.3f}) in year {}!".format(
+                    process_id, baseline_stock_outflow, total_outflows_rel, year)
+                raise Exception(s)
+
+        else:
+            total_outflows_abs = graph.evaluated_value[outflow_abs_indices].sum()
+
+            # Ignore leaf processes because those have zero outflows
+            is_leaf = not len(outflow_indices)
+
+            # Check that virtual flows are actually needed
+            diff = abs(total_inflows - total_outflows_abs)
+            need_virtual_flows = total_inflows < total_outflows_abs and (diff > self._virtual_flows_epsilon)
+            if not is_leaf and total_inflows < total_outflows_abs:
+                if self._use_virtual_flows and need_virtual_flows:
+                    v_flow = self._create_virtual_inflow(process_id, diff, year)
+                    total_inflows += v_flow.evaluated_value
+
+            # Remaining outflows to be distributed between all relative outflows
+            total_outflows_rel = total_inflows - total_outflows_abs
+
+        graph.is_evaluated[outflow_rel_indices] = True
+        graph.evaluated_value[outflow_rel_indices] = graph.share[outflow_rel_indices] * total_outflows_rel
+        return True
+
+    def _raise_unsolvable_timestep(self, year: int) -> None:
+        """
+        Show information about Processes that could not be evaluated in the target year and raise Exception.
+
+        :param year: Target year
+        """
+        print("Encountered processes that could not be evaluated in year {}:".format(year))
+        print("The following processes have no inflows and have ONLY relative outflows (= error in data)")
+        print("Possible ways to to fix:")
+        print("- Introducing a valid inflow to the process")
+        print("- Ensure that a valid inflow is present for the process in the model's initial year")
+        print("")
+
+        # Get list of unevaluated flows
+        # The possible process causing the error is probably one of the flows' source processes
+        unevaluated_inflows = []
+        for p_id in self._year_to_process_id_to_process[year]:
+            for flow in self._get_process_inflows(p_id, year):
+                if not flow.is_evaluated:
+                    unevaluated_inflows.append(flow)
+
+        # Check all flow source processes and check for problematic processes:
+        # Invalid process means:
+        # - no inflows
+        # - only relative outflows
+        # This is definitely error in data
+        unique_process_ids = set()
+        for flow in unevaluated_inflows:
+            source_process_inflows = self._get_process_inflows(flow.source_process_id, year)
+            source_process_outflows = self._get_process_outflows(flow.source_process_id, year)
+            has_no_inflows = len(source_process_inflows) == 0
+            has_only_relative_outflows = len(source_process_outflows) > 0 and all(
+                [not flow.is_unit_absolute_value for flow in source_process_outflows])
+
+            if has_no_inflows and has_only_relative_outflows:
+                unique_process_ids.add(flow.source_process_id)
+
+        print("List of invalid process IDs:")
+        for source_process_id in unique_process_ids:
+            print("\t{}".format(source_process_id))
+        print("")
+
+        print("List of unevaluated flows:")
+        for flow in unevaluated_inflows:
+            print("\t{}".format(flow))
+
+        raise Exception("Unsolvable loop detected")
+
     def _advance_timestep(self) -> None:
         """
         Advance to next timestep.
@@ -1034,7 +1249,6 @@ class FlowSolver(object):
         new_virtual_process.id = process_id
         new_virtual_process.name = process_name
         new_virtual_process.stock_lifetime = 0
-        new_virtual_process.conversion_factor = 1.0
         new_virtual_process.transformation_stage = transformation_stage
         new_virtual_process.is_virtual = True
         return new_virtual_process
@@ -1117,12 +1331,8 @@ class FlowSolver(object):
         new_virtual_flow.unit = unit
         new_virtual_flow.is_virtual = True
 
-        # Copy indicators to virtual flows
-        for indicator_name, indicator in self._indicators.items():
-            new_indicator = copy.deepcopy(indicator)
-            new_indicator.conversion_factor = 0.0
-            new_virtual_flow.indicator_name_to_indicator[new_indicator.name] = new_indicator
-            new_virtual_flow.indicator_name_to_evaluated_value[new_indicator.name] = 0.0
+        # Virtual flows have all indicators with conversion factor 0.0
+        new_virtual_flow.set_indicators(self._indicator_schema)
 
         return new_virtual_flow
 
@@ -1138,6 +1348,32 @@ class FlowSolver(object):
         v_flow = self._create_virtual_flow(source_process.id, target_process.id, value, "")
         return v_flow
 
+    def _create_virtual_inflow(self, process_id: str, value: float, year: int) -> Flow:
+        """
+        Create virtual Process and virtual inflow from that Process to the target Process
+        and add those to the year data.
+
+        :param process_id: Target Process ID
+        :param value: Virtual inflow value
+        :param year: Target year
+        :return: New virtual Flow
+        """
+        process = self.get_process(process_id, year)
+        v_process = self._create_virtual_process_ex(process)
+        v_flow = self._create_virtual_flow_ex(v_process, process, value)
+        v_flow.evaluate_indicator_values_from_baseline_value()
+
+        # Create virtual Flows and Processes to current year data
+        self._year_to_process_id_to_process[year][v_process.id] = v_process
+        self._year_to_process_id_to_flow_ids[year][v_process.id] = {"in": [], "out": []}
+        self._unique_process_id_to_process[v_process.id] = v_process
+
+        self._year_to_flow_id_to_flow[year][v_flow.id] = v_flow
+        self._year_to_process_id_to_flow_ids[year][v_flow.target_process_id]["in"].append(v_flow.id)
+        self._year_to_process_id_to_flow_ids[year][v_flow.source_process_id]["out"].append(v_flow.id)
+        self._unique_flow_id_to_flow[v_flow.id] = v_flow
+        return v_flow
+
     def _create_virtual_flows(self, year: int, epsilon: float = 0.1) -> None:
         """
         Create virtual flows to balance out process inflows and outflows.
@@ -1147,6 +1383,7 @@ class FlowSolver(object):
                         virtual flow
         """
         # Virtual outflow is unreported flow of process
+        topology = self._current_topology
         created_virtual_processes = {}
         created_virtual_flows = {}
         for process_id, process in self._current_process_id_to_process.items():
@@ -1156,9 +1393,9 @@ class FlowSolver(object):
                 continue
 
             # Ignore root and leaf processes (= root process has no inflows and leaf process has no outflows)
-            is_root_process = self.is_root_process(process_id, year)
-            is_leaf_process = self.is_leaf_process(process_id, year)
-            if is_root_process or is_leaf_process:
+            # Virtual inflows created during the timestep do not change root and leaf processes
+            process_index = topology.process_id_to_index[process_id]
+            if topology.is_root_process[process_index] or topology.is_leaf_process[process_index]:
                 continue
 
             inflows_total = self.get_process_inflows_total(process_id, year)
@@ -1260,8 +1497,6 @@ class FlowSolver(object):
 
             # Stock parameters
             stock_years = np.array(self._years)
-            stock_total_inflows = np.zeros(len(stock_years))
-            stock_total = np.zeros(len(stock_years))
             stock_lifetime_params = {
                 'Type': stock.stock_distribution_type,
                 'Mean': [stock.stock_lifetime],
@@ -1271,13 +1506,23 @@ class FlowSolver(object):
                 StockDistributionParameter.Condition: [condition],
             }
 
-            # Baseline DSM
-            baseline_dsm = DynamicStockModel(t=copy.deepcopy(stock_years),
-                                             i=copy.deepcopy(stock_total_inflows),
-                                             s=copy.deepcopy(stock_total),
-                                             lt=copy.deepcopy(stock_lifetime_params))
+            # Baseline DSM and indicator DSMs share the same lifetime model so all of those
+            # are handled by one batched DSM: element 0 is the baseline and elements 1...N are indicators
+            indicator_names = self.get_indicator_names()
+            batched_dsm_params = {
+                "t": copy.deepcopy(stock_years),
+                "i": np.zeros((1 + len(indicator_names), len(stock_years))),
+                "lt": copy.deepcopy(stock_lifetime_params),
+                "elements": [self._baseline_value_name] + indicator_names,
+                "name": stock.id,
+            }
+            if self._pack_dynamic_stock_cohorts:
+                batched_dsm = PackedBatchedDynamicStockModel(sf_cutoff=self._dynamic_stock_survival_cutoff,
+                                                             **batched_dsm_params)
+            else:
+                batched_dsm = BatchedDynamicStockModel(**batched_dsm_params)
 
-            # Apply stock lifetime overrides to baseline DSM if needed
+            # Apply stock lifetime overrides to DSM if needed
             year_to_override = {}
             if stock.stock_lifetime_overrides:
                 for stock_lifetime_override in stock.stock_lifetime_overrides:
@@ -1289,47 +1534,18 @@ class FlowSolver(object):
                         # ODYM already has calculated stock lifetimes for each year so only update the years
                         # that have been overridden by this stock lifetime modifier
                         if year in year_to_override:
-                            baseline_dsm.lt["Mean"][year_index] = year_to_override[year]
+                            batched_dsm.lt["Mean"][year_index] = year_to_override[year]
 
-            baseline_dsm.compute_s_c_inflow_driven()
-            baseline_dsm.compute_o_c_from_s_c()
-            baseline_dsm.compute_stock_total()
-            baseline_dsm.compute_stock_change()
-            baseline_dsm.compute_outflow_total()
+            batched_dsm.compute()
 
             # Stock ID -> DSM
-            self._stock_id_to_baseline_dsm[stock.id] = baseline_dsm
-
-            # Create indicator DSMs for each indicator name
-            for indicator_name in self.get_indicator_names():
-                indicator_dsm = DynamicStockModel(t=copy.deepcopy(stock_years),
-                                                  i=copy.deepcopy(stock_total_inflows),
-                                                  s=copy.deepcopy(stock_total),
-                                                  lt=copy.deepcopy(stock_lifetime_params))
-
-                # Apply stock lifetime override to indicator DSM if needed
-                year_to_override = {}
-                if stock.stock_lifetime_overrides:
-                    for stock_lifetime_override in stock.stock_lifetime_overrides:
-                        override_lt = stock_lifetime_override.lifetime
-                        override_start_year = stock_lifetime_override.start_year
-                        override_end_year = stock_lifetime_override.end_year + 1
-                        year_to_override = {v: override_lt for v in range(override_start_year, override_end_year)}
-                        for year_index, year in enumerate(stock_years):
-                            # ODYM already has calculated stock lifetimes for each year so only update the years
-                            # that have been overridden by this stock lifetime modifier
-                            if year in year_to_override:
-                                indicator_dsm.lt["Mean"][year_index] = year_to_override[year]
-
-                indicator_dsm.compute_s_c_inflow_driven()
-                indicator_dsm.compute_o_c_from_s_c()
-                indicator_dsm.compute_stock_total()
-                indicator_dsm.compute_stock_change()
-                indicator_dsm.compute_outflow_total()
-
-                # Stock ID -> Indicator name -> DSM
+            self._stock_id_to_batched_dsm[stock.id] = batched_dsm
+            self._stock_id_to_baseline_dsm[stock.id] = batched_dsm[0]
+
+            # Stock ID -> Indicator name -> DSM
+            for indicator_index, indicator_name in enumerate(indicator_names):
                 indicator_name_to_dsm = self._stock_id_to_indicator_name_to_dsm.get(stock.id, {})
-                indicator_name_to_dsm[indicator_name] = indicator_dsm
+                indicator_name_to_dsm[indicator_name] = batched_dsm[1 + indicator_index]
                 self._stock_id_to_indicator_name_to_dsm[stock.id] = indicator_name_to_dsm
 
     def _evaluate_dynamic_stock_outflows(self, year: int) -> None:
@@ -1374,7 +1590,7 @@ class FlowSolver(object):
                     evaluated_value = flow.evaluated_share * stock_total_outflow
                     flow.set_evaluated_value_for_indicator(indicator_name, evaluated_value)
 
-    def _get_dynamic_stock_outflow_value(self, dsm: DynamicStockModel, year: int) -> float:
+    def _get_dynamic_stock_outflow_value(self, dsm: DynamicStockModelElement, year: int) -> float:
         """
         Get dynamic stock total outflow value.
 
@@ -1392,36 +1608,23 @@ class FlowSolver(object):
 
         :return: Solved ScenarioData
         """
-        # Make deep copies and return ScenarioData containing the data
-        years = copy.deepcopy(self._years)
-        year_to_process_id_to_process = copy.deepcopy(self._year_to_process_id_to_process)
-        year_to_process_id_to_flow_ids = copy.deepcopy(self._year_to_process_id_to_flow_ids)
-        year_to_flow_id_to_flow = copy.deepcopy(self._year_to_flow_id_to_flow)
-        unique_process_id_to_process = copy.deepcopy(self._unique_process_id_to_process)
-        unique_flow_id_to_flow = copy.deepcopy(self._unique_flow_id_to_flow)
-        process_id_to_stock = copy.deepcopy(self._process_id_to_stock)
-        stocks = copy.deepcopy(self._all_stocks)
-        use_virtual_flows = copy.deepcopy(self._use_virtual_flows)
-        virtual_flows_epsilon = copy.deepcopy(self._virtual_flows_epsilon)
-        baseline_value_name = copy.deepcopy(self._baseline_value_name)
-        baseline_unit_name = copy.deepcopy(self._baseline_unit_name)
-        indicator_name_to_indicator = copy.deepcopy(self._indicator_name_to_indicator)
-
-        scenario_data = ScenarioData(years=years,
-                                     year_to_process_id_to_process=year_to_process_id_to_process,
-                                     year_to_process_id_to_flow_ids=year_to_process_id_to_flow_ids,
-                                     year_to_flow_id_to_flow=year_to_flow_id_to_flow,
-                                     unique_process_id_to_process=unique_process_id_to_process,
-                                     unique_flow_id_to_flow=unique_flow_id_to_flow,
-                                     process_id_to_stock=process_id_to_stock,
-                                     stocks=stocks,
-                                     use_virtual_flows=use_virtual_flows,
-                                     virtual_flows_epsilon=virtual_flows_epsilon,
-                                     baseline_value_name=baseline_value_name,
-                                     baseline_unit_name=baseline_unit_name,
-                                     indicator_name_to_indicator=indicator_name_to_indicator
-        )
-        return scenario_data
+        # Copy Flows and mappings, Processes, Stocks and Indicators are not modified when solving
+        # scenarios and are shared with the returned ScenarioData (see ScenarioData.create_copy)
+        scenario_data = ScenarioData(years=self._years,
+                                     year_to_process_id_to_process=self._year_to_process_id_to_process,
+                                     year_to_process_id_to_flow_ids=self._year_to_process_id_to_flow_ids,
+                                     year_to_flow_id_to_flow=self._year_to_flow_id_to_flow,
+                                     unique_process_id_to_process=self._unique_process_id_to_process,
+                                     unique_flow_id_to_flow=self._unique_flow_id_to_flow,
+                                     process_id_to_stock=self._process_id_to_stock,
+                                     stocks=self._all_stocks,
+                                     use_virtual_flows=self._use_virtual_flows,
+                                     virtual_flows_epsilon=self._virtual_flows_epsilon,
+                                     baseline_value_name=self._baseline_value_name,
+                                     baseline_unit_name=self._baseline_unit_name,
+                                     indicator_name_to_indicator=self._indicator_name_to_indicator
+                                     )
+        return scenario_data.create_copy()
 
     def _apply_flow_modifiers(self) -> None:
         """
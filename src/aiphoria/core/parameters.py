@@ -2,7 +2,7 @@
 # and DataProvider file provides the default
 # values for each parameter
 from enum import Enum
-from typing import Dict, Any
+from typing import Dict, Any, FrozenSet
 
 
 class ParameterName(str, Enum):
@@ -58,9 +58,17 @@ class ParameterName(str, Enum):
     # Output path
     OutputPath: str = "output_path"
 
+    # Columnar result store
+    CreateResultStore: str = "create_result_store"
+
     # Show plots
     ShowPlots: str = "show_plots"
 
+    # Plot rendering
+    PlotMode: str = "plot_mode"
+    PlotFormat: str = "plot_format"
+    NumPlotWorkers: str = "num_plot_workers"
+
     # Visualize inflows to process IDs
     VisualizeInflowsToProcesses: str = "visualize_inflows_to_processes"
 
@@ -79,6 +87,8 @@ class ParameterName(str, Enum):
 
     # Check errors
     CheckErrors: str = "check_errors"
+    SkipChecks: str = "skip_checks"
+    NumCheckWorkers: str = "num_check_workers"
 
     # Include scenario file metadata
     IncludeMetadata: str = "include_metadata"
@@ -89,6 +99,44 @@ class ParameterName(str, Enum):
     SkipNumRowsStockLifetimeOverrides: str = "skip_num_rows_stock_lifetime_overrides"
     IgnoreColumnsStockLifetimeOverrides: str = "ignore_columns_stock_lifetime_overrides"
 
+    # Flow solver
+    UseArraySolver: str = "use_array_solver"
+    NumScenarioWorkers: str = "num_scenario_workers"
+
+    # Result export
+    NumExportWorkers: str = "num_export_workers"
+    ScenarioDataExportFormat: str = "scenario_data_export_format"
+
+    # Dynamic stocks
+    PackDynamicStockCohorts: str = "pack_dynamic_stock_cohorts"
+    DynamicStockSurvivalCutoff: str = "dynamic_stock_survival_cutoff"
+    StreamDynamicStocksExport: str = "stream_dynamic_stocks_export"
+    DynamicStockCohortsFormat: str = "dynamic_stock_cohorts_format"
+
+
+# Parameters that only control how scenarios are run, exported or visualized.
+# These do not change the solved results so those are not part of the cache keys.
+# NOTE: CheckErrors and SkipChecks are not listed here because cached scenarios are not checked again,
+# so scenarios solved with skipped checks must not be reused by run with the checks enabled
+execution_only_parameter_names: FrozenSet[ParameterName] = frozenset([
+    ParameterName.OutputPath,
+    ParameterName.CreateNetworkGraphs,
+    ParameterName.CreateSankeyCharts,
+    ParameterName.CreateResultStore,
+    ParameterName.ShowPlots,
+    ParameterName.PlotMode,
+    ParameterName.PlotFormat,
+    ParameterName.NumPlotWorkers,
+    ParameterName.VisualizeInflowsToProcesses,
+    ParameterName.NumCheckWorkers,
+    ParameterName.IncludeMetadata,
+    ParameterName.NumScenarioWorkers,
+    ParameterName.NumExportWorkers,
+    ParameterName.ScenarioDataExportFormat,
+    ParameterName.StreamDynamicStocksExport,
+    ParameterName.DynamicStockCohortsFormat,
+])
+
 
 class ParameterFillMethod(str, Enum):
     """
@@ -110,6 +158,45 @@ class ParameterScenarioType(str, Enum):
     Unconstrained: str = "Unconstrained"
 
 
+class ParameterDynamicStockCohortsFormat(str, Enum):
+    """
+    Valid values for parameter DynamicStockCohortsFormat
+    """
+
+    Excel: str = "Excel"
+    NPZ: str = "NPZ"
+    Parquet: str = "Parquet"
+
+
+class ParameterScenarioDataExportFormat(str, Enum):
+    """
+    Valid values for parameter ScenarioDataExportFormat
+    """
+
+    Excel: str = "Excel"
+    Parquet: str = "Parquet"
+    Arrow: str = "Arrow"
+
+
+class ParameterPlotMode(str, Enum):
+    """
+    Valid values for parameter PlotMode
+    """
+
+    Render: str = "Render"
+    Off: str = "Off"
+    OnRequest: str = "OnRequest"
+
+
+class ParameterPlotFormat(str, Enum):
+    """
+    Valid values for parameter PlotFormat
+    """
+
+    SVG: str = "SVG"
+    PNG: str = "PNG"
+
+
 # Parameters used for Process/Flows/Stocks in settings file
 class StockDistributionType(str, Enum):
     """
@@ -0,0 +1,385 @@
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Union, Callable, Any
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from .parameters import ParameterPlotFormat
+from .resultstore import ScenarioResults
+
+# Plots are rendered without pyplot: each Figure gets its own Agg canvas so figures are never
+# registered to GUI backend and each Figure is cleared as soon as the image file is written.
+# Render functions are module level functions that take only plain values and arrays
+# so that those can be run in worker processes.
+
+
+def get_plot_filename(name: str, plot_format: str) -> str:
+    """
+    Get plot filename with extension for the plot format, e.g. "Baseline_stock_plots_by_product.svg".
+
+    :param name: Filename without extension
+    :param plot_format: Plot format (SVG or PNG)
+    :return: Filename
+    """
+    return "{}.{}".format(name, ParameterPlotFormat(plot_format).value.lower())
+
+
+def _save_figure(fig: Figure, filename: str) -> None:
+    """
+    Save Figure to file using Agg canvas and release the Figure.
+    Image format is detected from the filename extension.
+
+    :param fig: Figure
+    :param filename: Target filename
+    """
+    try:
+        FigureCanvasAgg(fig)
+        fig.savefig(filename, format=os.path.splitext(filename)[1][1:])
+    finally:
+        # Clearing removes the axes and breaks the reference cycles between
+        # Figure and Axes so memory is released without waiting for garbage collector
+        fig.clear()
+
+
+def render_stock_plots(filename: str,
+                       years: List[int],
+                       stock_ids: List[str],
+                       element_names: List[str],
+                       element_units: List[str],
+                       stock_totals: np.ndarray,
+                       stock_changes: np.ndarray,
+                       stock_outflows: np.ndarray) -> None:
+    """
+    Render in-use stock, stock change and stock outflow plots of all stocks to one image.
+    Each element (baseline and indicators) has 3 subplots.
+
+    :param filename: Target filename
+    :param years: List of years
+    :param stock_ids: List of Stock IDs
+    :param element_names: Element names, element 0 is baseline and elements 1...N are the indicators
+    :param element_units: Element units
+    :param stock_totals: Stock totals (stocks x elements x years)
+    :param stock_changes: Stock changes (stocks x elements x years)
+    :param stock_outflows: Stock outflow totals (stocks x elements x years)
+    """
+    num_subplots = len(element_names) * 3
+    fig = Figure(figsize=(12, 20))
+    axes = fig.subplots(num_subplots, 1, sharex='all', sharey='none')
+    for stock_index, stock_id in enumerate(stock_ids):
+        for element_index, (element_name, element_unit) in enumerate(zip(element_names, element_units)):
+            plot_index = element_index * 3
+            if element_index == 0:
+                label = "{}".format(stock_id)
+                titles = ["In-use stock per year by product type",
+                          "Stock change per year by product type",
+                          "Stock outflow per year by product type"]
+            else:
+                label = "{} ({}) {}".format(element_name, element_unit, stock_id)
+                titles = ["{} stock in-use per year by product type".format(element_name),
+                          "{} stock change per year".format(element_name),
+                          "{} outflow per year by product type".format(element_name)]
+
+            ylabels = ["In-use stock ({})".format(element_unit),
+                       "Stock change ({})".format(element_unit),
+                       "Stock outflow ({})".format(element_unit)]
+            values = [stock_totals[stock_index, element_index],
+                      stock_changes[stock_index, element_index],
+                      stock_outflows[stock_index, element_index]]
+            for offset in range(3):
+                axes[plot_index + offset].plot(years, values[offset], marker='o', label=label)
+                axes[plot_index + offset].set_ylabel(ylabels[offset])
+                axes[plot_index + offset].set_title(titles[offset])
+
+    # Set common properties to axes
+    for axis in axes:
+        axis.set_xlabel("Year")
+        axis.title.set_size(12)
+        axis.legend()
+
+    # Adjust layout to prevent overlap
+    fig.tight_layout()
+    tick_gap = 1 if len(years) < 15 else 10
+    axes[-1].set_xticks(years[::tick_gap])
+    _save_figure(fig, filename)
+
+
+def render_co2_removal_plot(filename: str,
+                            years: List[int],
+                            stock_ids: List[str],
+                            co2_removals: np.ndarray,
+                            stock_id_to_steady_state_years: Union[Dict[str, List[int]], None] = None) -> None:
+    """
+    Render annual CO2 emissions / removals of stocks to image.
+
+    :param filename: Target filename
+    :param years: List of years
+    :param stock_ids: List of Stock IDs
+    :param co2_removals: Annual CO2 removals (stocks x years)
+    :param stock_id_to_steady_state_years: If defined then steady-state years of each stock are highlighted
+    """
+    # Define line styles, markers, and colors for differentiation
+    line_styles = ['-', '--', '-.', ':']
+    markers = ['o', 's', '^', 'D']
+    colors = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    for index, stock_id in enumerate(stock_ids):
+        line_style = line_styles[index % len(line_styles)]
+        marker = markers[index % len(markers)]
+        color = colors[index % len(colors)]
+        ax.plot(years, co2_removals[index], marker=marker, linestyle=line_style, color=color,
+                label=f'{stock_id}')
+
+        if stock_id_to_steady_state_years is not None:
+            steady_years = stock_id_to_steady_state_years.get(stock_id, [])
+            if steady_years:
+                ax.axvspan(steady_years[0], steady_years[-1], color=color, alpha=0.1)
+
+    ax.set_xlabel('Year')
+    ax.set_ylabel('CO2 Emissions / Removals (Mt CO2)')
+    ax.set_title('Annual CO2 Emissions / Removals by Product')
+    ax.grid(True)
+    tick_gap = 1 if len(years) < 15 else 10
+    ax.set_xticks(years[::tick_gap])
+    ax.legend()
+    fig.tight_layout()
+    _save_figure(fig, filename)
+
+
+def render_inflows_plot(filename: str,
+                        years: List[int],
+                        source_process_ids: List[str],
+                        values: np.ndarray,
+                        process_name: str) -> None:
+    """
+    Render inflows per year to process as stacked area chart.
+
+    :param filename: Target filename
+    :param years: List of years
+    :param source_process_ids: List of source Process IDs
+    :param values: Inflow values (source processes x years)
+    :param process_name: Name of the target Process
+    """
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    ax.stackplot(years, values, labels=list(source_process_ids))
+    ax.set_ylabel("Mm3 SWE")
+    ax.set_title("Inputs to {}".format(process_name))
+    ax.legend(loc='upper left')
+    tick_gap = 1 if len(years) < 15 else 10
+    ax.set_xticks(years[::tick_gap])
+    _save_figure(fig, filename)
+
+
+def _init_plot_worker() -> None:
+    """
+    Initialize plot worker process to use headless Agg backend.
+    """
+    matplotlib.use("Agg")
+
+
+class PlotRenderer(object):
+    """
+    Renders scenario plots to SVG or PNG images either in the current process or in worker processes.
+    Rendering is started when plot is requested and PlotRenderer.close waits until all plots are done.
+    Worker processes are started with 'spawn' so that those are safe to start from export worker threads,
+    so the calling script must create PlotRenderer inside the 'if __name__ == "__main__":' block.
+    """
+
+    def __init__(self, plot_format: str = ParameterPlotFormat.SVG, num_workers: int = 1):
+        """
+        Create PlotRenderer.
+
+        :param plot_format: Plot format (SVG or PNG)
+        :param num_workers: Number of worker processes (1 = no worker processes, 0 = number of CPUs)
+        """
+        self._plot_format = ParameterPlotFormat(plot_format)
+        if num_workers <= 0:
+            num_workers = os.cpu_count()
+
+        self._executor = None
+        if num_workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=num_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_plot_worker)
+        self._filename_to_future = {}
+
+    @property
+    def plot_format(self) -> str:
+        return self._plot_format
+
+    def _render(self, func: Callable, filename: str, *args: Any) -> Future:
+        """
+        Render plot with the render function.
+
+        :param func: Render function
+        :param filename: Target filename
+        :param args: Arguments for the render function after the filename
+        :return: Future
+        """
+        if self._executor is not None:
+            future = self._executor.submit(func, filename, *args)
+        else:
+            future = Future()
+            try:
+                future.set_result(func(filename, *args))
+            except Exception as ex:
+                future.set_exception(ex)
+
+        self._filename_to_future[filename] = future
+        return future
+
+    def render_stock_plots(self,
+                           path_to_dir: str,
+                           scenario_name: str,
+                           years: List[int],
+                           stock_ids: List[str],
+                           element_names: List[str],
+                           element_units: List[str],
+                           stock_totals: np.ndarray,
+                           stock_changes: np.ndarray,
+                           stock_outflows: np.ndarray) -> Future:
+        """
+        Render stock plots of the scenario, see render_stock_plots.
+
+        :param path_to_dir: Path to scenario output directory
+        :param scenario_name: Scenario name
+        :return: Future
+        """
+        filename = os.path.join(path_to_dir, get_plot_filename(
+            "{}_stock_plots_by_product".format(scenario_name), self._plot_format))
+        return self._render(render_stock_plots, filename, years, stock_ids, element_names, element_units,
+                            stock_totals, stock_changes, stock_outflows)
+
+    def render_co2_removal_plot(self,
+                                path_to_dir: str,
+                                scenario_name: str,
+                                years: List[int],
+                                stock_ids: List[str],
+                                co2_removals: np.ndarray,
+                                stock_id_to_steady_state_years: Union[Dict[str, List[int]], None] = None) -> Future:
+        """
+        Render CO2 removal plot of the scenario, see render_co2_removal_plot.
+
+        :param path_to_dir: Path to scenario output directory
+        :param scenario_name: Scenario name
+        :return: Future
+        """
+        filename = os.path.join(path_to_dir, get_plot_filename(
+            "{}_annual_co2_removal_by_product".format(scenario_name), self._plot_format))
+        return self._render(render_co2_removal_plot, filename, years, stock_ids, co2_removals,
+                            stock_id_to_steady_state_years)
+
+    def render_inflows_plot(self,
+                            path_to_dir: str,
+                            scenario_name: str,
+                            process_id: str,
+                            years: List[int],
+                            source_process_ids: List[str],
+                            values: np.ndarray,
+                            process_name: str) -> Future:
+        """
+        Render inflows to process plot of the scenario, see render_inflows_plot.
+
+        :param path_to_dir: Path to scenario output directory
+        :param scenario_name: Scenario name
+        :param process_id: Target Process ID
+        :return: Future
+        """
+        # NOTE: Replace character ':' in Process ID to underscore because
+        # Windows system are not able to handle that character in filename
+        process_id_for_filename = process_id.replace(":", "_")
+        filename = os.path.join(path_to_dir, get_plot_filename(
+            "{}_inflows_to_{}".format(scenario_name, process_id_for_filename), self._plot_format))
+        return self._render(render_inflows_plot, filename, years, source_process_ids, values, process_name)
+
+    def render_scenario_results(self,
+                                results: ScenarioResults,
+                                path_to_dir: str,
+                                conversion_factor_c_to_co2: Union[float, None] = None,
+                                process_ids: Union[List[str], None] = None) -> None:
+        """
+        Render all plots of the scenario from the result store.
+        CO2 removal plot is rendered only if conversion factor is defined and results contain Carbon indicator.
+
+        :param results: ScenarioResults
+        :param path_to_dir: Path to scenario output directory
+        :param conversion_factor_c_to_co2: Conversion factor from carbon to CO2
+        :param process_ids: List of Process IDs to render inflows plot
+        """
+        if process_ids is None:
+            process_ids = []
+
+        years = results.years
+        stock_ids = results.stock_ids
+        if stock_ids:
+            shape = (len(stock_ids), len(results.element_names), len(years))
+            stock_totals = np.zeros(shape)
+            stock_changes = np.zeros(shape)
+            stock_outflows = np.zeros(shape)
+            for stock_index, stock_id in enumerate(stock_ids):
+                for element_index, element_name in enumerate(results.element_names):
+                    stock_totals[stock_index, element_index] = results.get_stock_total(stock_id, element_name)
+                    stock_changes[stock_index, element_index] = results.get_stock_change(stock_id, element_name)
+                    stock_outflows[stock_index, element_index] = results.get_stock_outflows(stock_id, element_name)
+
+            self.render_stock_plots(path_to_dir, results.scenario_name, years, stock_ids,
+                                    results.element_names, results.element_units,
+                                    stock_totals, stock_changes, stock_outflows)
+
+            target_indicator_name = "Carbon"
+            if conversion_factor_c_to_co2 is not None and target_indicator_name in results.element_names[1:]:
+                co2_removals = np.zeros((len(stock_ids), len(years)))
+                for stock_index, stock_id in enumerate(stock_ids):
+                    co2_removals[stock_index] = (results.get_stock_inflows(stock_id, target_indicator_name) -
+                                                 results.get_stock_outflows(stock_id, target_indicator_name)) * \
+                                                conversion_factor_c_to_co2
+                self.render_co2_removal_plot(path_to_dir, results.scenario_name, years, stock_ids, co2_removals)
+
+        for process_id in process_ids:
+            source_process_ids, values = results.get_inflows_to_process(process_id)
+            self.render_inflows_plot(path_to_dir, results.scenario_name, process_id, years,
+                                     source_process_ids, values, results.get_process_name(process_id))
+
+    def close(self) -> List[str]:
+        """
+        Wait until all requested plots are rendered and stop worker processes.
+        Raises Exception with list of errors if rendering of any plot failed.
+
+        :return: List of rendered filenames
+        """
+        errors = []
+        filenames = []
+        for filename, future in self._filename_to_future.items():
+            try:
+                future.result()
+                filenames.append(filename)
+            except Exception as ex:
+                errors.append("Plot '{}': {}".format(filename, ex))
+
+        self._filename_to_future.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        if errors:
+            raise Exception(errors)
+
+        return filenames
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            # Do not hide the original exception with plot errors
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+            self._filename_to_future.clear()
+            return
+
+        self.close()
@@ -0,0 +1,384 @@
+import importlib.util
+import os
+import zipfile
+from typing import List, Dict, Union, Any
+import numpy as np
+import pandas as pd
+from .parameters import ParameterDynamicStockCohortsFormat, ParameterScenarioDataExportFormat
+
+# Directory names of the combined scenario data tables when written as Parquet / Arrow dataset
+_sheet_name_to_table_dir_name = {
+    "Processes": "processes",
+    "Flows": "flows",
+    "Flow values (baseline value)": "flow_values",
+    "Mass balance": "mass_balance",
+}
+
+# Partition columns of the combined scenario data tables
+# NOTE: Flow values and mass balance tables have only one row per year so those are partitioned only by scenario
+_table_dir_name_to_partition_columns = {
+    "processes": ["Scenario", "Year"],
+    "flows": ["Scenario", "Year"],
+    "flow_values": ["Scenario"],
+    "mass_balance": ["Scenario"],
+}
+
+# Column names of the total sheets of dynamic stocks Excel file
+_total_sheet_name_to_value_column = {
+    "Total_stock": "Stock total",
+    "Total_stock_change": "Stock change",
+    "Total_stock_outflow": "Stock outflow total",
+}
+
+
+class DynamicStocksWriter(object):
+    """
+    Writer for dynamic stock results of one scenario.
+
+    Stock by cohort and outflow by cohort matrices (years x cohorts) are written either as
+    sheets to the dynamic stocks Excel file or to separate binary file (NPZ or Parquet).
+    Stock totals, stock changes and stock outflow totals are always written to the Excel file
+    as sheets Total_stock, Total_stock_change and Total_stock_outflow when the writer is closed.
+
+    If streaming is enabled then Excel file is written row by row directly from the arrays
+    by using xlsxwriter in constant memory mode, otherwise each sheet is written from DataFrame.
+    Contents of the sheets are the same in both cases.
+    """
+
+    def __init__(self,
+                 path_to_excel_file: str,
+                 years: List[int],
+                 streaming: bool = False,
+                 cohorts_format: str = ParameterDynamicStockCohortsFormat.Excel,
+                 path_to_cohorts_file: Union[str, None] = None,
+                 ):
+        """
+        Create writer and open the output files.
+
+        :param path_to_excel_file: Path to dynamic stocks Excel file
+        :param years: List of years
+        :param streaming: True to write Excel file row by row with constant memory (default: False)
+        :param cohorts_format: Format of the cohort matrices (Excel, NPZ or Parquet)
+        :param path_to_cohorts_file: Path to the cohorts file, required if cohorts_format is NPZ or Parquet
+        """
+        if cohorts_format not in [entry for entry in ParameterDynamicStockCohortsFormat]:
+            raise Exception("Invalid dynamic stock cohorts format '{}'".format(cohorts_format))
+
+        if cohorts_format != ParameterDynamicStockCohortsFormat.Excel and not path_to_cohorts_file:
+            raise Exception("No path to cohorts file for dynamic stock cohorts format '{}'".format(cohorts_format))
+
+        if cohorts_format == ParameterDynamicStockCohortsFormat.Parquet and importlib.util.find_spec("pyarrow") is None:
+            raise Exception("Writing dynamic stock cohorts as Parquet requires pyarrow (pip install pyarrow)")
+
+        self._years = [int(year) for year in years]
+        self._streaming = streaming
+        self._cohorts_format = cohorts_format
+        self._sheet_names = set()
+
+        # Total sheet name -> (list of (scenario name, stock ID, indicator name), list of values)
+        self._total_sheet_name_to_entries = {name: ([], []) for name in _total_sheet_name_to_value_column}
+
+        # Excel file
+        self._writer = None
+        self._workbook = None
+        self._header_format = None
+        if streaming:
+            import xlsxwriter
+            self._workbook = xlsxwriter.Workbook(path_to_excel_file, {"constant_memory": True})
+
+            # Same style as pandas uses for header and index cells
+            self._header_format = self._workbook.add_format({"bold": True, "border": 1,
+                                                             "align": "center", "valign": "top"})
+        else:
+            self._writer = pd.ExcelWriter(path_to_excel_file, engine="xlsxwriter")
+
+        # Cohorts file
+        self._zip_file = None
+        self._parquet_writer = None
+        self._path_to_cohorts_file = path_to_cohorts_file
+        if cohorts_format == ParameterDynamicStockCohortsFormat.NPZ:
+            # NPZ file is a zip archive of .npy files so arrays can be added one by one
+            self._zip_file = zipfile.ZipFile(path_to_cohorts_file, mode="w",
+                                             compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+            self._write_npz_array("years", np.array(self._years))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_cohorts(self,
+                      stock_id: str,
+                      element_name: str,
+                      sheet_name_stock_by_cohort: str,
+                      sheet_name_outflow_by_cohort: str,
+                      stock_by_cohort: np.ndarray,
+                      outflow_by_cohort: np.ndarray) -> None:
+        """
+        Write stock by cohort and outflow by cohort matrices (years x cohorts).
+        Sheet names are used when cohorts are written to Excel file, otherwise
+        the matrices are stored under the stock ID and element name.
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name
+        :param sheet_name_stock_by_cohort: Excel sheet name for stock by cohort
+        :param sheet_name_outflow_by_cohort: Excel sheet name for outflow by cohort
+        :param stock_by_cohort: Stock by cohort (years x cohorts)
+        :param outflow_by_cohort: Outflow by cohort (years x cohorts)
+        """
+        if self._cohorts_format == ParameterDynamicStockCohortsFormat.Excel:
+            self._write_matrix_sheet(sheet_name_stock_by_cohort, stock_by_cohort)
+            self._write_matrix_sheet(sheet_name_outflow_by_cohort, outflow_by_cohort)
+            return
+
+        if self._cohorts_format == ParameterDynamicStockCohortsFormat.NPZ:
+            self._write_npz_array("{}/{}/stock_by_cohort".format(stock_id, element_name), stock_by_cohort)
+            self._write_npz_array("{}/{}/outflow_by_cohort".format(stock_id, element_name), outflow_by_cohort)
+            return
+
+        self._write_parquet_cohorts(stock_id, element_name, stock_by_cohort, outflow_by_cohort)
+
+    def write_totals(self,
+                     scenario_name: str,
+                     stock_id: str,
+                     indicator_name: str,
+                     stock_total: np.ndarray,
+                     stock_change: np.ndarray,
+                     stock_outflow: np.ndarray) -> None:
+        """
+        Add stock total, stock change and stock outflow total of the stock.
+        Totals are written to the Excel file when the writer is closed.
+
+        :param scenario_name: Scenario name
+        :param stock_id: Stock ID
+        :param indicator_name: Baseline unit name or indicator name
+        :param stock_total: Stock total per year
+        :param stock_change: Stock change per year
+        :param stock_outflow: Stock outflow total per year
+        """
+        key = (scenario_name, stock_id, indicator_name)
+        for sheet_name, values in zip(_total_sheet_name_to_value_column, [stock_total, stock_change, stock_outflow]):
+            keys, list_of_values = self._total_sheet_name_to_entries[sheet_name]
+            keys.append(key)
+            list_of_values.append(np.asarray(values))
+
+    def close(self) -> None:
+        """
+        Write the total sheets and close the output files.
+        """
+        if self._writer is None and self._workbook is None:
+            return
+
+        try:
+            for sheet_name, (keys, list_of_values) in self._total_sheet_name_to_entries.items():
+                if keys:
+                    self._write_total_sheet(sheet_name, keys, list_of_values)
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+            if self._workbook is not None:
+                self._workbook.close()
+                self._workbook = None
+
+            if self._zip_file is not None:
+                self._zip_file.close()
+                self._zip_file = None
+
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+                self._parquet_writer = None
+
+    def _add_sheet_name(self, sheet_name: str) -> None:
+        """
+        Check that sheet name is not already used.
+        Rows of the streamed sheets are flushed to disk immediately so those cannot be overwritten.
+
+        :param sheet_name: Sheet name
+        """
+        if sheet_name in self._sheet_names:
+            raise Exception("Duplicate sheet name '{}' in dynamic stocks Excel file".format(sheet_name))
+        self._sheet_names.add(sheet_name)
+
+    def _write_matrix_sheet(self, sheet_name: str, matrix: np.ndarray) -> None:
+        """
+        Write matrix (years x cohorts) to sheet with years as header row and as index column.
+
+        :param sheet_name: Sheet name
+        :param matrix: Matrix (years x cohorts)
+        """
+        if not self._streaming:
+            df = pd.DataFrame(matrix, columns=self._years, index=self._years)
+            df.to_excel(self._writer, sheet_name=sheet_name)
+            return
+
+        self._add_sheet_name(sheet_name)
+        worksheet = self._workbook.add_worksheet(sheet_name)
+        for col_index, year in enumerate(self._years):
+            worksheet.write_number(0, col_index + 1, year, self._header_format)
+
+        is_finite = np.isfinite(matrix)
+        all_finite = bool(is_finite.all())
+        for row_index, year in enumerate(self._years):
+            worksheet.write_number(row_index + 1, 0, year, self._header_format)
+            if all_finite or is_finite[row_index].all():
+                worksheet.write_row(row_index + 1, 1, matrix[row_index].tolist())
+            else:
+                for col_index, value in enumerate(matrix[row_index].tolist()):
+                    self._write_value(worksheet, row_index + 1, col_index + 1, value)
+
+    def _write_total_sheet(self, sheet_name: str, keys: List[Any], list_of_values: List[np.ndarray]) -> None:
+        """
+        Write total sheet with columns Year, value, Scenario, Stock ID and Indicator.
+        Each stock has one row per year.
+
+        :param sheet_name: Sheet name
+        :param keys: List of (scenario name, stock ID, indicator name)
+        :param list_of_values: List of value arrays, one for each key
+        """
+        value_column = _total_sheet_name_to_value_column[sheet_name]
+        columns = ["Year", value_column, "Scenario", "Stock ID", "Indicator"]
+        if not self._streaming:
+            num_years = len(self._years)
+            df = pd.DataFrame({
+                "Year": np.tile(self._years, len(keys)),
+                value_column: np.concatenate(list_of_values),
+                "Scenario": np.repeat([key[0] for key in keys], num_years).astype(object),
+                "Stock ID": np.repeat([key[1] for key in keys], num_years).astype(object),
+                "Indicator": np.repeat([key[2] for key in keys], num_years).astype(object),
+            })
+            df.to_excel(self._writer, sheet_name=sheet_name, index=False)
+            return
+
+        self._add_sheet_name(sheet_name)
+        worksheet = self._workbook.add_worksheet(sheet_name)
+        for col_index, column in enumerate(columns):
+            worksheet.write_string(0, col_index, column, self._header_format)
+
+        row_index = 1
+        for (scenario_name, stock_id, indicator_name), values in zip(keys, list_of_values):
+            for year, value in zip(self._years, values.tolist()):
+                worksheet.write_number(row_index, 0, year)
+                self._write_value(worksheet, row_index, 1, value)
+                worksheet.write(row_index, 2, scenario_name)
+                worksheet.write(row_index, 3, stock_id)
+                worksheet.write(row_index, 4, indicator_name)
+                row_index += 1
+
+    @staticmethod
+    def _write_value(worksheet: Any, row_index: int, col_index: int, value: float) -> None:
+        """
+        Write number to cell the same way as pandas: NaN is left empty and infinity is written as text.
+
+        :param worksheet: xlsxwriter Worksheet
+        :param row_index: Row index
+        :param col_index: Column index
+        :param value: Value
+        """
+        if np.isnan(value):
+            return
+
+        if np.isinf(value):
+            worksheet.write_string(row_index, col_index, "inf" if value > 0 else "-inf")
+            return
+
+        worksheet.write_number(row_index, col_index, value)
+
+    def _write_npz_array(self, name: str, array: np.ndarray) -> None:
+        """
+        Add array to NPZ file.
+
+        :param name: Array name
+        :param array: Array
+        """
+        with self._zip_file.open(name + ".npy", mode="w", force_zip64=True) as fs:
+            np.lib.format.write_array(fs, np.asanyarray(array), allow_pickle=False)
+
+    def _write_parquet_cohorts(self,
+                               stock_id: str,
+                               element_name: str,
+                               stock_by_cohort: np.ndarray,
+                               outflow_by_cohort: np.ndarray) -> None:
+        """
+        Append cohort matrices of the stock to Parquet file as rows
+        (Stock ID, Indicator, Year, Cohort, Stock by cohort, Outflow by cohort).
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name
+        :param stock_by_cohort: Stock by cohort (years x cohorts)
+        :param outflow_by_cohort: Outflow by cohort (years x cohorts)
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        years = np.array(self._years, dtype=np.int64)
+        num_years = len(years)
+        num_values = num_years * num_years
+        table = pa.table({
+            "Stock ID": pa.DictionaryArray.from_arrays(np.zeros(num_values, dtype=np.int32), [stock_id]),
+            "Indicator": pa.DictionaryArray.from_arrays(np.zeros(num_values, dtype=np.int32), [element_name]),
+            "Year": np.repeat(years, num_years),
+            "Cohort": np.tile(years, num_years),
+            "Stock by cohort": np.ascontiguousarray(stock_by_cohort, dtype=np.float64).reshape(-1),
+            "Outflow by cohort": np.ascontiguousarray(outflow_by_cohort, dtype=np.float64).reshape(-1),
+        })
+
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self._path_to_cohorts_file, table.schema)
+        self._parquet_writer.write_table(table)
+
+
+def get_dynamic_stock_cohorts_filename(scenario_name: str, cohorts_format: str) -> Union[str, None]:
+    """
+    Get filename of the dynamic stock cohorts file for the scenario.
+
+    :param scenario_name: Scenario name
+    :param cohorts_format: Format of the cohort matrices (Excel, NPZ or Parquet)
+    :return: Filename or None if cohorts are written to the dynamic stocks Excel file
+    """
+    if cohorts_format == ParameterDynamicStockCohortsFormat.NPZ:
+        return "{}_dynamic_stocks_cohorts.npz".format(scenario_name)
+
+    if cohorts_format == ParameterDynamicStockCohortsFormat.Parquet:
+        return "{}_dynamic_stocks_cohorts.parquet".format(scenario_name)
+
+    return None
+
+
+def write_scenario_data_tables(sheet_name_to_df: Dict[str, pd.DataFrame],
+                               path_to_dir: str,
+                               export_format: str = ParameterScenarioDataExportFormat.Parquet) -> None:
+    """
+    Write combined scenario data tables of one scenario to Parquet or Arrow IPC dataset.
+    Each table is written to own subdirectory of path_to_dir (processes, flows, flow_values, mass_balance)
+    using Hive partitioning, e.g. processes/Scenario=Baseline/Year=2021/part-0.parquet, so tables of
+    all scenarios can be read as one dataset (e.g. pandas.read_parquet(path_to_dir + "/processes")).
+    Tables of different scenarios go to different partitions so scenarios can be written one by one
+    and concurrently.
+
+    :param sheet_name_to_df: Dictionary (sheet name -> DataFrame), each DataFrame has columns Scenario and Year
+    :param path_to_dir: Path to combined scenario data directory
+    :param export_format: Export format (Parquet or Arrow)
+    """
+    if export_format not in [ParameterScenarioDataExportFormat.Parquet, ParameterScenarioDataExportFormat.Arrow]:
+        raise Exception("Invalid scenario data export format '{}'".format(export_format))
+
+    if importlib.util.find_spec("pyarrow") is None:
+        raise Exception("Writing scenario data as {} requires pyarrow (pip install pyarrow)".format(export_format))
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset_format = "parquet" if export_format == ParameterScenarioDataExportFormat.Parquet else "ipc"
+    for sheet_name, df in sheet_name_to_df.items():
+        table_dir_name = _sheet_name_to_table_dir_name.get(sheet_name, sheet_name)
+        partition_columns = _table_dir_name_to_partition_columns.get(table_dir_name, ["Scenario"])
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        ds.write_dataset(table,
+                         os.path.join(path_to_dir, table_dir_name),
+                         format=dataset_format,
+                         partitioning=partition_columns,
+                         partitioning_flavor="hive",
+                         existing_data_behavior="overwrite_or_ignore")
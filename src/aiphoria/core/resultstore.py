@@ -0,0 +1,389 @@
+import json
+import os
+from typing import List, Dict, Union, Tuple
+import numpy as np
+import pandas as pd
+from .datastructures import Scenario
+
+# Result store layout (one directory per scenario):
+#   metadata.json                   Scenario name, years, Flow IDs, Flow source and target Process IDs,
+#                                   Process names, element names and units, Stock IDs
+#   flow_values.npy                 Evaluated Flow values (elements x years x flows)
+#   flow_exists.npy                 True if Flow exists in year (years x flows)
+#   stock_inflows.npy               Stock inflows (stocks x elements x years)
+#   stock_totals.npy                Stock totals (stocks x elements x years)
+#   stock_outflows.npy              Stock outflow totals (stocks x elements x years)
+#   stock_by_cohort_<index>.npy     Stock by cohort for Stock <index> (elements x years x cohorts)
+#   outflow_by_cohort_<index>.npy   Outflow by cohort for Stock <index> (elements x years x cohorts)
+#
+# Element 0 is always the baseline value and elements 1...N are the indicators.
+# Arrays are plain .npy files so those are memory mapped when loaded and only the parts
+# that are accessed are read from disk.
+
+RESULT_STORE_VERSION = 1
+_metadata_filename = "metadata.json"
+
+
+def write_scenario_results(scenario: Scenario, path_to_dir: str) -> None:
+    """
+    Write results of solved Scenario to result store directory.
+    Directory is created if it does not exist.
+
+    :param scenario: Solved Scenario
+    :param path_to_dir: Path to result store directory
+    """
+    flow_solver = scenario.flow_solver
+    if flow_solver is None:
+        raise Exception("Scenario '{}' is not solved".format(scenario.name))
+
+    os.makedirs(path_to_dir, exist_ok=True)
+
+    # Remove metadata and cohort files of existing result store first, so that partially rewritten
+    # result store is never mistaken for a complete one and cohort files of removed stocks are not left behind
+    for filename in os.listdir(path_to_dir):
+        is_cohort_file = filename.startswith(("stock_by_cohort_", "outflow_by_cohort_")) and filename.endswith(".npy")
+        if filename == _metadata_filename or is_cohort_file:
+            os.remove(os.path.join(path_to_dir, filename))
+
+    years = flow_solver.get_year_range()
+    indicators = flow_solver.get_indicator_name_to_indicator()
+    element_names = [scenario.scenario_data.baseline_value_name] + list(indicators.keys())
+    element_units = [scenario.scenario_data.baseline_unit_name] + [indicator.unit for indicator in indicators.values()]
+
+    flow_ids, flow_values, flow_exists = flow_solver.get_evaluated_flow_values_as_array()
+    unique_flows = flow_solver.get_unique_flows()
+    process_id_to_name = {process_id: process.name
+                          for process_id, process in flow_solver.get_unique_processes().items()}
+    np.save(os.path.join(path_to_dir, "flow_values.npy"), flow_values)
+    np.save(os.path.join(path_to_dir, "flow_exists.npy"), flow_exists)
+
+    stock_id_to_batched_dsm = flow_solver.get_batched_dynamic_stocks()
+    stock_ids = list(stock_id_to_batched_dsm.keys())
+    stock_values_shape = (len(stock_ids), len(element_names), len(years))
+    stock_inflows = np.zeros(stock_values_shape)
+    stock_totals = np.zeros(stock_values_shape)
+    stock_outflows = np.zeros(stock_values_shape)
+    for stock_index, stock_id in enumerate(stock_ids):
+        batched_dsm = stock_id_to_batched_dsm[stock_id]
+        if batched_dsm.s is None or batched_dsm.o is None:
+            batched_dsm.compute()
+
+        stock_inflows[stock_index] = batched_dsm.i
+        stock_totals[stock_index] = batched_dsm.s
+        stock_outflows[stock_index] = batched_dsm.o
+        np.save(os.path.join(path_to_dir, "stock_by_cohort_{}.npy".format(stock_index)), batched_dsm.s_c)
+        np.save(os.path.join(path_to_dir, "outflow_by_cohort_{}.npy".format(stock_index)), batched_dsm.o_c)
+
+    np.save(os.path.join(path_to_dir, "stock_inflows.npy"), stock_inflows)
+    np.save(os.path.join(path_to_dir, "stock_totals.npy"), stock_totals)
+    np.save(os.path.join(path_to_dir, "stock_outflows.npy"), stock_outflows)
+
+    # Metadata is written last so incomplete result store is never mistaken for a complete one
+    metadata = {
+        "version": RESULT_STORE_VERSION,
+        "scenario_name": scenario.name,
+        "years": [int(year) for year in years],
+        "flow_ids": flow_ids,
+        "flow_source_process_ids": [unique_flows[flow_id].source_process_id for flow_id in flow_ids],
+        "flow_target_process_ids": [unique_flows[flow_id].target_process_id for flow_id in flow_ids],
+        "process_names": process_id_to_name,
+        "element_names": element_names,
+        "element_units": element_units,
+        "stock_ids": stock_ids,
+    }
+    path_to_metadata = os.path.join(path_to_dir, _metadata_filename)
+    path_to_temp_metadata = "{}.{}.tmp".format(path_to_metadata, os.getpid())
+    with open(path_to_temp_metadata, "w", encoding="utf-8") as fs:
+        json.dump(metadata, fs, indent=1)
+    os.replace(path_to_temp_metadata, path_to_metadata)
+
+
+class ScenarioResults(object):
+    """
+    Lazy reader for scenario results written with write_scenario_results.
+    Arrays are memory mapped on first access so reading e.g. one indicator
+    of one stock does not load other data from disk.
+    """
+
+    def __init__(self, path_to_dir: str):
+        """
+        Open result store directory.
+
+        :param path_to_dir: Path to result store directory
+        """
+        path_to_metadata = os.path.join(path_to_dir, _metadata_filename)
+        if not os.path.isfile(path_to_metadata):
+            raise Exception("No scenario results found in '{}'".format(path_to_dir))
+
+        with open(path_to_metadata, "r", encoding="utf-8") as fs:
+            metadata = json.load(fs)
+
+        if metadata.get("version", None) != RESULT_STORE_VERSION:
+            raise Exception("Unsupported result store version {} in '{}'".format(
+                metadata.get("version", None), path_to_dir))
+
+        self._path_to_dir = path_to_dir
+        self._metadata = metadata
+        self._flow_id_to_index = {flow_id: index for index, flow_id in enumerate(metadata["flow_ids"])}
+        self._element_name_to_index = {name: index for index, name in enumerate(metadata["element_names"])}
+        self._stock_id_to_index = {stock_id: index for index, stock_id in enumerate(metadata["stock_ids"])}
+        self._filename_to_array = {}
+
+    @property
+    def scenario_name(self) -> str:
+        return self._metadata["scenario_name"]
+
+    @property
+    def years(self) -> List[int]:
+        return self._metadata["years"]
+
+    @property
+    def flow_ids(self) -> List[str]:
+        return self._metadata["flow_ids"]
+
+    @property
+    def element_names(self) -> List[str]:
+        """
+        Get element names. First element is the baseline value name, others are indicator names.
+
+        :return: List of element names
+        """
+        return self._metadata["element_names"]
+
+    @property
+    def element_units(self) -> List[str]:
+        return self._metadata["element_units"]
+
+    @property
+    def stock_ids(self) -> List[str]:
+        return self._metadata["stock_ids"]
+
+    def _get_array(self, filename: str) -> np.ndarray:
+        """
+        Get memory mapped array, array is opened only once.
+
+        :param filename: Array filename in result store directory
+        :return: Memory mapped array (read-only)
+        """
+        array = self._filename_to_array.get(filename, None)
+        if array is None:
+            array = np.load(os.path.join(self._path_to_dir, filename), mmap_mode="r")
+            self._filename_to_array[filename] = array
+        return array
+
+    def _get_element_index(self, element_name: Union[str, None]) -> int:
+        if element_name is None:
+            return 0
+
+        if element_name not in self._element_name_to_index:
+            raise KeyError("Element '{}' not found in results of scenario '{}'".format(
+                element_name, self.scenario_name))
+        return self._element_name_to_index[element_name]
+
+    def _get_stock_index(self, stock_id: str) -> int:
+        if stock_id not in self._stock_id_to_index:
+            raise KeyError("Stock '{}' not found in results of scenario '{}'".format(stock_id, self.scenario_name))
+        return self._stock_id_to_index[stock_id]
+
+    def get_flow_values(self, flow_id: str, element_name: Union[str, None] = None) -> np.ndarray:
+        """
+        Get evaluated values of Flow for all years.
+
+        :param flow_id: Flow ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Array of values (years)
+        """
+        if flow_id not in self._flow_id_to_index:
+            raise KeyError("Flow '{}' not found in results of scenario '{}'".format(flow_id, self.scenario_name))
+
+        element_index = self._get_element_index(element_name)
+        flow_index = self._flow_id_to_index[flow_id]
+        return np.array(self._get_array("flow_values.npy")[element_index, :, flow_index])
+
+    def get_process_name(self, process_id: str) -> str:
+        """
+        Get Process name.
+
+        :param process_id: Process ID
+        :return: Process name
+        """
+        process_id_to_name = self._metadata.get("process_names", {})
+        if process_id not in process_id_to_name:
+            raise KeyError("Process '{}' not found in results of scenario '{}'".format(process_id, self.scenario_name))
+        return process_id_to_name[process_id]
+
+    def get_inflows_to_process(self, process_id: str,
+                               element_name: Union[str, None] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Get inflows to Process by source Process for all years.
+        Source Process IDs are in the same order as the incoming Flows are in the result store.
+
+        :param process_id: Process ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Tuple (list of source Process IDs, array of values (source processes x years))
+        """
+        if "flow_target_process_ids" not in self._metadata:
+            raise Exception("Results of scenario '{}' do not contain Flow source and target Process IDs".format(
+                self.scenario_name))
+
+        source_process_ids = []
+        flow_indices_by_source = []
+        for flow_index, target_process_id in enumerate(self._metadata["flow_target_process_ids"]):
+            if target_process_id != process_id:
+                continue
+
+            source_process_id = self._metadata["flow_source_process_ids"][flow_index]
+            if source_process_id not in source_process_ids:
+                source_process_ids.append(source_process_id)
+                flow_indices_by_source.append([])
+            flow_indices_by_source[source_process_ids.index(source_process_id)].append(flow_index)
+
+        element_index = self._get_element_index(element_name)
+        flow_values = self._get_array("flow_values.npy")[element_index]
+        values = np.zeros((len(source_process_ids), len(self.years)))
+        for source_index, flow_indices in enumerate(flow_indices_by_source):
+            values[source_index] = np.sum(flow_values[:, flow_indices], axis=1)
+        return source_process_ids, values
+
+    def get_flow_exists(self) -> np.ndarray:
+        """
+        Get flow existence table.
+
+        :return: Boolean array (years x flows), True if Flow exists in year
+        """
+        return np.array(self._get_array("flow_exists.npy"))
+
+    def get_flow_values_as_dataframe(self, element_name: Union[str, None] = None) -> pd.DataFrame:
+        """
+        Get evaluated Flow values for all years in the same format as
+        FlowSolver.get_evaluated_flow_values_as_dataframe.
+
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: DataFrame (column "Year" and one column per Flow ID)
+        """
+        element_index = self._get_element_index(element_name)
+        df = pd.DataFrame(np.array(self._get_array("flow_values.npy")[element_index]), columns=self.flow_ids)
+        df.insert(0, "Year", self.years)
+        return df
+
+    def get_stock_inflows(self, stock_id: str, element_name: Union[str, None] = None) -> np.ndarray:
+        """
+        Get stock inflows for all years.
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Array of values (years)
+        """
+        stock_index = self._get_stock_index(stock_id)
+        element_index = self._get_element_index(element_name)
+        return np.array(self._get_array("stock_inflows.npy")[stock_index, element_index])
+
+    def get_stock_total(self, stock_id: str, element_name: Union[str, None] = None) -> np.ndarray:
+        """
+        Get stock total for all years.
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Array of values (years)
+        """
+        stock_index = self._get_stock_index(stock_id)
+        element_index = self._get_element_index(element_name)
+        return np.array(self._get_array("stock_totals.npy")[stock_index, element_index])
+
+    def get_stock_change(self, stock_id: str, element_name: Union[str, None] = None) -> np.ndarray:
+        """
+        Get stock change for all years. Formula: stock_change(t) = stock(t) - stock(t-1).
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Array of values (years)
+        """
+        stock_total = self.get_stock_total(stock_id, element_name)
+        stock_change = np.zeros(stock_total.shape)
+        if len(stock_total):
+            stock_change[0] = stock_total[0]
+            stock_change[1:] = np.diff(stock_total)
+        return stock_change
+
+    def get_stock_outflows(self, stock_id: str, element_name: Union[str, None] = None) -> np.ndarray:
+        """
+        Get stock outflow total for all years.
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Array of values (years)
+        """
+        stock_index = self._get_stock_index(stock_id)
+        element_index = self._get_element_index(element_name)
+        return np.array(self._get_array("stock_outflows.npy")[stock_index, element_index])
+
+    def get_stock_by_cohort(self, stock_id: str, element_name: Union[str, None] = None) -> np.ndarray:
+        """
+        Get stock by cohort.
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Array of values (years x cohorts)
+        """
+        stock_index = self._get_stock_index(stock_id)
+        element_index = self._get_element_index(element_name)
+        return np.array(self._get_array("stock_by_cohort_{}.npy".format(stock_index))[element_index])
+
+    def get_outflow_by_cohort(self, stock_id: str, element_name: Union[str, None] = None) -> np.ndarray:
+        """
+        Get outflow by cohort.
+
+        :param stock_id: Stock ID
+        :param element_name: Baseline value name or indicator name (default: baseline)
+        :return: Array of values (years x cohorts)
+        """
+        stock_index = self._get_stock_index(stock_id)
+        element_index = self._get_element_index(element_name)
+        return np.array(self._get_array("outflow_by_cohort_{}.npy".format(stock_index))[element_index])
+
+    def close(self) -> None:
+        """
+        Release memory mapped arrays.
+        """
+        self._filename_to_array.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def write_results(scenarios: List[Scenario], path_to_dir: str) -> Dict[str, str]:
+    """
+    Write results of all solved Scenarios to result store, one directory per Scenario.
+
+    :param scenarios: List of solved Scenarios
+    :param path_to_dir: Path to root directory of result store
+    :return: Dictionary (scenario name -> path to scenario result directory)
+    """
+    scenario_name_to_path = {}
+    for scenario in scenarios:
+        path_to_scenario_dir = os.path.join(path_to_dir, scenario.name)
+        write_scenario_results(scenario, path_to_scenario_dir)
+        scenario_name_to_path[scenario.name] = path_to_scenario_dir
+    return scenario_name_to_path
+
+
+def load_results(path_to_dir: str) -> Dict[str, ScenarioResults]:
+    """
+    Open all scenario results in result store root directory.
+    Only metadata is read, arrays are read on access.
+
+    :param path_to_dir: Path to root directory of result store
+    :return: Dictionary (scenario name -> ScenarioResults)
+    """
+    scenario_name_to_results = {}
+    for entry in sorted(os.listdir(path_to_dir)):
+        path_to_scenario_dir = os.path.join(path_to_dir, entry)
+        if not os.path.isfile(os.path.join(path_to_scenario_dir, _metadata_filename)):
+            continue
+
+        results = ScenarioResults(path_to_scenario_dir)
+        scenario_name_to_results[results.scenario_name] = results
+    return scenario_name_to_results
@@ -18,3 +18,12 @@ class FlowType(str, Enum):
     Absolute: str = "ABS"
     Relative: str = "REL"
 
+
+
+# Data checks
+class DataCheckStage(str, Enum):
+    # Checks for the data read from the settings file, run before filling missing flow data
+    Input: str = "input"
+
+    # Checks for the built model data (after filling missing flow data and merging relative flows)
+    Model: str = "model"
@@ -23,7 +23,11 @@ Repository for this class, documentation, and tutorials: https://github.com/IndE
 
 """
 
+from collections import OrderedDict
+
 import numpy as np
+import scipy.linalg
+import scipy.sparse
 import scipy.stats
 
 def __version__():
@@ -31,6 +35,64 @@ def __version__():
     return str('1.0'), str('Class DynamicStockModel, dsm. Version 1.0. Last change: July 25th, 2019. Check https://github.com/IndEcol/ODYM for latest version.')
 
 
+class SurvivalFunctionCache(object):
+
+    """ Bounded least-recently-used cache for survival tables.
+
+    Dynamic stock models with identical lifetime models (distribution type, lifetime parameter vectors and
+    number of years) share the same survival table. The cached tables are read-only and shared between
+    all dynamic stock models that use them, e.g. baseline and indicator stocks of all scenarios.
+
+    maxsize : maximum number of cached survival tables, the least recently used table is evicted first
+    """
+
+    def __init__(self, maxsize=256):
+        """ Init function. Create empty cache."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._key_to_sf = OrderedDict()
+
+    def __len__(self):
+        return len(self._key_to_sf)
+
+    @staticmethod
+    def make_key(t, lt, half_life=None):
+        """ Build hashable cache key from time vector and lifetime distribution dictionary."""
+        LifetimeParameters = []
+        for ThisKey in sorted(lt.keys(), key=str):
+            if ThisKey != 'Type':
+                Values = np.asarray(lt[ThisKey])
+                LifetimeParameters.append((str(ThisKey), Values.shape, tuple(Values.ravel().tolist())))
+        return lt['Type'], len(t), half_life, tuple(LifetimeParameters)
+
+    def get(self, key):
+        """ Return cached survival table for key or None if not cached."""
+        sf = self._key_to_sf.get(key, None)
+        if sf is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._key_to_sf.move_to_end(key)
+        return sf
+
+    def put(self, key, sf):
+        """ Store survival table for key as read-only array and evict least recently used tables if needed."""
+        sf.setflags(write=False)
+        self._key_to_sf[key] = sf
+        self._key_to_sf.move_to_end(key)
+        while len(self._key_to_sf) > self.maxsize:
+            self._key_to_sf.popitem(last=False)
+        return sf
+
+    def clear(self):
+        """ Remove all cached survival tables."""
+        self._key_to_sf.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class DynamicStockModel(object):
 
     """ Class containing a dynamic stock model
@@ -55,8 +117,12 @@ class DynamicStockModel(object):
 
     name : string, optional
         Name of the dynamic stock model, default is 'DSM'
+
+    sf_cache : SurvivalFunctionCache shared by all instances, set to None to disable caching of survival tables
     """
 
+    sf_cache = SurvivalFunctionCache()
+
     """
     Basic initialisation and dimension check methods
     """
@@ -213,81 +279,77 @@ class DynamicStockModel(object):
         This is the only method for the inflow-driven model where the lifetime distribution directly enters the computation. All other stock variables are determined by mass balance.
         The shape of the output sf array is NoofYears * NoofYears, and the meaning is years by age-cohorts.
         The method does nothing if the sf alreay exists. For example, sf could be assigned to the dynamic stock model from an exogenous computation to save time.
+        The distributions are evaluated for all cohorts at once, see compute_sf_from_distribution.
+        Survival tables are shared through sf_cache between dynamic stock models with identical lifetime models,
+        cached tables are read-only.
         """
         if self.sf is None:
+            if self.sf_cache is not None:
+                CacheKey = self.sf_cache.make_key(self.t, self.lt, getattr(self, 'half_life', None))
+                self.sf = self.sf_cache.get(CacheKey)
+                if self.sf is not None:
+                    return self.sf
+
             self.sf = np.zeros((len(self.t), len(self.t)))
             # Perform specific computations and checks for each lifetime distribution:
 
             if self.lt['Type'] == 'Fixed': # fixed lifetime, age-cohort leaves the stock in the model year when the age specified as 'Mean' is reached.
-                for m in range(0, len(self.t)):  # cohort index
-                    self.sf[m::,m] = np.multiply(1, (np.arange(0,len(self.t)-m) < self.lt['Mean'][m])) # converts bool to 0/1
+                self.sf = self.compute_sf_from_distribution(lambda Age, Mean: np.multiply(1, (Age < Mean)), # converts bool to 0/1
+                                                            [self.lt['Mean']])
                 # Example: if Lt is 3.5 years fixed, product will still be there after 0, 1, 2, and 3 years, gone after 4 years.
 
-            # if self.lt['Type'] == 'Simple':  # Implement simple first-order decay
-            #     for m in range(0, len(self.t)):  # Loop over each cohort index
-            #         mean_lifetime = self.lt['Mean'][m]
-            #     # Calculate decay constant k based on mean lifetime
-            #         k = ln(2) / half-life #if half-life is provided; otherwise:
-            #         k = 1 / mean_lifetime  # For mean lifetime-based decay constant
-            #     # Create decay factors for each time step
-            #         decay_factors = np.exp(-k * np.arange(0, len(self.t) - m))
-            #     # Apply the decay factor to each cohort over time
-            #         self.sf[m::, m] = decay_factors
-
             if self.lt['Type'] == 'Simple':  # Implement simple first-order decay
-                for m in range(0, len(self.t)):  # Loop over each cohort index
-                    mean_lifetime = self.lt['Mean'][m]
-
-                    # Decide on decay constant k
-                    if hasattr(self, 'half_life') and self.half_life is not None:
-                        k = np.log(2) / self.half_life
-                    else:
-                        k = 1 / mean_lifetime  # For mean lifetime-based decay
-
-                    # Create decay factors for each time step
-                    decay_factors = np.exp(-k * np.arange(0, len(self.t) - m))
-
-                    # Apply decay factor to the cohort
-                    self.sf[m::, m] = decay_factors
-
+                # Decide on decay constant k
+                if hasattr(self, 'half_life') and self.half_life is not None:
+                    k = np.log(2) / self.half_life * np.ones(len(self.t))
+                else:
+                    k = 1 / np.asarray(self.lt['Mean'], dtype=float)  # For mean lifetime-based decay
 
+                # Create decay factors for each time step and cohort
+                self.sf = self.compute_sf_from_distribution(lambda Age, k: np.exp(-k * Age), [k])
 
             if self.lt['Type'] == 'Normal': # normally distributed lifetime with mean and standard deviation. Watch out for nonzero values 
                 # for negative ages, no correction or truncation done here. Cf. note below.
-                for m in range(0, len(self.t)):  # cohort index
-                    if self.lt['Mean'][m] != 0:  # For products with lifetime of 0, sf == 0
-                        self.sf[m::,m] = scipy.stats.norm.sf(np.arange(0,len(self.t)-m), loc=self.lt['Mean'][m], scale=self.lt['StdDev'][m])
-                        # NOTE: As normal distributions have nonzero pdf for negative ages, which are physically impossible, 
-                        # these outflow contributions can either be ignored (violates the mass balance) or
-                        # allocated to the zeroth year of residence, the latter being implemented in the method compute compute_o_c_from_s_c.
-                        # As alternative, use lognormal or folded normal distribution options.
+                # For products with lifetime of 0, sf == 0
+                self.sf = self.compute_sf_from_distribution(lambda Age, Mean, StdDev: scipy.stats.norm.sf(Age, loc=Mean, scale=StdDev),
+                                                            [self.lt['Mean'], self.lt['StdDev']],
+                                                            np.asarray(self.lt['Mean']) != 0)
+                # NOTE: As normal distributions have nonzero pdf for negative ages, which are physically impossible, 
+                # these outflow contributions can either be ignored (violates the mass balance) or
+                # allocated to the zeroth year of residence, the latter being implemented in the method compute compute_o_c_from_s_c.
+                # As alternative, use lognormal or folded normal distribution options.
                         
             if self.lt['Type'] == 'FoldedNormal': # Folded normal distribution, cf. https://en.wikipedia.org/wiki/Folded_normal_distribution
-                for m in range(0, len(self.t)):  # cohort index
-                    if self.lt['Mean'][m] != 0:  # For products with lifetime of 0, sf == 0
-                        self.sf[m::,m] = scipy.stats.foldnorm.sf(np.arange(0,len(self.t)-m), self.lt['Mean'][m]/self.lt['StdDev'][m], 0, scale=self.lt['StdDev'][m])
-                        # NOTE: call this option with the parameters of the normal distribution mu and sigma of curve BEFORE folding,
-                        # curve after folding will have different mu and sigma.
+                # For products with lifetime of 0, sf == 0
+                self.sf = self.compute_sf_from_distribution(lambda Age, Mean, StdDev: scipy.stats.foldnorm.sf(Age, Mean / StdDev, 0, scale=StdDev),
+                                                            [self.lt['Mean'], self.lt['StdDev']],
+                                                            np.asarray(self.lt['Mean']) != 0)
+                # NOTE: call this option with the parameters of the normal distribution mu and sigma of curve BEFORE folding,
+                # curve after folding will have different mu and sigma.
 
             if self.lt['Type'] == 'LogNormal': # lognormal distribution
                 # Here, the mean and stddev of the lognormal curve, 
                 # not those of the underlying normal distribution, need to be specified! conversion of parameters done here:
-                for m in range(0, len(self.t)):  # cohort index
-                    if self.lt['Mean'][m] != 0:  # For products with lifetime of 0, sf == 0
-                        # calculate parameter mu    of underlying normal distribution:
-                        LT_LN = np.log(self.lt['Mean'][m] / np.sqrt(1 + self.lt['Mean'][m] * self.lt['Mean'][m] / (self.lt['StdDev'][m] * self.lt['StdDev'][m]))) 
-                        # calculate parameter sigma of underlying normal distribution:
-                        SG_LN = np.sqrt(np.log(1 + self.lt['Mean'][m] * self.lt['Mean'][m] / (self.lt['StdDev'][m] * self.lt['StdDev'][m])))
-                        # compute survial function
-                        self.sf[m::,m] = scipy.stats.lognorm.sf(np.arange(0,len(self.t)-m), s=SG_LN, loc = 0, scale=np.exp(LT_LN)) 
-                        # values chosen according to description on
-                        # https://docs.scipy.org/doc/scipy-0.13.0/reference/generated/scipy.stats.lognorm.html
-                        # Same result as EXCEL function "=LOGNORM.VERT(x;LT_LN;SG_LN;TRUE)"
+                Mean = np.asarray(self.lt['Mean'], dtype=float)
+                StdDev = np.asarray(self.lt['StdDev'], dtype=float)
+                with np.errstate(divide='ignore', invalid='ignore'): # Cohorts with lifetime 0 are masked out below
+                    # calculate parameter mu    of underlying normal distribution:
+                    LT_LN = np.log(Mean / np.sqrt(1 + Mean * Mean / (StdDev * StdDev)))
+                    # calculate parameter sigma of underlying normal distribution:
+                    SG_LN = np.sqrt(np.log(1 + Mean * Mean / (StdDev * StdDev)))
+                # compute survial function, for products with lifetime of 0, sf == 0
+                self.sf = self.compute_sf_from_distribution(lambda Age, LT_LN, SG_LN: scipy.stats.lognorm.sf(Age, s=SG_LN, loc=0, scale=np.exp(LT_LN)),
+                                                            [LT_LN, SG_LN],
+                                                            Mean != 0)
+                # values chosen according to description on
+                # https://docs.scipy.org/doc/scipy-0.13.0/reference/generated/scipy.stats.lognorm.html
+                # Same result as EXCEL function "=LOGNORM.VERT(x;LT_LN;SG_LN;TRUE)"
                         
             if self.lt['Type'] == 'Weibull': # Weibull distribution with standard definition of scale and shape parameters
-                for m in range(0, len(self.t)):  # cohort index
-                    if self.lt['Shape'][m] != 0:  # For products with lifetime of 0, sf == 0
-                        self.sf[m::,m] = scipy.stats.weibull_min.sf(np.arange(0,len(self.t)-m), c=self.lt['Shape'][m], loc = 0, scale=self.lt['Scale'][m])
+                # For products with lifetime of 0, sf == 0
+                self.sf = self.compute_sf_from_distribution(lambda Age, Shape, Scale: scipy.stats.weibull_min.sf(Age, c=Shape, loc=0, scale=Scale),
+                                                            [self.lt['Shape'], self.lt['Scale']],
+                                                            np.asarray(self.lt['Shape']) != 0)
 
             elif self.lt['Type'] in ['LandfillDecayWood', 'LandfillDecayPaper']: # FOD method IPCC https://www.ipcc-nggip.iges.or.jp/public/2019rf/pdf/5_Volume5/19R_V5_3_Ch03_SWDS.pdf
                 decay_rates = {'LandfillDecayWood': 0.05, 'LandfillDecayPaper': 0.025} # IPCC default decay rates
@@ -315,17 +377,42 @@ class DynamicStockModel(object):
                 # IPCC default oxidation factor (OX)
                 OX = self.lt.get('OX', 0.0)
 
-                for m in range(len(self.t)): # Loop over each cohort index
-                    decay_factors = np.exp(-k_adjusted * np.arange(len(self.t) - m)) # Compute decay factors for this cohort
-                    DDOCm_decomposed = 1 - decay_factors
-                    CH4_generated = DDOCm_decomposed * DOC * DOC_f * MCF * F * (16 / 12)
+                # Decay factors are the same for every cohort
+                self.sf = self.compute_sf_from_distribution(lambda Age: np.exp(-k_adjusted * Age) * DOC * DOC_f * MCF * (1 - R) * (1 - OX), [])
 
-                    self.sf[m:, m] = decay_factors * DOC * DOC_f * MCF * (1 - R) * (1 - OX)
+            if self.sf_cache is not None:
+                self.sf_cache.put(CacheKey, self.sf)
 
             return self.sf
         else:
             # sf already exists
             return self.sf
+
+    def compute_sf_from_distribution(self, SurvivalFunction, Parameters, Cohorts=None):
+        """
+        Build the survival table year-by-cohort from a survival function of the age.
+        SurvivalFunction(Age, *Parameters) is evaluated only once for the whole table:
+        If all cohorts share identical parameters, a single curve over ages 0 ... NoofYears-1 is computed and laid out
+        as a Toeplitz-structured lower triangle, sf(m,n) = curve(m-n).
+        Otherwise the age difference matrix is built once and the function is broadcasted with per-cohort parameter vectors.
+        Parameters is a list of parameter vectors with one value per cohort.
+        Cohorts is an optional boolean vector, cohorts set to False (e.g. lifetime 0) get sf == 0.
+        """
+        NoofYears = len(self.t)
+        Parameters = [np.asarray(Parameter) for Parameter in Parameters]
+        if Cohorts is None:
+            Cohorts = np.ones(NoofYears, dtype=bool)
+
+        if Cohorts.all() and all((Parameter == Parameter[0]).all() for Parameter in Parameters):
+            # Fast path: identical lifetime model for all cohorts
+            Curve = SurvivalFunction(np.arange(0, NoofYears), *[Parameter[0] for Parameter in Parameters])
+            return scipy.linalg.toeplitz(np.broadcast_to(Curve, (NoofYears,)).astype(float), np.zeros(NoofYears))
+
+        Age = np.arange(0, NoofYears)[:, np.newaxis] - np.arange(0, NoofYears)[np.newaxis, :]
+        Mask = (Age >= 0) & Cohorts[np.newaxis, :]
+        with np.errstate(divide='ignore', invalid='ignore'): # Masked entries are not used
+            Values = SurvivalFunction(np.maximum(Age, 0), *[Parameter[np.newaxis, :] for Parameter in Parameters])
+        return np.where(Mask, Values, 0.0)
         
 
     """
@@ -372,6 +459,43 @@ class DynamicStockModel(object):
             # s_c does not exist. Doing nothing
             return None
 
+    def update_inflow_cohort(self, Cohort, Inflow):
+        """ Set the inflow of a single age-cohort and update stock and outflow incrementally.
+        Only the column of the changed cohort is touched: s_c[:,c] and o_c[:,c] change by (Inflow - i[c]) * sf[:,c]
+        and by the corresponding outflow pdf, and the totals s and o change by the same column vectors.
+        This makes one update O(T) instead of rebuilding the full T x T cohort tables.
+        Requires that s_c, o_c, s, and o are already consistent with the current inflow, otherwise
+        the model is recomputed completely.
+        """
+        if self.s_c is None or self.o_c is None or self.s is None or self.o is None:
+            self.i[Cohort] = Inflow
+            self.s_c = None
+            self.o_c = None
+            self.s = None
+            self.o = None
+            self.compute_s_c_inflow_driven()
+            self.compute_o_c_from_s_c()
+            self.compute_stock_total()
+            self.compute_outflow_total()
+            return self.s
+
+        Delta = Inflow - self.i[Cohort]
+        self.i[Cohort] = Inflow
+        if Delta == 0:
+            return self.s
+
+        self.compute_sf()
+        Delta_s_c = Delta * self.sf[Cohort::, Cohort]
+        Delta_o_c = np.empty(len(Delta_s_c))
+        Delta_o_c[0] = Delta - Delta_s_c[0] # allow for outflow in year 0 already
+        Delta_o_c[1::] = -1 * np.diff(Delta_s_c)
+
+        self.s_c[Cohort::, Cohort] += Delta_s_c
+        self.o_c[Cohort::, Cohort] += Delta_o_c
+        self.s[Cohort::] += Delta_s_c
+        self.o[Cohort::] += Delta_o_c
+        return self.s
+
     def compute_i_from_s(self, InitialStock):
         """Given a stock at t0 broken down by different cohorts tx ... t0, an "initial stock". 
            This method calculates the original inflow that generated this stock.
@@ -801,6 +925,438 @@ class DynamicStockModel(object):
       
         
 
+class BatchedDynamicStockModel(object):
+
+    """ Class containing inflow-driven dynamic stock models for several elements that share the same lifetime model
+
+    All elements (e.g. the baseline value and indicators of the same stock) have the same time vector and
+    lifetime distribution, so the survival table sf is computed once and stock by cohort, outflow by cohort and
+    totals are computed for all elements at once.
+
+    Attributes
+    ----------
+    t : Series of years or other time intervals
+    i : Inflow to stock, elements x years table
+
+    o : Outflow from stock, elements x years table
+    o_c : Outflow from stock by cohort, elements x years x age-cohorts table
+
+    s_c : Stock by cohort, elements x years x age-cohorts table
+    s : Stock total, elements x years table
+
+    lt : lifetime distribution: dictionary, shared by all elements
+
+    elements : list of element names, e.g. baseline value name and indicator names
+
+    name : string, optional
+        Name of the dynamic stock model, default is 'BatchedDSM'
+    """
+
+    def __init__(self, t=None, i=None, lt=None, elements=None, name='BatchedDSM', sf=None):
+        """ Init function. Assign the input data to the instance of the object."""
+        self.t = t
+        self.elements = list(elements) if elements is not None else []
+        self.name = name
+
+        # Lifetime distribution and survival table are handled by a single dynamic stock model
+        self.lifetime_model = DynamicStockModel(t=t, lt=lt, name=name, sf=sf)
+
+        self.i = i if i is not None else np.zeros((len(self.elements), len(t)))
+        self.s_c = None
+        self.o_c = None
+        self.s = None
+        self.o = None
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __getitem__(self, Element):
+        """ Get DynamicStockModelElement for element index."""
+        return DynamicStockModelElement(self, Element)
+
+    @property
+    def lt(self):
+        return self.lifetime_model.lt
+
+    @property
+    def sf(self):
+        return self.lifetime_model.sf
+
+    def compute_sf(self):
+        """ Compute survival table shared by all elements, see DynamicStockModel.compute_sf."""
+        return self.lifetime_model.compute_sf()
+
+    def compute_s_c_inflow_driven(self):
+        """ With given inflows and lifetime distribution, the method builds the stock by cohort for all elements."""
+        if self.i is not None:
+            if self.lt is not None:
+                self.compute_sf()
+                self.s_c = np.einsum('ec,tc->etc', self.i, self.sf)
+                # s_c[e,t,c] = i[e,c] * sf[t,c] for all elements e and all t, c
+                return self.s_c
+            else:
+                # No lifetime distribution specified
+                return None
+        else:
+            # No inflow specified
+            return None
+
+    def compute_o_c_from_s_c(self):
+        """Compute outflow by cohort from stock by cohort for all elements."""
+        if self.s_c is not None:
+            if self.o_c is None:
+                self.o_c = np.zeros(self.s_c.shape)
+                self.o_c[:, 1::, :] = -1 * np.diff(self.s_c, n=1, axis=1)
+                Diagonal = np.arange(0, len(self.t))
+                self.o_c[:, Diagonal, Diagonal] = self.i - self.s_c[:, Diagonal, Diagonal] # allow for outflow in year 0 already
+            return self.o_c
+        else:
+            # s_c does not exist. Doing nothing
+            return None
+
+    def compute_stock_total(self):
+        """Determine total stock as row sum of cohort-specific stock for all elements."""
+        if self.s is None and self.s_c is not None:
+            self.s = self.s_c.sum(axis=2)
+        return self.s
+
+    def compute_outflow_total(self):
+        """Determine total outflow as row sum of cohort-specific outflow for all elements."""
+        if self.o is None and self.o_c is not None:
+            self.o = self.o_c.sum(axis=2)
+        return self.o
+
+    def compute_stock_change(self):
+        """ Determine stock change for all elements. Formula: stock_change(t) = stock(t) - stock(t-1)."""
+        if self.s is not None:
+            stock_change = np.zeros(self.s.shape)
+            stock_change[:, 0] = self.s[:, 0]
+            stock_change[:, 1::] = np.diff(self.s, axis=1)
+            return stock_change
+        else:
+            return None
+
+    def compute(self):
+        """ Compute stock by cohort, outflow by cohort, stock total and outflow total from scratch for all elements."""
+        self.s_c = None
+        self.o_c = None
+        self.s = None
+        self.o = None
+        self.compute_s_c_inflow_driven()
+        self.compute_o_c_from_s_c()
+        self.compute_stock_total()
+        self.compute_outflow_total()
+        return self.s
+
+    def get_element_s_c(self, Element):
+        """ Stock by cohort of a single element as years x age-cohorts table, computed for all elements if not yet done."""
+        if self.s_c is None:
+            self.compute_s_c_inflow_driven()
+        return self.s_c[Element] if self.s_c is not None else None
+
+    def get_element_o_c(self, Element):
+        """ Outflow by cohort of a single element as years x age-cohorts table, computed for all elements if not yet done."""
+        o_c = self.compute_o_c_from_s_c()
+        return o_c[Element] if o_c is not None else None
+
+    def update_inflow_cohort(self, Cohort, Inflows, Element=None):
+        """ Set the inflow of a single age-cohort and update stock and outflow incrementally,
+        see DynamicStockModel.update_inflow_cohort.
+        Inflows is a vector with one value per element, or a single value if Element index is given.
+        """
+        Elements = slice(None) if Element is None else [Element]
+        if self.s_c is None or self.o_c is None or self.s is None or self.o is None:
+            self.i[Elements, Cohort] = Inflows
+            return self.compute()
+
+        Delta = np.atleast_1d(Inflows - self.i[Elements, Cohort])
+        self.i[Elements, Cohort] = Inflows
+        if not Delta.any():
+            return self.s
+
+        self.compute_sf()
+        Delta_s_c = np.outer(Delta, self.sf[Cohort::, Cohort])
+        Delta_o_c = np.empty(Delta_s_c.shape)
+        Delta_o_c[:, 0] = Delta - Delta_s_c[:, 0] # allow for outflow in year 0 already
+        Delta_o_c[:, 1::] = -1 * np.diff(Delta_s_c, axis=1)
+
+        self.s_c[Elements, Cohort::, Cohort] += Delta_s_c
+        self.o_c[Elements, Cohort::, Cohort] += Delta_o_c
+        self.s[Elements, Cohort::] += Delta_s_c
+        self.o[Elements, Cohort::] += Delta_o_c
+        return self.s
+
+
+class PackedBatchedDynamicStockModel(BatchedDynamicStockModel):
+
+    """ BatchedDynamicStockModel that stores stock by cohort and outflow by cohort in packed form
+
+    Stock by cohort and outflow by cohort are lower triangular, so only the entries with year >= cohort are stored,
+    column by column (cohort by cohort). In addition each cohort column is cut off after the last age where
+    the survival share is above sf_cutoff (banded storage), which saves most of the memory for lifetimes that are
+    much shorter than the time horizon. The outflow of the last surviving age leaves the stock in the following year,
+    so the mass balance holds. With sf_cutoff = 0 (default) only exact zeros are cut off and the results are the
+    same as with dense storage.
+
+    s_c and o_c are available as dense elements x years x age-cohorts tables and per element through
+    DynamicStockModelElement, those are unpacked on request. Packed values are in s_c_packed and o_c_packed
+    (elements x packed entries), entry k belongs to year rows[k] and cohort cols[k].
+    compute_s_c_inflow_driven and compute_o_c_from_s_c return the packed values.
+    """
+
+    def __init__(self, t=None, i=None, lt=None, elements=None, name='PackedBatchedDSM', sf=None, sf_cutoff=0.0):
+        """ Init function. Assign the input data to the instance of the object."""
+        self.sf_cutoff = sf_cutoff
+        self.s_c_packed = None
+        self.o_c_packed = None
+        self.sf_packed = None
+        self.offsets = None
+        self.rows = None
+        self.cols = None
+        self.row_sum = None
+        super().__init__(t=t, i=i, lt=lt, elements=elements, name=name, sf=sf)
+
+    @property
+    def s_c(self):
+        return self.unpack(self.s_c_packed)
+
+    @s_c.setter
+    def s_c(self, Value):
+        self.s_c_packed = None if Value is None else self.pack(Value)
+
+    @property
+    def o_c(self):
+        return self.unpack(self.o_c_packed)
+
+    @o_c.setter
+    def o_c(self, Value):
+        self.o_c_packed = None if Value is None else self.pack(Value)
+
+    def compute_packing(self):
+        """ Determine packed layout from survival table: number of stored ages for each cohort, year and cohort of each entry."""
+        if self.offsets is None:
+            NoofYears = len(self.t)
+            self.compute_sf()
+            Age = np.arange(0, NoofYears)[:, np.newaxis] - np.arange(0, NoofYears)[np.newaxis, :]
+            # Number of ages with survival share above cutoff, stock by cohort is zero after that
+            NoofSurvivingAges = np.where((Age >= 0) & (np.abs(self.sf) > self.sf_cutoff), Age, -1).max(axis=0) + 1
+            # One more age is needed for the outflow of the last surviving age
+            NoofAges = np.minimum(NoofYears - np.arange(0, NoofYears), NoofSurvivingAges + 1)
+
+            self.offsets = np.concatenate(([0], np.cumsum(NoofAges)))
+            self.cols = np.repeat(np.arange(0, NoofYears), NoofAges)
+            Ages = np.arange(0, self.offsets[-1]) - self.offsets[self.cols]
+            self.rows = self.cols + Ages
+            self.sf_packed = np.where(Ages < NoofSurvivingAges[self.cols], self.sf[self.rows, self.cols], 0.0)
+            # Sparse entries x years matrix used to sum packed entries by year
+            self.row_sum = scipy.sparse.csr_matrix((np.ones(len(self.rows)), (np.arange(0, len(self.rows)), self.rows)),
+                                                   shape=(len(self.rows), NoofYears))
+        return self.offsets
+
+    def pack(self, Values):
+        """ Pack elements x years x age-cohorts table."""
+        self.compute_packing()
+        return Values[:, self.rows, self.cols]
+
+    def unpack(self, Values):
+        """ Unpack elements x packed entries table to elements x years x age-cohorts table."""
+        if Values is None:
+            return None
+
+        Unpacked = np.zeros((Values.shape[0], len(self.t), len(self.t)))
+        Unpacked[:, self.rows, self.cols] = Values
+        return Unpacked
+
+    def compute_s_c_inflow_driven(self):
+        """ With given inflows and lifetime distribution, the method builds the packed stock by cohort for all elements."""
+        if self.i is not None:
+            if self.lt is not None:
+                self.compute_packing()
+                self.s_c_packed = self.i[:, self.cols] * self.sf_packed[np.newaxis, :]
+                return self.s_c_packed
+            else:
+                # No lifetime distribution specified
+                return None
+        else:
+            # No inflow specified
+            return None
+
+    def compute_o_c_from_s_c(self):
+        """Compute packed outflow by cohort from packed stock by cohort for all elements."""
+        if self.s_c_packed is not None:
+            if self.o_c_packed is None:
+                self.o_c_packed = np.zeros(self.s_c_packed.shape)
+                self.o_c_packed[:, 1::] = self.s_c_packed[:, :-1] - self.s_c_packed[:, 1::]
+                Starts = self.offsets[:-1]
+                self.o_c_packed[:, Starts] = self.i - self.s_c_packed[:, Starts] # allow for outflow in year 0 already
+            return self.o_c_packed
+        else:
+            # s_c does not exist. Doing nothing
+            return None
+
+    def compute_stock_total(self):
+        """Determine total stock as sum of packed stock by cohort for all elements."""
+        if self.s is None and self.s_c_packed is not None:
+            self.s = (self.row_sum.T @ self.s_c_packed.T).T
+        return self.s
+
+    def compute_outflow_total(self):
+        """Determine total outflow as sum of packed outflow by cohort for all elements."""
+        if self.o is None and self.o_c_packed is not None:
+            self.o = (self.row_sum.T @ self.o_c_packed.T).T
+        return self.o
+
+    def compute(self):
+        """ Compute packed stock by cohort, outflow by cohort, stock total and outflow total from scratch for all elements."""
+        self.s_c_packed = None
+        self.o_c_packed = None
+        self.s = None
+        self.o = None
+        self.compute_s_c_inflow_driven()
+        self.compute_o_c_from_s_c()
+        self.compute_stock_total()
+        self.compute_outflow_total()
+        return self.s
+
+    def get_element_s_c(self, Element):
+        """ Stock by cohort of a single element as years x age-cohorts table, unpacked."""
+        if self.s_c_packed is None:
+            self.compute_s_c_inflow_driven()
+        if self.s_c_packed is None:
+            return None
+        return self.unpack(self.s_c_packed[[Element]])[0]
+
+    def get_element_o_c(self, Element):
+        """ Outflow by cohort of a single element as years x age-cohorts table, unpacked."""
+        self.compute_o_c_from_s_c()
+        if self.o_c_packed is None:
+            return None
+        return self.unpack(self.o_c_packed[[Element]])[0]
+
+    def update_inflow_cohort(self, Cohort, Inflows, Element=None):
+        """ Set the inflow of a single age-cohort and update packed stock and outflow incrementally,
+        see DynamicStockModel.update_inflow_cohort.
+        Inflows is a vector with one value per element, or a single value if Element index is given.
+        """
+        Elements = slice(None) if Element is None else [Element]
+        if self.s_c_packed is None or self.o_c_packed is None or self.s is None or self.o is None:
+            self.i[Elements, Cohort] = Inflows
+            return self.compute()
+
+        Delta = np.atleast_1d(Inflows - self.i[Elements, Cohort])
+        self.i[Elements, Cohort] = Inflows
+        if not Delta.any():
+            return self.s
+
+        # Entries of the cohort are contiguous and cover years Cohort ... Cohort + NoofAges - 1
+        Entries = slice(self.offsets[Cohort], self.offsets[Cohort + 1])
+        Years = slice(Cohort, Cohort + self.offsets[Cohort + 1] - self.offsets[Cohort])
+        Delta_s_c = np.outer(Delta, self.sf_packed[Entries])
+        Delta_o_c = np.empty(Delta_s_c.shape)
+        Delta_o_c[:, 0] = Delta - Delta_s_c[:, 0] # allow for outflow in year 0 already
+        Delta_o_c[:, 1::] = -1 * np.diff(Delta_s_c, axis=1)
+
+        self.s_c_packed[Elements, Entries] += Delta_s_c
+        self.o_c_packed[Elements, Entries] += Delta_o_c
+        self.s[Elements, Years] += Delta_s_c
+        self.o[Elements, Years] += Delta_o_c
+        return self.s
+
+
+class DynamicStockModelElement(object):
+
+    """ Single element of BatchedDynamicStockModel
+
+    Provides the same attributes and inflow-driven accessors as DynamicStockModel (i, o, s, s_c, o_c, lt, sf,
+    compute_s_c_inflow_driven, compute_outflow_total, ...) as views into the batched tables, so code written
+    for DynamicStockModel works unchanged. The stock is kept up to date by the batched model, inflows must be
+    changed with update_inflow_cohort.
+    """
+
+    def __init__(self, batched_dsm, element):
+        """ Init function. Assign batched model and element index."""
+        self.batched_dsm = batched_dsm
+        self.element = element
+
+    def _get_element_values(self, Values):
+        return Values[self.element] if Values is not None else None
+
+    @property
+    def name(self):
+        return self.batched_dsm.elements[self.element]
+
+    @property
+    def t(self):
+        return self.batched_dsm.t
+
+    @property
+    def lt(self):
+        return self.batched_dsm.lt
+
+    @property
+    def sf(self):
+        return self.batched_dsm.sf
+
+    @property
+    def i(self):
+        return self._get_element_values(self.batched_dsm.i)
+
+    @property
+    def s_c(self):
+        return self.batched_dsm.get_element_s_c(self.element)
+
+    @property
+    def o_c(self):
+        return self.batched_dsm.get_element_o_c(self.element)
+
+    @property
+    def s(self):
+        return self._get_element_values(self.batched_dsm.s)
+
+    @property
+    def o(self):
+        return self._get_element_values(self.batched_dsm.o)
+
+    def compute_sf(self):
+        return self.batched_dsm.compute_sf()
+
+    def compute_s_c_inflow_driven(self):
+        """ Stock by cohort of this element, computed for all elements if not yet done."""
+        return self.batched_dsm.get_element_s_c(self.element)
+
+    def compute_o_c_from_s_c(self):
+        return self.batched_dsm.get_element_o_c(self.element)
+
+    def compute_stock_total(self):
+        return self._get_element_values(self.batched_dsm.compute_stock_total())
+
+    def compute_outflow_total(self):
+        return self._get_element_values(self.batched_dsm.compute_outflow_total())
+
+    def compute_stock_change(self):
+        """ Determine stock change from time series for stock. Formula: stock_change(t) = stock(t) - stock(t-1)."""
+        if self.s is not None:
+            stock_change = np.zeros(len(self.s))
+            stock_change[0] = self.s[0]
+            stock_change[1::] = np.diff(self.s)
+            return stock_change
+        else:
+            return None
+
+    def check_stock_balance(self):
+        """ Check wether inflow, outflow, and stock are balanced, Balance = inflow - outflow - stock_change"""
+        try:
+            return self.i - self.o - self.compute_stock_change()
+        except TypeError:
+            # Could not determine balance. At least one of the variables is not defined.
+            return None
+
+    def update_inflow_cohort(self, Cohort, Inflow):
+        """ Set the inflow of a single age-cohort of this element and update stock and outflow incrementally."""
+        self.batched_dsm.update_inflow_cohort(Cohort, Inflow, self.element)
+        return self.s
+
+
 #
 #
 # The end.
@@ -1,32 +1,43 @@
 import os
 import sys
 import time
+import json
 import shutil
 import pandas as pd
 import numpy as np
 from tqdm import tqdm
-from typing import Union, Any, Dict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from typing import Union, Any, Dict, List, Tuple, Callable
 from datetime import datetime
-import matplotlib.pyplot as plt
 from .core.builder import init_builder, build_results
+from .core.resultstore import write_results, load_results
+from .core.plotrenderer import PlotRenderer
+from .core.resultexport import DynamicStocksWriter, get_dynamic_stock_cohorts_filename, write_scenario_data_tables
 from .core.utils import (
     setup_scenario_output_directories,
     calculate_scenario_mass_balance,
     shorten_sheet_name,
 )
 from .core.logger import log
-from .core.parameters import ParameterName
+from .core.parameters import ParameterName, ParameterDynamicStockCohortsFormat, ParameterScenarioDataExportFormat, \
+    ParameterPlotMode
 from .core.network_graph import NetworkGraph
 from .core.datavisualizer import DataVisualizer
+from .core.datastructures import Scenario
 
 _default_output_dir_name = "output"
 _default_cache_dir_name = "cache"
+_default_results_dir_name = "results"
+_plot_settings_filename = "plot_settings.json"
 
 
 def run_scenarios(path_to_settings_file: Union[str, None] = None,
                   path_to_output_dir: Union[str, None] = None,
                   remove_existing_output_dir: bool = False,
                   parameter_overrides: Union[Dict[str, Any], None] = None,
+                  use_cache: bool = False,
+                  path_to_cache_dir: Union[str, None] = None,
                   ) -> bool:
     """
     Run scenarios using the settings file.
@@ -36,10 +47,16 @@ def run_scenarios(path_to_settings_file: Union[str, None] = None,
     Key is parameter name and value is the parameter value.
     Refer example scenario file or aiphoria/core/parameters.py for full list of parameters.
 
-    :param path_to_settings_file: Path to target settings Excel file
+    If use_cache is True then loaded data and solved scenarios are cached to path_to_cache_dir
+    and reused on later runs as long as the settings file, effective parameters and aiphoria version
+    are the same. Cache directory is not removed with the output directory.
+
+    :param path_to_settings_file: Path to target settings Excel file or to data bundle directory
     :param path_to_output_dir: Path to output directory
     :param remove_existing_output_dir: Remove existing directory (default: False)
     :param parameter_overrides:     Dictionary {parameter name: parameter value}
+    :param use_cache: True to use cached data and solved scenarios (default: False)
+    :param path_to_cache_dir: Path to cache directory (default: "cache" in current working directory)
 
     :return: True if succesful, False otherwise
     """
@@ -74,9 +91,15 @@ def run_scenarios(path_to_settings_file: Union[str, None] = None,
         os.mkdir(path_to_output_dir)
 
     time_total_in_secs: float = time.perf_counter()
-    path_to_cache = os.path.join(path_to_output_dir, _default_cache_dir_name)
+    path_to_cache = ""
+    if use_cache:
+        path_to_cache = path_to_cache_dir
+        if path_to_cache is None:
+            path_to_cache = os.path.join(os.path.realpath(os.getcwd()), _default_cache_dir_name)
+        path_to_cache = os.path.realpath(os.path.expanduser(path_to_cache))
+
     init_builder(path_to_cache=path_to_cache,
-                 use_cache=False,
+                 use_cache=use_cache,
                  use_timing=False,
                  clear_cache=False)
 
@@ -90,6 +113,17 @@ def run_scenarios(path_to_settings_file: Union[str, None] = None,
         [scenario.name for scenario in scenarios]
     )
 
+    # Plots are rendered later from the result store when using plot mode OnRequest
+    plot_mode = model_params[ParameterName.PlotMode]
+    path_to_results = os.path.join(model_params[ParameterName.OutputPath], _default_results_dir_name)
+    if model_params[ParameterName.CreateResultStore] or plot_mode == ParameterPlotMode.OnRequest:
+        log("Writing result store...")
+        write_results(scenarios, path_to_results)
+
+    if plot_mode == ParameterPlotMode.OnRequest:
+        _write_plot_settings(path_to_results, model_params)
+        log("Plots can be rendered with render_plots(\"{}\")".format(model_params[ParameterName.OutputPath]))
+
     if model_params[ParameterName.CreateNetworkGraphs]:
         progress_bar = tqdm(total=len(scenarios),
                             desc="Building network graphs for solved scenarios")
@@ -114,538 +148,10 @@ def run_scenarios(path_to_settings_file: Union[str, None] = None,
         sys.stderr.flush()
 
     # %%
-    # ***************************************************************************
-    # * Step 3: Export scenario results to files (processes, flows, and stocks) *
-    # ***************************************************************************
-
-    # Sheet names to what are written to file. Note that the order is important.
-    sheet_names = ["Processes", "Flows",
-                   "Flow values (baseline value)", "Mass balance"]
-    sheet_name_to_list_of_dfs = {name: [] for name in sheet_names}
-
-    progress_bar = tqdm(total=len(scenarios))
-    for scenario_index, scenario in enumerate(scenarios):
-        progress_bar.set_description("Exporting scenario processes, flows, and stocks data (scenario {}/{})".format(
-            scenario_index + 1, len(scenarios)))
-
-        # Processes Sheet
-        df_processes = scenario.flow_solver.get_processes_as_dataframe()
-        df_processes.insert(0, "Scenario", scenario.name)
-        sheet_name_to_list_of_dfs[sheet_names[0]].append(df_processes)
-
-        # Flows Sheet
-        df_flows = scenario.flow_solver.get_flows_as_dataframe()
-        df_flows.insert(0, "Scenario", scenario.name)
-        sheet_name_to_list_of_dfs[sheet_names[1]].append(df_flows)
-
-        # Flow values Sheet
-        df_flow_values = scenario.flow_solver.get_evaluated_flow_values_as_dataframe()
-        df_flow_values.insert(0, "Scenario", scenario.name)
-        sheet_name_to_list_of_dfs[sheet_names[2]].append(df_flow_values)
-
-        # Mass balance Sheet
-        df_scenario_mass_balance = calculate_scenario_mass_balance(
-            scenario.mfa_system)
-        df_scenario_mass_balance.insert(0, "Scenario", scenario.name)
-        sheet_name_to_list_of_dfs[sheet_names[3]].append(
-            df_scenario_mass_balance)
-
-        progress_bar.update(1)
-    progress_bar.close()
-    sys.stderr.flush()
-    sys.stdout.flush()
-
-    # Combine all scenario data to one Excel file
-    # by concatenating all sheet-specific list of DataFrames as one DataFrame
-    combined_excel_filename = os.path.join(
-        model_params[ParameterName.OutputPath], "combined_scenario_data.xlsx")
-    log(f"Exporting all scenarios to {combined_excel_filename}...")
-    with pd.ExcelWriter(combined_excel_filename, engine='xlsxwriter') as writer:
-        for sheet_name, list_of_dfs in sheet_name_to_list_of_dfs.items():
-            df = pd.concat(list_of_dfs, ignore_index=True)
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-
-    log(f"All scenario data exported to {combined_excel_filename}")
-    sys.stdout.flush()
-
-    # %%
-    # ***********************************************************************
-    # * Step 4: Build dynamic stock results for each Scenario and visualize *
-    # ***********************************************************************
-    progress_bar = tqdm(total=len(scenarios),
-                        desc="Building dynamic stock results")
-    sys.stderr.flush()
-    for scenario_index, scenario in enumerate(scenarios):
-        progress_bar.set_description("Building dynamic stock results (scenario {}/{})".format(
-            scenario_index + 1, len(scenarios)))
-
-        flow_solver = scenario.flow_solver
-        years = scenario.scenario_data.years
-        scenario_output_path = scenario_name_to_output_path[scenario.name]
-
-        # Full name of the baseline, e.g. "Solid wood equivalent"
-        baseline_value_name = scenario.scenario_data.baseline_value_name
-        baseline_unit_name = scenario.scenario_data.baseline_unit_name
-
-        # Total number of indicators
-        indicators = flow_solver.get_indicator_name_to_indicator()
-        num_indicators = len(indicators.keys())
-
-        # Baseline DSM
-        stock_id_to_baseline_dsm = flow_solver.get_baseline_dynamic_stocks()
-        stock_id_to_indicator_name_to_dsm = flow_solver.get_indicator_dynamic_stocks()
-
-        if not len(stock_id_to_baseline_dsm.keys()):
-            log("Scenario '{}': no dynamic stocks in the defined system".format(
-                scenario.name))
-            progress_bar.update(1)
-            continue
-
-        # Each baseline/indicator needs 3 plots
-        # so total = baseline (3) + (number of indicators * 3)
-        num_subplots = 3 + (num_indicators * 3)
-        fig, axes = plt.subplots(
-            num_subplots, 1, sharex='all', sharey='none', figsize=(12, 20))
-
-        # Create an Excel writer for exporting data
-        excel_filename = os.path.join(scenario_output_path, "{}_dynamic_stocks.xlsx".format(scenario.name))
-        with pd.ExcelWriter(excel_filename, engine="xlsxwriter") as writer:
-            all_stock_total_dfs = []
-            all_stock_change_dfs = []
-            all_stock_outflow_dfs = []
-            for stock_id, baseline_dsm in stock_id_to_baseline_dsm.items():
-                plot_index = 0
-
-                # Truncate the stock ID to 20 characters (or any suitable length) to fit within the 31 character limit
-                # Truncate to the first 20 characters
-                stock_id_for_filename = stock_id[:20]
-                stock_id_for_filename = stock_id_for_filename.replace(
-                    ":", "_")  # Replace ":" with "_"
-
-                # ******************
-                # * Baseline stock *
-                # ******************
-                baseline_stock_by_cohort = baseline_dsm.compute_s_c_inflow_driven()
-                baseline_outflow_by_cohort = baseline_dsm.compute_o_c_from_s_c()
-                baseline_stock_total = baseline_dsm.compute_stock_total()
-                baseline_stock_change = baseline_dsm.compute_stock_change()
-                baseline_stock_outflow = baseline_dsm.compute_outflow_total()
-
-                # Export stock by cohort
-                sheet_name = shorten_sheet_name(f'{stock_id_for_filename}_s_by_c_{baseline_value_name}')
-                df_baseline_stock_by_cohort = pd.DataFrame(
-                    baseline_stock_by_cohort, columns=years, index=years)
-                df_baseline_stock_by_cohort.to_excel(
-                    writer, sheet_name=sheet_name)
-
-                # Export outflow by cohort
-                sheet_name = shorten_sheet_name(f'{stock_id_for_filename}_o_by_c_{baseline_value_name}')
-                df_baseline_outflow_by_cohort = pd.DataFrame(
-                    baseline_outflow_by_cohort, columns=years, index=years)
-                df_baseline_outflow_by_cohort.to_excel(
-                    writer, sheet_name=sheet_name)
-
-                # Export stock total
-                df_baseline_stock_total = pd.DataFrame(baseline_stock_total, index=years)
-                df_baseline_stock_total.reset_index(inplace=True)
-                df_baseline_stock_total.columns = ["Year", "Stock total"]
-                df_baseline_stock_total["Scenario"] = scenario.name
-                df_baseline_stock_total["Stock ID"] = stock_id
-                df_baseline_stock_total["Indicator"] = baseline_unit_name
-                all_stock_total_dfs.append(df_baseline_stock_total)
-
-                # Export stock change
-                df_baseline_stock_change = pd.DataFrame(baseline_stock_change, index=years)
-                df_baseline_stock_change.reset_index(inplace=True)
-                df_baseline_stock_change.columns = ["Year", "Stock change"]
-                df_baseline_stock_change["Scenario"] = scenario.name
-                df_baseline_stock_change["Stock ID"] = stock_id
-                df_baseline_stock_change["Indicator"] = baseline_unit_name
-                all_stock_change_dfs.append(df_baseline_stock_change)
-
-                # Export stock outflow total
-                df_baseline_stock_outflow = pd.DataFrame(baseline_stock_outflow, index=years)
-                df_baseline_stock_outflow.reset_index(inplace=True)
-                df_baseline_stock_outflow.columns = ["Year", "Stock outflow total"]
-                df_baseline_stock_outflow["Scenario"] = scenario.name
-                df_baseline_stock_outflow["Stock ID"] = stock_id
-                df_baseline_stock_outflow["Indicator"] = baseline_unit_name
-                all_stock_outflow_dfs.append(df_baseline_stock_outflow)
-
-                # Plot baseline stock total (in-use stocks)
-                axes[plot_index + 0].plot(years, baseline_stock_total, marker='o', label="{}".format(stock_id))
-                axes[plot_index + 0].set_ylabel("In-use stock ({})".format(baseline_unit_name))
-                axes[plot_index + 0].set_title("In-use stock per year by product type")
-
-                # Plot baseline stock change
-                axes[plot_index + 1].plot(years, baseline_stock_change, marker='o', label=f'{stock_id}')
-                axes[plot_index + 1].set_ylabel("Stock change ({})".format(baseline_unit_name))
-                axes[plot_index + 1].set_title("Stock change per year by product type")
-
-                # Plot baseline outflow by cohort
-                axes[plot_index + 2].plot(years, baseline_stock_outflow, marker='o', label=f'{stock_id}')
-                axes[plot_index + 2].set_ylabel("Stock outflow ({})".format(baseline_unit_name))
-                axes[plot_index + 2].set_title("Stock outflow per year by product type")
-
-                plot_index += 3
-                for indicator_name, indicator_dsm in stock_id_to_indicator_name_to_dsm[stock_id].items():
-                    # **************
-                    # * Indicators *
-                    # **************
-                    indicator_unit = indicators[indicator_name].unit
-                    indicator_stock_by_cohort = indicator_dsm.compute_s_c_inflow_driven()
-                    indicator_outflow_by_cohort = indicator_dsm.compute_o_c_from_s_c()
-                    indicator_stock_total = indicator_dsm.compute_stock_total()
-                    indicator_stock_change = indicator_dsm.compute_stock_change()
-                    indicator_stock_outflow = indicator_dsm.compute_outflow_total()
-
-                    # Export indicator stock by cohort
-                    sheet_name = shorten_sheet_name(f"{stock_id_for_filename}_s_by_c_{indicator_name}")
-                    df_indicator_stock_by_cohort = pd.DataFrame(
-                        indicator_stock_by_cohort, columns=years, index=years)
-                    df_indicator_stock_by_cohort.to_excel(writer, sheet_name=sheet_name)
-
-                    # Export indicator outflow by cohort
-                    sheet_name = shorten_sheet_name(f"{stock_id_for_filename}_o_by_c_{indicator_name}")
-                    df_indicator_oc = pd.DataFrame(
-                        indicator_outflow_by_cohort, columns=years, index=years)
-                    df_indicator_oc.to_excel(writer, sheet_name=sheet_name)
-
-                    # Export indicator stock total
-                    df_indicator_stock_total = pd.DataFrame(
-                        indicator_stock_total, index=years)
-                    df_indicator_stock_total.reset_index(inplace=True)
-                    df_indicator_stock_total.columns = ["Year", "Stock total"]
-                    df_indicator_stock_total["Scenario"] = scenario.name
-                    df_indicator_stock_total["Stock ID"] = stock_id
-                    df_indicator_stock_total["Indicator"] = indicator_name
-                    all_stock_total_dfs.append(df_indicator_stock_total)
-
-                    # Export indicator stock change
-                    df_indicator_stock_change = pd.DataFrame(
-                        indicator_stock_change, index=years)
-                    df_indicator_stock_change.reset_index(inplace=True)
-                    df_indicator_stock_change.columns = [
-                        "Year", "Stock change"]
-                    df_indicator_stock_change["Scenario"] = scenario.name
-                    df_indicator_stock_change["Stock ID"] = stock_id
-                    df_indicator_stock_change["Indicator"] = indicator_name
-                    all_stock_change_dfs.append(df_indicator_stock_change)
-
-                    # Export indicator stock outflow total
-                    df_indicator_stock_outflow = pd.DataFrame(
-                        indicator_stock_outflow, index=years)
-                    df_indicator_stock_outflow.reset_index(inplace=True)
-                    df_indicator_stock_outflow.columns = [
-                        "Year", "Stock outflow total"]
-                    df_indicator_stock_outflow["Scenario"] = scenario.name
-                    df_indicator_stock_outflow["Stock ID"] = stock_id
-                    df_indicator_stock_outflow["Indicator"] = indicator_name
-                    all_stock_outflow_dfs.append(df_indicator_stock_outflow)
-
-                    # Plot indicator stock total (in-use stocks)
-                    axes[plot_index + 0].plot(years, indicator_stock_total, marker='o', label='{} ({}) {}'.format(
-                        indicator_name, indicator_unit, stock_id))
-                    axes[plot_index +
-                         0].set_ylabel("In-use stock ({})".format(indicator_unit))
-                    axes[plot_index + 0].set_title(
-                        "{} stock in-use per year by product type".format(indicator_name))
-
-                    # Plot indicator stock change
-                    axes[plot_index + 1].plot(years, indicator_stock_change, marker='o', label="{} ({}) {}".format(
-                        indicator_name, indicator_unit, stock_id))
-                    axes[plot_index +
-                         1].set_ylabel("Stock change ({})".format(indicator_unit))
-                    axes[plot_index +
-                         1].set_title("{} stock change per year".format(indicator_name))
-
-                    # Plot indicator outflow by cohort
-                    axes[plot_index + 2].plot(years, indicator_stock_outflow, marker='o', label="{} ({}) {}".format(
-                        indicator_name, indicator_unit, stock_id
-                    ))
-                    axes[plot_index +
-                         2].set_ylabel("Stock outflow ({})".format(indicator_unit))
-                    axes[plot_index + 2].set_title(
-                        "{} outflow per year by product type".format(indicator_name))
-
-                    plot_index += 3
-
-            if all_stock_total_dfs:
-                combined_stock_total_df = pd.concat(
-                    all_stock_total_dfs, ignore_index=True)
-                combined_sheet_name = "Total_stock"
-                combined_stock_total_df.to_excel(
-                    writer, sheet_name=combined_sheet_name, index=False)
-
-            if all_stock_change_dfs:
-                combined_stock_change_df = pd.concat(
-                    all_stock_change_dfs, ignore_index=True)
-                combined_sheet_name = "Total_stock_change"
-                combined_stock_change_df.to_excel(
-                    writer, sheet_name=combined_sheet_name, index=False)
-
-            if all_stock_outflow_dfs:
-                all_stock_outflow_dfs = pd.concat(
-                    all_stock_outflow_dfs, ignore_index=True)
-                combined_sheet_name = "Total_stock_outflow"
-                all_stock_outflow_dfs.to_excel(
-                    writer, sheet_name=combined_sheet_name, index=False)
-
-            # Set common properties to axes
-            range_x_ticks = range(min(years), max(years) + 1)
-            for axis in axes:
-                axis.set_xlabel("Year")
-                axis.title.set_size(12)
-                axis.legend()
-
-            # Adjust layout to prevent overlap
-            plt.tight_layout()
-            tick_gap = 1 if len(years) < 15 else 10
-            plt.xticks(years[::tick_gap])
-
-            # Save the figure as an SVG file
-            filename = os.path.join(scenario_output_path, "{}_stock_plots_by_product.svg".format(scenario.name))
-            plt.savefig(filename, format='svg')
-
-            # if model_params[ParameterName.ShowPlots]:
-            #     plt.show()
-
-        progress_bar.update(1)
-    progress_bar.refresh()
-    progress_bar.close()
-    sys.stderr.flush()
-
-    # *****************************************************
-    # * Step 5: Convert the carbon stocks to CO2 removals *
-    # *****************************************************
-    log("Calculating annual CO2 stock emissions / removals results...")
-
-    # Storage for comparison
-    all_scenario_results = {}
-    all_emitter_years = {}
-
-    show_steady_state_overlay = False  # Toggle to enable/disable overlay
-    steady_state_threshold_ratio = 0.05  # Relative threshold for stability
-    min_steady_state_years = 5  # Minimum consecutive years for valid steady state
-
-    for scenario in scenarios:
-        scenario_output_path = scenario_name_to_output_path[scenario.name]
-        flow_solver = scenario.flow_solver
-        years = scenario.scenario_data.years
-        year_start = scenario.scenario_data.start_year
-
-        stock_id_to_indicator_name_to_dsm = flow_solver.get_indicator_dynamic_stocks()
-        if not len(stock_id_to_indicator_name_to_dsm.keys()):
-            log("Scenario '{}': no dynamic stocks in the defined system".format(
-                scenario.name))
-            continue
-
-        results_co2_removals = pd.DataFrame({'Year': years})
-        results_net_emitters = pd.DataFrame({'Year': years})
-        conversion_factor_c_to_co2 = model_params[ParameterName.ConversionFactorCToCO2]
-
-        # Define line styles, markers, and colors for differentiation
-        line_styles = ['-', '--', '-.', ':']
-        markers = ['o', 's', '^', 'D']
-        colors = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
-
-        target_indicator_name = "Carbon"
-        plt.figure(figsize=(10, 6))
-
-        scenario_results = {}
-        steady_state_info = {}
-        net_emitter_info = {}
-
-        for index, (stock_id, indicator_name_to_dsm) in enumerate(stock_id_to_indicator_name_to_dsm.items()):
-            if target_indicator_name not in indicator_name_to_dsm:
-                continue
-
-            dsm = indicator_name_to_dsm[target_indicator_name]
-            total_inflows_carbon = dsm.i
-            total_outflows_carbon = dsm.o
-            annual_co2_removal = (
-                total_inflows_carbon - total_outflows_carbon) * conversion_factor_c_to_co2
-            results_co2_removals[stock_id] = annual_co2_removal
-            scenario_results[stock_id] = annual_co2_removal
-
-            # Detect steady-state years with rolling window approach
-            threshold = steady_state_threshold_ratio * \
-                max(abs(annual_co2_removal))
-            rolling_mean = pd.Series(annual_co2_removal).rolling(
-                window=min_steady_state_years, center=True).mean()
-            is_steady = abs(pd.Series(annual_co2_removal) -
-                            rolling_mean) < threshold
-
-            # Extract consecutive steady years
-            steady_years = []
-            current_run = []
-            for year, steady in zip(years, is_steady):
-                if steady:
-                    current_run.append(year)
-                else:
-                    if len(current_run) >= min_steady_state_years:
-                        steady_years.extend(current_run)
-                    current_run = []
-            if len(current_run) >= min_steady_state_years:
-                steady_years.extend(current_run)
-
-            steady_state_info[stock_id] = sorted(set(steady_years))
-
-            # Detect net emitter years (negative removals)
-            emitter_years = [year for year, value in zip(
-                years, annual_co2_removal) if value < 0]
-            results_net_emitters[stock_id] = [
-                "Emitter" if value < 0 else "" for value in annual_co2_removal]
-            net_emitter_info[stock_id] = emitter_years
-
-            # Plot CO2 removals with steady state overlay
-            line_style = line_styles[index % len(line_styles)]
-            marker = markers[index % len(markers)]
-            color = colors[index % len(colors)]
-            plt.plot(years, annual_co2_removal, marker=marker, linestyle=line_style, color=color,
-                     label=f'{stock_id}')
-            if show_steady_state_overlay and steady_years:
-                plt.axvspan(steady_years[0],
-                            steady_years[-1], color=color, alpha=0.1)
-
-        all_scenario_results[scenario.name] = scenario_results
-        all_emitter_years[scenario.name] = net_emitter_info
-
-        plt.xlabel('Year')
-        plt.ylabel('CO2 Emissions / Removals (Mt CO2)')
-        plt.title('Annual CO2 Emissions / Removals by Product')
-        plt.grid(True)
-        tick_gap = 1 if len(years) < 15 else 10
-        plt.xticks(years[::tick_gap])
-        plt.legend()
-        plt.tight_layout()
-
-        # Export CO2 removal data to CSV
-        log("Exporting annual CO2 emissions / removal (Mt) by stock results...")
-        filename = os.path.join(scenario_output_path, f"{scenario.name}_annual_co2_removal_by_stock.csv")
-        results_co2_removals.to_csv(path_or_buf=filename, index=False, mode="w")
-
-        # Export net emitter flag table
-        log("Exporting annual CO2 net emitter years (where removals < 0)...")
-        filename = os.path.join(scenario_output_path, f"{scenario.name}_annual_net_emitter_flags.csv")
-        results_net_emitters.to_csv(path_or_buf=filename, index=False, mode="w")
-
-        # Export CO2 removal plot as SVG
-        filename = os.path.join(scenario_output_path, f"{scenario.name}_annual_co2_removal_by_product.svg")
-        plt.savefig(filename, format='svg')
-
-        # if model_params[ParameterName.ShowPlots]:
-        #     plt.show()
-
-        # Print and export steady-state info
-        print(f"\nSteady-state periods for scenario '{scenario.name}':")
-        for stock_id, years_list in steady_state_info.items():
-            if years_list:
-                print(f"  {stock_id}: {years_list[0]} to {years_list[-1]} ({len(years_list)} years)")
-            else:
-                print(f"  {stock_id}: No steady-state period detected.")
-
-        steady_state_df = pd.DataFrame([
-            {'Stock': stock_id, 'StartYear': years_list[0] if years_list else None,
-             'EndYear': years_list[-1] if years_list else None, 'DurationYears': len(years_list)}
-            for stock_id, years_list in steady_state_info.items()
-        ])
-        filename = os.path.join(scenario_output_path, f"{scenario.name}_steady_state_periods.csv")
-        steady_state_df.to_csv(filename, index=False)
-
-    # ************************************************************
-    # * Step 6: Visualize inflows per year to selected processes *
-    # ************************************************************
-
-    # This is only done when there is multiple years
-    # Visualize inflows per year to processes
-    visualize_inflows_to_process_ids = model_params[ParameterName.VisualizeInflowsToProcesses]
-    for scenario in scenarios:
-        scenario_output_path = scenario_name_to_output_path[scenario.name]
-        flow_solver = scenario.flow_solver
-        years = scenario.scenario_data.years
-
-        # Dictionary: Process ID to process
-        unique_processes = flow_solver.get_unique_processes()
-        for process_id in visualize_inflows_to_process_ids:
-            process = flow_solver.get_process(process_id, min(years))
-            flow_id_to_source_process_id = {}
-
-            # Find all source processes of all incoming flows to this process in all years
-            # This is needed to create stable set of process names so that the relative
-            # position of the processes stay the same in stacked chart between the years
-            source_process_ids = set()
-            for year in years:
-                inflows = flow_solver.get_process_flows(
-                    process_id, year)["Inflows"]
-                unique_flow_ids = set()
-                for flow in inflows:
-                    unique_flow_ids.add(flow.id)
-                    flow_id_to_source_process_id[flow.id] = flow.source_process_id
-
-                # Find source process ID of each incoming flow and add
-                # to list of unique source process IDs if not already there
-                unique_flow_ids = list(unique_flow_ids)
-                for flow_id in unique_flow_ids:
-                    source_process_ids.add(
-                        flow_id_to_source_process_id[flow_id])
-
-            # Now source_process_ids-list contains list of all the possible process IDs
-            # that have flows incoming to process_id. This list is needed to keep the
-            # incoming process IDs the same every year because aiphoria allows the connections
-            # between the flows to change between the years.
-            source_process_ids = list(source_process_ids)
-
-            # Create 2D array with shape of (number of source process IDs, number of years)
-            # and fill with the value of the inflow from source process for each year
-            df_inflows_to_process = pd.DataFrame(columns=['Year', 'Source Process ID', 'Value ({})'.format(
-                model_params[ParameterName.BaselineUnitName])])
-            source_process_by_flow_values = np.zeros(
-                (len(source_process_ids), len(years)))
-            for year_index, year in enumerate(years):
-                inflows = flow_solver.get_process_flows(
-                    process_id, year)["Inflows"]
-                for flow in inflows:
-                    source_process_id_index = source_process_ids.index(
-                        flow.source_process_id)
-                    source_process_by_flow_values[source_process_id_index,
-                                                  year_index] = flow.evaluated_value
-                    df_inflows_to_process.loc[len(df_inflows_to_process)] = [year, flow.source_process_id,
-                                                                             flow.evaluated_value]
-
-            df_inflows_to_process = df_inflows_to_process.round(5)
-
-            # Export inflows to process to CSV file
-            # NOTE: Replace character ':' in Process ID to underscore because
-            # Windows system are not able to handle that character in filename
-            process_id_for_filename = process_id.replace(":", "_")
-            filename = os.path.join(scenario_output_path,
-                                    "{}_inflows_to_{}.csv".format(scenario.name, process_id_for_filename))
-            df_inflows_to_process.to_csv(
-                path_or_buf=filename, index=False, mode="w")
-
-            # Initialize the figure and axes for the stacked area chart
-            fig, ax = plt.subplots(figsize=(12, 8))
-            ax.stackplot(years, source_process_by_flow_values,
-                         labels=list(source_process_ids))
-            ax.set_ylabel("Mm3 SWE")
-            ax.set_title("Inputs to {}".format(process.name))
-            ax.legend(loc='upper left')
-            tick_gap = 1 if len(years) < 15 else 10
-            plt.xticks(years[::tick_gap])
-
-            # Save the figure as an SVG file
-            filename = os.path.join(scenario_output_path,
-                                    "{}_inflows_to_{}.svg".format(scenario.name, process_id_for_filename))
-            plt.savefig(filename, format='svg')
-
-            # NOTE: Causes when running from PyCharm
-            # if model_params[ParameterName.ShowPlots]:
-            #     plt.show()
-
-    # ***********************************************************
-    # * Step 7: Visualize the scenario results as Sankey graphs *
-    # ***********************************************************
+    # *****************************************************************************
+    # * Steps 3-7: Export scenario results (processes, flows, and stocks), dynamic *
+    # * stocks, CO2 removals, inflows to selected processes and Sankey graphs     *
+    # *****************************************************************************
     # Virtual process graph label overrides
     # TODO: Move also this to settings file?
     virtual_process_graph_labels = {}
@@ -689,11 +195,589 @@ def run_scenarios(path_to_settings_file: Union[str, None] = None,
             "timestamp": timestamp,
         }
 
+    # Plots are requested by the export tasks and rendered by PlotRenderer
+    plot_renderer = None
+    if plot_mode == ParameterPlotMode.Render:
+        plot_renderer = PlotRenderer(model_params[ParameterName.PlotFormat], model_params[ParameterName.NumPlotWorkers])
+
+    # Export tasks: task name -> (function, arguments, names of the tasks the function needs results from)
+    # Results of the dependency tasks are appended to the arguments in the same order as the names
+    tasks = {}
+    export_format = model_params[ParameterName.ScenarioDataExportFormat]
+    if export_format == ParameterScenarioDataExportFormat.Excel:
+        for scenario in scenarios:
+            tasks["tables:{}".format(scenario.name)] = (_build_scenario_tables, [scenario], [])
+
+        # Combine all scenario data to one Excel file
+        path_to_combined_scenario_data = os.path.join(
+            model_params[ParameterName.OutputPath], "combined_scenario_data.xlsx")
+        tasks["combined_scenario_data"] = (_write_combined_scenario_data,
+                                           [path_to_combined_scenario_data],
+                                           ["tables:{}".format(scenario.name) for scenario in scenarios])
+    else:
+        # Parquet / Arrow dataset is written scenario by scenario, each scenario has own partitions
+        path_to_combined_scenario_data = os.path.join(
+            model_params[ParameterName.OutputPath], "combined_scenario_data")
+        log(f"Exporting all scenarios to {path_to_combined_scenario_data}...")
+        for scenario in scenarios:
+            tasks["tables:{}".format(scenario.name)] = (
+                _export_scenario_tables, [scenario, path_to_combined_scenario_data, export_format], [])
+
+    for scenario in scenarios:
+        scenario_output_path = scenario_name_to_output_path[scenario.name]
+        tasks["dynamic_stocks:{}".format(scenario.name)] = (
+            _export_dynamic_stocks,
+            [scenario,
+             scenario_output_path,
+             model_params[ParameterName.StreamDynamicStocksExport],
+             model_params[ParameterName.DynamicStockCohortsFormat],
+             plot_renderer],
+            [])
+        tasks["co2_removals:{}".format(scenario.name)] = (
+            _export_co2_removals,
+            [scenario, scenario_output_path, model_params[ParameterName.ConversionFactorCToCO2], plot_renderer],
+            [])
+
+        # Visualize inflows per year to selected processes
+        tasks["inflows_to_processes:{}".format(scenario.name)] = (
+            _export_inflows_to_processes,
+            [scenario,
+             scenario_output_path,
+             model_params[ParameterName.VisualizeInflowsToProcesses],
+             model_params[ParameterName.BaselineUnitName],
+             plot_renderer],
+            [])
+
+    # Sankey graphs are independent of the file exports so those are built
+    # while the workbooks are written when using export workers
     if model_params[ParameterName.CreateSankeyCharts]:
-        log("Creating Sankey charts for scenarios...")
-        visualizer = DataVisualizer()
-        visualizer.build_and_show(
-            scenarios, visualizer_params, model_params, combine_to_one_file=True)
+        tasks["sankey_charts"] = (_build_sankey_charts, [scenarios, visualizer_params, model_params], [])
+
+    # Leaving PlotRenderer waits until all requested plots are rendered
+    with plot_renderer if plot_renderer is not None else nullcontext():
+        _run_export_tasks(tasks, model_params[ParameterName.NumExportWorkers])
+    log(f"All scenario data exported to {path_to_combined_scenario_data}")
 
     time_total_in_secs = time.perf_counter() - time_total_in_secs
     log("Finished in {:.2f}s".format(time_total_in_secs))
+
+
+def render_plots(path_to_output_dir: str,
+                 plot_format: Union[str, None] = None,
+                 num_workers: int = 1) -> List[str]:
+    """
+    Render plots of scenarios that were run with parameter plot_mode set to OnRequest.
+    Plots are rendered from the result store in the output directory to the scenario output directories.
+
+    :param path_to_output_dir: Path to output directory of the scenario run
+    :param plot_format: Plot format (SVG or PNG), if None then uses the plot format of the scenario run
+    :param num_workers: Number of worker processes (1 = no worker processes, 0 = number of CPUs)
+    :return: List of rendered plot filenames
+    """
+    path_to_output_dir = os.path.realpath(os.path.expanduser(path_to_output_dir))
+    path_to_results = os.path.join(path_to_output_dir, _default_results_dir_name)
+    path_to_plot_settings = os.path.join(path_to_results, _plot_settings_filename)
+    if not os.path.isfile(path_to_plot_settings):
+        raise Exception("No plot settings found in '{}', run scenarios with parameter '{}' set to '{}'".format(
+            path_to_results, ParameterName.PlotMode.value, ParameterPlotMode.OnRequest.value))
+
+    with open(path_to_plot_settings, "r", encoding="utf-8") as fs:
+        plot_settings = json.load(fs)
+
+    if plot_format is None:
+        plot_format = plot_settings[ParameterName.PlotFormat.value]
+
+    with PlotRenderer(plot_format, num_workers) as plot_renderer:
+        for scenario_name, results in load_results(path_to_results).items():
+            with results:
+                plot_renderer.render_scenario_results(results,
+                                                      os.path.join(path_to_output_dir, scenario_name),
+                                                      plot_settings[ParameterName.ConversionFactorCToCO2.value],
+                                                      plot_settings[ParameterName.VisualizeInflowsToProcesses.value])
+        return plot_renderer.close()
+
+
+def _write_plot_settings(path_to_results: str, model_params: Dict[str, Any]) -> None:
+    """
+    Write model parameters needed for rendering plots with render_plots to result store directory.
+
+    :param path_to_results: Path to root directory of result store
+    :param model_params: Dictionary of model parameters
+    """
+    plot_settings = {
+        ParameterName.PlotFormat.value: model_params[ParameterName.PlotFormat],
+        ParameterName.ConversionFactorCToCO2.value: model_params[ParameterName.ConversionFactorCToCO2],
+        ParameterName.VisualizeInflowsToProcesses.value: list(model_params[ParameterName.VisualizeInflowsToProcesses]),
+    }
+    with open(os.path.join(path_to_results, _plot_settings_filename), "w", encoding="utf-8") as fs:
+        json.dump(plot_settings, fs, indent=1)
+
+
+def _run_export_tasks(tasks: Dict[str, Tuple[Callable, List[Any], List[str]]], num_workers: int = 1) -> None:
+    """
+    Run export tasks. Task is started when all the tasks it depends on have finished
+    and the results of those tasks are appended to the task arguments.
+    Tasks are run in worker threads if num_workers is not 1, otherwise tasks are run
+    in the defined order. Task that depends on failed task is not run.
+    Raises Exception with list of errors if any of the tasks failed.
+
+    :param tasks: Dictionary (task name -> (function, list of arguments, list of dependency task names))
+    :param num_workers: Number of worker threads (1 = no worker threads, 0 = number of CPUs)
+    """
+    if num_workers <= 0:
+        num_workers = os.cpu_count()
+
+    num_workers = max(1, min(num_workers, len(tasks)))
+    task_name_to_result = {}
+    pending_task_names = list(tasks.keys())
+    failed_task_names = set()
+    errors = []
+
+    def get_ready_task_names() -> List[str]:
+        # Tasks that depend on failed tasks are dropped
+        ready_task_names = []
+        for task_name in list(pending_task_names):
+            dependency_names = tasks[task_name][2]
+            if any(name in failed_task_names for name in dependency_names):
+                pending_task_names.remove(task_name)
+                failed_task_names.add(task_name)
+                continue
+
+            if all(name in task_name_to_result for name in dependency_names):
+                pending_task_names.remove(task_name)
+                ready_task_names.append(task_name)
+        return ready_task_names
+
+    def get_task_args(task_name: str) -> List[Any]:
+        func, args, dependency_names = tasks[task_name]
+        return list(args) + [task_name_to_result[name] for name in dependency_names]
+
+    def on_task_failed(task_name: str, ex: Exception) -> None:
+        failed_task_names.add(task_name)
+        errors.append("Export task '{}': {}".format(task_name, ex))
+
+    progress_bar = tqdm(total=len(tasks), desc="Exporting scenario results")
+    if num_workers == 1:
+        ready_task_names = get_ready_task_names()
+        while ready_task_names:
+            for task_name in ready_task_names:
+                try:
+                    task_name_to_result[task_name] = tasks[task_name][0](*get_task_args(task_name))
+                except Exception as ex:
+                    on_task_failed(task_name, ex)
+                progress_bar.update(1)
+            ready_task_names = get_ready_task_names()
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            future_to_task_name = {}
+            for task_name in get_ready_task_names():
+                future = executor.submit(tasks[task_name][0], *get_task_args(task_name))
+                future_to_task_name[future] = task_name
+
+            while future_to_task_name:
+                done, _ = wait(future_to_task_name.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    task_name = future_to_task_name.pop(future)
+                    try:
+                        task_name_to_result[task_name] = future.result()
+                    except Exception as ex:
+                        on_task_failed(task_name, ex)
+                    progress_bar.update(1)
+
+                for task_name in get_ready_task_names():
+                    future = executor.submit(tasks[task_name][0], *get_task_args(task_name))
+                    future_to_task_name[future] = task_name
+
+    progress_bar.close()
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    if errors:
+        raise Exception(errors)
+
+
+def _build_scenario_tables(scenario: Scenario) -> Dict[str, pd.DataFrame]:
+    """
+    Build processes, flows, flow values and mass balance tables for the Scenario.
+    Each table has the scenario name as the first column.
+
+    :param scenario: Solved Scenario
+    :return: Dictionary (sheet name -> DataFrame)
+    """
+    # Processes Sheet
+    df_processes = scenario.flow_solver.get_processes_as_dataframe()
+    df_processes.insert(0, "Scenario", scenario.name)
+
+    # Flows Sheet
+    df_flows = scenario.flow_solver.get_flows_as_dataframe()
+    df_flows.insert(0, "Scenario", scenario.name)
+
+    # Flow values Sheet
+    df_flow_values = scenario.flow_solver.get_evaluated_flow_values_as_dataframe()
+    df_flow_values.insert(0, "Scenario", scenario.name)
+
+    # Mass balance Sheet
+    df_scenario_mass_balance = calculate_scenario_mass_balance(scenario.mfa_system)
+    df_scenario_mass_balance.insert(0, "Scenario", scenario.name)
+
+    # Sheet names to what are written to file. Note that the order is important.
+    return {
+        "Processes": df_processes,
+        "Flows": df_flows,
+        "Flow values (baseline value)": df_flow_values,
+        "Mass balance": df_scenario_mass_balance,
+    }
+
+
+def _export_scenario_tables(scenario: Scenario, path_to_dir: str, export_format: str) -> None:
+    """
+    Build processes, flows, flow values and mass balance tables for the Scenario
+    and write those to Parquet / Arrow dataset.
+
+    :param scenario: Solved Scenario
+    :param path_to_dir: Path to combined scenario data directory
+    :param export_format: Export format (Parquet or Arrow)
+    """
+    write_scenario_data_tables(_build_scenario_tables(scenario), path_to_dir, export_format)
+
+
+def _write_combined_scenario_data(filename: str, *list_of_sheet_name_to_df: Dict[str, pd.DataFrame]) -> None:
+    """
+    Combine all scenario data to one Excel file
+    by concatenating all sheet-specific list of DataFrames as one DataFrame.
+
+    :param filename: Path to Excel file
+    :param list_of_sheet_name_to_df: Dictionaries (sheet name -> DataFrame), one for each scenario
+    """
+    log(f"Exporting all scenarios to {filename}...")
+    sheet_name_to_list_of_dfs = {}
+    for sheet_name_to_df in list_of_sheet_name_to_df:
+        for sheet_name, df in sheet_name_to_df.items():
+            sheet_name_to_list_of_dfs.setdefault(sheet_name, []).append(df)
+
+    with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+        for sheet_name, list_of_dfs in sheet_name_to_list_of_dfs.items():
+            df = pd.concat(list_of_dfs, ignore_index=True)
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def _export_dynamic_stocks(scenario: Scenario,
+                           scenario_output_path: str,
+                           stream_export: bool = False,
+                           cohorts_format: str = ParameterDynamicStockCohortsFormat.Excel,
+                           plot_renderer: Union[PlotRenderer, None] = None) -> None:
+    """
+    Build dynamic stock results for the Scenario and visualize.
+    Writes the dynamic stocks Excel file and the optional cohorts file to scenario output directory
+    and requests the stock plots from PlotRenderer.
+
+    :param scenario: Solved Scenario
+    :param scenario_output_path: Path to scenario output directory
+    :param stream_export: True to write Excel file row by row with constant memory (default: False)
+    :param cohorts_format: Format of the cohort matrices (Excel, NPZ or Parquet)
+    :param plot_renderer: PlotRenderer for the stock plots, None = no plots (default: None)
+    """
+    flow_solver = scenario.flow_solver
+    years = scenario.scenario_data.years
+
+    # Full name of the baseline, e.g. "Solid wood equivalent"
+    baseline_value_name = scenario.scenario_data.baseline_value_name
+    baseline_unit_name = scenario.scenario_data.baseline_unit_name
+
+    # Baseline and indicators
+    indicators = flow_solver.get_indicator_name_to_indicator()
+    element_names = [baseline_value_name] + list(indicators.keys())
+    element_units = [baseline_unit_name] + [indicator.unit for indicator in indicators.values()]
+
+    # Baseline DSM
+    stock_id_to_baseline_dsm = flow_solver.get_baseline_dynamic_stocks()
+    stock_id_to_indicator_name_to_dsm = flow_solver.get_indicator_dynamic_stocks()
+
+    if not len(stock_id_to_baseline_dsm.keys()):
+        log("Scenario '{}': no dynamic stocks in the defined system".format(
+            scenario.name))
+        return
+
+    # Values for stock plots (stocks x elements x years)
+    stock_ids = list(stock_id_to_baseline_dsm.keys())
+    stock_values_shape = (len(stock_ids), len(element_names), len(years))
+    stock_totals = np.zeros(stock_values_shape)
+    stock_changes = np.zeros(stock_values_shape)
+    stock_outflows = np.zeros(stock_values_shape)
+
+    # Create a writer for exporting data
+    # Cohort matrices are written either to Excel file or to separate NPZ/Parquet file
+    excel_filename = os.path.join(scenario_output_path, "{}_dynamic_stocks.xlsx".format(scenario.name))
+    cohorts_filename = get_dynamic_stock_cohorts_filename(scenario.name, cohorts_format)
+    if cohorts_filename is not None:
+        cohorts_filename = os.path.join(scenario_output_path, cohorts_filename)
+
+    with DynamicStocksWriter(excel_filename, years, streaming=stream_export,
+                             cohorts_format=cohorts_format, path_to_cohorts_file=cohorts_filename) as writer:
+        for stock_index, (stock_id, baseline_dsm) in enumerate(stock_id_to_baseline_dsm.items()):
+            # Truncate the stock ID to 20 characters (or any suitable length) to fit within the 31 character limit
+            # Truncate to the first 20 characters
+            stock_id_for_filename = stock_id[:20]
+            stock_id_for_filename = stock_id_for_filename.replace(
+                ":", "_")  # Replace ":" with "_"
+
+            # ******************
+            # * Baseline stock *
+            # ******************
+            baseline_stock_by_cohort = baseline_dsm.compute_s_c_inflow_driven()
+            baseline_outflow_by_cohort = baseline_dsm.compute_o_c_from_s_c()
+            baseline_stock_total = baseline_dsm.compute_stock_total()
+            baseline_stock_change = baseline_dsm.compute_stock_change()
+            baseline_stock_outflow = baseline_dsm.compute_outflow_total()
+
+            # Export stock by cohort and outflow by cohort
+            writer.write_cohorts(stock_id, baseline_value_name,
+                                 shorten_sheet_name(f'{stock_id_for_filename}_s_by_c_{baseline_value_name}'),
+                                 shorten_sheet_name(f'{stock_id_for_filename}_o_by_c_{baseline_value_name}'),
+                                 baseline_stock_by_cohort,
+                                 baseline_outflow_by_cohort)
+
+            # Export stock total, stock change and stock outflow total
+            writer.write_totals(scenario.name, stock_id, baseline_unit_name,
+                                baseline_stock_total, baseline_stock_change, baseline_stock_outflow)
+
+            stock_totals[stock_index, 0] = baseline_stock_total
+            stock_changes[stock_index, 0] = baseline_stock_change
+            stock_outflows[stock_index, 0] = baseline_stock_outflow
+
+            for indicator_name, indicator_dsm in stock_id_to_indicator_name_to_dsm[stock_id].items():
+                # **************
+                # * Indicators *
+                # **************
+                indicator_stock_by_cohort = indicator_dsm.compute_s_c_inflow_driven()
+                indicator_outflow_by_cohort = indicator_dsm.compute_o_c_from_s_c()
+                indicator_stock_total = indicator_dsm.compute_stock_total()
+                indicator_stock_change = indicator_dsm.compute_stock_change()
+                indicator_stock_outflow = indicator_dsm.compute_outflow_total()
+
+                # Export indicator stock by cohort and outflow by cohort
+                writer.write_cohorts(stock_id, indicator_name,
+                                     shorten_sheet_name(f"{stock_id_for_filename}_s_by_c_{indicator_name}"),
+                                     shorten_sheet_name(f"{stock_id_for_filename}_o_by_c_{indicator_name}"),
+                                     indicator_stock_by_cohort,
+                                     indicator_outflow_by_cohort)
+
+                # Export indicator stock total, stock change and stock outflow total
+                writer.write_totals(scenario.name, stock_id, indicator_name,
+                                    indicator_stock_total, indicator_stock_change, indicator_stock_outflow)
+
+                element_index = element_names.index(indicator_name)
+                stock_totals[stock_index, element_index] = indicator_stock_total
+                stock_changes[stock_index, element_index] = indicator_stock_change
+                stock_outflows[stock_index, element_index] = indicator_stock_outflow
+
+    if plot_renderer is not None:
+        plot_renderer.render_stock_plots(scenario_output_path, scenario.name, years, stock_ids,
+                                         element_names, element_units, stock_totals, stock_changes, stock_outflows)
+
+
+def _export_co2_removals(scenario: Scenario,
+                         scenario_output_path: str,
+                         conversion_factor_c_to_co2: float,
+                         plot_renderer: Union[PlotRenderer, None] = None) -> None:
+    """
+    Convert the carbon stocks of the Scenario to annual CO2 emissions / removals.
+    Writes the CO2 removals, net emitter flags and steady-state periods CSV files to scenario output directory
+    and requests the CO2 removal plot from PlotRenderer.
+
+    :param scenario: Solved Scenario
+    :param scenario_output_path: Path to scenario output directory
+    :param conversion_factor_c_to_co2: Conversion factor from carbon to CO2
+    :param plot_renderer: PlotRenderer for the CO2 removal plot, None = no plot (default: None)
+    """
+    show_steady_state_overlay = False  # Toggle to enable/disable overlay
+    steady_state_threshold_ratio = 0.05  # Relative threshold for stability
+    min_steady_state_years = 5  # Minimum consecutive years for valid steady state
+
+    flow_solver = scenario.flow_solver
+    years = scenario.scenario_data.years
+
+    stock_id_to_indicator_name_to_dsm = flow_solver.get_indicator_dynamic_stocks()
+    if not len(stock_id_to_indicator_name_to_dsm.keys()):
+        log("Scenario '{}': no dynamic stocks in the defined system".format(
+            scenario.name))
+        return
+
+    results_co2_removals = pd.DataFrame({'Year': years})
+    results_net_emitters = pd.DataFrame({'Year': years})
+
+    target_indicator_name = "Carbon"
+    plot_stock_ids = []
+    plot_co2_removals = []
+    steady_state_info = {}
+    for stock_id, indicator_name_to_dsm in stock_id_to_indicator_name_to_dsm.items():
+        if target_indicator_name not in indicator_name_to_dsm:
+            continue
+
+        dsm = indicator_name_to_dsm[target_indicator_name]
+        total_inflows_carbon = dsm.i
+        total_outflows_carbon = dsm.o
+        annual_co2_removal = (
+            total_inflows_carbon - total_outflows_carbon) * conversion_factor_c_to_co2
+        results_co2_removals[stock_id] = annual_co2_removal
+
+        # Detect steady-state years with rolling window approach
+        threshold = steady_state_threshold_ratio * \
+            max(abs(annual_co2_removal))
+        rolling_mean = pd.Series(annual_co2_removal).rolling(
+            window=min_steady_state_years, center=True).mean()
+        is_steady = abs(pd.Series(annual_co2_removal) -
+                        rolling_mean) < threshold
+
+        # Extract consecutive steady years
+        steady_years = []
+        current_run = []
+        for year, steady in zip(years, is_steady):
+            if steady:
+                current_run.append(year)
+            else:
+                if len(current_run) >= min_steady_state_years:
+                    steady_years.extend(current_run)
+                current_run = []
+        if len(current_run) >= min_steady_state_years:
+            steady_years.extend(current_run)
+
+        steady_state_info[stock_id] = sorted(set(steady_years))
+
+        # Flag net emitter years (negative removals)
+        results_net_emitters[stock_id] = [
+            "Emitter" if value < 0 else "" for value in annual_co2_removal]
+
+        plot_stock_ids.append(stock_id)
+        plot_co2_removals.append(annual_co2_removal)
+
+    # Export CO2 removal data to CSV
+    log("Exporting annual CO2 emissions / removal (Mt) by stock results...")
+    filename = os.path.join(scenario_output_path, f"{scenario.name}_annual_co2_removal_by_stock.csv")
+    results_co2_removals.to_csv(path_or_buf=filename, index=False, mode="w")
+
+    # Export net emitter flag table
+    log("Exporting annual CO2 net emitter years (where removals < 0)...")
+    filename = os.path.join(scenario_output_path, f"{scenario.name}_annual_net_emitter_flags.csv")
+    results_net_emitters.to_csv(path_or_buf=filename, index=False, mode="w")
+
+    # Plot CO2 removals with optional steady state overlay
+    if plot_renderer is not None:
+        plot_renderer.render_co2_removal_plot(scenario_output_path, scenario.name, years, plot_stock_ids,
+                                              np.array(plot_co2_removals).reshape(len(plot_stock_ids), len(years)),
+                                              steady_state_info if show_steady_state_overlay else None)
+
+    # Print and export steady-state info
+    # NOTE: Lines are printed at once so that output of concurrent export tasks is not interleaved
+    lines = [f"\nSteady-state periods for scenario '{scenario.name}':"]
+    for stock_id, years_list in steady_state_info.items():
+        if years_list:
+            lines.append(f"  {stock_id}: {years_list[0]} to {years_list[-1]} ({len(years_list)} years)")
+        else:
+            lines.append(f"  {stock_id}: No steady-state period detected.")
+    print("\n".join(lines))
+
+    steady_state_df = pd.DataFrame([
+        {'Stock': stock_id, 'StartYear': years_list[0] if years_list else None,
+         'EndYear': years_list[-1] if years_list else None, 'DurationYears': len(years_list)}
+        for stock_id, years_list in steady_state_info.items()
+    ])
+    filename = os.path.join(scenario_output_path, f"{scenario.name}_steady_state_periods.csv")
+    steady_state_df.to_csv(filename, index=False)
+
+
+def _export_inflows_to_processes(scenario: Scenario,
+                                 scenario_output_path: str,
+                                 process_ids: List[str],
+                                 baseline_unit_name: str,
+                                 plot_renderer: Union[PlotRenderer, None] = None) -> None:
+    """
+    Visualize inflows per year to selected processes of the Scenario.
+    Writes the inflows CSV file for each process to scenario output directory
+    and requests the stacked inflows plot for each process from PlotRenderer.
+
+    :param scenario: Solved Scenario
+    :param scenario_output_path: Path to scenario output directory
+    :param process_ids: List of process IDs
+    :param baseline_unit_name: Baseline unit name
+    :param plot_renderer: PlotRenderer for the inflows plots, None = no plots (default: None)
+    """
+    flow_solver = scenario.flow_solver
+    years = scenario.scenario_data.years
+
+    for process_id in process_ids:
+        process = flow_solver.get_process(process_id, min(years))
+        flow_id_to_source_process_id = {}
+
+        # Find all source processes of all incoming flows to this process in all years
+        # This is needed to create stable set of process names so that the relative
+        # position of the processes stay the same in stacked chart between the years
+        source_process_ids = set()
+        for year in years:
+            inflows = flow_solver.get_process_flows(
+                process_id, year)["Inflows"]
+            unique_flow_ids = set()
+            for flow in inflows:
+                unique_flow_ids.add(flow.id)
+                flow_id_to_source_process_id[flow.id] = flow.source_process_id
+
+            # Find source process ID of each incoming flow and add
+            # to list of unique source process IDs if not already there
+            unique_flow_ids = list(unique_flow_ids)
+            for flow_id in unique_flow_ids:
+                source_process_ids.add(
+                    flow_id_to_source_process_id[flow_id])
+
+        # Now source_process_ids-list contains list of all the possible process IDs
+        # that have flows incoming to process_id. This list is needed to keep the
+        # incoming process IDs the same every year because aiphoria allows the connections
+        # between the flows to change between the years.
+        source_process_ids = list(source_process_ids)
+
+        # Create 2D array with shape of (number of source process IDs, number of years)
+        # and fill with the value of the inflow from source process for each year
+        df_inflows_to_process = pd.DataFrame(columns=['Year', 'Source Process ID', 'Value ({})'.format(
+            baseline_unit_name)])
+        source_process_by_flow_values = np.zeros(
+            (len(source_process_ids), len(years)))
+        for year_index, year in enumerate(years):
+            inflows = flow_solver.get_process_flows(
+                process_id, year)["Inflows"]
+            for flow in inflows:
+                source_process_id_index = source_process_ids.index(
+                    flow.source_process_id)
+                source_process_by_flow_values[source_process_id_index,
+                                              year_index] = flow.evaluated_value
+                df_inflows_to_process.loc[len(df_inflows_to_process)] = [year, flow.source_process_id,
+                                                                         flow.evaluated_value]
+
+        df_inflows_to_process = df_inflows_to_process.round(5)
+
+        # Export inflows to process to CSV file
+        # NOTE: Replace character ':' in Process ID to underscore because
+        # Windows system are not able to handle that character in filename
+        process_id_for_filename = process_id.replace(":", "_")
+        filename = os.path.join(scenario_output_path,
+                                "{}_inflows_to_{}.csv".format(scenario.name, process_id_for_filename))
+        df_inflows_to_process.to_csv(
+            path_or_buf=filename, index=False, mode="w")
+
+        # Stacked area chart of inflows
+        if plot_renderer is not None:
+            plot_renderer.render_inflows_plot(scenario_output_path, scenario.name, process_id, years,
+                                              source_process_ids, source_process_by_flow_values, process.name)
+
+
+def _build_sankey_charts(scenarios: List[Scenario], visualizer_params: Dict[str, Any],
+                         model_params: Dict[str, Any]) -> None:
+    """
+    Visualize the scenario results as Sankey graphs.
+
+    :param scenarios: List of solved Scenarios
+    :param visualizer_params: Dictionary of visualizer parameters
+    :param model_params: Dictionary of model parameters
+    """
+    log("Creating Sankey charts for scenarios...")
+    visualizer = DataVisualizer()
+    visualizer.build_and_show(
+        scenarios, visualizer_params, model_params, combine_to_one_file=True)
@@ -1,7 +1,13 @@
 import os
+import json
 import warnings
+import numpy as np
+import pandas as pd
 import pytest
-from aiphoria.core.builder import init_builder, build_dataprovider, build_datachecker, build_and_solve_scenarios, build_results
+from aiphoria.core.builder import init_builder, build_dataprovider, build_datachecker, build_and_solve_scenarios, build_results, \
+    solve_scenarios, get_scenario_cache_keys, get_settings_file_cache_key
+from aiphoria.core import builder
+from aiphoria.core.parameters import ParameterName, ParameterPlotMode
 
 
 def get_path_to_reference_scenario() -> str:
@@ -192,7 +198,7 @@ def test_build_results(capfd):
 
         raise ex_info
 
-    parameter_overrides = {"start_year": 1000}
+    parameter_overrides = {"virtual_flows_epsilon": 0.2}
     model_params, scenarios, color_defs = build_results(
         filename=path_to_scenario,
         path_to_output_dir=path_to_output,
@@ -201,3 +207,223 @@ def test_build_results(capfd):
     # Expect string "Overriding parameter" in standard output (parameter has been overridden)
     out, err = capfd.readouterr()
     assert "Overriding parameter" in out
+
+
+def test_solve_scenarios_in_worker_processes():
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    # Alternative scenarios solved in worker processes must match sequentially solved scenarios
+    scenario_name_to_flow_values = []
+    for num_workers in [1, 2]:
+        dataprovider = build_dataprovider(path_to_scenario, use_cache=False)
+        datachecker = build_datachecker(dataprovider, use_cache=False)
+        scenarios = solve_scenarios(datachecker.build_scenarios(), num_workers=num_workers)
+        assert len(scenarios) > 1
+
+        scenario_name_to_flow_values.append({
+            scenario.name: scenario.flow_solver.get_evaluated_flow_values_as_dataframe() for scenario in scenarios
+        })
+
+    sequential_results, parallel_results = scenario_name_to_flow_values
+    assert list(sequential_results.keys()) == list(parallel_results.keys())
+    for scenario_name, df_flow_values in sequential_results.items():
+        assert df_flow_values.equals(parallel_results[scenario_name])
+
+
+def test_build_cache_keys():
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    dataprovider = build_dataprovider(path_to_scenario, use_cache=False)
+    datachecker = build_datachecker(dataprovider, use_cache=False)
+    scenario_keys = get_scenario_cache_keys(datachecker)
+    assert len(scenario_keys) == len(dataprovider.get_scenario_definitions()) + 1
+    assert len(set(scenario_keys)) == len(scenario_keys)
+
+    # Keys are stable and output path does not affect the keys
+    dataprovider.get_model_params()[ParameterName.OutputPath] = "another_output"
+    assert get_scenario_cache_keys(datachecker) == scenario_keys
+
+    # Execution-only parameters do not affect the keys
+    dataprovider.get_model_params()[ParameterName.NumExportWorkers] = 4
+    dataprovider.get_model_params()[ParameterName.PlotMode] = ParameterPlotMode.Off
+    assert get_scenario_cache_keys(datachecker) == scenario_keys
+
+    # Skipped checks affect the keys because cached scenarios are not checked again
+    dataprovider.get_model_params()[ParameterName.SkipChecks] = ["color_definitions"]
+    assert not set(get_scenario_cache_keys(datachecker)).intersection(scenario_keys)
+    dataprovider.get_model_params()[ParameterName.SkipChecks] = []
+    assert get_scenario_cache_keys(datachecker) == scenario_keys
+
+    # Removing alternative scenario keeps the baseline key
+    dataprovider.get_scenario_definitions().pop()
+    assert get_scenario_cache_keys(datachecker) == scenario_keys[:-1]
+
+    # Changing effective model parameter invalidates every scenario
+    dataprovider.get_model_params()[ParameterName.VirtualFlowsEpsilon] += 1.0
+    new_scenario_keys = get_scenario_cache_keys(datachecker)
+    assert not set(new_scenario_keys).intersection(scenario_keys)
+
+
+def test_build_and_solve_scenarios_cached():
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    path_to_cache = os.path.join(os.path.abspath("."), "tests", "test_cache")
+    init_builder(path_to_cache=path_to_cache, use_cache=True, use_timing=False, clear_cache=True)
+
+    dataprovider = build_dataprovider(path_to_scenario, use_cache=False)
+    datachecker = build_datachecker(dataprovider, use_cache=False)
+    uncached_scenarios = build_and_solve_scenarios(datachecker, use_cache=False)
+
+    # First run solves and writes every scenario to cache, second run reads all of them from cache
+    for _ in range(2):
+        dataprovider = build_dataprovider(path_to_scenario, use_cache=True)
+        datachecker = build_datachecker(dataprovider, use_cache=True)
+        scenarios = build_and_solve_scenarios(datachecker, use_cache=True)
+        assert [scenario.name for scenario in scenarios] == [scenario.name for scenario in uncached_scenarios]
+        for scenario, uncached_scenario in zip(scenarios, uncached_scenarios):
+            assert scenario.mfa_system is not None
+            df_flow_values = scenario.flow_solver.get_evaluated_flow_values_as_dataframe()
+            assert df_flow_values.equals(uncached_scenario.flow_solver.get_evaluated_flow_values_as_dataframe())
+
+    filenames = os.listdir(path_to_cache)
+    assert len([filename for filename in filenames if filename.startswith("dataprovider_")]) == 1
+    assert len([filename for filename in filenames if filename.startswith("scenario_")]) == len(scenarios)
+
+    # Changing effective model parameter creates new entries for every scenario
+    dataprovider = build_dataprovider(path_to_scenario, use_cache=True)
+    dataprovider.get_model_params()[ParameterName.VirtualFlowsEpsilon] += 1.0
+    datachecker = build_datachecker(dataprovider, use_cache=True)
+    build_and_solve_scenarios(datachecker, use_cache=True)
+    filenames = os.listdir(path_to_cache)
+    assert len([filename for filename in filenames if filename.startswith("scenario_")]) == 2 * len(scenarios)
+
+
+def test_build_and_solve_scenarios_cached_execution_only_parameters(monkeypatch):
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    path_to_cache = os.path.join(os.path.abspath("."), "tests", "test_cache")
+    init_builder(path_to_cache=path_to_cache, use_cache=True, use_timing=False, clear_cache=True)
+
+    dataprovider = build_dataprovider(path_to_scenario, use_cache=True)
+    datachecker = build_datachecker(dataprovider, use_cache=True)
+    scenario_keys = get_scenario_cache_keys(datachecker)
+    build_and_solve_scenarios(datachecker, use_cache=True)
+    filenames = sorted(os.listdir(path_to_cache))
+
+    # Changing execution-only parameters uses the same cache entries and nothing is solved again
+    def solve_scenarios_not_allowed(*args, **kwargs):
+        raise Exception("Scenarios were solved instead of reading those from cache")
+
+    monkeypatch.setattr(builder, "solve_scenarios", solve_scenarios_not_allowed)
+    dataprovider = build_dataprovider(path_to_scenario, use_cache=True)
+    dataprovider.get_model_params()[ParameterName.NumExportWorkers] = 4
+    dataprovider.get_model_params()[ParameterName.PlotMode] = ParameterPlotMode.Off
+    datachecker = build_datachecker(dataprovider, use_cache=True)
+    assert get_scenario_cache_keys(datachecker) == scenario_keys
+
+    scenarios = build_and_solve_scenarios(datachecker, use_cache=True)
+    assert sorted(os.listdir(path_to_cache)) == filenames
+    assert scenarios[0].flow_solver is not None
+    assert scenarios[0].model_params[ParameterName.NumExportWorkers] == 4
+    assert scenarios[0].model_params[ParameterName.PlotMode] == ParameterPlotMode.Off
+
+
+def create_data_bundle(path_to_scenario: str, path_to_bundle: str, table_format: str = "csv") -> None:
+    # Write settings as flat JSON mapping and every data sheet to its own table
+    os.makedirs(path_to_bundle, exist_ok=True)
+    settings = {}
+    sheet_settings = pd.read_excel(path_to_scenario, sheet_name="Settings", usecols="B:C", skiprows=5)
+    for _, (param_name, param_value) in sheet_settings.iterrows():
+        if pd.isna(param_name) or pd.isna(param_value):
+            continue
+        settings[param_name] = param_value.item() if isinstance(param_value, np.generic) else param_value
+
+    sheet_name_to_skip_num_rows = {}
+    for param_name, param_value in list(settings.items()):
+        if param_name.startswith("sheet_name_"):
+            skip_param_name = param_name.replace("sheet_name_", "skip_num_rows_")
+            sheet_name_to_skip_num_rows[param_value] = settings.get(skip_param_name, 0)
+            if table_format != "csv" and skip_param_name in settings:
+                # Parquet tables have no rows to skip
+                settings[skip_param_name] = 0
+
+    for sheet_name in pd.ExcelFile(path_to_scenario).sheet_names:
+        if sheet_name == "Settings":
+            continue
+
+        if table_format == "csv":
+            sheet = pd.read_excel(path_to_scenario, sheet_name=sheet_name, header=None)
+            sheet.to_csv(os.path.join(path_to_bundle, "{}.csv".format(sheet_name)), header=False, index=False)
+        else:
+            # Only sheets defined in settings are written because Parquet requires one type per column
+            if sheet_name not in sheet_name_to_skip_num_rows:
+                continue
+
+            skip_num_rows = sheet_name_to_skip_num_rows.get(sheet_name, 0)
+            sheet = pd.read_excel(path_to_scenario, sheet_name=sheet_name, skiprows=skip_num_rows)
+            sheet.columns = [str(col) for col in sheet.columns]
+            sheet.to_parquet(os.path.join(path_to_bundle, "{}.parquet".format(sheet_name)), index=False)
+
+    with open(os.path.join(path_to_bundle, "settings.json"), "w") as fs:
+        json.dump(settings, fs)
+
+
+def assert_same_dataprovider_data(dataprovider_a, dataprovider_b):
+    assert dataprovider_a.get_model_params() == dataprovider_b.get_model_params()
+    assert [p.id for p in dataprovider_a.get_processes()] == [p.id for p in dataprovider_b.get_processes()]
+    assert [(f.id, f.year, f.value, f.unit) for f in dataprovider_a.get_flows()] == \
+           [(f.id, f.year, f.value, f.unit) for f in dataprovider_b.get_flows()]
+    assert [s.id for s in dataprovider_a.get_stocks()] == [s.id for s in dataprovider_b.get_stocks()]
+    assert [s.name for s in dataprovider_a.get_scenario_definitions()] == \
+           [s.name for s in dataprovider_b.get_scenario_definitions()]
+    assert dataprovider_a.get_process_positions() == dataprovider_b.get_process_positions()
+
+
+def test_dataprovider_data_bundle(tmp_path):
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    path_to_bundle = os.path.join(tmp_path, "bundle")
+    create_data_bundle(path_to_scenario, path_to_bundle)
+    dataprovider_xlsx = build_dataprovider(path_to_scenario, use_cache=False)
+    dataprovider_bundle = build_dataprovider(path_to_bundle, use_cache=False)
+    assert_same_dataprovider_data(dataprovider_xlsx, dataprovider_bundle)
+
+    # Lists can be defined directly in settings
+    path_to_settings = os.path.join(path_to_bundle, "settings.json")
+    with open(path_to_settings, "r") as fs:
+        settings = json.load(fs)
+    cache_key = get_settings_file_cache_key(path_to_bundle)
+
+    settings[ParameterName.IgnoreColumnsFlows] = ["A"]
+    with open(path_to_settings, "w") as fs:
+        json.dump(settings, fs)
+    assert_same_dataprovider_data(dataprovider_xlsx, build_dataprovider(path_to_bundle, use_cache=False))
+    assert get_settings_file_cache_key(path_to_bundle) != cache_key
+
+    # Missing required table
+    os.remove(os.path.join(path_to_bundle, "Flows.csv"))
+    with pytest.raises(Exception):
+        build_dataprovider(path_to_bundle, use_cache=False)
+
+    # Missing settings
+    os.remove(path_to_settings)
+    with pytest.raises(Exception):
+        build_dataprovider(path_to_bundle, use_cache=False)
+
+
+def test_dataprovider_data_bundle_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    path_to_bundle = os.path.join(tmp_path, "bundle")
+    create_data_bundle(path_to_scenario, path_to_bundle, table_format="parquet")
+    dataprovider_xlsx = build_dataprovider(path_to_scenario, use_cache=False)
+    dataprovider_bundle = build_dataprovider(path_to_bundle, use_cache=False)
+    assert [(f.id, f.year, f.value) for f in dataprovider_xlsx.get_flows()] == \
+           [(f.id, f.year, f.value) for f in dataprovider_bundle.get_flows()]
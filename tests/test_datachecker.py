@@ -1,9 +1,12 @@
 import os
+import time
 import pytest
 import warnings
 from aiphoria import ParameterName, ParameterFillMethod
-from aiphoria.core.datachecker import DataChecker
+from aiphoria.core.parameters import StockDistributionType
+from aiphoria.core.datachecker import DataChecker, DataCheck
 from aiphoria.core.dataprovider import DataProvider
+from aiphoria.core.types import DataCheckStage
 
 
 def get_path_to_reference_scenario() -> str:
@@ -374,3 +377,164 @@ def test_scenario_definitions():
 
 def test_process_stock_parameters():
     pass
+
+
+@pytest.mark.parametrize("fill_method", [method for method in ParameterFillMethod])
+def test_fill_missing_flows(fill_method):
+    # Test that every year gets its own Flow when filling missing Flow data
+    path_to_scenario = get_path_to_reference_scenario()
+
+    # Ignore openpyxl warning about Data validation extension support, we are not using that
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    dataprovider = DataProvider(path_to_scenario)
+    params = dataprovider.get_model_params()
+    params[ParameterName.FillMissingAbsoluteFlows] = True
+    params[ParameterName.FillMissingRelativeFlows] = True
+    params[ParameterName.FillMethod] = fill_method
+
+    # Define Flows also for the end year so that the years between have no Flow data
+    flows = dataprovider.get_flows()
+    for flow in list(flows):
+        end_year_flow = flow.create_copy()
+        end_year_flow.year = params[ParameterName.EndYear]
+        flows.append(end_year_flow)
+
+    datachecker = DataChecker(dataprovider)
+    scenarios = datachecker.build_scenarios()
+    year_to_flow_id_to_flow = scenarios[0].scenario_data.year_to_flow_id_to_flow
+
+    all_flows = []
+    for year, flow_id_to_flow in year_to_flow_id_to_flow.items():
+        for flow_id, flow in flow_id_to_flow.items():
+            assert flow.year == year
+            all_flows.append(flow)
+
+    assert len(set([id(flow) for flow in all_flows])) == len(all_flows)
+
+
+def test_data_checks_report_all_errors():
+    # Test that errors from all failed data checks are reported at once
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = DataProvider(path_to_scenario)
+
+    # Invalid prioritized transformation stage and color definition
+    params = dataprovider.get_model_params()
+    params[ParameterName.PrioritizeTransformationStages] = ["Invalid transformation stage"]
+    dataprovider.get_color_definitions()[0].value = "Invalid color"
+
+    with pytest.raises(Exception) as ex_info:
+        datachecker = DataChecker(dataprovider)
+        scenarios = datachecker.build_scenarios()
+
+    errors = ex_info.value.args[0]
+    assert any(["Invalid transformation stage" in error for error in errors])
+    assert any(["Invalid color" in error for error in errors])
+
+
+def test_data_checks_skip():
+    # Test skipping data checks by name
+    path_to_scenario = get_path_to_color_definitions_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = DataProvider(path_to_scenario)
+    params = dataprovider.get_model_params()
+    params[ParameterName.SkipChecks] = ["color_definitions"]
+
+    datachecker = DataChecker(dataprovider)
+    scenarios = datachecker.build_scenarios()
+    assert "color_definitions" not in datachecker.get_check_timings()
+    assert "root_processes" in datachecker.get_check_timings()
+
+    # Unknown check name
+    params[ParameterName.SkipChecks] = ["invalid_check_name"]
+    with pytest.raises(Exception) as ex_info:
+        datachecker = DataChecker(dataprovider)
+        scenarios = datachecker.build_scenarios()
+
+
+@pytest.mark.parametrize("num_workers", [1, 4])
+def test_data_checks_exception(monkeypatch, num_workers):
+    # Test that exception from data check is reported as error and errors from other checks are not lost
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = DataProvider(path_to_scenario)
+    params = dataprovider.get_model_params()
+    params[ParameterName.NumCheckWorkers] = num_workers
+    dataprovider.get_color_definitions()[0].value = "Invalid color"
+
+    def failing_check(checker, data):
+        raise Exception("Check failed unexpectedly")
+
+    monkeypatch.setattr(DataChecker, "_data_checks", list(DataChecker._data_checks))
+    DataChecker.register_data_check(DataCheck("failing_check", DataCheckStage.Model,
+                                              "Running failing check...", failing_check))
+
+    with pytest.raises(Exception) as ex_info:
+        datachecker = DataChecker(dataprovider)
+        scenarios = datachecker.build_scenarios()
+
+    errors = ex_info.value.args[0]
+    assert "Data check 'failing_check' failed: Check failed unexpectedly" in errors
+    assert any(["Invalid color" in error for error in errors])
+
+
+def test_data_checks_skip_keeps_defaults():
+    # Test that skipping data check does not change the built data
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = DataProvider(path_to_scenario)
+    params = dataprovider.get_model_params()
+    params[ParameterName.SkipChecks] = ["process_stock_parameters"]
+    process = dataprovider.get_processes()[0]
+    process.stock_lifetime = 0
+    process.stock_distribution_type = "Invalid distribution type"
+
+    datachecker = DataChecker(dataprovider)
+    scenarios = datachecker.build_scenarios()
+    assert process.stock_distribution_type == StockDistributionType.Fixed
+
+
+@pytest.mark.parametrize("num_workers", [1, 4])
+def test_data_checks_messages_in_order(monkeypatch, capsys, num_workers):
+    # Test that messages from data checks are printed in the order of registered checks
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = DataProvider(path_to_scenario)
+    params = dataprovider.get_model_params()
+    params[ParameterName.NumCheckWorkers] = num_workers
+
+    def slow_check(checker, data):
+        time.sleep(0.2)
+        checker._print_check_message("Slow check message")
+        return True, []
+
+    def fast_check(checker, data):
+        checker._print_check_message("Fast check message")
+        return True, []
+
+    monkeypatch.setattr(DataChecker, "_data_checks", [
+        DataCheck("slow_check", DataCheckStage.Model, "Running slow check...", slow_check),
+        DataCheck("fast_check", DataCheckStage.Model, "Running fast check...", fast_check),
+    ])
+
+    datachecker = DataChecker(dataprovider)
+    scenarios = datachecker.build_scenarios()
+    lines = [line for line in capsys.readouterr().out.splitlines() if "check" in line]
+    assert lines == ["Running slow check...", "Slow check message", "Running fast check...", "Fast check message"]
+
+
+def test_data_checks_workers():
+    # Test running data checks in worker threads
+    path_to_scenario = get_path_to_reference_scenario()
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = DataProvider(path_to_scenario)
+    params = dataprovider.get_model_params()
+    params[ParameterName.NumCheckWorkers] = 4
+
+    datachecker = DataChecker(dataprovider)
+    scenarios = datachecker.build_scenarios()
+
+    check_names = set(datachecker.get_check_timings().keys())
+    assert check_names
+    assert check_names.issubset(set(DataChecker.get_data_check_names()))
@@ -6,6 +6,7 @@ import pandas as pd
 from aiphoria.core.datastructures import (
     ObjectBase,
     Indicator,
+    IndicatorSchema,
     StockLifetimeOverride,
     Process,
     Flow,
@@ -16,6 +17,7 @@ from aiphoria.core.datastructures import (
     Scenario,
     Color,
     ProcessEntry,
+    YearTable,
 )
 
 
@@ -205,6 +207,40 @@ def test_process_creation():
     assert process_str == "Process 'P0:loc': Lifetime: 10"
 
 
+def test_process_create_copy():
+    """
+    Test copying Process-object
+    """
+    p = Process(make_process_data())
+    p_copy = p.create_copy()
+    assert p_copy is not p
+    assert p_copy.id == p.id
+    assert p_copy.stock_lifetime == p.stock_lifetime
+
+    # Expected: Changing copy does not change the original Process
+    p_copy.position_x = 123
+    p_copy.meta["key"] = "value"
+    assert p.position_x != 123
+    assert "key" not in p.meta
+
+    # Expected: Process without data can be copied
+    assert Process().create_copy().id is None
+
+
+def test_process_creation_from_list():
+    """
+    Test creating Process-object from list of row values
+    """
+    data = make_process_data()
+    p_series = Process(data)
+    p_list = Process(data.tolist())
+    slot_names = [name for cls in Process.__mro__ for name in getattr(cls, "__slots__", ())]
+    assert [getattr(p_list, name) for name in slot_names] == [getattr(p_series, name) for name in slot_names]
+
+    # Expected: Row with only missing values leaves Process to default state
+    assert Process([None] * len(data)).id is None
+
+
 def test_process_is_valid():
     """
     Test Process-object valid state checking
@@ -298,6 +334,50 @@ def test_flow_creation():
     assert f.year == 2020
 
 
+def test_flow_creation_from_list():
+    """
+    Test creating Flow-object from list of row values and column names
+    """
+    data = make_flow_data()
+    f_series = Flow(data)
+    f_list = Flow(data.tolist(), column_names=list(data.index))
+    assert f_list.id == f_series.id
+    assert f_list.value == f_series.value
+    assert f_list.year == f_series.year
+    assert f_list.get_indicator_names() == f_series.get_indicator_names() == ["CO2"]
+    assert f_list.get_indicator_units() == f_series.get_indicator_units() == ["kg"]
+    assert f_list.get_indicator_conversion_factor("CO2") == 0.5
+
+
+def test_flow_indicator_schema():
+    """
+    Test Flow-objects sharing IndicatorSchema
+    """
+    data = make_flow_data()
+    schema = IndicatorSchema.from_column_names(list(data.index))
+    assert schema.names == ("CO2",)
+    assert schema.units == ("kg",)
+
+    f_a = Flow(data.tolist(), column_names=list(data.index), indicator_schema=schema)
+    f_b = Flow(data.tolist(), column_names=list(data.index), indicator_schema=schema)
+    assert f_a.indicator_schema is f_b.indicator_schema
+    assert f_a.indicator_conversion_factors.tolist() == [0.5]
+    assert f_a.indicator_name_to_indicator["CO2"].unit == "kg"
+
+    # Changing conversion factor does not change copies of the Flow
+    f_copy = f_a.create_copy()
+    f_copy.set_indicator_conversion_factor("CO2", 2.0)
+    assert f_copy.get_indicator_conversion_factor("CO2") == 2.0
+    assert f_a.get_indicator_conversion_factor("CO2") == 0.5
+
+    # Missing conversion factor defaults to 0.0 and invalid values are kept for DataChecker
+    values = data.tolist()
+    values[13] = None
+    assert Flow(values, column_names=list(data.index)).get_indicator_conversion_factor("CO2") == 0.0
+    values[13] = "invalid"
+    assert Flow(values, column_names=list(data.index)).indicator_conversion_factors.dtype == object
+
+
 def test_flow_id_generation():
     """
     Test Flow-object ID generation
@@ -306,6 +386,31 @@ def test_flow_id_generation():
     assert f.id == "A_id B_id"
 
 
+def test_flow_id_cache():
+    """
+    Test Flow-object ID is updated when source or target Process ID changes
+    """
+    f = Flow(make_flow_data())
+    assert f.id == "A_id B_id"
+    assert f.id is Flow(make_flow_data()).id
+
+    f.source_process_id = "C_id"
+    assert f.id == "C_id B_id"
+    f.target_process_id = "D_id"
+    assert f.id == "C_id D_id"
+
+
+def test_objects_use_slots():
+    """
+    Test that Process, Flow, Stock and FlowModifier do not have per-instance dictionary
+    """
+    p = Process(make_process_data())
+    for obj in [p, Flow(make_flow_data()), Stock(p), FlowModifier()]:
+        assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            obj.undefined_attribute = 1
+
+
 def test_flow_is_valid():
     """
     Test checking validity of Flow-object
@@ -549,4 +654,38 @@ def test_process_entry_remove():
     assert len(pe.inflows) == 0
 
     with pytest.raises(Exception):
-        pe.remove_inflow("nonexistent")
\ No newline at end of file
+        pe.remove_inflow("nonexistent")
+
+
+# *************
+# * YearTable *
+# *************
+def test_year_table():
+    """
+    Test YearTable set, get, remove and copy
+    """
+    flow_a = Flow(make_flow_data())
+    flow_b = flow_a.create_copy()
+    flow_b.year = 2021
+    flow_b.value = 5.0
+
+    table = YearTable([2020, 2021, 2022], [flow_a.id, "Other"])
+    table.set(2020, flow_a.id, flow_a)
+    table.set(2021, flow_a.id, flow_b)
+
+    assert table.get(2020, flow_a.id) is flow_a
+    assert table.get(2022, flow_a.id) is None
+    assert table.has_data.tolist() == [[True, False], [True, False], [False, False]]
+    assert table.get_year_items(2021) == [(flow_a.id, flow_b)]
+    assert table.get_id_items(flow_a.id) == [(2020, flow_a), (2021, flow_b)]
+    assert table.items() == [(2020, flow_a.id, flow_a), (2021, flow_a.id, flow_b)]
+
+    values = table.get_values("value")
+    assert values[1, 0] == 5.0
+    assert pd.isna(values[2, 0])
+
+    # Copy does not change the original
+    table_copy = table.copy()
+    table_copy.remove(2020, flow_a.id)
+    assert table_copy.get(2020, flow_a.id) is None
+    assert table.get(2020, flow_a.id) is flow_a
@@ -5,7 +5,7 @@ import pytest
 
 from aiphoria import ParameterName
 from aiphoria.example import run_example
-import matplotlib
+import matplotlib.pyplot
 
 output_dir_name = "output_test_example"
 
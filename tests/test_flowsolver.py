@@ -1,14 +1,20 @@
 import os
 import warnings
 
+import numpy as np
 import pytest
+import scipy.stats
 
 from aiphoria.core import FlowSolver
+from aiphoria.core.datastructures import Flow
+from aiphoria.core.flowgraph import FlowGraph, FlowGraphTopology
 from aiphoria.core.datachecker import DataChecker
 from aiphoria.core.dataprovider import DataProvider
 from aiphoria.core.flowmodifiersolver import FlowModifierSolver, FlowErrorType
 from aiphoria.core.parameters import ParameterScenarioType, ParameterName
 from aiphoria.core.utils import build_mfa_system_for_scenario, show_model_parameters, calculate_scenario_mass_balance
+from aiphoria.lib.odym.modules.dynamic_stock_model import BatchedDynamicStockModel, DynamicStockModel, \
+    PackedBatchedDynamicStockModel, SurvivalFunctionCache
 
 
 def get_path_to_flowsolver_scenario() -> str:
@@ -94,3 +100,293 @@ def test_flowsolver_virtual_flows():
     for scenario in scenarios:
         scenario.mfa_system = build_mfa_system_for_scenario(scenario)
 
+
+
+def solve_scenarios(path_to_scenario: str, use_array_solver: bool) -> list:
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = DataProvider(path_to_scenario)
+    datachecker = DataChecker(dataprovider)
+    datachecker.check_for_errors()
+
+    scenarios = datachecker.build_scenarios()
+    for scenario_index, scenario in enumerate(scenarios):
+        scenario.model_params[ParameterName.UseArraySolver] = use_array_solver
+        if scenario_index == 0:
+            flow_solver = FlowSolver(scenario=scenario)
+        else:
+            baseline_scenario_data = scenarios[0].flow_solver.get_solved_scenario_data()
+            scenario.copy_from_baseline_scenario_data(baseline_scenario_data)
+            flow_solver = FlowSolver(scenario=scenario, reset_evaluated_values=False)
+
+        flow_solver.solve_timesteps()
+        scenario.flow_solver = flow_solver
+
+    return scenarios
+
+
+@pytest.mark.parametrize("path_to_scenario", [
+    get_path_to_flowsolver_scenario(),
+    get_path_to_flowsolver_virtual_flows_scenario(),
+])
+def test_flowsolver_array_solver(path_to_scenario):
+    # Array solver must produce the same results as the default solver
+    expected_scenarios = solve_scenarios(path_to_scenario, use_array_solver=False)
+    got_scenarios = solve_scenarios(path_to_scenario, use_array_solver=True)
+    for expected_scenario, got_scenario in zip(expected_scenarios, got_scenarios):
+        expected_flow_solver = expected_scenario.flow_solver
+        got_flow_solver = got_scenario.flow_solver
+        for year, flow_id_to_flow in expected_flow_solver._get_year_to_flow_id_to_flow().items():
+            assert flow_id_to_flow.keys() == got_flow_solver._get_year_to_flow_id_to_flow()[year].keys()
+            for flow_id, expected_flow in flow_id_to_flow.items():
+                got_flow = got_flow_solver.get_flow(flow_id, year)
+                assert got_flow.is_evaluated == expected_flow.is_evaluated
+                assert got_flow.get_all_evaluated_values() == pytest.approx(expected_flow.get_all_evaluated_values())
+
+        for stock_id, expected_dsm in expected_flow_solver.get_baseline_dynamic_stocks().items():
+            got_dsm = got_flow_solver.get_baseline_dynamic_stocks()[stock_id]
+            assert got_dsm.s == pytest.approx(expected_dsm.s)
+            assert got_dsm.o == pytest.approx(expected_dsm.o)
+
+
+def create_flow_graph_topology(flow_entries: list) -> FlowGraphTopology:
+    # Flow entries: list of (source Process ID, target Process ID, unit)
+    process_id_to_flow_ids = {}
+    flow_id_to_flow = {}
+    for source_process_id, target_process_id, unit in flow_entries:
+        for process_id in [source_process_id, target_process_id]:
+            if process_id not in process_id_to_flow_ids:
+                process_id_to_flow_ids[process_id] = {"in": [], "out": []}
+
+        flow = Flow()
+        flow.source_process_id = source_process_id
+        flow.target_process_id = target_process_id
+        flow.value = 100.0
+        flow.unit = unit
+        flow_id_to_flow[flow.id] = flow
+        process_id_to_flow_ids[source_process_id]["out"].append(flow.id)
+        process_id_to_flow_ids[target_process_id]["in"].append(flow.id)
+
+    return FlowGraphTopology(process_id_to_flow_ids, flow_id_to_flow)
+
+
+def test_flow_graph_evaluation_order():
+    topology = create_flow_graph_topology([("A", "B", "Mm3"), ("B", "C", "%"), ("C", "D", "%"), ("B", "D", "%")])
+    process_order, unsolvable_process_indices = topology.get_evaluation_order(np.zeros(4, dtype=bool))
+    assert [topology.process_ids[index] for index in process_order] == ["A", "B", "C", "D"]
+    assert len(unsolvable_process_indices) == 0
+
+
+def test_flow_graph_evaluation_order_relative_loop():
+    # Loop B -> C -> B contains only relative flows and can not be evaluated
+    topology = create_flow_graph_topology([("A", "B", "Mm3"), ("B", "C", "%"), ("C", "B", "%"), ("C", "D", "%")])
+    process_order, unsolvable_process_indices = topology.get_evaluation_order(np.zeros(4, dtype=bool))
+    assert [topology.process_ids[index] for index in process_order] == ["A"]
+    assert sorted([topology.process_ids[index] for index in unsolvable_process_indices]) == ["B", "C", "D"]
+
+    # Loop is broken by stock in B because relative stock outflows are evaluated from the stock outflow
+    is_stock_process = np.array([process_id == "B" for process_id in topology.process_ids])
+    process_order, unsolvable_process_indices = topology.get_evaluation_order(is_stock_process)
+    assert [topology.process_ids[index] for index in process_order] == ["A", "C", "B", "D"]
+    assert len(unsolvable_process_indices) == 0
+
+
+@pytest.mark.parametrize("use_array_solver", [False, True])
+def test_flowsolver_unevaluated_process(monkeypatch, use_array_solver):
+    # Process that can not be evaluated in the evaluation order must not be skipped silently
+    def get_reversed_evaluation_order(topology, is_stock_process):
+        return np.arange(len(topology.process_ids))[::-1], np.array([], dtype=int)
+
+    monkeypatch.setattr(FlowGraphTopology, "get_evaluation_order", get_reversed_evaluation_order)
+    monkeypatch.setattr(FlowGraph, "get_evaluation_order", get_reversed_evaluation_order)
+    with pytest.raises(Exception) as ex_info:
+        path_to_scenario = os.path.join(os.path.dirname(get_path_to_flowsolver_scenario()), "example_scenario.xlsx")
+        solve_scenarios(path_to_scenario, use_array_solver=use_array_solver)
+
+    assert "could not be evaluated" in str(ex_info.value)
+
+
+def test_flowsolver_topology_cache():
+    # All years in the scenario have the same structure and share the same topology
+    scenarios = solve_scenarios(get_path_to_flowsolver_scenario(), use_array_solver=False)
+    flow_solver = scenarios[0].flow_solver
+    assert len(flow_solver.get_year_range()) > 1
+    assert len(flow_solver._structure_key_to_topology) == 1
+
+
+@pytest.mark.parametrize("lifetime_type", ["Fixed", "Normal", "Weibull"])
+def test_dynamic_stock_incremental_inflow(lifetime_type):
+    # Updating inflow cohort by cohort must give the same result as recomputing the full cohort tables
+    years = np.arange(2000, 2030)
+    inflows = np.linspace(1.0, 5.0, len(years))
+    lt = {"Type": lifetime_type, "Mean": [7.0], "StdDev": [2.0], "Shape": [2.0], "Scale": [8.0]}
+
+    incremental_dsm = DynamicStockModel(t=years, i=np.zeros(len(years)), s=np.zeros(len(years)), lt=dict(lt))
+    incremental_dsm.compute_s_c_inflow_driven()
+    incremental_dsm.compute_o_c_from_s_c()
+    incremental_dsm.compute_stock_total()
+    incremental_dsm.compute_outflow_total()
+    for year_index, inflow in enumerate(inflows):
+        incremental_dsm.update_inflow_cohort(year_index, inflow)
+    incremental_dsm.update_inflow_cohort(3, 2 * inflows[3])
+
+    full_inflows = inflows.copy()
+    full_inflows[3] *= 2
+    full_dsm = DynamicStockModel(t=years, i=full_inflows, lt=dict(lt))
+    full_dsm.compute_s_c_inflow_driven()
+    full_dsm.compute_o_c_from_s_c()
+    full_dsm.compute_stock_total()
+    full_dsm.compute_outflow_total()
+
+    assert np.allclose(incremental_dsm.s_c, full_dsm.s_c)
+    assert np.allclose(incremental_dsm.o_c, full_dsm.o_c)
+    assert np.allclose(incremental_dsm.s, full_dsm.s)
+    assert np.allclose(incremental_dsm.o, full_dsm.o)
+
+
+def test_dynamic_stock_survival_function():
+    # Identical and per-cohort lifetime parameters must both give sf(m, n) = ProbDist.sf(m - n)
+    years = np.arange(2000, 2040)
+    means = np.linspace(5.0, 15.0, len(years))
+    for lt_means in [[10.0], list(means)]:
+        dsm = DynamicStockModel(t=years, lt={"Type": "Normal", "Mean": lt_means, "StdDev": [3.0]})
+        sf = dsm.compute_sf()
+        for cohort_index in range(len(years)):
+            expected = scipy.stats.norm.sf(np.arange(0, len(years) - cohort_index),
+                                           loc=dsm.lt["Mean"][cohort_index], scale=3.0)
+            assert np.allclose(sf[cohort_index:, cohort_index], expected)
+            assert not sf[:cohort_index, cohort_index].any()
+
+
+def test_dynamic_stock_survival_function_cache(monkeypatch):
+    # Identical lifetime models share one read-only survival table, least recently used tables are evicted
+    monkeypatch.setattr(DynamicStockModel, "sf_cache", SurvivalFunctionCache(maxsize=2))
+    years = np.arange(2000, 2030)
+
+    def create_dsm(mean: float) -> DynamicStockModel:
+        return DynamicStockModel(t=years, lt={"Type": "Normal", "Mean": [mean], "StdDev": [2.0]})
+
+    sf = create_dsm(10.0).compute_sf()
+    assert create_dsm(10.0).compute_sf() is sf
+    assert not sf.flags.writeable
+    assert create_dsm(20.0).compute_sf() is not sf
+
+    create_dsm(30.0).compute_sf()
+    assert len(DynamicStockModel.sf_cache) == 2
+    assert create_dsm(10.0).compute_sf() is not sf
+    assert np.array_equal(create_dsm(10.0).compute_sf(), sf)
+
+
+def test_batched_dynamic_stock():
+    # Batched DSM elements must match separate DynamicStockModels with the same lifetime model
+    years = np.arange(2000, 2030)
+    lt = {"Type": "Weibull", "Mean": [0.0], "StdDev": [0.0], "Shape": [2.0], "Scale": [8.0]}
+    batched_dsm = BatchedDynamicStockModel(t=years, lt=dict(lt), elements=["Baseline", "Carbon", "CO2"])
+    batched_dsm.compute()
+    for year_index in range(len(years)):
+        batched_dsm.update_inflow_cohort(year_index, np.array([1.0, 0.5, 1.8]) * (year_index + 1))
+    batched_dsm[1].update_inflow_cohort(5, 0.0)
+
+    for element_index, scale in enumerate([1.0, 0.5, 1.8]):
+        inflows = scale * np.arange(1, len(years) + 1)
+        if element_index == 1:
+            inflows[5] = 0.0
+
+        dsm = DynamicStockModel(t=years, i=inflows, lt=dict(lt))
+        dsm.compute_s_c_inflow_driven()
+        dsm.compute_o_c_from_s_c()
+        element = batched_dsm[element_index]
+        assert np.allclose(element.i, dsm.i)
+        assert np.allclose(element.compute_s_c_inflow_driven(), dsm.s_c)
+        assert np.allclose(element.compute_o_c_from_s_c(), dsm.o_c)
+        assert np.allclose(element.compute_stock_total(), dsm.compute_stock_total())
+        assert np.allclose(element.compute_outflow_total(), dsm.compute_outflow_total())
+        assert np.allclose(element.compute_stock_change(), dsm.compute_stock_change())
+
+
+@pytest.mark.parametrize("sf_cutoff", [0.0, 1e-9])
+def test_packed_batched_dynamic_stock(sf_cutoff):
+    # Packed cohort storage must match dense storage, cut off cohorts must still keep the mass balance
+    years = np.arange(2000, 2100)
+    lt = {"Type": "Normal", "Mean": [8.0], "StdDev": [2.0]}
+    dense_dsm = BatchedDynamicStockModel(t=years, lt=dict(lt), elements=["Baseline", "Carbon"])
+    packed_dsm = PackedBatchedDynamicStockModel(t=years, lt=dict(lt), elements=["Baseline", "Carbon"],
+                                                sf_cutoff=sf_cutoff)
+    dense_dsm.compute()
+    packed_dsm.compute()
+    for year_index in range(len(years)):
+        inflows = np.array([1.0, 0.5]) * (1.0 + np.sin(year_index))
+        dense_dsm.update_inflow_cohort(year_index, inflows)
+        packed_dsm.update_inflow_cohort(year_index, inflows)
+
+    assert packed_dsm.s_c_packed.size < dense_dsm.s_c.size / 2
+    for element_index in range(len(dense_dsm)):
+        assert np.allclose(packed_dsm[element_index].s_c, dense_dsm[element_index].s_c)
+        assert np.allclose(packed_dsm[element_index].o_c, dense_dsm[element_index].o_c)
+        assert np.allclose(packed_dsm[element_index].s, dense_dsm[element_index].s)
+        assert np.allclose(packed_dsm[element_index].o, dense_dsm[element_index].o)
+        assert np.allclose(packed_dsm[element_index].check_stock_balance(), 0.0)
+
+
+def test_scenario_data_copy():
+    # Copied ScenarioData shares Processes but Flows and mappings can be modified independently
+    scenarios = solve_scenarios(get_path_to_flowsolver_scenario(), use_array_solver=False)
+    scenario_data = scenarios[0].flow_solver.get_solved_scenario_data()
+    scenario_data_copy = scenario_data.create_copy()
+
+    year = scenario_data.years[0]
+    flow_id, flow = next(iter(scenario_data.year_to_flow_id_to_flow[year].items()))
+    flow_copy = scenario_data_copy.year_to_flow_id_to_flow[year][flow_id]
+    assert flow_copy is not flow
+    assert flow_copy.evaluated_value == flow.evaluated_value
+    assert flow_copy.get_all_evaluated_values() == flow.get_all_evaluated_values()
+
+    flow_copy.evaluated_value = flow.evaluated_value + 1.0
+    for indicator_name in flow_copy.indicator_name_to_evaluated_value:
+        flow_copy.set_evaluated_value_for_indicator(indicator_name, -1.0)
+    assert flow_copy.evaluated_value != flow.evaluated_value
+    assert all(value != -1.0 for value in flow.indicator_name_to_evaluated_value.values())
+
+    process_id = next(iter(scenario_data.year_to_process_id_to_process[year]))
+    assert scenario_data_copy.year_to_process_id_to_process[year][process_id] is \
+           scenario_data.year_to_process_id_to_process[year][process_id]
+    scenario_data_copy.year_to_process_id_to_flow_ids[year][process_id]["in"].append("New flow")
+    assert "New flow" not in scenario_data.year_to_process_id_to_flow_ids[year][process_id]["in"]
+
+
+@pytest.mark.parametrize("path_to_scenario", [
+    get_path_to_flowsolver_scenario(),
+    get_path_to_flowsolver_virtual_flows_scenario(),
+])
+def test_flowsolver_dataframes(path_to_scenario):
+    # DataFrames must contain the same values as the per Process / Flow getters
+    scenarios = solve_scenarios(path_to_scenario, use_array_solver=False)
+    flow_solver = scenarios[0].flow_solver
+    indicator_names = list(flow_solver.get_indicator_name_to_indicator().keys())
+
+    df_processes = flow_solver.get_processes_as_dataframe()
+    assert len(df_processes) == sum([len(p) for p in flow_solver._get_year_to_process_id_to_process().values()])
+    for row in df_processes.itertuples(index=False):
+        year, process_id = row[0], row[1]
+        expected = [flow_solver.get_process_inflows_total(process_id, year),
+                    flow_solver.get_process_outflows_total(process_id, year)]
+        for indicator_name in indicator_names:
+            expected += [flow_solver._get_process_indicator_inflows_total(process_id, indicator_name, year),
+                         flow_solver._get_process_indicator_outflows_total(process_id, indicator_name, year)]
+        assert list(row[2:]) == pytest.approx(expected)
+
+    df_flows = flow_solver.get_flows_as_dataframe()
+    for row in df_flows.itertuples(index=False):
+        flow = flow_solver.get_flow(row[1], row[0])
+        assert isinstance(flow, Flow)
+        assert list(row[2:5]) == [flow.source_process_id, flow.target_process_id, flow.evaluated_share]
+        assert list(row[5:]) == flow.get_all_evaluated_values()
+
+    df_flow_values = flow_solver.get_evaluated_flow_values_as_dataframe()
+    assert list(df_flow_values["Year"]) == list(flow_solver._get_year_to_flow_id_to_flow().keys())
+    for row in df_flow_values.itertuples(index=False):
+        year = row[0]
+        for flow_id, value in zip(df_flow_values.columns[1:], row[1:]):
+            expected = 0.0
+            if flow_solver.has_flow(flow_id, year) and isinstance(flow_solver.get_flow(flow_id, year), Flow):
+                expected = flow_solver.get_flow(flow_id, year).evaluated_value
+            assert value == expected
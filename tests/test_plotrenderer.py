@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+
+from aiphoria.core.parameters import ParameterPlotFormat
+from aiphoria.core.plotrenderer import PlotRenderer, get_plot_filename
+
+years = list(range(2000, 2020))
+stock_ids = ["Construction:FI", "Furniture:FI"]
+element_names = ["Solid wood equivalent", "Carbon"]
+element_units = ["Mm3", "Mt"]
+
+
+def request_plots(plot_renderer: PlotRenderer, path_to_dir: str) -> None:
+    rng = np.random.default_rng(0)
+    shape = (len(stock_ids), len(element_names), len(years))
+    plot_renderer.render_stock_plots(path_to_dir, "Baseline", years, stock_ids, element_names, element_units,
+                                     rng.random(shape), rng.random(shape), rng.random(shape))
+    plot_renderer.render_co2_removal_plot(path_to_dir, "Baseline", years, stock_ids,
+                                          rng.random((len(stock_ids), len(years))),
+                                          {stock_ids[0]: years[5:10]})
+    plot_renderer.render_inflows_plot(path_to_dir, "Baseline", "Sawmilling:FI", years,
+                                      ["Forest:FI", "Import:FI"], rng.random((2, len(years))), "Sawmilling")
+
+
+@pytest.mark.parametrize("plot_format", [ParameterPlotFormat.SVG, ParameterPlotFormat.PNG])
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_plot_renderer(tmp_path, plot_format, num_workers):
+    with PlotRenderer(plot_format, num_workers) as plot_renderer:
+        request_plots(plot_renderer, str(tmp_path))
+        filenames = plot_renderer.close()
+
+    expected_filenames = [os.path.join(str(tmp_path), get_plot_filename(name, plot_format)) for name in [
+        "Baseline_stock_plots_by_product",
+        "Baseline_annual_co2_removal_by_product",
+        "Baseline_inflows_to_Sawmilling_FI",
+    ]]
+    assert filenames == expected_filenames
+
+    # Check image signature
+    for filename in filenames:
+        with open(filename, "rb") as fs:
+            header = fs.read(8)
+        if plot_format == ParameterPlotFormat.PNG:
+            assert header == b"\x89PNG\r\n\x1a\n"
+        else:
+            assert header.startswith(b"<?xml")
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_plot_renderer_errors(tmp_path, num_workers):
+    # Failed plots are reported when closing PlotRenderer, other plots are still rendered
+    plot_renderer = PlotRenderer(ParameterPlotFormat.PNG, num_workers)
+    plot_renderer.render_inflows_plot(str(tmp_path), "Baseline", "Sawmilling:FI", years,
+                                      ["Forest:FI"], np.zeros((1, len(years) - 1)), "Sawmilling")
+    plot_renderer.render_inflows_plot(str(tmp_path), "Baseline", "Pulping:FI", years,
+                                      ["Forest:FI"], np.zeros((1, len(years))), "Pulping")
+    with pytest.raises(Exception) as ex:
+        plot_renderer.close()
+
+    errors = ex.value.args[0]
+    assert len(errors) == 1
+    assert "Baseline_inflows_to_Sawmilling_FI.png" in errors[0]
+    assert os.path.isfile(os.path.join(str(tmp_path), "Baseline_inflows_to_Pulping_FI.png"))
+
+    with pytest.raises(ValueError):
+        PlotRenderer("PDF")
@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aiphoria.core.parameters import ParameterDynamicStockCohortsFormat, ParameterScenarioDataExportFormat
+from aiphoria.core.resultexport import DynamicStocksWriter, write_scenario_data_tables
+
+years = list(range(2000, 2010))
+
+
+def make_cohort_matrices(seed: int):
+    rng = np.random.default_rng(seed)
+    stock_by_cohort = np.tril(rng.random((len(years), len(years))))
+    outflow_by_cohort = np.tril(rng.random((len(years), len(years))))
+    return stock_by_cohort, outflow_by_cohort
+
+
+def write_dynamic_stocks(writer: DynamicStocksWriter):
+    stock_ids = ["Construction:FI", "Furniture:FI"]
+    for stock_index, stock_id in enumerate(stock_ids):
+        for element_index, element_name in enumerate(["Solid wood equivalent", "Carbon"]):
+            stock_by_cohort, outflow_by_cohort = make_cohort_matrices(stock_index * 2 + element_index)
+            writer.write_cohorts(stock_id, element_name,
+                                 "{}_s_by_c_{}".format(stock_index, element_name),
+                                 "{}_o_by_c_{}".format(stock_index, element_name),
+                                 stock_by_cohort,
+                                 outflow_by_cohort)
+            writer.write_totals("Baseline", stock_id, element_name,
+                                stock_by_cohort.sum(axis=1),
+                                np.diff(stock_by_cohort.sum(axis=1), prepend=0.0),
+                                outflow_by_cohort.sum(axis=1))
+
+
+def test_dynamic_stocks_writer_streaming(tmp_path):
+    # Streamed Excel file must have the same contents as the file written from DataFrames
+    # NOTE: NaN is written as empty cell and infinity as text in both cases
+    filenames = []
+    for streaming in [False, True]:
+        filename = os.path.join(tmp_path, "dynamic_stocks_{}.xlsx".format(streaming))
+        with DynamicStocksWriter(filename, years, streaming=streaming) as writer:
+            write_dynamic_stocks(writer)
+            stock_by_cohort, outflow_by_cohort = make_cohort_matrices(4)
+            stock_by_cohort[1, 0] = np.nan
+            outflow_by_cohort[2, 1] = np.inf
+            writer.write_cohorts("Other:FI", "Carbon", "Other_s_by_c", "Other_o_by_c",
+                                 stock_by_cohort, outflow_by_cohort)
+        filenames.append(filename)
+
+    sheet_name_to_df = pd.read_excel(filenames[0], sheet_name=None)
+    sheet_name_to_df_streamed = pd.read_excel(filenames[1], sheet_name=None)
+    assert list(sheet_name_to_df.keys()) == list(sheet_name_to_df_streamed.keys())
+    assert list(sheet_name_to_df.keys())[-3:] == ["Total_stock", "Total_stock_change", "Total_stock_outflow"]
+    for sheet_name, df in sheet_name_to_df.items():
+        pd.testing.assert_frame_equal(df, sheet_name_to_df_streamed[sheet_name])
+
+    df_total_stock = sheet_name_to_df["Total_stock"]
+    assert list(df_total_stock.columns) == ["Year", "Stock total", "Scenario", "Stock ID", "Indicator"]
+    assert len(df_total_stock) == 4 * len(years)
+
+
+def test_dynamic_stocks_writer_duplicate_sheet_name(tmp_path):
+    filename = os.path.join(tmp_path, "dynamic_stocks.xlsx")
+    stock_by_cohort, outflow_by_cohort = make_cohort_matrices(0)
+    with pytest.raises(Exception):
+        with DynamicStocksWriter(filename, years, streaming=True) as writer:
+            writer.write_cohorts("A", "Carbon", "Sheet", "Sheet", stock_by_cohort, outflow_by_cohort)
+
+
+def test_dynamic_stocks_writer_npz(tmp_path):
+    filename = os.path.join(tmp_path, "dynamic_stocks.xlsx")
+    filename_cohorts = os.path.join(tmp_path, "dynamic_stocks_cohorts.npz")
+    with DynamicStocksWriter(filename, years, streaming=True,
+                             cohorts_format=ParameterDynamicStockCohortsFormat.NPZ,
+                             path_to_cohorts_file=filename_cohorts) as writer:
+        write_dynamic_stocks(writer)
+
+    # Cohort matrices are not written to Excel file
+    assert list(pd.read_excel(filename, sheet_name=None).keys()) == [
+        "Total_stock", "Total_stock_change", "Total_stock_outflow"]
+
+    with np.load(filename_cohorts) as cohorts:
+        assert cohorts["years"].tolist() == years
+        stock_by_cohort, outflow_by_cohort = make_cohort_matrices(3)
+        assert np.array_equal(cohorts["Furniture:FI/Carbon/stock_by_cohort"], stock_by_cohort)
+        assert np.array_equal(cohorts["Furniture:FI/Carbon/outflow_by_cohort"], outflow_by_cohort)
+
+
+def test_dynamic_stocks_writer_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    filename = os.path.join(tmp_path, "dynamic_stocks.xlsx")
+    filename_cohorts = os.path.join(tmp_path, "dynamic_stocks_cohorts.parquet")
+    with DynamicStocksWriter(filename, years,
+                             cohorts_format=ParameterDynamicStockCohortsFormat.Parquet,
+                             path_to_cohorts_file=filename_cohorts) as writer:
+        write_dynamic_stocks(writer)
+
+    df = pd.read_parquet(filename_cohorts)
+    assert len(df) == 4 * len(years) * len(years)
+    df = df[(df["Stock ID"] == "Construction:FI") & (df["Indicator"] == "Carbon")]
+    stock_by_cohort, outflow_by_cohort = make_cohort_matrices(1)
+    assert df["Year"].tolist() == np.repeat(years, len(years)).tolist()
+    assert df["Cohort"].tolist() == np.tile(years, len(years)).tolist()
+    assert np.array_equal(df["Stock by cohort"].to_numpy().reshape(len(years), len(years)), stock_by_cohort)
+    assert np.array_equal(df["Outflow by cohort"].to_numpy().reshape(len(years), len(years)), outflow_by_cohort)
+
+
+@pytest.mark.parametrize("export_format", [ParameterScenarioDataExportFormat.Parquet,
+                                           ParameterScenarioDataExportFormat.Arrow])
+def test_write_scenario_data_tables(tmp_path, export_format):
+    pytest.importorskip("pyarrow")
+    import pyarrow.dataset as ds
+
+    # Scenarios are written one by one to the same dataset
+    path_to_dir = os.path.join(tmp_path, "combined_scenario_data")
+    scenario_name_to_sheet_name_to_df = {}
+    for scenario_index, scenario_name in enumerate(["Baseline", "Alternative 50%"]):
+        df_processes = pd.DataFrame({
+            "Scenario": scenario_name,
+            "Year": np.repeat(years, 2),
+            "Process ID": ["P0", "P1"] * len(years),
+            "Total inflows": np.arange(2 * len(years), dtype=float) + scenario_index,
+        })
+        df_mass_balance = pd.DataFrame({
+            "Scenario": scenario_name,
+            "Year": years,
+            "Difference": np.zeros(len(years)),
+        })
+        sheet_name_to_df = {"Processes": df_processes, "Mass balance": df_mass_balance}
+        write_scenario_data_tables(sheet_name_to_df, path_to_dir, export_format)
+        scenario_name_to_sheet_name_to_df[scenario_name] = sheet_name_to_df
+
+    # Processes are partitioned by scenario and year, mass balance only by scenario
+    dataset_format = "parquet" if export_format == ParameterScenarioDataExportFormat.Parquet else "ipc"
+    extension = "parquet" if export_format == ParameterScenarioDataExportFormat.Parquet else "arrow"
+    assert os.path.isfile(os.path.join(path_to_dir, "processes", "Scenario=Baseline", "Year=2000",
+                                       "part-0.{}".format(extension)))
+    assert os.path.isfile(os.path.join(path_to_dir, "mass_balance", "Scenario=Baseline",
+                                       "part-0.{}".format(extension)))
+
+    for sheet_name, table_dir_name in [("Processes", "processes"), ("Mass balance", "mass_balance")]:
+        dataset = ds.dataset(os.path.join(path_to_dir, table_dir_name), format=dataset_format, partitioning="hive")
+        df = dataset.to_table().to_pandas()
+        expected_df = pd.concat([sheet_name_to_df[sheet_name]
+                                 for sheet_name_to_df in scenario_name_to_sheet_name_to_df.values()])
+        df = df[list(expected_df.columns)].sort_values(list(expected_df.columns)).reset_index(drop=True)
+        expected_df = expected_df.sort_values(list(expected_df.columns)).reset_index(drop=True)
+        pd.testing.assert_frame_equal(df, expected_df, check_dtype=False)
+
+    with pytest.raises(Exception):
+        write_scenario_data_tables({}, path_to_dir, ParameterScenarioDataExportFormat.Excel)
@@ -0,0 +1,118 @@
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from aiphoria.core.builder import build_dataprovider, build_datachecker, solve_scenarios
+from aiphoria.core.parameters import ParameterName
+from aiphoria.core import resultstore
+from aiphoria.core.resultstore import ScenarioResults, write_results, load_results, write_scenario_results
+
+
+def get_path_to_reference_scenario() -> str:
+    # Check that the last part of the path is "tests" to allow running
+    # the tests outside tests/
+    path_to_tests = os.path.abspath(".")
+    if os.path.split(path_to_tests)[-1] != "tests":
+        path_to_tests = os.path.join(path_to_tests, "tests")
+
+    return os.path.join(path_to_tests, "reference_data", "example_scenario.xlsx")
+
+
+@pytest.mark.parametrize("pack_dynamic_stock_cohorts", [False, True])
+def test_result_store(tmp_path, pack_dynamic_stock_cohorts):
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = build_dataprovider(get_path_to_reference_scenario(), use_cache=False)
+    dataprovider.get_model_params()[ParameterName.PackDynamicStockCohorts] = pack_dynamic_stock_cohorts
+    datachecker = build_datachecker(dataprovider, use_cache=False)
+    scenarios = solve_scenarios(datachecker.build_scenarios(), num_workers=1)
+
+    path_to_results = os.path.join(tmp_path, "results")
+    write_results(scenarios, path_to_results)
+    scenario_name_to_results = load_results(path_to_results)
+    assert sorted(scenario_name_to_results.keys()) == sorted(scenario.name for scenario in scenarios)
+
+    for scenario in scenarios:
+        flow_solver = scenario.flow_solver
+        with scenario_name_to_results[scenario.name] as results:
+            assert results.years == flow_solver.get_year_range()
+            assert results.element_names[1:] == flow_solver.get_indicator_names()
+
+            # Baseline flow values are the same as in the FlowSolver DataFrame
+            df_flow_values = flow_solver.get_evaluated_flow_values_as_dataframe()
+            df_stored_flow_values = results.get_flow_values_as_dataframe()
+            assert list(df_stored_flow_values.columns) == list(df_flow_values.columns)
+            assert np.array_equal(df_stored_flow_values.to_numpy(dtype=float), df_flow_values.to_numpy(dtype=float))
+
+            # Indicator values of single flow
+            flow_id = results.flow_ids[0]
+            for indicator_name in flow_solver.get_indicator_names():
+                expected = [flow_solver.get_flow(flow_id, year).get_evaluated_value_for_indicator(indicator_name)
+                            if flow_solver.has_flow(flow_id, year) else 0.0 for year in results.years]
+                assert np.array_equal(results.get_flow_values(flow_id, indicator_name), expected)
+
+            # Dynamic stocks
+            stock_id_to_baseline_dsm = flow_solver.get_baseline_dynamic_stocks()
+            assert results.stock_ids == list(stock_id_to_baseline_dsm.keys())
+            for stock_id, baseline_dsm in stock_id_to_baseline_dsm.items():
+                assert np.array_equal(results.get_stock_inflows(stock_id), baseline_dsm.i)
+                assert np.array_equal(results.get_stock_total(stock_id), baseline_dsm.s)
+                assert np.array_equal(results.get_stock_outflows(stock_id), baseline_dsm.o)
+                assert np.array_equal(results.get_stock_change(stock_id), baseline_dsm.compute_stock_change())
+                assert np.array_equal(results.get_stock_by_cohort(stock_id), baseline_dsm.s_c)
+                assert np.array_equal(results.get_outflow_by_cohort(stock_id), baseline_dsm.o_c)
+
+                for indicator_name, indicator_dsm in flow_solver.get_indicator_dynamic_stocks()[stock_id].items():
+                    assert np.array_equal(results.get_stock_total(stock_id, indicator_name), indicator_dsm.s)
+                    assert np.array_equal(results.get_stock_by_cohort(stock_id, indicator_name), indicator_dsm.s_c)
+
+            # Inflows to process by source process
+            for process_id in flow_solver.get_unique_processes().keys():
+                source_process_ids, values = results.get_inflows_to_process(process_id)
+                for year_index, year in enumerate(results.years):
+                    expected = {source_process_id: 0.0 for source_process_id in source_process_ids}
+                    if flow_solver.has_process(process_id, year):
+                        for flow in flow_solver.get_process_inflows(process_id, year):
+                            expected[flow.source_process_id] += flow.evaluated_value
+                    assert list(values[:, year_index]) == pytest.approx(list(expected.values()))
+                assert results.get_process_name(process_id) == flow_solver.get_unique_processes()[process_id].name
+
+            with pytest.raises(KeyError):
+                results.get_stock_total("invalid_stock_id")
+
+    with pytest.raises(Exception):
+        ScenarioResults(os.path.join(tmp_path, "invalid_path"))
+
+
+def test_result_store_rewrite(tmp_path, monkeypatch):
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+    dataprovider = build_dataprovider(get_path_to_reference_scenario(), use_cache=False)
+    datachecker = build_datachecker(dataprovider, use_cache=False)
+    scenario = solve_scenarios(datachecker.build_scenarios(), num_workers=1)[0]
+
+    path_to_results = os.path.join(tmp_path, "results")
+    write_scenario_results(scenario, path_to_results)
+    num_stocks = len(ScenarioResults(path_to_results).stock_ids)
+
+    # Cohort file of stock that does not exist anymore (e.g. from run with more stocks)
+    path_to_stale_file = os.path.join(path_to_results, "stock_by_cohort_{}.npy".format(num_stocks))
+    np.save(path_to_stale_file, np.zeros(1))
+
+    # Interrupted rewrite does not leave valid metadata behind
+    def save_interrupted(*args, **kwargs):
+        raise KeyboardInterrupt()
+
+    with monkeypatch.context() as m:
+        m.setattr(resultstore.np, "save", save_interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            write_scenario_results(scenario, path_to_results)
+
+    assert not os.path.exists(path_to_stale_file)
+    with pytest.raises(Exception):
+        ScenarioResults(path_to_results)
+
+    # Completed rewrite
+    write_scenario_results(scenario, path_to_results)
+    assert len(ScenarioResults(path_to_results).stock_ids) == num_stocks
+    assert not [filename for filename in os.listdir(path_to_results) if filename.endswith(".tmp")]
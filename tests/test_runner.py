@@ -1,4 +1,5 @@
 import os
+import shutil
 import warnings
 
 # Running matplotlib in headless mode, otherwise errors are raised
@@ -6,7 +7,8 @@ import matplotlib
 matplotlib.use("Agg")
 
 from aiphoria import ParameterName
-from aiphoria.runner import run_scenarios
+from aiphoria.core.parameters import ParameterPlotMode, ParameterPlotFormat
+from aiphoria.runner import run_scenarios, render_plots
 
 output_dir_name = "output_test_runner"
 
@@ -32,6 +34,130 @@ def test_run_scenarios():
                   parameter_overrides=parameter_overrides,
                   )
 
+def test_run_scenarios_export_workers():
+    # Ignore openpyxl warning about Data validation extension support, we are not using that
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    path_to_tests = os.path.abspath(".")
+    if os.path.split(path_to_tests)[-1] != "tests":
+        path_to_tests = os.path.join(path_to_tests, "tests")
+
+    path_to_settings_file = os.path.join(path_to_tests, "reference_data", "example_scenario.xlsx")
+
+    # Exported files must be the same regardless of the number of export workers
+    path_to_output_dirs = []
+    for num_export_workers in [1, 4]:
+        path_to_output_dir = os.path.join(path_to_tests, "{}_workers_{}".format(output_dir_name, num_export_workers))
+        parameter_overrides = {ParameterName.ShowPlots: False,
+                               ParameterName.CreateSankeyCharts: False,
+                               ParameterName.NumExportWorkers: num_export_workers}
+        run_scenarios(path_to_settings_file,
+                      path_to_output_dir,
+                      remove_existing_output_dir=True,
+                      parameter_overrides=parameter_overrides,
+                      )
+        path_to_output_dirs.append(path_to_output_dir)
+
+    filenames = []
+    for path_to_output_dir in path_to_output_dirs:
+        filenames.append(sorted(os.path.relpath(os.path.join(root, name), path_to_output_dir)
+                                for root, dirs, files in os.walk(path_to_output_dir) for name in files))
+    assert filenames[0] == filenames[1]
+    assert "combined_scenario_data.xlsx" in filenames[0]
+
+    for filename in filenames[0]:
+        if not filename.endswith(".csv"):
+            continue
+
+        with open(os.path.join(path_to_output_dirs[0], filename)) as fs_sequential, \
+                open(os.path.join(path_to_output_dirs[1], filename)) as fs_workers:
+            assert fs_sequential.read() == fs_workers.read()
+
+    for path_to_output_dir in path_to_output_dirs:
+        shutil.rmtree(path_to_output_dir, ignore_errors=True)
+
+
+def test_run_scenarios_plot_modes():
+    # Ignore openpyxl warning about Data validation extension support, we are not using that
+    warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")
+
+    path_to_tests = os.path.abspath(".")
+    if os.path.split(path_to_tests)[-1] != "tests":
+        path_to_tests = os.path.join(path_to_tests, "tests")
+
+    path_to_settings_file = os.path.join(path_to_tests, "reference_data", "example_scenario.xlsx")
+
+    def get_plot_filenames(path_to_output_dir: str) -> list:
+        return sorted(os.path.relpath(os.path.join(root, name), path_to_output_dir)
+                      for root, dirs, files in os.walk(path_to_output_dir)
+                      for name in files if name.endswith(".svg") or name.endswith(".png"))
+
+    path_to_output_dir_to_plot_mode = {}
+    for plot_mode in [ParameterPlotMode.Render, ParameterPlotMode.Off, ParameterPlotMode.OnRequest]:
+        path_to_output_dir = os.path.join(path_to_tests, "{}_plots_{}".format(output_dir_name, plot_mode.value))
+        parameter_overrides = {ParameterName.ShowPlots: False,
+                               ParameterName.CreateSankeyCharts: False,
+                               ParameterName.PlotMode: plot_mode}
+        run_scenarios(path_to_settings_file,
+                      path_to_output_dir,
+                      remove_existing_output_dir=True,
+                      parameter_overrides=parameter_overrides,
+                      )
+        path_to_output_dir_to_plot_mode[plot_mode] = path_to_output_dir
+
+    rendered_filenames = get_plot_filenames(path_to_output_dir_to_plot_mode[ParameterPlotMode.Render])
+    assert rendered_filenames
+    assert get_plot_filenames(path_to_output_dir_to_plot_mode[ParameterPlotMode.Off]) == []
+
+    # Plots are rendered on request from the result store
+    path_to_output_dir = path_to_output_dir_to_plot_mode[ParameterPlotMode.OnRequest]
+    assert get_plot_filenames(path_to_output_dir) == []
+    filenames = render_plots(path_to_output_dir, ParameterPlotFormat.PNG)
+    assert len(filenames) == len(rendered_filenames)
+    assert get_plot_filenames(path_to_output_dir) == [
+        filename.replace(".svg", ".png") for filename in rendered_filenames]
+
+    try:
+        render_plots(path_to_output_dir_to_plot_mode[ParameterPlotMode.Off])
+        assert False, "Exception not raised"
+    except Exception as ex:
+        assert "No plot settings found" in str(ex)
+
+    for path_to_output_dir in path_to_output_dir_to_plot_mode.values():
+        shutil.rmtree(path_to_output_dir, ignore_errors=True)
+
+
+def test_run_export_tasks():
+    from aiphoria.runner import _run_export_tasks
+
+    for num_workers in [1, 0]:
+        results = []
+        tasks = {
+            "a": (lambda value: value, [1], []),
+            "b": (lambda value: value, [2], []),
+            "sum": (lambda a, b: results.append(a + b), [], ["a", "b"]),
+        }
+        _run_export_tasks(tasks, num_workers)
+        assert results == [3]
+
+        # Task depending on failed task is not run and errors are reported
+        def fail():
+            raise Exception("Export failed")
+
+        results = []
+        tasks = {
+            "a": (fail, [], []),
+            "b": (lambda: results.append("b"), [], []),
+            "c": (lambda a: results.append("c"), [], ["a"]),
+        }
+        try:
+            _run_export_tasks(tasks, num_workers)
+            assert False, "Exception not raised"
+        except Exception as ex:
+            assert ex.args[0] == ["Export task 'a': Export failed"]
+        assert results == ["b"]
+
+
 def test_run_scenarios_no_settings_file():
     # Ignore openpyxl warning about Data validation extension support, we are not using that
     warnings.filterwarnings(action="ignore", category=UserWarning, module="openpyxl")